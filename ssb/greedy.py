@@ -20,11 +20,26 @@
 """
 A greedy algorithm trying to find the best or worst combination of the formats
 of base and intermediate columns in SSB queries.
+
+By default, every format considered for a column is evaluated by building and
+executing the query. Optionally, our cost model can be used as a surrogate to
+evaluate only the formats predicted to be the best (or worst) for each column
+(see --topK), and the repetitions can be spent by successive halving, i.e.,
+only on the formats which are still promising (see --halving).
+
+All measurements are appended to a journal, from which an aborted search can
+be resumed (see --resume). The executables for different format combinations
+can be built in parallel in separate copies of MorphStore's Engine directory
+(see --pathEngines), while the queries are executed one at a time (see
+--runCore). The executable for each format combination is built only once and
+kept in the sub-directory "exes" of the output directory.
 """
 
 import argparse
+import hashlib
 import math
 import os
+import shutil
 import subprocess
 import sys
 
@@ -34,6 +49,8 @@ import mal2morphstore.compr as compr
 import mal2morphstore.formats as formats
 import mal2morphstore.processingstyles as pss
 
+import lcbase_py.algo as algo
+
 import csvutils
 
 
@@ -51,11 +68,12 @@ def getAltSimpleName(fmt):
         fmtName += "_{}".format(fmt._bw)
     return fmtName
 
-def saveFmtComb(fmtComb):
+def saveFmtComb(fmtComb, dirPath):
     """
-    Stores a format combination to a CSV file.
+    Stores a format combination to a CSV file in the given directory.
     """
-    with open(os.path.join(combDir, "q{}.csv".format(query)), "w") as f:
+    os.makedirs(dirPath, exist_ok=True)
+    with open(os.path.join(dirPath, "q{}.csv".format(query)), "w") as f:
         f.write("colName\tformat\n")
         for colName, fmt in fmtComb.items():
             f.write("{}\t{}\n".format(colName, getAltSimpleName(fmt)))
@@ -71,6 +89,61 @@ def loadFmtComb(ps):
             colName, fmtName = line.rstrip().split("\t")
             fmtComb[colName] = formats.byName(fmtName, ps)
     return fmtComb
+
+def getFmtCombKey(fmtComb):
+    """
+    Returns a string identifying the given format combination in the journal.
+    """
+    return ";".join(
+            "{}={}".format(colName, getAltSimpleName(fmt))
+            for colName, fmt in fmtComb.items()
+    )
+
+def createJournal():
+    """
+    Creates an empty journal.
+    """
+    with open(journalFilePath, "w") as f:
+        f.write("scaleFactor\tprocessingStyle\tfmtComb\truntime\n")
+
+def loadJournal():
+    """
+    Loads the runtimes of all format combinations evaluated so far for the
+    current scale factor and processing style from the journal.
+    """
+    # The last line is incomplete if the search crashed while writing it.
+    # Remove it, such that new measurements are appended to a complete line.
+    with open(journalFilePath, "r+b") as f:
+        sizeComplete = f.read().rfind(b"\n") + 1
+        f.truncate(sizeComplete)
+    if not sizeComplete:
+        createJournal()
+    runtimesByKey = {}
+    with open(journalFilePath, "r") as f:
+        f.readline() # skip header
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) != 4:
+                raise RuntimeError(
+                        "invalid line in the journal '{}': '{}'".format(
+                                journalFilePath, line.rstrip("\n")
+                        )
+                )
+            sf, psJournal, key, runtime = fields
+            if int(sf) == scaleFactor and psJournal == ps:
+                runtimesByKey.setdefault(key, []).append(float(runtime))
+    return runtimesByKey
+
+def appendToJournal(key, runtime):
+    """
+    Appends one runtime measurement of the format combination with the given
+    key to the journal.
+    """
+    with open(journalFilePath, "a") as f:
+        f.write("{}\t{}\t{}\t{}\n".format(scaleFactor, ps, key, runtime))
+        # Make sure the measurement survives a crash.
+        f.flush()
+        os.fsync(f.fileno())
             
 def saveRuntimes(runtimes):
     """
@@ -125,39 +198,221 @@ def getFmtChoice(hasRndAcc, maxBw):
         ])
     return choice
 
-def evaluateFmtComb(fmtComb):
+def predictRuntime(colName, fmt):
+    """
+    Returns the runtime of the given format for the given column as estimated
+    by our cost model, or NaN if the cost model cannot estimate it.
+    """
+    if isinstance(fmt, formats.StaticVBPFormat):
+        # The cost model knows Static BP only with a bit width derived from
+        # the column's maximum bit width.
+        fmt = min(
+            [
+                formats.StaticVBPFormat(ps, suffix)
+                for suffix in formats.StaticVBPFormat.SUFFIXES
+            ],
+            key=lambda cand: abs(
+                    compr._setBw(cand, sMaxBw[colName])._bw - fmt._bw
+            )
+        )
+    fmt = fmt.changeMode(algo.MODE_FORMAT)
+    if fmt not in candFormats:
+        return math.nan
+    return mPredCost[
+            dfColInfos.index.get_loc(colName), candFormats.index(fmt)
+    ]
+
+def pruneFmtChoice(colName, choice):
+    """
+    Returns the formats in the given choice for the given column which our
+    cost model predicts to be the best (or worst), at most topK of them.
+    """
+    def _key(fmt):
+        runtime = predictRuntime(colName, fmt)
+        # Formats whose runtime is unknown come last.
+        return (math.isnan(runtime), runtime * optimizeFactor)
+    return sorted(choice, key=_key)[:topK]
+
+def evaluateFmtChoice(colName, choice):
     """
-    Determines the runtime yielded by the given format combination by executing
-    the query.
+    Determines the runtimes yielded by the given formats for the given column
+    in the current format combination.
+    
+    Without successive halving, each format is evaluated with the configured
+    number of repetitions. With successive halving, all formats are evaluated
+    with one repetition first, then the better half of them is evaluated again
+    until it has twice as many repetitions, and so on, until the configured
+    number of repetitions is reached. Thus, the finally selected format always
+    has as many repetitions as without successive halving.
+    
+    Returns the runtimes of each format and the indexes of the formats which
+    were evaluated in the last round.
+    """
+    runtimesByFmt = [[] for fmt in choice]
+    fmtIdxs = list(range(len(choice)))
+    countRepsRound = 1 if useHalving else countReps
+    while True:
+        fmtCombs = []
+        for fmtIdx in fmtIdxs:
+            fmt = choice[fmtIdx]
+            print("\t\ttrying '{}' ({} repetitions)".format(
+                    getAltSimpleName(fmt), countRepsRound)
+            )
+            fmtCombs.append({**fmtComb, colName: fmt})
+        for fmtIdx, runtimes in zip(
+                fmtIdxs, evaluateFmtCombs(fmtCombs, countRepsRound)
+        ):
+            runtimesByFmt[fmtIdx] = runtimes
+        if countRepsRound == countReps:
+            return runtimesByFmt, fmtIdxs
+        fmtIdxs = sorted(
+                fmtIdxs,
+                key=lambda fmtIdx: sum(runtimesByFmt[fmtIdx]) / \
+                        len(runtimesByFmt[fmtIdx]) * optimizeFactor
+        )[:math.ceil(len(fmtIdxs) / 2)]
+        countRepsRound = min(2 * countRepsRound, countReps)
+
+def getSsbArgs(slotIdx):
+    """
+    Returns the arguments for calling ssb.sh for the format combination in the
+    given build slot.
     """
-    saveFmtComb(fmtComb)
     args = "./ssb.sh -mem n -um s -sf {} -ps {} -p t -c manual -cconfig {} -q {} --pathArtifacts {}".format(
-            scaleFactor, ps, combDir, query, pathArtifacts
+            scaleFactor, ps, slotDirs[slotIdx], query, pathArtifacts
     ).split(" ")
-    # Build the executable.
+    if pathEngines is not None:
+        args += ["--pathEngine", pathEngines[slotIdx]]
+    return args
+
+def startBuild(fmtComb, slotIdx):
+    """
+    Starts building the executable for the given format combination in the
+    given build slot and returns the build process.
+    """
+    saveFmtComb(fmtComb, slotDirs[slotIdx])
+    args = getSsbArgs(slotIdx) + \
+            "-s t -e b --pathMal {}".format(pathMal).split(" ")
+    if buildCores is not None:
+        args = ["taskset", "-c", buildCores] + args
+    return subprocess.Popen(
+            args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+def getBuiltExeFilePath(slotIdx):
+    """
+    Returns the path of the executable built in the given build slot.
+    """
+    # TODO This duplicates the paths in ssb.sh and is relative to it.
+    pathEngine = "../../Engine" if pathEngines is None else pathEngines[slotIdx]
+    return os.path.join(
+            pathEngine, "build", "src", "ssb_sf{}".format(scaleFactor),
+            "q{}_sf{}".format(query, scaleFactor)
+    )
+
+def getExeDirPath(key):
+    """
+    Returns the path of the directory storing the executable for the format
+    combination with the given key.
+    """
+    h = hashlib.sha1("{}\t{}\t{}".format(scaleFactor, ps, key).encode())
+    return os.path.join(combDir, "exes", h.hexdigest())
+
+def storeExe(slotIdx, key):
+    """
+    Copies the executable built in the given build slot to the directory of
+    the format combination with the given key, such that the slot can be
+    reused.
+    """
+    exeDirPath = getExeDirPath(key)
+    os.makedirs(exeDirPath, exist_ok=True)
+    exeFilePath = os.path.join(exeDirPath, "q{}_sf{}".format(query, scaleFactor))
+    # Copy to a temporary file first, such that a crash never leaves an
+    # incomplete executable behind.
+    shutil.copy2(getBuiltExeFilePath(slotIdx), exeFilePath + ".tmp")
+    os.replace(exeFilePath + ".tmp", exeFilePath)
+
+def isExeStored(key):
+    """
+    Returns True if the executable for the format combination with the given
+    key has been built before.
+    """
+    return os.path.isfile(os.path.join(
+            getExeDirPath(key), "q{}_sf{}".format(query, scaleFactor)
+    ))
+
+def executeQuery(key):
+    """
+    Executes the query for the format combination with the given key once and
+    returns its runtime.
+    """
+    # TODO The reference results should not be necessary here.
+    args = getSsbArgs(0) + \
+            "-s r --pathRefRes {}".format(pathRefRes).split(" ") + \
+            ["--pathExe", getExeDirPath(key)]
+    if runCore is not None:
+        args = ["taskset", "-c", str(runCore)] + args
     ret = subprocess.call(
-            args + "-s t -e b --pathMal {}".format(pathMal).split(" "),
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
     )
     if ret:
-        raise RuntimeError("query build failed")
-    # Execute the query multiple times.
-    runtimes = []
-    for repIdx in range(countReps):
-        # Execute the query once.
-        ret = subprocess.call(
-                # TODO The reference results should not be necessary here.
-                args + "-s r --pathRefRes {}".format(pathRefRes).split(" "),
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
-        )
-        if ret:
-            raise RuntimeError("query execution failed")
-        # Extract the time measurement from the results file.
-        dfTime = csvutils.readMorphStoreCsv(os.path.join(
-                pathArtifacts, "time_sf{}".format(scaleFactor), "q{}.csv".format(query)
-        ))
-        runtimes.append(dfTime[dfTime["opIdx"] == 0]["runtime"].values[0])
-    return runtimes
+        raise RuntimeError("query execution failed")
+    # Extract the time measurement from the results file.
+    dfTime = csvutils.readMorphStoreCsv(os.path.join(
+            pathArtifacts, "time_sf{}".format(scaleFactor), "q{}.csv".format(query)
+    ))
+    # Like the runtimes loaded from the journal.
+    return float(dfTime[dfTime["opIdx"] == 0]["runtime"].values[0])
+
+def evaluateFmtCombs(fmtCombs, countRepsEval):
+    """
+    Determines the runtimes yielded by the given format combinations by
+    executing the query the given number of times for each of them.
+    
+    Runtimes found in the journal are reused, such that only the missing
+    repetitions are executed. The executable for each format combination is
+    built only once and kept for later rounds of successive halving. The
+    executables are built in parallel in the available build slots, while the
+    queries are executed one at a time, those built before first and the
+    others as soon as their executable is ready.
+    
+    Returns the runtimes of each format combination.
+    """
+    keys = [getFmtCombKey(fmtComb) for fmtComb in fmtCombs]
+    idxsMissing = [
+        idx for idx, key in enumerate(keys)
+        if len(runtimesByKey.get(key, [])) < countRepsEval
+    ]
+    idxsToBuild = [idx for idx in idxsMissing if not isExeStored(keys[idx])]
+    countSlots = len(slotDirs)
+    
+    def _execute(idx):
+        # Execute the query multiple times.
+        runtimes = runtimesByKey.setdefault(keys[idx], [])
+        while len(runtimes) < countRepsEval:
+            runtime = executeQuery(keys[idx])
+            appendToJournal(keys[idx], runtime)
+            runtimes.append(runtime)
+    
+    # Keep all build slots busy. A slot becomes free as soon as the executable
+    # built in it has been stored.
+    builds = {}
+    for buildIdx in range(min(len(idxsToBuild), countSlots)):
+        builds[buildIdx] = startBuild(fmtCombs[idxsToBuild[buildIdx]], buildIdx)
+    for idx in idxsMissing:
+        if idx not in idxsToBuild:
+            _execute(idx)
+    for buildIdx, idx in enumerate(idxsToBuild):
+        slotIdx = buildIdx % countSlots
+        if builds.pop(buildIdx).wait():
+            raise RuntimeError("query build failed")
+        storeExe(slotIdx, keys[idx])
+        nextBuildIdx = buildIdx + countSlots
+        if nextBuildIdx < len(idxsToBuild):
+            builds[nextBuildIdx] = startBuild(
+                    fmtCombs[idxsToBuild[nextBuildIdx]], slotIdx
+            )
+        _execute(idx)
+    return [runtimesByKey[key][:countRepsEval] for key in keys]
 
 
 # *****************************************************************************
@@ -207,6 +462,48 @@ if __name__ == "__main__":
             "--pathRefRes", metavar="DIR",
             default=None
     )
+    parser.add_argument(
+            "--pathComprProfiles", metavar="DIR",
+            default=None
+    )
+    parser.add_argument(
+            "--topK", metavar="N", type=int,
+            default=None,
+            help="Evaluate only the N formats for each column which our cost "
+                "model predicts to be the best (or worst). Requires the "
+                "profiles of our cost model, see --pathComprProfiles. By "
+                "default, all formats are evaluated."
+    )
+    parser.add_argument(
+            "--pathEngines", metavar="DIR", nargs="+",
+            default=None,
+            help="The copies of MorphStore's Engine directory to build the "
+                "executables in, see ssb.sh --pathEngine. The executables for "
+                "different format combinations are built in parallel, one per "
+                "copy. By default, ssb.sh's default Engine directory is used, "
+                "i.e., the executables are built one after the other."
+    )
+    parser.add_argument(
+            "--runCore", metavar="N", type=int,
+            default=None,
+            help="Execute the queries on core N only and build the "
+                "executables on all other cores using taskset. Ideally, this "
+                "core is isolated from the scheduler of the operating system. "
+                "By default, the affinity is not changed."
+    )
+    parser.add_argument(
+            "--resume", action="store_true",
+            help="Resume a previous search from its journal, i.e., reuse the "
+                "runtimes of the format combinations evaluated before. "
+                "Without this argument, the journal must not exist yet."
+    )
+    parser.add_argument(
+            "--halving", action="store_true",
+            help="Use successive halving on the repetitions, i.e., evaluate "
+                "all formats for a column with one repetition, then only the "
+                "better half of them with twice as many repetitions, and so "
+                "on, up to the number of repetitions specified with -r."
+    )
     gr = parser.add_mutually_exclusive_group(required=True)
     gr.add_argument(
             "--findBest", action="store_true",
@@ -216,6 +513,9 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
     
+    if args.topK is not None and args.topK < 1:
+        parser.error("the argument --topK must be at least 1")
+    
     query = args.query
     scaleFactor = args.scaleFactor
     ps = args.processingStyle
@@ -225,6 +525,27 @@ if __name__ == "__main__":
     pathArtifacts = args.pathArtifacts
     pathMal = os.path.join(pathArtifacts, "mal_sf{}".format(scaleFactor)) if args.pathMal is None else args.pathMal
     pathRefRes = os.path.join(pathArtifacts, "refres_sf{}".format(scaleFactor)) if args.pathRefRes is None else args.pathRefRes
+    pathComprProfiles = os.path.join(pathArtifacts, "compr_profiles") if args.pathComprProfiles is None else args.pathComprProfiles
+    topK = args.topK
+    useHalving = args.halving
+    pathEngines = args.pathEngines
+    runCore = args.runCore
+    journalFilePath = os.path.join(combDir, "q{}_journal.csv".format(query))
+    
+    # There is one build slot per Engine directory. Each slot has its own
+    # directory for the format combination to build.
+    slotDirs = [
+        os.path.join(combDir, "slot{}".format(slotIdx))
+        for slotIdx in range(1 if pathEngines is None else len(pathEngines))
+    ]
+    if runCore is None:
+        buildCores = None
+    else:
+        buildCores = ",".join(
+                str(core) for core in sorted(os.sched_getaffinity(0) - {runCore})
+        )
+        if not buildCores:
+            parser.error("there are no cores left for building the executables")
     optimizeFactor = 1 if args.findBest else -1
     
     # -------------------------------------------------------------------------
@@ -233,6 +554,24 @@ if __name__ == "__main__":
     
     os.makedirs(combDir, exist_ok=True)
     
+    # Every evaluated format combination and its runtimes are appended to the
+    # journal, such that the search can be resumed after a crash.
+    if os.path.exists(journalFilePath):
+        if not args.resume:
+            raise RuntimeError(
+                    "the journal '{}' already exists, use --resume to resume "
+                    "the search or delete it to start a new one".format(
+                            journalFilePath
+                    )
+            )
+        runtimesByKey = loadJournal()
+        print("Resuming with {} format combinations from the journal".format(
+                len(runtimesByKey))
+        )
+    else:
+        createJournal()
+        runtimesByKey = {}
+    
     # Load the data characteristics.
     dfColInfos = csvutils.getColInfos(os.path.join(
             os.path.join(pathArtifacts, "dc_sf{}".format(scaleFactor)), "q{}.csv".format(query)
@@ -246,17 +585,28 @@ if __name__ == "__main__":
         dfColInfos[csvutils.ColInfoCols.hasRndAccSorted]
     sMaxBw = dfColInfos[csvutils.ColInfoCols.maxBw]
 
+    # Estimate the runtimes of all formats for all columns using our cost
+    # model, if necessary.
+    if topK is not None:
+        candFormats = compr.getCandidateFormats(ps, True)
+        mPredCost = compr.getCostMatrix(
+                compr.OBJ_PERF, dfColInfos, candFormats, ps, pathComprProfiles
+        )
+
     # In the initial format combination, all columns are uncompressed.
     fmtComb = {colName: formats.UncomprFormat() for colName in dfColInfos.index}
 
     # Determine the number of possible format combinations.
     countFmtCombs = 1 # Leaving all columns uncompressed is always possible.
+    countFmtCombsEval = 1
     for colName in dfColInfos.index:
         if sIsResult[colName] or sIsForcedUncompr[colName]:
             # These columns must remain uncompressed. Thus, they do not
             # contribute to the number of combinations.
             continue
-        countFmtCombs += len(getFmtChoice(sHasRndAcc[colName], sMaxBw[colName]))
+        countChoice = len(getFmtChoice(sHasRndAcc[colName], sMaxBw[colName]))
+        countFmtCombs += countChoice
+        countFmtCombsEval += countChoice if topK is None else min(countChoice, topK)
 
     # Print some stats.
     countCols = len(dfColInfos)
@@ -273,6 +623,8 @@ if __name__ == "__main__":
     print("\t\t\t{} are results".format(countColsRes))
     print("\t\t\t{} are uncompressed intermediates".format(countColsUncompr - countColsRes))
     print("\t{} format combinations".format(countFmtCombs))
+    if topK is not None:
+        print("\t\t{} will be evaluated".format(countFmtCombsEval))
     
     # -------------------------------------------------------------------------
     # Greedy search.
@@ -298,15 +650,20 @@ if __name__ == "__main__":
         bestRuntime = math.inf
         bestFormat = None
         choice = getFmtChoice(hasRndAcc, sMaxBw[colName])
+        if topK is not None:
+            choice = pruneFmtChoice(colName, choice)
         if first:
             choice = [formats.UncomprFormat()] + choice
             first = False
-        for fmt in choice:
-            print("\t\ttrying '{}'".format(getAltSimpleName(fmt)))
-            fmtComb[colName] = fmt
-            runtimes = evaluateFmtComb(fmtComb)
+        runtimesByFmt, fmtIdxs = evaluateFmtChoice(colName, choice)
+        for fmt, runtimes in zip(choice, runtimesByFmt):
             for repIdx, runtime in enumerate(runtimes, start=1):
                 measurements.append([colName, fmt, repIdx, runtime])
+        # Only the formats evaluated in the last round are compared, since
+        # the others have fewer repetitions.
+        for fmtIdx in fmtIdxs:
+            fmt = choice[fmtIdx]
+            runtimes = runtimesByFmt[fmtIdx]
             runtime = sum(runtimes) / len(runtimes) * optimizeFactor
             if runtime < bestRuntime:
                 bestRuntime = runtime
@@ -323,5 +680,5 @@ if __name__ == "__main__":
     # -------------------------------------------------------------------------
     
     # Save resulting format combination and all measurements to files.
-    saveFmtComb(fmtComb)
+    saveFmtComb(fmtComb, combDir)
     saveRuntimes(measurements)
\ No newline at end of file
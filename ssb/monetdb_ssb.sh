@@ -178,6 +178,16 @@ eval $monetdb set readonly=yes $dbName
 # pipeline.
 eval $monetdb set optpipe=default_pipe $dbName
 
+# Replace the string literals in all selected queries by their dictionary codes
+# once, instead of for each repetition.
+pathQueriesDict=$(mktemp -d)
+sqlFiles=""
+for query in $queries
+do
+    sqlFiles="$sqlFiles $pathQueries/q$query.sql"
+done
+$qdict $pathDataDicts --sqlFiles $sqlFiles --outDir $pathQueriesDict
+
 printf "query\trepetition\truntime [ms]\n"
 
 for query in $queries
@@ -188,8 +198,7 @@ do
 
         runtime=$( \
             printf "SET SCHEMA $benchmark;\n" \
-            | cat - $pathQueries/q$query.sql \
-            | $qdict $pathDataDicts \
+            | cat - $pathQueriesDict/q$query.sql \
             | $mclient -d $dbName -f raw -t performance \
             2>&1 > /dev/null \
             | tail -n 2 \
@@ -201,6 +210,8 @@ do
     done
 done
 
+rm -rf $pathQueriesDict
+
 printf "Stopping MonetDB daemon... " >&2
 eval $monetdbd stop $pathMonetDBFarm
 printf "done.\n" >&2
\ No newline at end of file
@@ -28,11 +28,16 @@ function print_help () {
     echo "              [-v vectorVersion] [-c COMPRESSION_STRATEGY] [-cobj OBJECTIVE] "
     echo "              [-crndu FORMAT] [-crnds FORMAT] [-csequ FORMAT] [-cseqs FORMAT]"
     echo "              [-ccbsl N] [-cubase BOOL] [-cuinterm BOOL] [-cconfig DIR]"
-    echo "              [-um WAY_TO_USE_MONETDB] [-mit MONETDB_INT_TYPE] [-mem MEMORY_MANAGEMENT]"
-    echo "              [--useBetween BOOL] [--useIntersectKAry BOOL]"
+    echo "              [-cbudget SIZE]"
+    echo "              [-um WAY_TO_USE_MONETDB] [-mit MONETDB_INT_TYPE] [-ml MONETDB_LOAD_MODE]"
+    echo "              [-mt N] [-mem MEMORY_MANAGEMENT]"
+    echo "              [-j N] [--dataCache BOOL]"
+    echo "              [--useBetween BOOL] [--useIntersectKAry BOOL] [--useMergeJoin BOOL]"
+    echo "              [--reorderSelections BOOL] [--useFusion BOOL]"
     echo "              [--pathArtifacts DIR] [--pathData DIR] [--pathTime DIR] "
     echo "              [--pathDataCh DIR] [--pathSize DIR] [--pathRes DIR] "
     echo "              [--pathMal DIR] [--pathRefRes DIR] [--pathComprProfiles]"
+    echo "              [--pathTransCache DIR] [--pathEngine DIR] [--pathExe DIR]"
     echo ""
     echo "Star Schema Benchmark (SSB) in MorphStore."
     echo ""
@@ -53,6 +58,12 @@ function print_help () {
     echo "      in MonetDB, and loading the dictionary coded data into "
     echo "      MonetDB. A directory named 'data_sfN' is created in the "
     echo "      current directory, whereby N is the specified scale factor."
+    echo "      If this directory already contains the data for the current "
+    echo "      schema (and MonetDB has already been loaded, unless '-um s' "
+    echo "      is specified), the data generation is skipped. If columns "
+    echo "      were added to the required schema, only these are encoded, "
+    echo "      unless MonetDB is loaded from the dictionary-encoded "
+    echo "      .tbl-files ('-ml csv'), which always contain all columns."
     echo "  t, translate"
     echo "      Creates C++ source files for all SSB queries in MorphStore. "
     echo "      This includes running the queries with EXPLAIN and with "
@@ -143,6 +154,16 @@ function print_help () {
     echo "      Applies our cost model for lightweight integer compression "
     echo "      algorithms to minimize the size of all base columns and "
     echo "      intermediates involved in the query."
+    echo "  global"
+    echo "      Like costbased, but chooses the formats in which each column "
+    echo "      is produced and consumed jointly, taking the costs of the "
+    echo "      morph-operators between them into account."
+    echo "  budget"
+    echo "      Applies our cost model to minimize the runtime of the query "
+    echo "      such that the peak memory footprint of all base columns and "
+    echo "      intermediates stays within the budget specified by -cbudget, "
+    echo "      e.g., '-cbudget 4GiB'. If 'ssb.sh -p s' was run before, its "
+    echo "      size measurements are used instead of the estimated sizes."
     echo ""
     echo "This script depends on MonetDB, since the 'translate'-step requires "
     echo "MAL programs from MonetDB and the 'run'-step (with the 'check'- or "
@@ -222,7 +243,29 @@ function print_help () {
     echo "  -mit MONETDB_INT_TYPE, --intType MONETDB_INT_TYPE"
     echo "                          The integer type to use in MonetDB."
     echo "                          Defaults to BIGINT."
+    echo "  -ml MONETDB_LOAD_MODE, --loadMode MONETDB_LOAD_MODE"
+    echo "                          How to load the data into MonetDB in the "
+    echo "                          generate step: 'csv' loads the "
+    echo "                          dictionary-encoded .tbl-files, 'binary' "
+    echo "                          loads the binary column files of "
+    echo "                          MorphStore (converted to the integer type "
+    echo "                          of each column) without any parsing. "
+    echo "                          Defaults to csv."
+    echo "  -mt N, --monetdbThreads N"
+    echo "                          The number of threads MonetDB shall use "
+    echo "                          when the queries are translated. For N > 1, "
+    echo "                          MonetDB's mitosis and dataflow optimizers "
+    echo "                          split the queries into partitions, which "
+    echo "                          the translated queries process in parallel. "
+    echo "                          Requires '-mem n' for N > 1. Defaults to 1."
     echo "  -mem MEMORY_MANAGEMENT  The way MorphStore shall manage memory."
+    echo "  -j N, --jobs N          The number of worker processes to use for "
+    echo "                          the dictionary coding in the generate "
+    echo "                          step. Defaults to the number of available "
+    echo "                          cores."
+    echo "  --dataCache BOOL        Whether the generate step shall reuse the "
+    echo "                          data generated before, if it is current. "
+    echo "                          Defaults to true."
     echo ""
     echo "Examples:"
     echo "  ssb.sh"
@@ -256,6 +299,11 @@ function print_help () {
     echo "  - 'monetdbfarm' The directory of a MonetDB farm."
     echo "- Furthermore, it is assumed that '../..' is the MorphStore root "
     echo "  directory containing the directories 'Engine' and 'Benchmarks'."
+    echo "  A different copy of the 'Engine' directory can be specified with "
+    echo "  --pathEngine, e.g., to build several variants of a query at the "
+    echo "  same time. The run step executes the executables in the directory "
+    echo "  specified with --pathExe, which defaults to the one they are "
+    echo "  built in."
 }
 
 
@@ -279,6 +327,18 @@ function print_headline2 () {
     printf "\n"
 }
 
+# Replaces the string literals in all selected queries by their dictionary
+# codes using a single call of qdict.py. The rewritten queries are stored in
+# $pathDataQueriesDict.
+function rewrite_queries () {
+    local sqlFiles=""
+    for query in $queries
+    do
+        sqlFiles="$sqlFiles $pathQueries/q$query.sql"
+    done
+    $qdict $pathDataDicts --sqlFiles $sqlFiles --outDir $pathDataQueriesDict
+}
+
 
 #******************************************************************************
 # Functions for the individual steps
@@ -299,6 +359,9 @@ function clean () {
     # Delete the generated MorphStore C++ files.
     rm -rf $pathSrc
 
+    # Delete the cached translated programs.
+    rm -rf $pathTransCache
+
     print_headline1 "Done"
 }
 
@@ -307,31 +370,80 @@ function generate () {
 
     set -e
 
-    print_headline2 "Generating SSB data"
-    local oldPwd=$(pwd)
-    cd $pathDBGen
-    make
-    ./dbgen -f -s $scaleFactor -T a
-    cd $oldPwd
-
-    print_headline2 "Dictionary coding"
-    mkdir $pathData
-    eval $dbdict $schemaFullFile $schemaRequiredFile $pathDBGen $pathData
-
-    print_headline2 "Deleting original .tbl-files"
-    rm -f $pathDBGen/*.tbl
+    # The generated data depends only on the scale factor (and the schema,
+    # which is checked by dbdict.py).
+    local inputKey="ssb-dbgen -s $scaleFactor -T a"
 
-    if [[ $useMonetDB != $umSaved ]]
+    # The data generated before can only be reused if MonetDB does not need to
+    # be loaded again, since the dictionary-encoded .tbl-files are deleted
+    # after loading.
+    local dataCurrent=""
+    if [[ $useDataCache = "true" ]]
     then
-        print_headline2 "Loading data into MonetDB"
-        eval $monetdb create $dbName
-        eval $monetdb release $dbName
-        eval $createload $benchmark $schemaRequiredFile $pathDataTblsDict $intType $pathDataStatsDict \
-            | $mclient -d $dbName
+        if [[ $useMonetDB = $umSaved ]] || eval $monetdb status $dbName > /dev/null 2>&1
+        then
+            if eval $dbdict $schemaFullFile $schemaRequiredFile $pathDBGen $pathData \
+                --inputKey \"$inputKey\" --noTbls --check > /dev/null 2>&1
+            then
+                dataCurrent="true"
+            fi
+        fi
     fi
 
-    print_headline2 "Deleting dictionary-encoded .tbl-files"
-    rm -rf $pathDataTblsDict
+    if [[ $dataCurrent ]]
+    then
+        print_headline2 "Reusing the SSB data generated before"
+    else
+        print_headline2 "Generating SSB data"
+        local oldPwd=$(pwd)
+        cd $pathDBGen
+        make
+        ./dbgen -f -s $scaleFactor -T a
+        cd $oldPwd
+
+        print_headline2 "Dictionary coding"
+        mkdir --parents $pathData
+        # The dictionary-encoded .tbl-files are only required for loading the
+        # data into MonetDB from CSV files. Only columns whose outputs are not
+        # current are encoded.
+        if [[ $useMonetDB != $umSaved && $loadMode = "csv" ]]
+        then
+            local tblsFlag=""
+        else
+            local tblsFlag="--noTbls"
+        fi
+        eval $dbdict $schemaFullFile $schemaRequiredFile $pathDBGen $pathData \
+            --inputKey \"$inputKey\" --singlePass $tblsFlag --jobs $countJobs
+
+        print_headline2 "Deleting original .tbl-files"
+        rm -f $pathDBGen/*.tbl
+
+        if [[ $useMonetDB != $umSaved ]]
+        then
+            print_headline2 "Loading data into MonetDB"
+            if eval $monetdb status $dbName > /dev/null 2>&1
+            then
+                eval $monetdb destroy -f $dbName
+            fi
+            eval $monetdb create $dbName
+            eval $monetdb release $dbName
+            case $loadMode in
+                csv)
+                    eval $createload $benchmark $schemaRequiredFile $pathDataTblsDict $intType $pathDataStatsDict \
+                        | $mclient -d $dbName
+                    ;;
+                binary)
+                    eval $createload $benchmark $schemaRequiredFile $pathDataColsDict $intType $pathDataStatsDict \
+                        --loadMode binary --binDir $pathDataBinsMonetDB \
+                        | $mclient -d $dbName
+                    rm -rf $pathDataBinsMonetDB
+                    ;;
+            esac
+        fi
+
+        print_headline2 "Deleting dictionary-encoded .tbl-files"
+        rm -rf $pathDataTblsDict
+    fi
 
     set +e
 
@@ -345,11 +457,16 @@ function translate () {
 
     if [[ $useMonetDB = $umPipeline || $useMonetDB = $umMaterialize ]]
     then
-        # We need to switch off multi-threading, mitosis, and dataflow before
-        # the translation, because mal2morphstore cannot handle the resulting
-        # MAL plans otherwise.
-        eval $monetdb set nthreads=1 $dbName
-        eval $monetdb set optpipe=sequential_pipe $dbName
+        # With a single thread, we switch off mitosis and dataflow before the
+        # translation to obtain purely sequential MAL plans. Otherwise, the
+        # partitions of the MAL plans are translated to parallel tasks.
+        eval $monetdb set nthreads=$monetdbThreads $dbName
+        if [[ $monetdbThreads -eq 1 ]]
+        then
+            eval $monetdb set optpipe=sequential_pipe $dbName
+        else
+            eval $monetdb set optpipe=default_pipe $dbName
+        fi
     fi
 
     case $useMonetDB in
@@ -365,13 +482,18 @@ function translate () {
             ;;
     esac
 
+    if [[ $useMonetDB != $umSaved ]]
+    then
+        rewrite_queries
+    fi
+
     mkdir --parents $pathSrc
     local cmakeListsFile=$pathSrc/CMakeLists.txt
 
     rm -f $cmakeListsFile
 
     local comprFlags="-c $comprStrategy -cobj $comprObjective"
-    if [[ $comprStrategy = "costbased" ]]
+    if [[ $comprStrategy = "costbased" || $comprStrategy = "global" || $comprStrategy = "budget" ]]
     then
         comprFlags="$comprFlags --cprofdir $pathComprProfiles"
     fi
@@ -403,6 +525,10 @@ function translate () {
     then
         comprFlags="$comprFlags -cuinterm $comprUncomprInterm"
     fi
+    if [[ $comprBudget ]]
+    then
+        comprFlags="$comprFlags -cbudget $comprBudget"
+    fi
 
     local structFlags=""
     if [[ $structUseBetween ]]
@@ -413,18 +539,44 @@ function translate () {
     then
         structFlags="$structFlags --useIntersectKAry $structUseIntersectKAry"
     fi
+    if [[ $structUseMergeJoin ]]
+    then
+        structFlags="$structFlags --useMergeJoin $structUseMergeJoin"
+    fi
+    if [[ $structReorderSelections ]]
+    then
+        structFlags="$structFlags --reorderSelections $structReorderSelections"
+    fi
+    if [[ $structUseFusion ]]
+    then
+        structFlags="$structFlags --useFusion $structUseFusion"
+    fi
 
     local statFlag="--statdir $pathDataStatsDict"
 
-    local queryIndependentFlags="$processingStyle $purpose $versionSelect --rep $repetitionCount $comprFlags $structFlags $statFlag"
+    # The translated programs are reused if only the compression configuration
+    # changes, e.g., during the search for good formats.
+    local transCacheFlag="--transcachedir $pathTransCache"
+
+    local queryIndependentFlags="$processingStyle $purpose $versionSelect --rep $repetitionCount $comprFlags $structFlags $statFlag $transCacheFlag"
 
     printf "if( BUILD_ALL OR BUILD_SSB EQUAL $scaleFactor )\n" >> $cmakeListsFile
     for query in $queries
     do
         printf "$benchmark q$query: "
 
-        local ciFlag="--cifile $pathDataCh/q$query.csv"
+        # Without the data characteristics of a previous run, they are
+        # estimated from the statistics on the base data.
+        if [[ -f $pathDataCh/q$query.csv ]]
+        then
+            local ciFlag="--cifile $pathDataCh/q$query.csv"
+        else
+            local ciFlag=""
+        fi
         if [[ $comprStrategy = "realbest" || $comprStrategy = "realworst" ]]
+        then
+            local sizesFileFlag="--csizesfile $pathSize/q$query.csv"
+        elif [[ $comprStrategy = "budget" && -f $pathSize/q$query.csv ]]
         then
             local sizesFileFlag="--csizesfile $pathSize/q$query.csv"
         else
@@ -441,16 +593,14 @@ function translate () {
         case $useMonetDB in
             $umPipeline)
                 printf "SET SCHEMA $benchmark;\nEXPLAIN " \
-                    | cat - $pathQueries/q$query.sql \
-                    | $qdict $pathDataDicts \
+                    | cat - $pathDataQueriesDict/q$query.sql \
                     | $mclient -d $dbName -f raw \
                     | $mal2morphstore $queryIndependentFlags $queryDependentFlags \
                     > $pathSrc/q$query.cpp
                 ;;
             $umMaterialize)
                 printf "SET SCHEMA $benchmark;\nEXPLAIN " \
-                    | cat - $pathQueries/q$query.sql \
-                    | $qdict $pathDataDicts \
+                    | cat - $pathDataQueriesDict/q$query.sql \
                     | $mclient -d $dbName -f raw \
                     > $pathMal/q$query.mal
                 cat $pathMal/q$query.mal \
@@ -477,7 +627,8 @@ function translate () {
         #      higher-level in the build script.
         printf "\t                        -Wno-unused-parameter\n"         >> $cmakeListsFile
         printf "\t                        $<$<CONFIG:DEBUG>:-DDEBUG> )\n"  >> $cmakeListsFile
-        printf "\ttarget_link_libraries( $targetName PRIVATE \"-ldl\" )\n" >> $cmakeListsFile
+        # -lpthread is required by the parallel tasks of partitioned queries.
+        printf "\ttarget_link_libraries( $targetName PRIVATE \"-ldl\" \"-lpthread\" )\n" >> $cmakeListsFile
         printf "\n"                                                        >> $cmakeListsFile
 
         printf "done.\n"
@@ -507,6 +658,11 @@ function translateToDot () {
             ;;
     esac
 
+    if [[ $useMonetDB != $umSaved ]]
+    then
+        rewrite_queries
+    fi
+
     for query in $queries
     do
         printf "$benchmark q$query: "
@@ -515,8 +671,7 @@ function translateToDot () {
         case $useMonetDB in
             $umPipeline)
                 printf "SET SCHEMA $benchmark;\nEXPLAIN " \
-                    | cat - $pathQueries/q$query.sql \
-                    | $qdict $pathDataDicts \
+                    | cat - $pathDataQueriesDict/q$query.sql \
                     | $mclient -d $dbName -f raw \
                     | $dotvisualize $query \
                     > $pathSrc/q$query.dot
@@ -525,8 +680,7 @@ function translateToDot () {
                 ;;
             $umMaterialize)
                 printf "SET SCHEMA $benchmark;\nEXPLAIN " \
-                    | cat - $pathQueries/q$query.sql \
-                    | $qdict $pathDataDicts \
+                    | cat - $pathDataQueriesDict/q$query.sql \
                     | $mclient -d $dbName -f raw \
                     > $pathMal/q$query.mal
                 cat $pathMal/q$query.mal \
@@ -573,7 +727,7 @@ function build () {
     fi
 
     local oldPwd=$(pwd)
-    cd $pathMorphStore/Engine
+    cd $pathEngine
     if [[ $processingStyle = $psSSE ]]
     then
         local extensionFlags="-sse4"
@@ -673,6 +827,11 @@ function run () {
             fi
     esac
 
+    if [[ ( $purpose = $purposeCheck || $purpose = $purposeResults ) && $useMonetDB != $umSaved ]]
+    then
+        rewrite_queries
+    fi
+
     for query in $queries
     do
         printf "$benchmark q$query: "
@@ -690,8 +849,7 @@ function run () {
                         cmp --silent \
                             <( \
                                 printf "SET SCHEMA $benchmark;\n" \
-                                    | cat - $pathQueries/q$query.sql \
-                                    | $qdict $pathDataDicts \
+                                    | cat - $pathDataQueriesDict/q$query.sql \
                                     | $mclient -d $dbName -f csv \
                                     | sort \
                             ) \
@@ -702,8 +860,7 @@ function run () {
                         ;;
                     $umMaterialize)
                         printf "SET SCHEMA $benchmark;\n" \
-                            | cat - $pathQueries/q$query.sql \
-                            | $qdict $pathDataDicts \
+                            | cat - $pathDataQueriesDict/q$query.sql \
                             | $mclient -d $dbName -f csv \
                             | sort \
                             > $pathRefRes/q$query.csv
@@ -738,8 +895,7 @@ function run () {
                         local resFileMorphSt=$pathRes/q${query}_MorphStore.csv
                         local resFileMonetDB=$pathRes/q${query}_MonetDB.csv
                         printf "SET SCHEMA $benchmark;\n" \
-                            | cat - $pathQueries/q$query.sql \
-                            | $qdict $pathDataDicts \
+                            | cat - $pathDataQueriesDict/q$query.sql \
                             | $mclient -d $dbName -f csv \
                             | sort \
                             > $resFileMonetDB
@@ -752,8 +908,7 @@ function run () {
                         local resFileMorphSt=$pathRes/q${query}_MorphStore.csv
                         local resFileMonetDB=$pathRes/q${query}_MonetDB.csv
                         printf "SET SCHEMA $benchmark;\n" \
-                            | cat - $pathQueries/q$query.sql \
-                            | $qdict $pathDataDicts \
+                            | cat - $pathDataQueriesDict/q$query.sql \
                             | $mclient -d $dbName -f csv \
                             | sort \
                             > $resFileMonetDB
@@ -967,11 +1122,19 @@ comprCascBlockSizeLog=""
 comprUncomprBase=""
 comprUncomprInterm=""
 comprConfigDir=""
+comprBudget=""
 useMonetDB=$umPipeline
 intType=BIGINT
+loadMode=csv
+monetdbThreads=1
 memManagement=$memSelf
+countJobs=$(nproc)
+useDataCache="true"
 structUseBetween=""
 structUseIntersectKAry=""
+structUseMergeJoin=""
+structReorderSelections=""
+structUseFusion=""
 pathArtifacts="."
 pathData=""
 pathTime=""
@@ -981,6 +1144,9 @@ pathRes=""
 pathMal=""
 pathRefRes=""
 pathComprProfiles=""
+pathTransCache=""
+pathEngine=""
+pathExe=""
 
 # -----------------------------------------------------------------------------
 # Parsing.
@@ -1090,6 +1256,10 @@ do
             comprUncomprInterm=$2
             shift
             ;;
+        -cbudget)
+            comprBudget=$2
+            shift
+            ;;
         -um|--useMonetDB)
             if [[ ${umMap[$2]+_} ]]
             then
@@ -1104,6 +1274,14 @@ do
             intType=$2
             shift
             ;;
+        -ml|--loadMode)
+            loadMode=$2
+            shift
+            ;;
+        -mt|--monetdbThreads)
+            monetdbThreads=$2
+            shift
+            ;;
         -mem|--memManagement)
             if [[ ${memMap[$2]+_} ]]
             then
@@ -1114,6 +1292,14 @@ do
                 exit -1
             fi
             ;;
+        -j|--jobs)
+            countJobs=$2
+            shift
+            ;;
+        --dataCache)
+            useDataCache=$2
+            shift
+            ;;
         --useBetween)
             structUseBetween=$2
             shift
@@ -1122,6 +1308,18 @@ do
             structUseIntersectKAry=$2
             shift
             ;;
+        --useMergeJoin)
+            structUseMergeJoin=$2
+            shift
+            ;;
+        --reorderSelections)
+            structReorderSelections=$2
+            shift
+            ;;
+        --useFusion)
+            structUseFusion=$2
+            shift
+            ;;
         --pathArtifacts)
             pathArtifacts=$2
             shift
@@ -1158,6 +1356,18 @@ do
             pathComprProfiles=$2
             shift
             ;;
+        --pathTransCache)
+            pathTransCache=$2
+            shift
+            ;;
+        --pathEngine)
+            pathEngine=$2
+            shift
+            ;;
+        --pathExe)
+            pathExe=$2
+            shift
+            ;;
         *)
             printf "unknown option: $key\n"
             exit -1
@@ -1182,6 +1392,25 @@ then
     exit -1
 fi
 
+if [[ ! ( $monetdbThreads =~ ^[1-9][0-9]*$ ) ]]
+then
+    printf "the number of threads of MonetDB must be a positive integer, but is '$monetdbThreads'\n"
+    exit -1
+fi
+
+# MorphStore's self-managed memory is not thread-safe.
+if [[ $monetdbThreads -gt 1 ]] && [[ $memManagement != $memNoSelf ]]
+then
+    printf "you selected $monetdbThreads threads for MonetDB, which requires '-mem $memNoSelf'\n"
+    exit -1
+fi
+
+if [[ $loadMode != "csv" && $loadMode != "binary" ]]
+then
+    printf "unknown load mode for MonetDB: $loadMode\n"
+    exit -1
+fi
+
 # Check if all specified query numbers are valid.
 regexQuery="^([1-4]\.[1-3]|3\.4)$"
 for query in $queries
@@ -1207,8 +1436,16 @@ fi
 # Directories for the generated source code and executables.
 # -----------------------------------------------------------------------------
 
-pathSrc=$pathMorphStore/Engine/src/"$benchmark"_sf$scaleFactor
-pathExe=$pathMorphStore/Engine/build/src/"$benchmark"_sf$scaleFactor
+if [[ ! $pathEngine ]]
+then
+    pathEngine=$pathMorphStore/Engine
+fi
+
+pathSrc=$pathEngine/src/"$benchmark"_sf$scaleFactor
+if [[ ! $pathExe ]]
+then
+    pathExe=$pathEngine/build/src/"$benchmark"_sf$scaleFactor
+fi
 
 # -----------------------------------------------------------------------------
 # Directories for the artifacts created (in)directly by this script.
@@ -1224,6 +1461,10 @@ pathDataTblsDict=$pathData/tbls_dict
 pathDataDicts=$pathData/dicts
 pathDataColsDict=$pathData/cols_dict
 pathDataStatsDict=$pathData/stats_dict
+# The queries with string literals replaced by dictionary codes.
+pathDataQueriesDict=$pathData/queries_dict
+# The binary files for loading the data into MonetDB.
+pathDataBinsMonetDB=$pathData/bins_monetdb
 
 # Directory for the measured runtimes.
 if [[ ! $pathTime ]]
@@ -1267,6 +1508,12 @@ then
     pathComprProfiles=$pathArtifacts/compr_profiles
 fi
 
+# Directory for the cache of translated programs.
+if [[ ! $pathTransCache ]]
+then
+    pathTransCache=$pathArtifacts/trans_cache
+fi
+
 # -----------------------------------------------------------------------------
 # Other
 # -----------------------------------------------------------------------------
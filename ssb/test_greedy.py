@@ -0,0 +1,197 @@
+#*********************************************************************************************
+# Copyright (C) 2019 by MorphStore-Team                                                      *
+#                                                                                            *
+# This file is part of MorphStore - a compression aware vectorized column store.             *
+#                                                                                            *
+# This program is free software: you can redistribute it and/or modify it under the          *
+# terms of the GNU General Public License as published by the Free Software Foundation,      *
+# either version 3 of the License, or (at your option) any later version.                    *
+#                                                                                            *
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;  *
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  *
+# See the GNU General Public License for more details.                                       *
+#                                                                                            *
+# You should have received a copy of the GNU General Public License along with this program. *
+# If not, see <http://www.gnu.org/licenses/>.                                                *
+#*********************************************************************************************
+
+"""
+Tests for greedy.py, which is run as a script with ssb.sh and the data
+characteristics replaced by fakes.
+
+Run with "python -m unittest test_greedy" in this directory.
+"""
+
+
+import os
+import runpy
+import sys
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+_SSB_DIR_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(_SSB_DIR_PATH)
+sys.path.append(os.path.join(_SSB_DIR_PATH, "..", "tools", "mal2x"))
+
+import pandas as pd
+
+import csvutils
+
+
+_QUERY = "1.1"
+_SCALE_FACTOR = 1
+_EXE_NAME = "q{}_sf{}".format(_QUERY, _SCALE_FACTOR)
+
+
+def _getColInfos(colInfosFilePath):
+    cols = csvutils.ColInfoCols
+    return pd.DataFrame(
+        {
+            cols.countValues: [1000, 2000, 1000],
+            cols.maxBw: [5, 9, 3],
+            cols.isBaseCol: [True, False, False],
+            cols.isResult: [False, False, True],
+            cols.isForcedUncompr: [False, False, False],
+            cols.hasRndAccUnsorted: [False, False, False],
+            cols.hasRndAccSorted: [False, False, False],
+            cols.countSeqAcc: [1, 1, 1],
+            cols.producingOpIdx: [0, 1, 2],
+        },
+        index=["a", "b", "r"]
+    )
+
+
+class _FakeSsb:
+    """
+    Replaces the calls of ssb.sh. Building writes the format combination to
+    the executable, executing it yields a runtime depending only on the
+    format combination.
+    """
+
+    def __init__(self):
+        self.builtFmtCombs = []
+        self.countRuns = 0
+        self.crashAtRun = None
+        self.fmtCombRun = None
+
+    @staticmethod
+    def _getArg(args, name):
+        return args[args.index(name) + 1]
+
+    def Popen(self, args, **kwargs):
+        with open(os.path.join(
+            self._getArg(args, "-cconfig"), "q{}.csv".format(_QUERY)
+        )) as configFile:
+            fmtComb = configFile.read()
+        self.builtFmtCombs.append(fmtComb)
+        exeDirPath = os.path.join(
+            self._getArg(args, "--pathEngine"), "build", "src",
+            "ssb_sf{}".format(_SCALE_FACTOR)
+        )
+        os.makedirs(exeDirPath, exist_ok=True)
+        with open(os.path.join(exeDirPath, _EXE_NAME), "w") as exeFile:
+            exeFile.write(fmtComb)
+        return mock.Mock(wait=mock.Mock(return_value=0))
+
+    def call(self, args, **kwargs):
+        self.countRuns += 1
+        if self.countRuns == self.crashAtRun:
+            raise KeyboardInterrupt()
+        with open(os.path.join(
+            self._getArg(args, "--pathExe"), _EXE_NAME
+        )) as exeFile:
+            self.fmtCombRun = exeFile.read()
+        return 0
+
+    def readMorphStoreCsv(self, filePath):
+        runtime = zlib.crc32(self.fmtCombRun.encode()) % 1000 + 1000
+        return pd.DataFrame({"opIdx": [0], "runtime": [runtime]})
+
+
+class TestGreedy(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.outDirPath = os.path.join(self.tmpDir.name, "out")
+        self.ssb = _FakeSsb()
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def _run(self, *flags):
+        argv = [
+            "greedy.py", "-q", _QUERY, "-sf", str(_SCALE_FACTOR),
+            "-ps", "avx2<v256<uint64_t>>", "-o", self.outDirPath, "-r", "4",
+            "--pathArtifacts", self.tmpDir.name, "--findBest",
+            "--pathEngines",
+            os.path.join(self.tmpDir.name, "engine1"),
+            os.path.join(self.tmpDir.name, "engine2"),
+        ] + list(flags)
+        with mock.patch.object(sys, "argv", argv), \
+                mock.patch("subprocess.Popen", self.ssb.Popen), \
+                mock.patch("subprocess.call", self.ssb.call), \
+                mock.patch.object(csvutils, "getColInfos", _getColInfos), \
+                mock.patch.object(
+                    csvutils, "readMorphStoreCsv", self.ssb.readMorphStoreCsv
+                ), \
+                mock.patch("sys.stdout"):
+            runpy.run_path(
+                os.path.join(_SSB_DIR_PATH, "greedy.py"), run_name="__main__"
+            )
+
+    def _readOutput(self, suffix):
+        with open(os.path.join(
+            self.outDirPath, "q{}{}.csv".format(_QUERY, suffix)
+        )) as outFile:
+            return outFile.read()
+
+    def testHalvingBuildsEachCombinationOnce(self):
+        self._run("--halving")
+        self.assertEqual(
+            len(self.ssb.builtFmtCombs), len(set(self.ssb.builtFmtCombs))
+        )
+        # All 7 formats of the first and all 6 formats of the second column
+        # are built, while the repetitions shrink from round to round.
+        self.assertEqual(len(self.ssb.builtFmtCombs), 13)
+        self.assertLess(self.ssb.countRuns, 13 * 4)
+
+    def testResumeFromTruncatedJournal(self):
+        self._run()
+        fmtCombExpected = self._readOutput("")
+        runtimesExpected = self._readOutput("_runtimes")
+        countRunsExpected = self.ssb.countRuns
+
+        # Crash twice, each time in the middle of writing to the journal.
+        journalFilePath = os.path.join(
+            self.outDirPath, "q{}_journal.csv".format(_QUERY)
+        )
+        os.remove(journalFilePath)
+        self.ssb = _FakeSsb()
+        countRuns = 0
+        for flags, crashAtRun in [([], 10), (["--resume"], 15)]:
+            self.ssb.crashAtRun = crashAtRun
+            with self.assertRaises(KeyboardInterrupt):
+                self._run(*flags)
+            countRuns += self.ssb.countRuns - 1
+            with open(journalFilePath, "r+b") as journalFile:
+                journalFile.truncate(os.path.getsize(journalFilePath) - 5)
+            # The measurement in the truncated line is lost.
+            countRuns -= 1
+            self.ssb.countRuns = 0
+        self.ssb.crashAtRun = None
+        self._run("--resume")
+        countRuns += self.ssb.countRuns
+
+        self.assertEqual(self._readOutput(""), fmtCombExpected)
+        self.assertEqual(self._readOutput("_runtimes"), runtimesExpected)
+        self.assertEqual(countRuns, countRunsExpected)
+        with open(journalFilePath) as journalFile:
+            lines = journalFile.read().splitlines()
+        self.assertEqual(len(lines), 1 + countRunsExpected)
+        for line in lines:
+            self.assertEqual(len(line.split("\t")), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -42,12 +42,29 @@ For each input CSV file, the output consists of the following:
   this column. In this file, the i-th line contains the value whose dictionary
   code is i (line counting starts with zero). These files are required for
   replacing string constants in queries (see MorphStore's qdict.py tool). They
-  are stored in the sub-directory "dicts".
+  are stored in the sub-directory "dicts". Additionally, the same dictionary
+  is stored in the binary file "<table>.<column>.dictbin", which allows
+  looking up values by a binary search without reading the entire file. It
+  consists of the magic number "MSDICT01", the number n of values as a 64-bit
+  integer, the n + 1 byte offsets of the values relative to the beginning of
+  the heap as 64-bit integers, and the heap of the UTF-8 encoded values (all
+  integers are little-endian). The i-th value spans the bytes from the i-th
+  to the (i+1)-th offset.
 - For each required column: A binary file containing some meta data and the column's
   data elements as an array of uncompressed 64-bit integers in little-endian
   byte ordering. This is exactly the file format of MorphStore's binary_io
   persistence class. These files are required for loading data into MorphStore.
   They are stored in the sub-directory "cols_dict".
+- A JSON file containing the maximum value of each required column and the
+  number of rows, as well as a JSON file "<table>.colstats.json" containing
+  further statistics on each required column as required for the selection of
+  suitable compressed formats, i.e., the number of data elements, the minimum,
+  the maximum, the number of distinct values and whether this number is exact
+  or estimated, whether the column is sorted, whether it is unique (i.e.,
+  whether all of its data elements are distinct), the number of runs, the histograms of the bit widths of the data
+  elements and of their deltas (the i-th entry refers to bit width i+1), and
+  the bounds of an equi-depth histogram of the data elements. Both are stored
+  in the sub-directory "stats_dict".
   
 Furthermore, the names of the columns must be known in order to name the column
 files appropriately. Therefore, schema information must be provided as a JSON
@@ -70,69 +87,859 @@ the fact that benchmark queries might not access all columns of the schema. In
 the simplest case, this second schema file can be the same as the first. Then,
 all columns are considered.
   
+The type of each required column is determined from a sample of the first
+rows of the CSV file. By default, columns containing only unsigned integers
+are stored as they are and all other columns are dictionary coded. With
+--typed, the following types are encoded without a dictionary as well:
+- "int": signed integers, e.g., "-42".
+- "decimal": fixed-point numbers, e.g., "-3.14", which are multiplied by
+  10^scale, whereby the scale is the maximum number of fractional digits in
+  the sample.
+- "date": dates of the form "YYYY-MM-DD", which are stored as the number of
+  days since 1970-01-01.
+If a column of these types contains negative values, the column's minimum is
+subtracted from all of its values, such that all data elements are unsigned.
+For each such column, a JSON file "<table>.<column>.type.json" containing the
+type, the scale, and this offset is stored in the sub-directory "dicts". It is
+required for replacing literals in queries (see MorphStore's qdict.py tool).
+
 Known limitations:
-- Currently, any type other than unsigned integer will be treated as a string.
-  However, for floats, dates, etc. there may be more processing-friendly ways
-  to obtain integers from them.
-- This script is not tuned for performance.
+- Values not matching the type determined from the sample result in an error.
+  In this case, a larger sample can be used.
+
+Each CSV file is read in chunks of a configurable number of rows. The
+dictionaries are built and applied to entire columns of a chunk at once, which
+keeps the memory footprint bounded and makes large scale factors feasible.
+Optionally, multiple worker processes can be used. Then, all CSV files are
+encoded concurrently and large CSV files are split into ranges of rows, whose
+partial dictionaries are merged and whose encoded data elements are written to
+the respective parts of the output files.
+
+The output directory contains a manifest recording which input (identified by
+a hash of the CSV file or by a user-provided key) and which full schema the
+outputs of each table were created from. Tables whose outputs are current are
+skipped. If only columns were added to the required schema, only these are
+encoded, unless the projected CSV file is required, which always contains all
+required columns.
 """
 
-# TODO A cleverer way to determine which columns shall be dictionary coded.
-# TODO Reasonable treatment of columns of type float, date, etc..
+# TODO Reasonable treatment of floating-point columns.
 # TODO Documentation for parameters and return values.
 
 
 import argparse
+import concurrent.futures
+import csv
+import hashlib
+import io
 import json
+import mmap
 import os
+import shutil
 import struct
 import sys
 
+import numpy as np
+import pandas as pd
+
             
 _COLSEP = "|"
 
+# The size of the blocks in which files are read when counting lines.
+_BLOCKSIZE = 1 << 24
+
+# The size of the meta data at the beginning of each column file in bytes.
+_HEADERSIZE = 16
+
+# The name of the file recording the inputs the outputs were created from.
+_MANIFEST_FILENAME = "manifest.json"
+
+# The magic number at the beginning of each binary dictionary file.
+_DICTBIN_MAGIC = b"MSDICT01"
+
+# The number of buckets of the equi-depth histograms in the statistics and the
+# maximum number of data elements of a column they are built from.
+_HIST_COUNT_BUCKETS = 64
+_HIST_SAMPLE_SIZE = 1 << 16
+
+# The number of hashes kept for estimating the number of distinct values of a
+# column which is neither dictionary coded nor sorted. Up to this number, the
+# number of distinct values is exact.
+_DISTINCT_SKETCH_SIZE = 1 << 16
 
-def _isInt(val):
-    """Returns True if the given string represents an unsigned integer."""
+
+# The types of columns encoded without a dictionary, in the order in which
+# they are tried, and the patterns all of their values must match. Columns of
+# type "uint" are stored as they are, all other types are parsed to signed
+# integers first.
+_TYPE_UINT = "uint"
+_TYPE_INT = "int"
+_TYPE_DECIMAL = "decimal"
+_TYPE_DATE = "date"
+_PATTERN_BY_TYPE = {
+    _TYPE_UINT: r"[0-9]+",
+    _TYPE_INT: r"-?[0-9]+",
+    _TYPE_DECIMAL: r"-?[0-9]*\.?[0-9]*",
+    _TYPE_DATE: r"[0-9]{4}-[0-9]{2}-[0-9]{2}",
+}
+
+# The maximum number of digits (including the fractional digits of decimals)
+# for which all values of a type fit into 64 bits.
+_MAX_DIGITS_BY_TYPE = {
+    _TYPE_UINT: 19,
+    _TYPE_INT: 18,
+    _TYPE_DECIMAL: 18,
+}
+
+
+def _detectType(sampleStrs, typed):
+    """
+    Determines the type of a column from the given sample of its values.
+    
+    Returns the type and the scale (only relevant for decimals), or None and
+    None if the column requires dictionary coding. Unless typed is True, only
+    unsigned integers are recognized. Numbers with too many digits to fit into
+    64 bits require dictionary coding as well.
+    """
+    
+    if not len(sampleStrs):
+        return None, None
+    sample = pd.Series(sampleStrs)
+    for colType, pattern in _PATTERN_BY_TYPE.items():
+        if not typed and colType != _TYPE_UINT:
+            break
+        if not sample.str.fullmatch(pattern).all():
+            continue
+        if colType == _TYPE_DECIMAL:
+            if not sample.str.contains("[0-9]").all():
+                continue
+            parts = sample.str.partition(".")
+            scale = int(parts[2].str.len().max())
+            if parts[0].str.count("[0-9]").max() + scale > \
+                    _MAX_DIGITS_BY_TYPE[colType]:
+                continue
+            return colType, scale
+        if colType in _MAX_DIGITS_BY_TYPE:
+            if sample.str.count("[0-9]").max() > _MAX_DIGITS_BY_TYPE[colType]:
+                continue
+        if colType == _TYPE_DATE:
+            if pd.to_datetime(
+                sample, format="%Y-%m-%d", errors="coerce"
+            ).isna().any():
+                continue
+        return colType, 0
+    return None, None
+
+def _parseTyped(inStrs, colType, scale):
+    """
+    Parses the given values of a column of the given type (other than "uint")
+    to signed 64-bit integers.
+    """
+    
+    try:
+        if colType == _TYPE_INT:
+            return inStrs.astype(np.int64)
+        if colType == _TYPE_DECIMAL:
+            parts = pd.Series(inStrs).str.partition(".")
+            fracs = parts[2]
+            if len(fracs) and fracs.str.len().max() > scale:
+                raise ValueError(
+                    "more than {} fractional digits".format(scale)
+                )
+            return (parts[0] + fracs.str.ljust(scale, "0")).to_numpy().astype(
+                np.int64
+            )
+        if colType == _TYPE_DATE:
+            return pd.to_datetime(
+                inStrs, format="%Y-%m-%d"
+            ).to_numpy().astype("datetime64[D]").astype(np.int64)
+    except (ValueError, OverflowError) as e:
+        raise RuntimeError(
+            "a value does not match the type '{}' determined from the sample "
+            "of the column's values ({}), try a larger sample".format(
+                colType, e
+            )
+        )
+    raise RuntimeError("unsupported type: '{}'".format(colType))
+
+class _RangeFile(io.RawIOBase):
+    """
+    A read-only binary file restricted to the byte range [start, end) of a
+    memory-mapped underlying file.
+    """
+    
+    def __init__(self, filePath, start, end):
+        with open(filePath, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        self._pos = start
+        self._end = end
+        
+    def readable(self):
+        return True
+    
+    def readinto(self, buf):
+        count = min(len(buf), self._end - self._pos)
+        memoryview(buf)[:count] = self._mmap[self._pos:self._pos + count]
+        self._pos += count
+        return count
+    
+    def close(self):
+        if not self.closed:
+            self._mmap.close()
+        super().close()
+
+def _openRange(inTblFilePath, start, end):
+    """
+    Opens the byte range [start, end) of the given file for buffered binary
+    reading.
+    """
     
-    return all(["0" <= c <= "9" for c in val])
+    return io.BufferedReader(_RangeFile(inTblFilePath, start, end), _BLOCKSIZE)
             
-def _encodeTable(
-    tblName,
-    colNamesFull,
-    colNamesRequired,
+def _countLines(inTblFilePath, start, end):
+    """Returns the number of lines in the byte range [start, end) of the given file."""
+    
+    countLines = 0
+    lastBlock = b""
+    with _openRange(inTblFilePath, start, end) as inTblFile:
+        while True:
+            block = inTblFile.read(_BLOCKSIZE)
+            if not block:
+                break
+            countLines += block.count(b"\n")
+            lastBlock = block
+    # A last line without a trailing line break counts as well.
+    if lastBlock and not lastBlock.endswith(b"\n"):
+        countLines += 1
+    return countLines
+
+def _splitRanges(inTblFilePath, countRanges):
+    """
+    Splits the given file into at most countRanges byte ranges of roughly
+    equal size, whose boundaries coincide with line boundaries. Returns a list
+    of (start, end)-tuples.
+    """
+    
+    size = os.path.getsize(inTblFilePath)
+    bounds = [0]
+    with open(inTblFilePath, "rb") as inTblFile:
+        for rangeIdx in range(1, countRanges):
+            pos = size * rangeIdx // countRanges
+            if pos <= bounds[-1]:
+                continue
+            # Move to the beginning of the next line (or stay at pos if a line
+            # starts there).
+            inTblFile.seek(pos - 1)
+            inTblFile.readline()
+            bound = inTblFile.tell()
+            if bounds[-1] < bound < size:
+                bounds.append(bound)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _readChunks(inTblFile, colIdxs, chunkSize):
+    """
+    Returns an iterator over the given columns of the given CSV file. Each
+    element is a pandas DataFrame of at most chunkSize rows, whose columns are
+    labeled with their indexes in the CSV file and contain the values as
+    strings, exactly as they occur in the file.
+    """
+    
+    return pd.read_csv(
+        inTblFile,
+        sep=_COLSEP,
+        header=None,
+        usecols=colIdxs,
+        dtype=str,
+        na_filter=False,
+        quoting=csv.QUOTE_NONE,
+        encoding="utf-8",
+        engine="c",
+        chunksize=chunkSize,
+    )
+
+def _bitwidths(vals):
+    """
+    Returns the effective bit widths of the given unsigned 64-bit integers,
+    whereby the effective bit width of zero is one.
+    """
+    
+    bws = np.ones(len(vals), dtype=np.uint8)
+    rest = vals.copy()
+    for shift in [32, 16, 8, 4, 2, 1]:
+        isWider = (rest >> np.uint64(shift)) != 0
+        rest[isWider] >>= np.uint64(shift)
+        bws[isWider] += shift
+    return bws
+
+def _hash64(vals):
+    """
+    Returns the hashes of the given unsigned 64-bit integers. The hash function
+    (the finalizer of SplitMix64) is a bijection, i.e., distinct values have
+    distinct hashes.
+    """
+    
+    hashes = vals ^ (vals >> np.uint64(30))
+    hashes *= np.uint64(0xbf58476d1ce4e5b9)
+    hashes ^= hashes >> np.uint64(27)
+    hashes *= np.uint64(0x94d049bb133111eb)
+    hashes ^= hashes >> np.uint64(31)
+    return hashes
+
+class _ColStats:
+    """
+    Statistics on a sequence of data elements of a column. They are updated
+    with subsequent parts of the sequence and can be merged with the
+    statistics of the directly following sequence.
+    
+    The deltas are calculated modulo 2^64, just like in MorphStore. The delta
+    of the first data element of a column refers to zero.
+    
+    The number of distinct values of a sorted column is its number of runs.
+    Otherwise, it is estimated from the _DISTINCT_SKETCH_SIZE smallest hashes
+    of the distinct values (a KMV sketch), which bounds the memory footprint
+    and the size of the statistics passed between processes. If there are
+    fewer distinct values, the sketch contains all of them and the number is
+    exact.
+    """
+    
+    def __init__(self, trackDistinct):
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.first = None
+        self.last = None
+        self.isSorted = True
+        self.countRuns = 0
+        # Indexed by the bit width, i.e., index 0 is unused.
+        self.bwHist = np.zeros(65, dtype=np.int64)
+        self.deltaBwHist = np.zeros(65, dtype=np.int64)
+        # The sorted smallest hashes of the distinct values.
+        self.distHashes = \
+            np.zeros(0, dtype=np.uint64) if trackDistinct else None
+        
+    def update(self, vals):
+        """Extends the statistics by the given subsequent data elements."""
+        
+        if not len(vals):
+            return
+        vals = np.asarray(vals, dtype=np.uint64)
+        
+        prev = np.uint64(0 if self.last is None else self.last)
+        deltas = np.diff(vals, prepend=prev)
+        isNewRun = vals[1:] != vals[:-1]
+        
+        if self.last is None:
+            self.first = int(vals[0])
+            self.min = int(vals.min())
+            self.max = int(vals.max())
+            self.countRuns += 1
+        else:
+            self.isSorted = self.isSorted and vals[0] >= prev
+            self.min = min(self.min, int(vals.min()))
+            self.max = max(self.max, int(vals.max()))
+            if vals[0] != prev:
+                self.countRuns += 1
+        self.isSorted = self.isSorted and bool(np.all(vals[1:] >= vals[:-1]))
+        self.countRuns += int(np.count_nonzero(isNewRun))
+        self.last = int(vals[-1])
+        self.count += len(vals)
+        
+        self.bwHist += np.bincount(_bitwidths(vals), minlength=65)
+        self.deltaBwHist += np.bincount(_bitwidths(deltas), minlength=65)
+        
+        if self.distHashes is not None:
+            self._addHashes(pd.unique(_hash64(vals)))
+            
+    def _addHashes(self, hashes):
+        """
+        Adds the given distinct hashes to the sketch and keeps only the
+        smallest ones.
+        """
+        
+        if len(self.distHashes) == _DISTINCT_SKETCH_SIZE:
+            hashes = hashes[hashes < self.distHashes[-1]]
+        if len(hashes) > _DISTINCT_SKETCH_SIZE:
+            hashes = np.partition(hashes, _DISTINCT_SKETCH_SIZE - 1)[
+                :_DISTINCT_SKETCH_SIZE
+            ]
+        self.distHashes = np.unique(
+            np.concatenate([self.distHashes, hashes])
+        )[:_DISTINCT_SKETCH_SIZE]
+    
+    def merge(self, other):
+        """
+        Extends these statistics by those of the sequence directly following
+        this one.
+        """
+        
+        if not other.count:
+            return
+        if not self.count:
+            self.__dict__.update(other.__dict__)
+            return
+        
+        # The delta of the other sequence's first element refers to zero so
+        # far.
+        first = np.array([other.first], dtype=np.uint64)
+        last = np.array([self.last], dtype=np.uint64)
+        other.deltaBwHist[_bitwidths(first)[0]] -= 1
+        other.deltaBwHist[_bitwidths(first - last)[0]] += 1
+        
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.isSorted = \
+            self.isSorted and other.isSorted and other.first >= self.last
+        self.countRuns += other.countRuns - (other.first == self.last)
+        self.last = other.last
+        self.bwHist += other.bwHist
+        self.deltaBwHist += other.deltaBwHist
+        if self.distHashes is not None:
+            self._addHashes(other.distHashes)
+    
+    def _countDistinct(self):
+        """
+        Returns the number of distinct values and whether it is exact rather
+        than estimated.
+        """
+        
+        if self.isSorted:
+            return self.countRuns, True
+        if len(self.distHashes) < _DISTINCT_SKETCH_SIZE:
+            return len(self.distHashes), True
+        # The smallest hashes are spread evenly over the range of the hash
+        # function.
+        estimate = (_DISTINCT_SKETCH_SIZE - 1) * float(1 << 64) / (
+            int(self.distHashes[-1]) + 1
+        )
+        return min(
+            self.count, max(_DISTINCT_SKETCH_SIZE, int(round(estimate)))
+        ), False
+        
+    def toDict(self, countDistinct=None):
+        """
+        Returns the statistics as a dictionary suitable for JSON. The exact
+        number of distinct values must be provided if it was not tracked.
+        
+        A column is only marked as unique if this is known for sure, i.e., if
+        the number of distinct values is exact.
+        """
+        
+        if countDistinct is None:
+            countDistinct, isDistinctExact = self._countDistinct()
+        else:
+            isDistinctExact = True
+        return {
+            "count": self.count,
+            "min": 0 if self.min is None else self.min,
+            "max": 0 if self.max is None else self.max,
+            "distinct": countDistinct,
+            "isDistinctExact": isDistinctExact,
+            "isSorted": bool(self.isSorted),
+            "isUnique": isDistinctExact and countDistinct == self.count,
+            "countRuns": self.countRuns,
+            "bwHist": self.bwHist[1:].tolist(),
+            "deltaBwHist": self.deltaBwHist[1:].tolist(),
+        }
+
+def _histBounds(colFilePath, countRows):
+    """
+    Returns the bounds of an equi-depth histogram of the data elements in the
+    given column file as a list of _HIST_COUNT_BUCKETS + 1 values. The i-th
+    bucket spans the values from the i-th to the (i+1)-th bound (both
+    inclusive) and contains about the same number of data elements as each
+    other bucket. Frequent values span several buckets.
+    
+    For large columns, the histogram is built from a random sample of the data
+    elements. The sample is the same for each run.
+    """
+    
+    if not countRows:
+        return [0] * (_HIST_COUNT_BUCKETS + 1)
+    vals = np.memmap(
+        colFilePath, dtype="<u8", mode="r",
+        offset=_HEADERSIZE, shape=(countRows,)
+    )
+    if countRows > _HIST_SAMPLE_SIZE:
+        poss = np.sort(np.random.default_rng(0).choice(
+            countRows, _HIST_SAMPLE_SIZE, replace=False
+        ))
+        vals = vals[poss]
+    vals = np.sort(vals)
+    boundIdxs = np.arange(_HIST_COUNT_BUCKETS + 1) * (len(vals) - 1) // \
+        _HIST_COUNT_BUCKETS
+    return [int(val) for val in vals[boundIdxs]]
+
+def _writeDictBin(outDictBinFilePath, sortedVals):
+    """
+    Writes the given sorted dictionary to a binary dictionary file.
+    """
+    
+    heapParts = [val.encode("utf-8") for val in sortedVals]
+    offsets = np.zeros(len(heapParts) + 1, dtype="<u8")
+    np.cumsum(
+        np.fromiter(map(len, heapParts), dtype=np.uint64, count=len(heapParts)),
+        out=offsets[1:]
+    )
+    with open(outDictBinFilePath, "wb") as outDictBinFile:
+        outDictBinFile.write(_DICTBIN_MAGIC)
+        outDictBinFile.write(struct.pack("<Q", len(heapParts)))
+        outDictBinFile.write(offsets.tobytes())
+        outDictBinFile.write(b"".join(heapParts))
+
+def _collectRange(
+    inTblFilePath, start, end, nonIntColIdxs, typeByColIdx, chunkSize
+):
+    """
+    First pass of the two-pass mode over the byte range [start, end) of the
+    given CSV file.
+    
+    Returns the number of rows in this range, a dictionary mapping the index
+    of each column requiring dictionary coding to an (unsorted) array of the
+    distinct values of this column in this range, and a dictionary mapping the
+    index of each typed column to the minimum of its parsed values in this
+    range.
+    """
+    
+    if not len(nonIntColIdxs) and not len(typeByColIdx):
+        return _countLines(inTblFilePath, start, end), {}, {}
+    
+    # The distinct values of each chunk are found by hashing and merged only
+    # once at the end.
+    countRows = 0
+    distValPartsByColIdx = {idx: [] for idx in nonIntColIdxs}
+    minByColIdx = {idx: 0 for idx in typeByColIdx}
+    with _openRange(inTblFilePath, start, end) as inTblFile:
+        for chunk in _readChunks(
+            inTblFile, sorted(nonIntColIdxs + list(typeByColIdx)), chunkSize
+        ):
+            countRows += len(chunk)
+            for idx in nonIntColIdxs:
+                distValPartsByColIdx[idx].append(pd.unique(chunk[idx]))
+            for idx, (colType, scale) in typeByColIdx.items():
+                vals = _parseTyped(chunk[idx].to_numpy(), colType, scale)
+                if len(vals):
+                    minByColIdx[idx] = min(minByColIdx[idx], int(vals.min()))
+    return countRows, {
+        idx: pd.unique(np.concatenate(distValPartsByColIdx[idx]))
+        for idx in nonIntColIdxs
+    }, minByColIdx
+
+def _encodeRange(
     inTblFilePath,
+    start,
+    end,
+    colIdxsRequired,
+    dictByColIdx,
+    typeByColIdx,
+    offsetByColIdx,
+    outColFilePathByColIdx,
+    rowOffset,
     outTblFilePath,
-    outDictDirPath,
-    outColDirPath,
-    outStatFilePath
+    chunkSize
 ):
     """
-    Applies order-preserving dictionary coding to all required non-integer
-    columns of the given CSV file and creates all output files for this CSV
-    file.
+    Second pass of the two-pass mode over the byte range [start, end) of the
+    given CSV file.
+    
+    Encodes the non-integer columns using the given (sorted) dictionaries,
+    parses the typed columns and subtracts their offsets, and writes the data
+    elements of all required columns to the already existing column files,
+    starting at the row with the given offset. Unless
+    outTblFilePath is None, the projected CSV file for this range is written
+    to it.
+    
+    Returns a dictionary mapping the index of each required column to the
+    statistics of this column in this range.
     """
     
-    print("Processing table '{}'".format(tblName))
+    # Hash-based lookup of the dictionary codes.
+    codeIdxByColIdx = {idx: pd.Index(d) for idx, d in dictByColIdx.items()}
     
-    countColsFull = len(colNamesFull)
-    countColsRequired = len(colNamesRequired)
-    print("\t{}/{} columns required.".format(countColsRequired, countColsFull))
+    # Open output files for all columns.
+    outColFiles = {
+        idx: open(outColFilePathByColIdx[idx], "r+b")
+        for idx in colIdxsRequired
+    }
+    for outColFile in outColFiles.values():
+        outColFile.seek(_HEADERSIZE + rowOffset * 8)
+    outTblFile = None if outTblFilePath is None else open(outTblFilePath, "w")
     
-    # Find out the positions of the columns to be taken into account.
-    colIdxsRequired = [
-        colIdx
-        for colIdx, colName in enumerate(colNamesFull)
-        if colName in colNamesRequired
-    ]
+    colStats = {
+        idx: _ColStats(idx not in codeIdxByColIdx) for idx in colIdxsRequired
+    }
+    
+    # Encode non-integer columns, write output files.
+    with _openRange(inTblFilePath, start, end) as inTblFile:
+        for chunk in _readChunks(inTblFile, colIdxsRequired, chunkSize):
+            # The lines of the output CSV file, built column by column.
+            outLines = None
+            for idx in colIdxsRequired:
+                inStrs = chunk[idx].to_numpy()
+                if idx in codeIdxByColIdx:
+                    vals = codeIdxByColIdx[idx].get_indexer(inStrs).astype(
+                        np.uint64
+                    )
+                    outStrs = vals.astype(str).astype(object)
+                elif idx in typeByColIdx:
+                    colType, scale = typeByColIdx[idx]
+                    vals = (
+                        _parseTyped(inStrs, colType, scale) -
+                        offsetByColIdx[idx]
+                    ).astype(np.uint64)
+                    outStrs = vals.astype(str).astype(object)
+                else:
+                    vals = inStrs.astype(np.uint64)
+                    outStrs = inStrs
+                outColFiles[idx].write(vals.astype("<u8").tobytes())
+                colStats[idx].update(vals)
+                if outTblFile is None:
+                    continue
+                if outLines is None:
+                    outLines = outStrs
+                else:
+                    outLines = outLines + _COLSEP + outStrs
+            if outLines is not None and len(outLines):
+                outTblFile.write("\n".join(outLines.tolist()))
+                outTblFile.write("\n")
+    
+    # Close output files.
+    for outColFile in outColFiles.values():
+        outColFile.close()
+    if outTblFile is not None:
+        outTblFile.close()
+    
+    return colStats
+
+def _scanRange(
+    inTblFilePath,
+    start,
+    end,
+    colIdxsRequired,
+    nonIntColIdxs,
+    typeByColIdx,
+    segFilePathByColIdx,
+    segOffset,
+    chunkSize
+):
+    """
+    First pass of the single-pass mode over the byte range [start, end) of the
+    given CSV file. This is the only pass parsing the CSV file.
+    
+    Writes the data elements of all required columns to the given segment
+    files, starting at the given byte offset. For the non-integer columns,
+    preliminary codes are written, which refer to the order in which the
+    distinct values first occur in this range. For the typed columns, the
+    parsed values are written without subtracting their offsets.
+    
+    Returns the number of rows in this range, a dictionary mapping the index
+    of each non-integer column to an array of the distinct values of this
+    column in this range in the order of their preliminary codes, and a
+    dictionary mapping the index of each typed column to the minimum of its
+    parsed values in this range.
+    """
+    
+    distValsByColIdx = {
+        idx: pd.Index([], dtype=object) for idx in nonIntColIdxs
+    }
+    minByColIdx = {idx: 0 for idx in typeByColIdx}
+    
+    # Open output files for all columns.
+    segFiles = {
+        idx: open(segFilePathByColIdx[idx], "wb") for idx in colIdxsRequired
+    }
+    for segFile in segFiles.values():
+        segFile.seek(segOffset)
+    
+    countRows = 0
+    with _openRange(inTblFilePath, start, end) as inTblFile:
+        for chunk in _readChunks(inTblFile, colIdxsRequired, chunkSize):
+            countRows += len(chunk)
+            for idx in colIdxsRequired:
+                inStrs = chunk[idx].to_numpy()
+                if idx in distValsByColIdx:
+                    # Codes referring to the distinct values of this chunk...
+                    chunkCodes, chunkDistVals = pd.factorize(inStrs)
+                    # ...are mapped to codes referring to the distinct values
+                    # of this range, which are extended by the values not seen
+                    # before.
+                    distVals = distValsByColIdx[idx]
+                    rangeCodes = distVals.get_indexer(chunkDistVals)
+                    isNew = rangeCodes == -1
+                    rangeCodes[isNew] = np.arange(
+                        len(distVals), len(distVals) + np.count_nonzero(isNew)
+                    )
+                    distValsByColIdx[idx] = distVals.append(
+                        pd.Index(chunkDistVals[isNew], dtype=object)
+                    )
+                    vals = rangeCodes[chunkCodes].astype(np.uint64)
+                elif idx in typeByColIdx:
+                    colType, scale = typeByColIdx[idx]
+                    vals = _parseTyped(inStrs, colType, scale)
+                    if len(vals):
+                        minByColIdx[idx] = min(
+                            minByColIdx[idx], int(vals.min())
+                        )
+                    vals = vals.view(np.uint64)
+                else:
+                    vals = inStrs.astype(np.uint64)
+                segFiles[idx].write(vals.astype("<u8").tobytes())
+    
+    # Close output files for all columns.
+    for segFile in segFiles.values():
+        segFile.close()
+    
+    return countRows, {
+        idx: distVals.to_numpy() for idx, distVals in distValsByColIdx.items()
+    }, minByColIdx
+
+def _remapRange(
+    colIdxsRequired,
+    codeMapByColIdx,
+    offsetByColIdx,
+    segFilePathByColIdx,
+    segOffset,
+    countRows,
+    outColFilePathByColIdx,
+    rowOffset,
+    outTblFilePath,
+    chunkSize
+):
+    """
+    Second pass of the single-pass mode over the segment files of one range.
+    No text is parsed in this pass.
+    
+    Replaces the preliminary codes of the non-integer columns by their
+    dictionary codes using the given arrays mapping the former to the latter,
+    subtracts the given offsets from the values of the typed columns, and
+    writes the data elements of all required columns to the already
+    existing column files, starting at the row with the given offset. Segment
+    files other than the column files themselves are deleted afterwards.
+    Unless outTblFilePath is None, the projected CSV file for this range is
+    written to it.
+    
+    Returns a dictionary mapping the index of each required column to the
+    statistics of this column in this range.
+    """
+    
+    colStats = {
+        idx: _ColStats(idx not in codeMapByColIdx) for idx in colIdxsRequired
+    }
+    
+    outTblFile = None if outTblFilePath is None else open(outTblFilePath, "w")
+    
+    if countRows:
+        # Memory-map the data elements of the segment and column files.
+        segs = {}
+        outCols = {}
+        for idx in colIdxsRequired:
+            inPlace = \
+                segFilePathByColIdx[idx] == outColFilePathByColIdx[idx]
+            segs[idx] = np.memmap(
+                segFilePathByColIdx[idx], dtype="<u8",
+                mode="r+" if inPlace else "r",
+                offset=segOffset, shape=(countRows,)
+            )
+            outCols[idx] = segs[idx] if inPlace else np.memmap(
+                outColFilePathByColIdx[idx], dtype="<u8", mode="r+",
+                offset=_HEADERSIZE + rowOffset * 8, shape=(countRows,)
+            )
+            
+        for pos in range(0, countRows, chunkSize):
+            # The lines of the output CSV file, built column by column.
+            outLines = None
+            for idx in colIdxsRequired:
+                vals = segs[idx][pos:pos + chunkSize]
+                isChanged = True
+                if idx in codeMapByColIdx:
+                    vals = codeMapByColIdx[idx][vals]
+                elif offsetByColIdx.get(idx, 0):
+                    # Subtraction modulo 2^64, since the segment files contain
+                    # the two's complement of negative values.
+                    vals = vals - np.uint64(offsetByColIdx[idx] % (1 << 64))
+                else:
+                    isChanged = False
+                colStats[idx].update(vals)
+                if outCols[idx] is not segs[idx] or isChanged:
+                    outCols[idx][pos:pos + chunkSize] = vals
+                if outTblFile is None:
+                    continue
+                outStrs = vals.astype(str).astype(object)
+                if outLines is None:
+                    outLines = outStrs
+                else:
+                    outLines = outLines + _COLSEP + outStrs
+            if outLines is not None and len(outLines):
+                outTblFile.write("\n".join(outLines.tolist()))
+                outTblFile.write("\n")
+                
+        for idx in colIdxsRequired:
+            outCols[idx].flush()
+        del segs
+        del outCols
+        
+    if outTblFile is not None:
+        outTblFile.close()
+    
+    for idx in colIdxsRequired:
+        if segFilePathByColIdx[idx] != outColFilePathByColIdx[idx]:
+            os.remove(segFilePathByColIdx[idx])
     
-    with open(inTblFilePath, "r") as inTblFile:
-        # ---------------------------------------------------------------------
-        # Preparation
-        # ---------------------------------------------------------------------
+    return colStats
+
+class _Table:
+    """
+    Everything required to encode one CSV file, i.e., its paths, the positions
+    of its required columns, and its split into byte ranges.
+    """
+    
+    def __init__(
+        self,
+        tblName,
+        colNamesFull,
+        colNamesRequired,
+        inTblFilePath,
+        outTblFilePath,
+        outDictDirPath,
+        outColDirPath,
+        outStatFilePath,
+        countRanges,
+        singlePass,
+        mergeStats,
+        typed,
+        sampleSize
+    ):
+        print("Processing table '{}'".format(tblName))
+        
+        self.tblName = tblName
+        self.colNamesFull = colNamesFull
+        self.inTblFilePath = inTblFilePath
+        self.outTblFilePath = outTblFilePath
+        self.outDictDirPath = outDictDirPath
+        self.outStatFilePath = outStatFilePath
+        self.outColStatFilePath = \
+            os.path.splitext(outStatFilePath)[0] + ".colstats.json"
+        self.singlePass = singlePass
+        self.mergeStats = mergeStats
+        
+        countColsFull = len(colNamesFull)
+        countColsRequired = len(colNamesRequired)
+        print("\t{}/{} columns required.".format(
+            countColsRequired, countColsFull
+        ))
+        
+        # Find out the positions of the columns to be taken into account.
+        self.colIdxsRequired = [
+            colIdx
+            for colIdx, colName in enumerate(colNamesFull)
+            if colName in colNamesRequired
+        ]
         
         # Check if the number of columns is ok.
-        firstLine = inTblFile.readline().rstrip()
+        with open(inTblFilePath, "r") as inTblFile:
+            firstLine = inTblFile.readline().rstrip()
         firstLineEntries = firstLine.split(_COLSEP)[:-1]
         countColsFound = len(firstLineEntries)
         if countColsFound != countColsFull:
@@ -143,129 +950,457 @@ def _encodeTable(
                 )
             )
         
-        # Determine the columns requiring dictionary coding.
-        # TODO This might produce false negatives, since only the first element
-        #      of each column is considered.
-        nonIntColIdxs = [
-            idx
-            for idx in colIdxsRequired
-            if not _isInt(firstLineEntries[idx])
-        ]
+        # Determine the columns requiring dictionary coding and the types of
+        # the other columns from a sample of the first rows.
+        with _openRange(
+            inTblFilePath, 0, os.path.getsize(inTblFilePath)
+        ) as inTblFile:
+            sample = next(
+                _readChunks(inTblFile, self.colIdxsRequired, sampleSize)
+            )
+        self.nonIntColIdxs = []
+        self.typeByColIdx = {}
+        for idx in self.colIdxsRequired:
+            colType, scale = _detectType(sample[idx].to_numpy(), typed)
+            if colType is None:
+                self.nonIntColIdxs.append(idx)
+            elif colType != _TYPE_UINT:
+                self.typeByColIdx[idx] = (colType, scale)
         print("\t{}/{} required columns need dictionary coding.".format(
-            len(nonIntColIdxs), countColsRequired,
+            len(self.nonIntColIdxs), countColsRequired,
         ))
+        if len(self.typeByColIdx):
+            print("\t{}/{} required columns are typed: {}.".format(
+                len(self.typeByColIdx), countColsRequired,
+                ", ".join([
+                    "{} ({})".format(colNamesFull[idx], colType)
+                    for idx, (colType, _) in self.typeByColIdx.items()
+                ])
+            ))
         
-        # ---------------------------------------------------------------------
-        # First pass: Create the dictionaries for all non-integer columns
-        # ---------------------------------------------------------------------
+        self.outColFilePathByColIdx = {
+            idx: os.path.join(
+                outColDirPath,
+                "{}.{}.uncompr_f.bin".format(tblName, colNamesFull[idx])
+            )
+            for idx in self.colIdxsRequired
+        }
         
-        print("\tCreating dictionaries... ", end="")
-        sys.stdout.flush()
+        # Split the file into byte ranges to be processed independently.
+        self.ranges = _splitRanges(inTblFilePath, countRanges)
+        if len(self.ranges) > 1:
+            print("\tSplit into {} ranges.".format(len(self.ranges)))
+            if outTblFilePath is None:
+                self.outTblFilePaths = [None] * len(self.ranges)
+            else:
+                self.outTblFilePaths = [
+                    "{}.part{}".format(outTblFilePath, rangeIdx)
+                    for rangeIdx in range(len(self.ranges))
+                ]
+            # In the single-pass mode, each range writes to its own segment
+            # files, which are copied to the column files in the second pass.
+            self.segFilePathsByColIdx = [
+                {
+                    idx: "{}.seg{}".format(outColFilePath, rangeIdx)
+                    for idx, outColFilePath in
+                        self.outColFilePathByColIdx.items()
+                }
+                for rangeIdx in range(len(self.ranges))
+            ]
+            self.segOffset = 0
+        else:
+            self.outTblFilePaths = [outTblFilePath]
+            # In the single-pass mode, a single range writes directly to the
+            # column files, which are updated in-place in the second pass.
+            self.segFilePathsByColIdx = [self.outColFilePathByColIdx]
+            self.segOffset = _HEADERSIZE
         
-        inTblFile.seek(0, 0)
+        # Set by the first pass.
+        self.countRowsByRange = None
+        self.rowOffsets = None
+        self.dictByColIdx = None
+        self.offsetByColIdx = None
+        self.codeMapsByRange = None
         
-        countRows = 0;
+    def firstPass(self, chunkSize):
+        """
+        The function to call for each range in the first pass and the
+        arguments of each call.
+        """
         
-        # Determine the number of rows and the distinct values as a set.
-        distValsByColIdx = {idx: set() for idx in nonIntColIdxs}
-        if len(nonIntColIdxs):
-            for line in inTblFile:
-                countRows += 1
-                lineEntries = line.rstrip().split(_COLSEP)
-                for idx in nonIntColIdxs:
-                    distValsByColIdx[idx].add(lineEntries[idx])
+        if self.singlePass:
+            return _scanRange, [
+                (
+                    self.inTblFilePath, start, end,
+                    self.colIdxsRequired, self.nonIntColIdxs,
+                    self.typeByColIdx, segFilePathByColIdx, self.segOffset,
+                    chunkSize
+                )
+                for (start, end), segFilePathByColIdx in zip(
+                    self.ranges, self.segFilePathsByColIdx
+                )
+            ]
         else:
-            for line in inTblFile:
-                countRows += 1
-                    
-        # Sort distinct values as a list and write dictionary files.
-        for idx in nonIntColIdxs:
-            distValsByColIdx[idx] = list(sorted(distValsByColIdx[idx]))
+            return _collectRange, [
+                (
+                    self.inTblFilePath, start, end, self.nonIntColIdxs,
+                    self.typeByColIdx, chunkSize
+                )
+                for start, end in self.ranges
+            ]
+    
+    def secondPass(self, chunkSize):
+        """
+        The function to call for each range in the second pass and the
+        arguments of each call.
+        """
+        
+        if self.singlePass:
+            return _remapRange, [
+                (
+                    self.colIdxsRequired, codeMapByColIdx,
+                    self.offsetByColIdx, segFilePathByColIdx, self.segOffset, countRows,
+                    self.outColFilePathByColIdx, rowOffset,
+                    outTblFilePath, chunkSize
+                )
+                for codeMapByColIdx, segFilePathByColIdx, countRows,
+                    rowOffset, outTblFilePath in zip(
+                        self.codeMapsByRange, self.segFilePathsByColIdx,
+                        self.countRowsByRange, self.rowOffsets,
+                        self.outTblFilePaths
+                    )
+            ]
+        else:
+            return _encodeRange, [
+                (
+                    self.inTblFilePath, start, end,
+                    self.colIdxsRequired, self.dictByColIdx,
+                    self.typeByColIdx, self.offsetByColIdx,
+                    self.outColFilePathByColIdx, rowOffset,
+                    outTblFilePath, chunkSize
+                )
+                for (start, end), rowOffset, outTblFilePath in zip(
+                    self.ranges, self.rowOffsets, self.outTblFilePaths
+                )
+            ]
+    
+    def finishFirstPass(self, results):
+        """
+        Merges the results of the first pass over all ranges, writes the
+        dictionary files and the type files, and creates the column files.
+        """
+        
+        self.countRowsByRange = [countRows for countRows, _, _ in results]
+        distValsByRange = [
+            distValsByColIdx for _, distValsByColIdx, _ in results
+        ]
+        countRows = sum(self.countRowsByRange)
+        self.rowOffsets = [
+            sum(self.countRowsByRange[:rangeIdx])
+            for rangeIdx in range(len(self.ranges))
+        ]
+        
+        # Merge the distinct values of all ranges to sorted dictionaries.
+        # np.unique() sorts strings by code points, i.e., just like sorted().
+        self.dictByColIdx = {
+            idx: np.unique(np.concatenate([
+                distValsByColIdx[idx] for distValsByColIdx in distValsByRange
+            ]))
+            for idx in self.nonIntColIdxs
+        }
+        
+        # Write dictionary files and remove those of columns which are not
+        # dictionary coded anymore.
+        for idx in self.colIdxsRequired:
             outDictFilePath = os.path.join(
-                outDictDirPath, "{}.{}.dict".format(tblName, colNamesFull[idx])
+                self.outDictDirPath,
+                "{}.{}.dict".format(self.tblName, self.colNamesFull[idx])
             )
+            outDictBinFilePath = outDictFilePath + "bin"
+            if idx not in self.dictByColIdx:
+                for filePath in [outDictFilePath, outDictBinFilePath]:
+                    if os.path.isfile(filePath):
+                        os.remove(filePath)
+                continue
             with open(outDictFilePath, "w") as outDictFile:
-                for val in distValsByColIdx[idx]:
-                    outDictFile.write(val + "\n")
-                    
-        # Create encoding dictionaries as a dict.
-        dictByColIdx = {
-            # str() because its used with join() later.
-            idx: {
-                val: str(pos)
-                for pos, val in enumerate(distValsByColIdx[idx])
-            }
-            for idx in nonIntColIdxs
+                outDictFile.writelines(
+                    val + "\n" for val in self.dictByColIdx[idx]
+                )
+            _writeDictBin(outDictBinFilePath, self.dictByColIdx[idx])
+        
+        # Typed columns containing negative values are shifted by their
+        # minimum.
+        self.offsetByColIdx = {
+            idx: min([minByColIdx[idx] for _, _, minByColIdx in results])
+            for idx in self.typeByColIdx
         }
         
-        print("done." if len(nonIntColIdxs) else "nothing to do.")
+        # Write type files and remove those of columns which are not typed
+        # anymore.
+        for idx in self.colIdxsRequired:
+            outTypeFilePath = os.path.join(
+                self.outDictDirPath,
+                "{}.{}.type.json".format(self.tblName, self.colNamesFull[idx])
+            )
+            if idx not in self.typeByColIdx:
+                if os.path.isfile(outTypeFilePath):
+                    os.remove(outTypeFilePath)
+                continue
+            colType, scale = self.typeByColIdx[idx]
+            with open(outTypeFilePath, "w") as outTypeFile:
+                json.dump(
+                    {
+                        "type": colType,
+                        "scale": scale,
+                        "offset": self.offsetByColIdx[idx],
+                    },
+                    outTypeFile,
+                    indent=2
+                )
+                
+        if self.singlePass:
+            # Map the preliminary codes of each range to dictionary codes.
+            codeIdxByColIdx = {
+                idx: pd.Index(d) for idx, d in self.dictByColIdx.items()
+            }
+            self.codeMapsByRange = [
+                {
+                    idx: codeIdxByColIdx[idx].get_indexer(
+                        distValsByColIdx[idx]
+                    ).astype(np.uint64)
+                    for idx in self.nonIntColIdxs
+                }
+                for distValsByColIdx in distValsByRange
+            ]
         
-        # ---------------------------------------------------------------------
-        # Second pass: Encode non-integer columns, create output files
-        # ---------------------------------------------------------------------
+        # Create the column files, such that all ranges can write their data
+        # elements to them independently. A single range of the single-pass
+        # mode has already written its data elements to them.
+        inPlace = self.singlePass and len(self.ranges) == 1
+        for idx in self.colIdxsRequired:
+            with open(
+                self.outColFilePathByColIdx[idx], "r+b" if inPlace else "wb"
+            ) as outColFile:
+                # TODO Does "Q" guarantee 64 bits on all platforms?
+                # The number of data elements in the column (logical size).
+                outColFile.write(struct.pack("<Q", countRows))
+                # The column's size in byte (physical size).
+                outColFile.write(struct.pack("<Q", countRows * 8))
+                outColFile.truncate(_HEADERSIZE + countRows * 8)
+            
+    def finishSecondPass(self, results):
+        """
+        Merges the results of the second pass over all ranges, concatenates
+        the parts of the projected CSV file, and writes the statistics file.
+        """
         
-        print("\tEncoding data... ", end="")
-        sys.stdout.flush()
+        if len(self.outTblFilePaths) > 1 and self.outTblFilePath is not None:
+            with open(self.outTblFilePath, "wb") as outTblFile:
+                for outTblFilePath in self.outTblFilePaths:
+                    with open(outTblFilePath, "rb") as outTblPartFile:
+                        shutil.copyfileobj(outTblPartFile, outTblFile)
+                    os.remove(outTblFilePath)
         
-        inTblFile.seek(0, 0)
+        # Merge the statistics of all ranges.
+        colStats = results[0]
+        for colStatsOfRange in results[1:]:
+            for idx in self.colIdxsRequired:
+                colStats[idx].merge(colStatsOfRange[idx])
         
-        # Open output files for all columns.
-        outColFiles = {
-            idx: open(
-                os.path.join(
-                    outColDirPath,
-                    "{}.{}.uncompr_f.bin".format(tblName, colNamesFull[idx])
-                ),
-                "wb"
+        # Keep the statistics of the columns which were not encoded again.
+        if self.mergeStats:
+            with open(self.outStatFilePath, "r") as outStatFile:
+                stats = json.load(outStatFile)
+            with open(self.outColStatFilePath, "r") as outColStatFile:
+                statsByColName = json.load(outColStatFile)
+        else:
+            stats = {}
+            statsByColName = {}
+        for idx in self.colIdxsRequired:
+            colName = self.colNamesFull[idx]
+            statsByColName[colName] = colStats[idx].toDict(
+                len(self.dictByColIdx[idx]) if idx in self.dictByColIdx
+                else None
             )
-            for idx in colIdxsRequired
-        }
-        
-        # Write metadata for all columns.
-        for idx in colIdxsRequired:
-            # TODO Does "Q" guarantee 64 bits on all platforms?
-            # The number of data elements in the column (logical size).
-            outColFiles[idx].write(struct.pack("<Q", countRows))
-            # The column's size in byte (physical size).
-            outColFiles[idx].write(struct.pack("<Q", countRows * 8))
-        
-        # TODO Implement this in a cleaner way.
-        # ...
-        maxVals = {idx: 0 for idx in colIdxsRequired}
-        
-        # Encode non-integer columns, write output files.
-        st = struct.Struct("<Q")
-        with open(outTblFilePath, "w") as outTblFile:
-            for line in inTblFile:
-                lineEntries = line.split(_COLSEP)
-                for idx in nonIntColIdxs:
-                    lineEntries[idx] = dictByColIdx[idx][lineEntries[idx]]
-                outTblFile.write(_COLSEP.join(
-                    [lineEntries[idx] for idx in colIdxsRequired]
-                ))
-                outTblFile.write("\n")
-                for idx in colIdxsRequired:
-                    entryAsInt = int(lineEntries[idx])
-                    outColFiles[idx].write(st.pack(entryAsInt))
-                    if entryAsInt > maxVals[idx]:
-                        maxVals[idx] = entryAsInt
+            statsByColName[colName]["histBounds"] = _histBounds(
+                self.outColFilePathByColIdx[idx], sum(self.countRowsByRange)
+            )
+            stats[colName] = statsByColName[colName]["max"]
         
-        with open(outStatFilePath, "w") as outStatFile:
+        with open(self.outStatFilePath, "w") as outStatFile:
             json.dump(
                 dict(
-                    {colNamesFull[idx]: maxVals[idx] for idx in colIdxsRequired},
-                    _cardinality=countRows,
+                    {
+                        colName: stats[colName]
+                        for colName in self.colNamesFull
+                        if colName in stats
+                    },
+                    _cardinality=sum(self.countRowsByRange),
                 ),
                 outStatFile,
                 indent=2
             )
+        with open(self.outColStatFilePath, "w") as outColStatFile:
+            json.dump(
+                {
+                    colName: statsByColName[colName]
+                    for colName in self.colNamesFull
+                    if colName in statsByColName
+                },
+                outColStatFile,
+                indent=2
+            )
+
+def _encodeTables(tables, executor, chunkSize):
+    """
+    Applies order-preserving dictionary coding to all required non-integer
+    columns of the given tables and creates all output files for them.
+    
+    Each table is processed in two passes over its byte ranges. In the
+    two-pass mode, the first pass determines the distinct values of all
+    non-integer columns and the second pass parses the CSV file again to
+    encode the data. In the single-pass mode, the first pass writes all data
+    elements, using preliminary codes for the non-integer columns, and the
+    second pass only replaces the preliminary codes by the final ones. The
+    ranges of all tables are processed concurrently if an executor is given.
+    Each range is processed in chunks of chunkSize rows. Within each chunk,
+    all work is done on entire columns using NumPy, such that the memory
+    footprint is bounded by the chunk size (plus the dictionaries) instead of
+    growing with the size of the table.
+    """
+    
+    if not len(tables):
+        return
+    
+    for passIdx in [1, 2]:
+        if passIdx == 1:
+            print("Creating dictionaries... ", end="")
+        else:
+            print("Encoding data... ", end="")
+        sys.stdout.flush()
+        
+        funcsAndArgsLists = [
+            tbl.firstPass(chunkSize) if passIdx == 1 else
+                tbl.secondPass(chunkSize)
+            for tbl in tables
+        ]
+        if executor is None:
+            futures = None
+        else:
+            futures = [
+                [executor.submit(func, *args) for args in argsList]
+                for func, argsList in funcsAndArgsLists
+            ]
+        for tblIdx, tbl in enumerate(tables):
+            if futures is None:
+                func, argsList = funcsAndArgsLists[tblIdx]
+                results = [func(*args) for args in argsList]
+            else:
+                results = [future.result() for future in futures[tblIdx]]
+            if passIdx == 1:
+                tbl.finishFirstPass(results)
+            else:
+                tbl.finishSecondPass(results)
         
-        # Close output files for all columns.
-        for idx, outColFile in outColFiles.items():
-            outColFile.close()
-            
         print("done.")
         
+def _hashFile(inTblFilePath):
+    """Returns a key identifying the contents of the given file."""
+    
+    h = hashlib.sha1()
+    with open(inTblFilePath, "rb") as inTblFile:
+        while True:
+            block = inTblFile.read(_BLOCKSIZE)
+            if not block:
+                break
+            h.update(block)
+    return "sha1:" + h.hexdigest()
+
+def _loadManifest(manifestFilePath):
+    """
+    Loads the manifest from the given file, or returns an empty manifest if
+    the file does not exist.
+    """
+    
+    if not os.path.isfile(manifestFilePath):
+        return {"tables": {}}
+    with open(manifestFilePath, "r") as manifestFile:
+        return json.load(manifestFile)
+
+def _saveManifest(manifestFilePath, manifest):
+    """Atomically replaces the given file by the given manifest."""
+    
+    tmpFilePath = manifestFilePath + ".tmp"
+    with open(tmpFilePath, "w") as manifestFile:
+        json.dump(manifest, manifestFile, indent=2, sort_keys=True)
+    os.replace(tmpFilePath, manifestFilePath)
+
+def _isCurrent(outDirPath, fileSizeByRelPath):
+    """
+    Returns True if all of the given files below the given directory exist and
+    have the recorded sizes.
+    """
+    
+    for relPath, size in fileSizeByRelPath.items():
+        filePath = os.path.join(outDirPath, relPath)
+        if not os.path.isfile(filePath) or os.path.getsize(filePath) != size:
+            return False
+    return True
+
+def _colNamesOutdated(
+    manifestEntry,
+    inputKey,
+    typed,
+    colNamesFull,
+    colNamesRequired,
+    outDirPath,
+    outTblRelPath
+):
+    """
+    Returns the names of the required columns of a table whose output files
+    are not current according to the given manifest entry of that table.
+    
+    If the input key, the kind of encoding (typed or not), or the full schema
+    of the table have changed, or if the
+    projected CSV file is required (outTblRelPath is not None) but not
+    current or created for other required columns, all required columns are
+    outdated, since the projected CSV file always contains all of them.
+    """
+    
+    if manifestEntry is None or \
+            manifestEntry["input"] != inputKey or \
+            manifestEntry.get("typed", False) != typed or \
+            manifestEntry["schemaFull"] != colNamesFull:
+        return list(colNamesRequired)
+    if outTblRelPath is not None and (
+        manifestEntry["tbl"] is None or
+        manifestEntry.get("tblColumns") != [
+            colName for colName in colNamesFull if colName in colNamesRequired
+        ] or
+        not _isCurrent(outDirPath, {outTblRelPath: manifestEntry["tbl"]})
+    ):
+        return list(colNamesRequired)
+    if not _isCurrent(outDirPath, manifestEntry["stats"]):
+        return list(colNamesRequired)
+    return [
+        colName
+        for colName in colNamesRequired
+        if colName not in manifestEntry["columns"] or
+            not _isCurrent(outDirPath, manifestEntry["columns"][colName])
+    ]
+
+def _fileSizes(outDirPath, relPaths):
+    """
+    Returns a dictionary mapping each of the given paths relative to the given
+    directory to the size of the respective file, if it exists.
+    """
+    
+    return {
+        relPath: os.path.getsize(os.path.join(outDirPath, relPath))
+        for relPath in relPaths
+        if os.path.isfile(os.path.join(outDirPath, relPath))
+    }
+
 def _makeDirIf(dirPath):
     """Creates the specified directory if it does not already exist."""
     
@@ -316,8 +1451,93 @@ if __name__ == "__main__":
             "and where the output files shall be stored."
         # TODO Validate existence.
     )
+    # Optional arguments.
+    parser.add_argument(
+        "--chunkSize", metavar="N", type=int, default=1 << 20,
+        help="The number of rows to process at once. Larger chunks are "
+            "faster, but require more memory. Defaults to 2^20."
+    )
+    parser.add_argument(
+        "--singlePass", action="store_true",
+        help="Parse each CSV file only once. The data elements of the "
+            "non-integer columns are written with preliminary codes, which "
+            "are replaced by the final dictionary codes in a second pass over "
+            "the binary column files. Note that integer values are written "
+            "to the projected CSV files in their canonical form in this mode."
+    )
+    parser.add_argument(
+        "--noTbls", action="store_true",
+        help="Do not create the projected CSV files in the sub-directory "
+            "'tbls_dict'. They are only required for loading the data into a "
+            "DBMS."
+    )
+    parser.add_argument(
+        "--inputKey", metavar="KEY",
+        help="A key identifying the contents of all input CSV files, e.g., "
+            "the parameters they were generated with. By default, each CSV "
+            "file is identified by a hash of its contents."
+    )
+    parser.add_argument(
+        "--check", action="store_true",
+        help="Do not encode anything, but only check if the outputs for all "
+            "tables in schemaRequiredFile are current. Exits with status 0 if "
+            "they are and with status 1 otherwise. Requires --inputKey if "
+            "the input CSV files do not exist."
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Encode all required columns, even if their outputs are current."
+    )
+    parser.add_argument(
+        "--jobs", metavar="N", type=int, default=1,
+        help="The number of worker processes. With more than one job, the "
+            "tables are encoded concurrently and large tables are split into "
+            "ranges of rows, which are encoded concurrently as well. Defaults "
+            "to 1."
+    )
+    parser.add_argument(
+        "--minRangeSize", metavar="BYTES", type=int, default=1 << 26,
+        help="The minimum size of the ranges large tables are split into "
+            "when using more than one job. Defaults to 2^26 (64 MiB)."
+    )
+    parser.add_argument(
+        "--typed", action="store_true",
+        help="Encode signed integers, fixed-point decimals, and dates without "
+            "a dictionary (see above). By default, only unsigned integers "
+            "are."
+    )
+    parser.add_argument(
+        "--sampleSize", metavar="N", type=int, default=10000,
+        help="The number of rows at the beginning of each CSV file used to "
+            "determine the types of its columns. Defaults to 10000."
+    )
     args = parser.parse_args()
     
+    if args.chunkSize < 1:
+        raise RuntimeError(
+            "the chunk size must be positive, but it is {}".format(
+                args.chunkSize
+            )
+        )
+    if args.jobs < 1:
+        raise RuntimeError(
+            "the number of jobs must be positive, but it is {}".format(
+                args.jobs
+            )
+        )
+    if args.sampleSize < 1:
+        raise RuntimeError(
+            "the sample size must be positive, but it is {}".format(
+                args.sampleSize
+            )
+        )
+    if args.minRangeSize < 1:
+        raise RuntimeError(
+            "the minimum range size must be positive, but it is {}".format(
+                args.minRangeSize
+            )
+        )
+    
     # -------------------------------------------------------------------------
     # Actual work
     # -------------------------------------------------------------------------
@@ -327,28 +1547,172 @@ if __name__ == "__main__":
     outColDirPath  = os.path.join(args.outDirPath, "cols_dict")
     outStatDirPath = os.path.join(args.outDirPath, "stats_dict")
     
-    _makeDirIf(outTblDirPath)
-    _makeDirIf(outDictDirPath)
-    _makeDirIf(outColDirPath)
-    _makeDirIf(outStatDirPath)
-
     with open(args.schemaFullFilePath, "r") as schemaFile:
         schemaFull = json.load(schemaFile)
     with open(args.schemaRequiredFilePath, "r") as schemaFile:
         schemaRequired = json.load(schemaFile)
     
+    # Which outputs are current is recorded in a manifest. A table's outputs
+    # are current if they were created from the same input and full schema.
+    # Then, only the columns newly added to the required schema need to be
+    # encoded.
+    manifestFilePath = os.path.join(args.outDirPath, _MANIFEST_FILENAME)
+    manifest = _loadManifest(manifestFilePath)
+    
+    if args.check:
+        isCurrent = True
+        for tblName, colNamesRequired in schemaRequired.items():
+            inTblFileName = "{}.tbl".format(tblName)
+            inTblFilePath = os.path.join(args.inTblDirPath, inTblFileName)
+            if args.inputKey is not None:
+                inputKey = args.inputKey
+            elif os.path.isfile(inTblFilePath):
+                inputKey = _hashFile(inTblFilePath)
+            else:
+                inputKey = None
+            colNamesOutdated = _colNamesOutdated(
+                manifest["tables"].get(tblName),
+                inputKey,
+                args.typed,
+                schemaFull[tblName],
+                colNamesRequired,
+                args.outDirPath,
+                None if args.noTbls else
+                    os.path.join("tbls_dict", inTblFileName)
+            )
+            if inputKey is None or len(colNamesOutdated):
+                print("Table '{}' is outdated.".format(tblName))
+                isCurrent = False
+        sys.exit(0 if isCurrent else 1)
+    
+    if not args.noTbls:
+        _makeDirIf(outTblDirPath)
+    _makeDirIf(outDictDirPath)
+    _makeDirIf(outColDirPath)
+    _makeDirIf(outStatDirPath)
+    
+    tables = []
+    outTblRelPathByTblName = {}
     fileNames = os.listdir(args.inTblDirPath)
     for inTblFileName in fileNames:
         inTblFilePath = os.path.join(args.inTblDirPath, inTblFileName)
         tblName, ext = os.path.splitext(inTblFileName)
         if ext == ".tbl" and os.path.isfile(inTblFilePath):
-            _encodeTable(
+            inputKey = args.inputKey
+            if inputKey is None:
+                inputKey = _hashFile(inTblFilePath)
+            outTblRelPath = None if args.noTbls else \
+                os.path.join("tbls_dict", inTblFileName)
+            
+            if args.force:
+                colNamesOutdated = list(schemaRequired[tblName])
+            else:
+                colNamesOutdated = _colNamesOutdated(
+                    manifest["tables"].get(tblName),
+                    inputKey,
+                    args.typed,
+                    schemaFull[tblName],
+                    schemaRequired[tblName],
+                    args.outDirPath,
+                    outTblRelPath
+                )
+            if not len(colNamesOutdated):
+                print("Table '{}' is up to date.".format(tblName))
+                continue
+            mergeStats = \
+                len(colNamesOutdated) < len(schemaRequired[tblName])
+            # If only some columns are outdated, then the projected CSV file
+            # is current (see _colNamesOutdated()) and must not be
+            # overwritten by one containing only these columns.
+            if mergeStats:
+                outTblRelPath = None
+            
+            tables.append(_Table(
                 tblName,
                 schemaFull[tblName],
-                schemaRequired[tblName],
+                colNamesOutdated,
                 inTblFilePath,
-                os.path.join(outTblDirPath, inTblFileName),
+                None if outTblRelPath is None else
+                    os.path.join(args.outDirPath, outTblRelPath),
                 outDictDirPath,
                 outColDirPath,
-                os.path.join(outStatDirPath, "{}.json".format(tblName))
+                os.path.join(outStatDirPath, "{}.json".format(tblName)),
+                min(
+                    args.jobs,
+                    max(1, os.path.getsize(inTblFilePath) // args.minRangeSize)
+                ),
+                args.singlePass,
+                mergeStats,
+                args.typed,
+                args.sampleSize
+            ))
+            
+            # Forget the outputs of this table until they have been created.
+            if mergeStats:
+                manifestEntry = manifest["tables"][tblName]
+            else:
+                manifestEntry = {
+                    "input": inputKey,
+                    "typed": args.typed,
+                    "schemaFull": schemaFull[tblName],
+                    "columns": {},
+                    "stats": {},
+                    "tbl": None,
+                    "tblColumns": None,
+                }
+            for colName in colNamesOutdated:
+                manifestEntry["columns"].pop(colName, None)
+            manifest["tables"][tblName] = manifestEntry
+            outTblRelPathByTblName[tblName] = outTblRelPath
+    
+    # Remove the outdated entries before any output file is overwritten.
+    _saveManifest(manifestFilePath, manifest)
+    
+    if args.jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+            _encodeTables(tables, executor, args.chunkSize)
+    else:
+        _encodeTables(tables, None, args.chunkSize)
+    
+    # Record the outputs which have been created.
+    for tbl in tables:
+        manifestEntry = manifest["tables"][tbl.tblName]
+        for idx in tbl.colIdxsRequired:
+            colName = tbl.colNamesFull[idx]
+            manifestEntry["columns"][colName] = _fileSizes(
+                args.outDirPath,
+                [
+                    os.path.join(
+                        "cols_dict",
+                        "{}.{}.uncompr_f.bin".format(tbl.tblName, colName)
+                    ),
+                    os.path.join(
+                        "dicts", "{}.{}.dict".format(tbl.tblName, colName)
+                    ),
+                    os.path.join(
+                        "dicts", "{}.{}.dictbin".format(tbl.tblName, colName)
+                    ),
+                    os.path.join(
+                        "dicts",
+                        "{}.{}.type.json".format(tbl.tblName, colName)
+                    ),
+                ]
             )
+        manifestEntry["stats"] = _fileSizes(
+            args.outDirPath,
+            [
+                os.path.join("stats_dict", "{}.json".format(tbl.tblName)),
+                os.path.join(
+                    "stats_dict", "{}.colstats.json".format(tbl.tblName)
+                ),
+            ]
+        )
+        outTblRelPath = outTblRelPathByTblName[tbl.tblName]
+        if outTblRelPath is not None:
+            manifestEntry["tbl"] = _fileSizes(
+                args.outDirPath, [outTblRelPath]
+            )[outTblRelPath]
+            manifestEntry["tblColumns"] = [
+                tbl.colNamesFull[idx] for idx in tbl.colIdxsRequired
+            ]
+    _saveManifest(manifestFilePath, manifest)
@@ -25,6 +25,11 @@ dictionary-coded dataset. Such a dataset can be obtained using MorphStore's
 dbdict.py. Furthermore, the modified SQL query contains some diagnostic
 comments.
 
+In the batch mode, multiple SQL files are rewritten at once to an output
+directory, or multiple queries separated by NUL characters are read from stdin
+and printed to stdout. This saves the start-up of the interpreter and the
+search for dictionaries per query.
+
 In particular, comparisons of a column with a string literal are searched for.
 The column name determines the dictionary file to use, while the string literal
 is the value whose code is looked up in that file. The following forms of
@@ -32,22 +37,51 @@ comparisons are supported:
 - [tbl.]col op 'foo'
 - 'foo' op [tbl.]col
 - [tbl.]col BETWEEN 'foo' AND 'bar'
-Whereby op is a comparison operator in <, <=, =, >=, >, !=, <>. Note that the
-LIKE operator is not supported, since it cannot always be applied to dictionary
-codes.
+- [tbl.]col [NOT] LIKE 'foo%'
+Whereby op is a comparison operator in <, <=, =, >=, >, !=, <>. A string
+literal may be preceded by the keyword DATE.
+
+Since the dictionaries are order-preserving, the operators <, <=, >=, >, and
+BETWEEN also work for values not contained in the dictionary: The value is
+replaced by the code of the next greater value in the dictionary and the
+operator is adapted if necessary, e.g., "col <= 'foo'" becomes "col < 42" if
+'foo' is not contained in the dictionary and 42 is the code of the next
+greater value. Comparisons using LIKE are only supported if the pattern is a
+prefix, i.e., if its only wildcard is a trailing "%". They are replaced by a
+BETWEEN on the range of codes of the values starting with this prefix. Note
+that this range might be empty, which is expressed by a lower bound greater
+than the upper bound.
+
+Columns encoded without a dictionary by dbdict.py's option --typed are
+supported as well. For such columns, string literals as well as numeric
+literals in the following forms of comparisons are replaced by their encoded
+value:
+- [tbl.]col op 42
+- [tbl.]col BETWEEN 4.2 AND 42
 
 A dictionary file must fulfil the following criteria:
 - Its name must have the pattern "<tablename>.<columnname>.dict".
 - It is a text file whose i-th line contains the value whose code is i, lines
   are counted starting at zero.
 - Lines are separated by the newline character "\\n".
-Such dictionary files can be obtained using MorphStore's dbdict.py.
+- The lines are sorted by code points, i.e., the dictionary is
+  order-preserving.
+If there is a binary dictionary file "<tablename>.<columnname>.dictbin" next to
+a dictionary file, then values are looked up in the former by a binary search
+on the memory-mapped file. Otherwise, the dictionary file is read entirely.
+Either way, recently used dictionaries are kept open, such that each of them
+is read only once per query.
+Such dictionary files can be obtained using MorphStore's dbdict.py. The same
+holds for the type files "<tablename>.<columnname>.type.json" of typed
+columns.
 
 Known limitations:
 - The substitution is done using regular expressions and there are certainly
   ways to fool these.
-- This script is not tailored for efficiency.
 - Aliases as in "FROM table1 AS t1" are not supported yet.
+- Literals of typed columns are only replaced in comparisons. Arithmetic
+  involving typed columns, e.g., multiplying two decimals, is not adapted to
+  their scales and offsets.
 """
 
 # TODO Make diagnostic comments optional.
@@ -56,11 +90,25 @@ Known limitations:
 
 
 import argparse
+import bisect
+import datetime
+import decimal
+import functools
+import json
+import mmap
 import os
 import re
+import struct
 import sys
 
 
+# The magic number at the beginning of each binary dictionary file.
+_DICTBIN_MAGIC = b"MSDICT01"
+
+# The number of dictionaries to keep open.
+_DICT_CACHE_SIZE = 64
+
+
 # *****************************************************************************
 # Some helper functions.
 # *****************************************************************************
@@ -94,29 +142,174 @@ def _findTblName(colName):
         )
     return resTblName
 
-def _findValCode(tblName, colName, valStr):
+def _findTypedTblName(colName):
     """
-    Determines the code of the given string value in the dictionary of the
-    given column from the given table.
+    Determines the name of the table which has a typed column with the
+    specified name. Returns None if there is no such table and raises an error
+    if there are multiple such tables.
+    """
+    
+    tblNames = [
+        tblName
+        for tblName, colName2 in typeByTblAndColName
+        if colName2 == colName
+    ]
+    if len(tblNames) > 1:
+        raise RuntimeError(
+            "column name '{}' is ambiguous, could mean '{}.{}' or "
+            "'{}.{}'".format(
+                colName, tblNames[0], colName, tblNames[1], colName
+            )
+        )
+    return tblNames[0] if len(tblNames) else None
+
+def _encodeTyped(tblName, colName, valStr):
+    """
+    Determines the encoded value of the given value of the given typed column
+    from the given table.
+    """
+    
+    typeInfo = typeByTblAndColName[(tblName, colName)]
+    colType = typeInfo["type"]
+    try:
+        if colType == "int":
+            val = int(valStr)
+        elif colType == "decimal":
+            scaled = decimal.Decimal(valStr).scaleb(typeInfo["scale"])
+            if scaled != scaled.to_integral_value():
+                raise ValueError(
+                    "more than {} fractional digits".format(typeInfo["scale"])
+                )
+            val = int(scaled)
+        elif colType == "date":
+            val = (
+                datetime.date.fromisoformat(valStr) -
+                datetime.date(1970, 1, 1)
+            ).days
+        else:
+            raise RuntimeError("unsupported type: '{}'".format(colType))
+    except (ValueError, decimal.InvalidOperation) as e:
+        raise RuntimeError(
+            "value '{}' does not match the type '{}' of column "
+            "'{}.{}' ({})".format(valStr, colType, tblName, colName, e)
+        )
+    return val - typeInfo["offset"]
+
+class _DictBin:
+    """
+    A sorted dictionary stored in a memory-mapped binary dictionary file. The
+    i-th element is the value whose code is i.
+    """
+    
+    def __init__(self, dictBinFilePath):
+        with open(dictBinFilePath, "rb") as dictBinFile:
+            self._buf = mmap.mmap(
+                dictBinFile.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        if self._buf[:len(_DICTBIN_MAGIC)] != _DICTBIN_MAGIC:
+            raise RuntimeError(
+                "'{}' is not a binary dictionary file".format(dictBinFilePath)
+            )
+        self._count = struct.unpack_from(
+            "<Q", self._buf, len(_DICTBIN_MAGIC)
+        )[0]
+        self._offsetsPos = len(_DICTBIN_MAGIC) + 8
+        self._heapPos = self._offsetsPos + (self._count + 1) * 8
+        
+    def __len__(self):
+        return self._count
+    
+    def __getitem__(self, idx):
+        if not 0 <= idx < self._count:
+            raise IndexError(idx)
+        start, end = struct.unpack_from(
+            "<QQ", self._buf, self._offsetsPos + idx * 8
+        )
+        return self._buf[
+            self._heapPos + start:self._heapPos + end
+        ].decode("utf-8")
+
+@functools.lru_cache(maxsize=_DICT_CACHE_SIZE)
+def _getDict(tblName, colName):
+    """
+    Returns the sorted dictionary of the given column from the given table as
+    a sequence whose i-th element is the value whose code is i. The binary
+    dictionary file is used if it exists.
     """
     
-    valCode = None
     dictFilePath = os.path.join(args.dictDirPath, "{}.{}.dict".format(
         tblName, colName
     ))
+    if os.path.isfile(dictFilePath + "bin"):
+        return _DictBin(dictFilePath + "bin")
     with open(dictFilePath, "r") as dictFile:
-        for idx, line in enumerate(dictFile):
-            if line[-1] == "\n":
-                line = line[:-1]
-            if line == valStr:
-                valCode = idx
-                break
-    if valCode is None:
+        return [
+            line[:-1] if line[-1] == "\n" else line for line in dictFile
+        ]
+
+def _findCodeBounds(tblName, colName, valStr):
+    """
+    Determines the number of values less than the given string value and the
+    number of values less than or equal to the given string value in the
+    dictionary of the given column from the given table. If these numbers
+    differ, then the former is the code of the given value.
+    """
+    
+    if (tblName, colName) in typeByTblAndColName:
+        valCode = _encodeTyped(tblName, colName, valStr)
+        return valCode, valCode + 1
+    
+    # Dictionaries are sorted by code points, just like Python's strings.
+    d = _getDict(tblName, colName)
+    lo = bisect.bisect_left(d, valStr)
+    hi = lo + 1 if lo < len(d) and d[lo] == valStr else lo
+    return lo, hi
+
+def _findPrefixCodeBounds(tblName, colName, prefix):
+    """
+    Determines the range [lo, hi) of the codes of all values starting with the
+    given prefix in the dictionary of the given column from the given table.
+    """
+    
+    # The values starting with the prefix are the first values not less than
+    # the prefix.
+    d = _getDict(tblName, colName)
+    lo = bisect.bisect_left(d, prefix)
+    hi = bisect.bisect_left(
+        d, True, lo=lo, key=lambda val: not val.startswith(prefix)
+    )
+    return lo, hi
+
+def _findValCode(tblName, colName, valStr):
+    """
+    Determines the code of the given string value in the dictionary of the
+    given column from the given table.
+    """
+    
+    lo, hi = _findCodeBounds(tblName, colName, valStr)
+    if lo == hi:
         raise RuntimeError(
             "could not find value '{}' in the dictionary of column "
             "'{}.{}'".format(valStr, tblName, colName)
         )
-    return valCode
+    return lo
+
+def _findCmpCode(tblName, colName, op, valStr):
+    """
+    Determines the code to compare the given column from the given table with
+    instead of the given string value, and the comparison operator to use, for
+    a comparison of the form "col op 'foo'". The value does not need to be
+    contained in the dictionary for the operators <, <=, >=, >.
+    """
+    
+    lo, hi = _findCodeBounds(tblName, colName, valStr)
+    if lo < hi:
+        return op, lo
+    if op in ["<", "<="]:
+        return "<", lo
+    if op in [">=", ">"]:
+        return ">=", lo
+    return op, _findValCode(tblName, colName, valStr)
 
 
 # *****************************************************************************
@@ -129,14 +322,18 @@ def _findValCode(tblName, colName, valStr):
 # ends with the same quoatation mark. Between the quoation marks there is the
 # actual value. Since a full-pattern can contain more than one string literal
 # (see BETWEEN), this is a format string allowing the insertion of an index.
-_fspStrLit = "(?P<quote{idx}>[\"'`])(?P<valStr{idx}>.+?)(?P=quote{idx})"
+_fspStrLit = \
+    "(?:DATE\\s*)?(?P<quote{idx}>[\"'`])(?P<valStr{idx}>.+?)(?P=quote{idx})"
+
+# Sub-pattern for a numeric literal, analogous to the one for string literals.
+_fspNumLit = r"(?P<valStr{idx}>-?[0-9]+(?:\.[0-9]+)?)\b"
 
 # Sub-pattern for a column name, optionally preceeded by a table name and a
 # dot.
-_pTblCol = r"(?:(?P<tblName>\w+)\s*\.\s*)?(?P<colName>\w+)"
+_pTblCol = r"(?P<tblCol>(?:(?P<tblName>\w+)\s*\.\s*)?(?P<colName>\w+))"
 
 # Sub-pattern for a comparison operator.
-_pOp = r"(?P<op><|<=|=|>=|>|!=|<>|LIKE)"
+_pOp = r"(?P<op><|<=|=|>=|>|!=|<>|NOT\s+LIKE|LIKE)"
 
 # Full-patterns, composed of the sub-patterns above.
 
@@ -158,6 +355,24 @@ _pLitCmpCol = re.compile(
     re.IGNORECASE, # needed for "LIKE"
 )
 
+# Pattern for a comparison of a column (on the left hand side) with a single
+# numeric literal (on the right hand side), e.g., "tbl.col = 42".
+_pColCmpNum = re.compile(
+    r"(?P<prefix>{}\s*{}\s*){}".format(
+        _pTblCol, _pOp, _fspNumLit.format(idx=""),
+    ),
+    re.IGNORECASE, # needed for "LIKE"
+)
+
+# Pattern for a comparison of a column with two numeric literals using a
+# BETWEEN operator, e.g. "tbl.col BETWEEN 4.2 AND 42".
+_pColBetweenNum = re.compile(
+    r"(?P<prefix>{}\s+BETWEEN\s*){}(?P<infix>\s*AND\s*){}".format(
+        _pTblCol, _fspNumLit.format(idx=0), _fspNumLit.format(idx=1)
+    ),
+    re.IGNORECASE, # needed for "BETWEEN" and "AND"
+)
+
 # Pattern for a comparison of a column with two string literals using a BETWEEN
 # operator, e.g. "tbl.col BETWEEN 'foo' AND 'bar'".
 _pColBetween = re.compile(
@@ -183,25 +398,129 @@ def _getTblAndColName(match):
         tblName = _findTblName(colName)
     return tblName, colName
 
+def _isLike(match):
+    """
+    Returns True if the comparison operator captured by the given regex match
+    is a "LIKE" or a "NOT LIKE".
+    """
+    return match.group("op").upper().endswith("LIKE")
+
 def _checkNotLike(match):
     """
     Raises an error if the comparison operator captured by the given regex
-    match is a "LIKE", because we do not support this.
+    match is a "LIKE" or a "NOT LIKE", because we do not support this here.
     """
-    if match.group("op").upper() == "LIKE":
-        raise RuntimeError("comparisons using LIKE are not supported")
+    if _isLike(match):
+        raise RuntimeError(
+            "comparisons using LIKE are only supported in the form "
+            "\"col LIKE 'foo%'\" on dictionary-coded columns"
+        )
+
+# The operator to use if the operands of a comparison are swapped.
+_mirrorOp = {
+    "<": ">", "<=": ">=", "=": "=", ">=": "<=", ">": "<",
+    "!=": "!=", "<>": "<>",
+}
+
+def _getTypedTblAndColName(match):
+    """
+    Extracts the table name and column name from a regex match. Returns None
+    as the table name if the column is not a typed column.
+    """
+    tblName = match.group("tblName")
+    colName = match.group("colName")
+    if tblName is None:
+        tblName = _findTypedTblName(colName)
+    elif (tblName, colName) not in typeByTblAndColName:
+        tblName = None
+    return tblName, colName
+
+def _replaceColCmpNum(match):
+    """
+    Replacement function for comparisons of the form "tbl.col = 42" (see
+    _pColCmpNum). Comparisons of columns which are not typed are kept.
+    """
+    tblName, colName = _getTypedTblAndColName(match)
+    if tblName is None:
+        return match.group(0)
+    _checkNotLike(match)
+    valStr = match.group("valStr")
+    valCode = _encodeTyped(tblName, colName, valStr)
+    return "{}{} /*{}.{} {}*/".format(
+        match.group("prefix"), valCode, tblName, colName, valStr
+    )
+
+def _replaceColBetweenNum(match):
+    """
+    Replacement function for comparisons of the form "tbl.col BETWEEN 4.2 AND
+    42" (see _pColBetweenNum). Comparisons of columns which are not typed are
+    kept.
+    """
+    tblName, colName = _getTypedTblAndColName(match)
+    if tblName is None:
+        return match.group(0)
+    valStr0 = match.group("valStr0")
+    valStr1 = match.group("valStr1")
+    valCode0 = _encodeTyped(tblName, colName, valStr0)
+    valCode1 = _encodeTyped(tblName, colName, valStr1)
+    return "{}{} /*{}.{} {}*/{}{} /*{}.{} {}*/".format(
+        match.group("prefix"),
+        valCode0,
+        tblName,
+        colName,
+        valStr0,
+        match.group("infix"),
+        valCode1,
+        tblName,
+        colName,
+        valStr1,
+    )
+
+def _replaceColLike(match, tblName, colName):
+    """
+    Replacement function for comparisons of the form "tbl.col LIKE 'foo%'"
+    (see _pColCmpLit).
+    """
+    valStr = match.group("valStr")
+    prefix = valStr[:-1] if valStr.endswith("%") else valStr
+    if "%" in prefix or "_" in prefix or \
+            (tblName, colName) in typeByTblAndColName:
+        _checkNotLike(match)
+    if prefix == valStr:
+        # Without a wildcard, LIKE is an equality.
+        lo = _findValCode(tblName, colName, valStr)
+        hi = lo + 1
+    else:
+        lo, hi = _findPrefixCodeBounds(tblName, colName, prefix)
+    isNot = match.group("op").upper().startswith("NOT")
+    return "{} {}BETWEEN {} AND {} /*{}.{} {}LIKE '{}'*/".format(
+        match.group("tblCol"),
+        "NOT " if isNot else "",
+        lo,
+        hi - 1,
+        tblName,
+        colName,
+        "NOT " if isNot else "",
+        valStr,
+    )
 
 def _replaceColCmpLit(match):
     """
     Replacement function for comparisons of the form "tbl.col = 'foo'" (see
     _pColCmpLit).
     """
-    _checkNotLike(match)
     tblName, colName = _getTblAndColName(match)
+    if _isLike(match):
+        return _replaceColLike(match, tblName, colName)
     valStr = match.group("valStr")
-    valCode = _findValCode(tblName, colName, valStr)
+    op = match.group("op")
+    newOp, valCode = _findCmpCode(tblName, colName, op, valStr)
+    if newOp == op:
+        prefix = match.group("prefix")
+    else:
+        prefix = "{} {} ".format(match.group("tblCol"), newOp)
     return "{}{} /*{}.{} '{}'*/".format(
-        match.group("prefix"), valCode, tblName, colName, valStr
+        prefix, valCode, tblName, colName, valStr
     )
 
 def _replaceLitCmpCol(match):
@@ -212,9 +531,15 @@ def _replaceLitCmpCol(match):
     _checkNotLike(match)
     tblName, colName = _getTblAndColName(match)
     valStr = match.group("valStr")
-    valCode = _findValCode(tblName, colName, valStr)
+    op = match.group("op")
+    newOp, valCode = _findCmpCode(tblName, colName, _mirrorOp[op], valStr)
+    newOp = _mirrorOp[newOp]
+    if newOp == op:
+        suffix = match.group("suffix")
+    else:
+        suffix = " {} {}".format(newOp, match.group("tblCol"))
     return "{} /*{}.{} '{}'*/{}".format(
-        valCode, tblName, colName, valStr, match.group("suffix")
+        valCode, tblName, colName, valStr, suffix
     )
 
 def _replaceColBetween(match):
@@ -225,8 +550,10 @@ def _replaceColBetween(match):
     tblName, colName = _getTblAndColName(match)
     valStr0 = match.group("valStr0")
     valStr1 = match.group("valStr1")
-    valCode0 = _findValCode(tblName, colName, valStr0)
-    valCode1 = _findValCode(tblName, colName, valStr1)
+    # The bounds do not need to be contained in the dictionary.
+    valCode0, _ = _findCodeBounds(tblName, colName, valStr0)
+    _, valCode1 = _findCodeBounds(tblName, colName, valStr1)
+    valCode1 -= 1
     return "{}{} /*{}.{} '{}'*/ {}{} /*{}.{} '{}'*/".format(
         match.group("prefix"),
         valCode0,
@@ -241,6 +568,55 @@ def _replaceColBetween(match):
     )
 
 
+# *****************************************************************************
+# Functions for rewriting entire queries.
+# *****************************************************************************
+
+def _loadDictMetadata(dictDirPath):
+    """
+    Finds out for which columns of which tables there are dictionaries or
+    type files in the given directory and loads the type files.
+    """
+    
+    global colNamesByTblNames
+    global typeByTblAndColName
+    
+    pDictFileName = re.compile(r"(\w+).(\w+).dict")
+    pTypeFileName = re.compile(r"(\w+)\.(\w+)\.type\.json")
+    colNamesByTblNames = {}
+    typeByTblAndColName = {}
+    for fileName in os.listdir(dictDirPath):
+        m = pDictFileName.fullmatch(fileName)
+        if m is None:
+            m = pTypeFileName.fullmatch(fileName)
+            if m is None:
+                continue
+            with open(os.path.join(dictDirPath, fileName), "r") as f:
+                typeByTblAndColName[(m.group(1), m.group(2))] = json.load(f)
+        tblName = m.group(1)
+        colName = m.group(2)
+        if tblName not in colNamesByTblNames:
+            colNamesByTblNames[tblName] = []
+        colNamesByTblNames[tblName].append(colName)
+
+def _rewrite(sql):
+    """
+    Replaces string literals in the given query by their code in the
+    respective column's dictionary and returns the resulting query, preceded
+    by a comment.
+    """
+    
+    # Numeric literals first, since the replacements of string literals are
+    # numeric literals.
+    sql = _pColBetweenNum.sub(_replaceColBetweenNum, sql)
+    sql = _pColCmpNum    .sub(_replaceColCmpNum    , sql)
+    sql = _pColCmpLit .sub(_replaceColCmpLit , sql)
+    sql = _pLitCmpCol .sub(_replaceLitCmpCol , sql)
+    sql = _pColBetween.sub(_replaceColBetween, sql)
+    return "-- String literals automatically substituted for dictionary " \
+        "codes by {}\n{}".format(os.path.basename(sys.argv[0]), sql)
+
+
 # *****************************************************************************
 # Main program.
 # *****************************************************************************
@@ -272,39 +648,88 @@ if __name__ == "__main__":
             )
         # TODO validate existence
     )
+    # Optional arguments for the batch mode.
+    parser.add_argument(
+        "--sqlFiles", dest="sqlFilePaths", nargs="+", metavar="FILE",
+        help="The paths of multiple SQL files to be rewritten at once. "
+            "Requires --outDir."
+    )
+    parser.add_argument(
+        "--sqlDir", dest="sqlDirPath", metavar="DIR",
+        help="A directory all of whose SQL files (extension '.sql') shall be "
+            "rewritten at once. Requires --outDir."
+    )
+    parser.add_argument(
+        "--outDir", dest="outDirPath", metavar="DIR",
+        help="The directory where the rewritten SQL files shall be stored "
+            "under their original file names, if --sqlFiles or --sqlDir is "
+            "specified. Created if it does not exist."
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Read multiple queries from stdin, which are separated by a NUL "
+            "character. The rewritten queries are printed to stdout, "
+            "separated by a NUL character as well."
+    )
     args = parser.parse_args()
 
     if args.sqlFilePath == FROM_STDIN:
         # 0 is the file descriptor of stdin and can be used with open().
         args.sqlFilePath = 0
+    
+    isBatch = args.sqlFilePaths is not None or args.sqlDirPath is not None
+    if isBatch and args.outDirPath is None:
+        raise RuntimeError("--sqlFiles and --sqlDir require --outDir")
+    if isBatch and args.stream:
+        raise RuntimeError(
+            "--stream cannot be combined with --sqlFiles or --sqlDir"
+        )
 
     # -------------------------------------------------------------------------
     # Actual work
     # -------------------------------------------------------------------------
     
-    # Find out for which columns of which tables there are dictionaries.
-    pDictFileName = re.compile(r"(\w+).(\w+).dict")
-    colNamesByTblNames = {}
-    for fileName in os.listdir(args.dictDirPath):
-        m = pDictFileName.fullmatch(fileName)
-        if m is not None:
-            tblName = m.group(1)
-            colName = m.group(2)
-            if tblName not in colNamesByTblNames:
-                colNamesByTblNames[tblName] = []
-            colNamesByTblNames[tblName].append(colName)
-
-    # Read the query from the SQL file and replace string literals by their
-    # code in the respective column's dictionary. Print the result to stdout.
-    with open(args.sqlFilePath, "r") as sqlFile:
-        sql = sqlFile.read()
-        if sql == "":
-            sys.exit(1)
-        sql = _pColCmpLit .sub(_replaceColCmpLit , sql)
-        sql = _pLitCmpCol .sub(_replaceLitCmpCol , sql)
-        sql = _pColBetween.sub(_replaceColBetween, sql)
+    # The dictionaries are found only once for all queries.
+    _loadDictMetadata(args.dictDirPath)
+    
+    if isBatch:
+        # Rewrite each SQL file to a file of the same name in the output
+        # directory.
+        sqlFilePaths = list(args.sqlFilePaths or [])
+        if args.sqlDirPath is not None:
+            sqlFilePaths.extend(sorted(
+                os.path.join(args.sqlDirPath, fileName)
+                for fileName in os.listdir(args.sqlDirPath)
+                if fileName.endswith(".sql")
+            ))
+        os.makedirs(args.outDirPath, exist_ok=True)
+        for sqlFilePath in sqlFilePaths:
+            with open(sqlFilePath, "r") as sqlFile:
+                sql = sqlFile.read()
+            if sql == "":
+                raise RuntimeError(
+                    "the SQL file '{}' is empty".format(sqlFilePath)
+                )
+            outSqlFilePath = os.path.join(
+                args.outDirPath, os.path.basename(sqlFilePath)
+            )
+            with open(outSqlFilePath, "w") as outSqlFile:
+                outSqlFile.write(_rewrite(sql))
+    elif args.stream:
+        # Rewrite each query from stdin, skipping empty ones, e.g., after a
+        # trailing separator.
+        sqls = sys.stdin.read().split("\0")
         print(
-            "-- String literals automatically substituted for dictionary "
-            "codes by {}".format(os.path.basename(sys.argv[0]))
+            "\0".join(_rewrite(sql) for sql in sqls if sql.strip() != ""),
+            end=""
         )
-        print(sql, end="")
\ No newline at end of file
+    else:
+        # Read the query from the SQL file and replace string literals by
+        # their code in the respective column's dictionary. Print the result
+        # to stdout.
+        with open(args.sqlFilePath, "r") as sqlFile:
+            sql = sqlFile.read()
+            if sql == "":
+                sys.exit(1)
+            print(_rewrite(sql), end="")
+
@@ -0,0 +1,232 @@
+#*********************************************************************************************
+# Copyright (C) 2019 by MorphStore-Team                                                      *
+#                                                                                            *
+# This file is part of MorphStore - a compression aware vectorized column store.             *
+#                                                                                            *
+# This program is free software: you can redistribute it and/or modify it under the          *
+# terms of the GNU General Public License as published by the Free Software Foundation,      *
+# either version 3 of the License, or (at your option) any later version.                    *
+#                                                                                            *
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;  *
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  *
+# See the GNU General Public License for more details.                                       *
+#                                                                                            *
+# You should have received a copy of the GNU General Public License along with this program. *
+# If not, see <http://www.gnu.org/licenses/>.                                                *
+#*********************************************************************************************
+
+"""
+Tests for dbdict.py, which is run as a script on a small table.
+
+Run with "python -m unittest test_dbdict" in this directory.
+"""
+
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+import dbdict
+
+
+_DBDICT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dbdict.py")
+
+_ROWS = [
+    ("3", "b", "x"),
+    ("1", "a", "z"),
+    ("2", "b", "y"),
+]
+
+
+class TestAddColumn(unittest.TestCase):
+    """
+    Adding a column to the required schema when the outputs of the table are
+    current otherwise.
+    """
+
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.inDirPath = os.path.join(self.tmpDir.name, "in")
+        self.outDirPath = os.path.join(self.tmpDir.name, "out")
+        os.mkdir(self.inDirPath)
+        os.mkdir(self.outDirPath)
+        with open(os.path.join(self.inDirPath, "t.tbl"), "w") as inTblFile:
+            for row in _ROWS:
+                inTblFile.write("|".join(row) + "|\n")
+        self.schemaFullFilePath = self._writeSchema("full", ["a", "b", "c"])
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def _writeSchema(self, name, colNames):
+        schemaFilePath = os.path.join(self.tmpDir.name, name + ".json")
+        with open(schemaFilePath, "w") as schemaFile:
+            json.dump({"t": colNames}, schemaFile)
+        return schemaFilePath
+
+    def _run(self, colNamesRequired, *flags):
+        return subprocess.run(
+            [
+                sys.executable, _DBDICT, self.schemaFullFilePath,
+                self._writeSchema("required", colNamesRequired),
+                self.inDirPath, self.outDirPath, "--inputKey", "k"
+            ] + list(flags),
+            stdout=subprocess.PIPE, universal_newlines=True
+        )
+
+    def _readTbl(self):
+        with open(os.path.join(self.outDirPath, "tbls_dict", "t.tbl")) as f:
+            return [line.rstrip("\n").split("|") for line in f]
+
+    def _checkStats(self, colNames):
+        with open(
+            os.path.join(self.outDirPath, "stats_dict", "t.colstats.json")
+        ) as colStatFile:
+            self.assertEqual(list(json.load(colStatFile)), colNames)
+        for colName in colNames:
+            self.assertTrue(os.path.isfile(os.path.join(
+                self.outDirPath, "cols_dict",
+                "t.{}.uncompr_f.bin".format(colName)
+            )))
+
+    def testWithTbls(self):
+        self.assertEqual(self._run(["a", "b"]).returncode, 0)
+        self.assertEqual(self._readTbl(), [["3", "1"], ["1", "0"], ["2", "1"]])
+
+        self.assertEqual(self._run(["a", "b", "c"], "--check").returncode, 1)
+        res = self._run(["a", "b", "c"])
+        self.assertEqual(res.returncode, 0)
+        # The projected CSV file contains all required columns.
+        self.assertIn("3/3 columns required.", res.stdout)
+        self.assertEqual(
+            self._readTbl(),
+            [["3", "1", "0"], ["1", "0", "2"], ["2", "1", "1"]]
+        )
+        self._checkStats(["a", "b", "c"])
+        self.assertEqual(self._run(["a", "b", "c"], "--check").returncode, 0)
+
+        # Removing a column makes the projected CSV file outdated as well.
+        self.assertEqual(self._run(["a", "c"], "--check").returncode, 1)
+        self.assertEqual(self._run(["a", "c"]).returncode, 0)
+        self.assertEqual(self._readTbl(), [["3", "0"], ["1", "2"], ["2", "1"]])
+
+    def testWithoutTbls(self):
+        self.assertEqual(self._run(["a", "b"], "--noTbls").returncode, 0)
+
+        res = self._run(["a", "b", "c"], "--noTbls")
+        self.assertEqual(res.returncode, 0)
+        # Only the new column is encoded.
+        self.assertIn("1/3 columns required.", res.stdout)
+        self._checkStats(["a", "b", "c"])
+        self.assertEqual(
+            self._run(["a", "b", "c"], "--noTbls", "--check").returncode, 0
+        )
+
+        # The projected CSV file was never created, so all columns are
+        # encoded for it.
+        self.assertEqual(self._run(["a", "b", "c"], "--check").returncode, 1)
+        res = self._run(["a", "b", "c"])
+        self.assertIn("3/3 columns required.", res.stdout)
+        self.assertEqual(
+            self._readTbl(),
+            [["3", "1", "0"], ["1", "0", "2"], ["2", "1", "1"]]
+        )
+
+    def testPartialWithTbls(self):
+        # If a column file is lost, only this column is encoded again and the
+        # current projected CSV file is kept as it is.
+        self.assertEqual(self._run(["a", "b", "c"]).returncode, 0)
+        os.remove(os.path.join(
+            self.outDirPath, "cols_dict", "t.b.uncompr_f.bin"
+        ))
+        res = self._run(["a", "b", "c"])
+        self.assertIn("1/3 columns required.", res.stdout)
+        self.assertEqual(
+            self._readTbl(),
+            [["3", "1", "0"], ["1", "0", "2"], ["2", "1", "1"]]
+        )
+        self._checkStats(["a", "b", "c"])
+        self.assertEqual(self._run(["a", "b", "c"], "--check").returncode, 0)
+
+
+class TestColStats(unittest.TestCase):
+    """
+    The number of distinct values of columns which are not dictionary coded.
+    """
+
+    def _colStats(self, vals, countRanges=3):
+        # The statistics of the ranges are merged like those of a table.
+        colStats = None
+        vals = np.asarray(vals, dtype=np.uint64)
+        for part in np.array_split(vals, countRanges):
+            colStatsOfRange = dbdict._ColStats(True)
+            colStatsOfRange.update(part)
+            if colStats is None:
+                colStats = colStatsOfRange
+            else:
+                colStats.merge(colStatsOfRange)
+        return colStats.toDict()
+
+    def testExact(self):
+        vals = np.random.default_rng(0).integers(0, 1000, 100000)
+        stats = self._colStats(vals)
+        self.assertEqual(stats["distinct"], len(np.unique(vals)))
+        self.assertTrue(stats["isDistinctExact"])
+        self.assertFalse(stats["isUnique"])
+
+    def testEstimated(self):
+        countDistinct = 8 * dbdict._DISTINCT_SKETCH_SIZE
+        vals = np.random.default_rng(0).permutation(countDistinct) * 7
+        stats = self._colStats(np.concatenate([vals, vals[:1000]]))
+        self.assertFalse(stats["isDistinctExact"])
+        self.assertAlmostEqual(
+            stats["distinct"] / countDistinct, 1, delta=0.05
+        )
+        # The uniqueness is not known for sure.
+        self.assertFalse(self._colStats(vals)["isUnique"])
+
+    def testSorted(self):
+        countDistinct = 4 * dbdict._DISTINCT_SKETCH_SIZE
+        stats = self._colStats(np.arange(countDistinct))
+        self.assertEqual(stats["distinct"], countDistinct)
+        self.assertTrue(stats["isDistinctExact"])
+        self.assertTrue(stats["isUnique"])
+        stats = self._colStats(np.repeat(np.arange(countDistinct), 2))
+        self.assertEqual(stats["distinct"], countDistinct)
+        self.assertFalse(stats["isUnique"])
+
+
+class TestTypes(unittest.TestCase):
+    """Numbers which do not fit into 64 bits."""
+
+    def testDetectTooManyDigits(self):
+        self.assertEqual(
+            dbdict._detectType(np.array(["-1", "123456789012345678"]), True),
+            ("int", 0)
+        )
+        for sample in [
+            ["-1", "1234567890123456789"],
+            ["1.5", "12345678901234567.89"],
+        ]:
+            self.assertEqual(
+                dbdict._detectType(np.array(sample), True), (None, None)
+            )
+
+    def testParseOverflow(self):
+        for colType, scale, inStrs in [
+            ("int", 0, ["1", "12345678901234567890"]),
+            ("decimal", 1, ["1.5", "1234567890123456789.8"]),
+        ]:
+            with self.assertRaisesRegex(RuntimeError, "larger sample"):
+                dbdict._parseTyped(
+                    np.array(inStrs, dtype=object), colType, scale
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -67,8 +67,13 @@ class QueryGraph:
             "nested_loop_join":"&#10781;",
             "equi_join":"&#10781;",#<sup>Hash</sup>",
             "semi_join":"&#x22c9;",#<sup>Hash</sup>",
+            "hash_join":"&#10781;",
+            "merge_join":"&#10781;",
             "calc_binary":"",
             "agg_sum":"&#931;",
+            "project_calc_sum":"&#931;&#960;",
+            "partition":"&#8970;&#8969;",
+            "concat":"&#8852;",
             #SumGrBased is missing
             "group":"&#947;",
             "group_vec": "&#947;",
@@ -107,6 +112,10 @@ class QueryGraph:
             opNode = operators.OperatorNodeNto1Join(
                 opName, self.__operator_node_smybol_map["semi_join"], self.__operator_id
             )
+        elif isinstance(op, ops.MtoNJoin) or isinstance(op, ops.MergeJoin):
+            opNode = operators.OperatorNodeMtoNJoin(
+                opName, self.__operator_node_smybol_map[opName], self.__operator_id
+            )
         elif isinstance(op, ops.CalcBinary):
             #print(operator.op, file=sys.stderr)
             opNode = operators.OperatorNodeCalcBinary(
@@ -124,8 +133,8 @@ class QueryGraph:
         self.__operator_id+=1
         columnsIn = list()
         columnsOut = list()
-        for key in op.__dict__:
-            if key.startswith("out") and key.endswith("Col"):
+        for key in op.colKeys():
+            if key.startswith("out"):
                 colName = getattr(op, key)
                 colNode = columns.columnFactory(
                     colName,
@@ -136,7 +145,7 @@ class QueryGraph:
                 )
                 columnsOut.append(colNode)
                 self.__columns.add(colNode)
-            elif key.startswith("in") and key.endswith("Col"):
+            else:
                 colName = getattr(op, key)
                 colNode = columns.columnFactory(
                     colName,
@@ -76,6 +76,18 @@ class OperatorNodeNto1Join(OperatorNode):
                 "1:N"
             )
 
+class OperatorNodeMtoNJoin(OperatorNode):
+    def __init__(self, str_operator_name, str_operator_symbol, operator_id):
+        OperatorNode.__init__(self, str_operator_name, str_operator_symbol, operator_id)
+
+    def get_symbol_str(self):
+        return \
+            "{}<FONT POINT-SIZE=\"{}\">{}</FONT>".format(
+                super().get_symbol_str(),
+                str((super().fontsize) / 2),
+                "M:N"
+            )
+
 class OperatorNodeCalcBinary(OperatorNode):
     def __init__(self, str_operator_name, str_operator_symbol, operator_id, op):
         OperatorNode.__init__(self, str_operator_name, str_operator_symbol, operator_id)
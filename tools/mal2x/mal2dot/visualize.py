@@ -1,19 +1,12 @@
 import sys
+import mal2morphstore.ir as ir
 import mal2morphstore.operators as ops
 import mal2dot.graph as graph
 
 def dotAnalyze(translationResult, str_name, str_direction="BT"):
-    columnsIn = set()
-    columnsOut = set()
-    lastOperator = None
-    for el in translationResult.prog:
-        if isinstance(el, ops.Op):
-            lastOperator = el
-            for key in el.__dict__:
-                if key.startswith("out"):
-                    columnsOut.add(getattr(el, key))
-                elif key.startswith("in"):
-                    columnsIn.add(getattr(el, key))
+    defUseGraph = ir.DefUseGraph(translationResult.prog)
+    columnsIn = set(defUseGraph.consumerIdxsByCol)
+    columnsOut = set(defUseGraph.producerIdxByCol)
     columnsResult = translationResult.resultCols
 
     columnsUsedOut = columnsOut.intersection(columnsIn)
@@ -56,16 +56,21 @@ details.
 """
 
 
+import mal2morphstore.analysis as analysis
+import mal2morphstore.cache as cache
 import mal2morphstore.compr as compr
 import mal2morphstore.formats as formats
+import mal2morphstore.fusion
 import mal2morphstore.operators as ops
 import mal2morphstore.output
 import mal2morphstore.processingstyles as ps
 import mal2morphstore.purposes as pp
+import mal2morphstore.reordering
 import mal2morphstore.translation
 
 import argparse
 import os
+import re
 import sys
 
 
@@ -85,6 +90,22 @@ def addFlagArg(parser, argName, default, helpTrue, helpFalse):
     )
     parser.set_defaults(argName=default)
 
+_SIZE_UNITS = {
+    "": 1, "B": 1,
+    "KiB": 1 << 10, "MiB": 1 << 20, "GiB": 1 << 30, "TiB": 1 << 40,
+    "KB": 10 ** 3, "MB": 10 ** 6, "GB": 10 ** 9, "TB": 10 ** 12,
+}
+
+def parseSize(str):
+    """
+    Parses a size in bytes with an optional unit, e.g., "4GiB" or "500MB".
+    """
+    
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([A-Za-z]*)", str.strip())
+    if m is None or m.group(2) not in _SIZE_UNITS:
+        raise argparse.ArgumentTypeError("invalid size: '{}'".format(str))
+    return int(float(m.group(1)) * _SIZE_UNITS[m.group(2)])
+
 if __name__ == "__main__":
     # -------------------------------------------------------------------------
     # Parsing the command line arguments
@@ -149,14 +170,26 @@ if __name__ == "__main__":
     parser.add_argument(
         "--statdir", dest="statDirPath", default=None, metavar="DIR",
         help="The path to the directory containing statistics on the base "
-            "columns as created by dbdict.py."
+            "columns as created by dbdict.py. These also determine which base "
+            "columns are unique and sorted. Without them, the facts about the "
+            "schema of the Star Schema Benchmark are assumed."
         # TODO Validate existence.
     )
+    parser.add_argument(
+        "--transcachedir", dest="transCacheDirPath", default=None,
+        metavar="DIR",
+        help="The path to a directory for caching translated programs. If "
+            "the same MAL program has already been translated with the same "
+            "query plan structure arguments and statistics, then only the "
+            "compression configuration and the C++-code generation are "
+            "done. Without this argument, nothing is cached."
+    )
     parser.add_argument(
         "--cifile", dest="colInfosFilePath", default=None, metavar="FILE",
         help="The path to the CSV file containing information on all base "
             "columns and intermediate results in the query as created by "
-            "'ssb.sh -p d'."
+            "'ssb.sh -p d'. If omitted, this information is estimated from "
+            "the statistics in the directory specified by --statdir."
         # TODO Validate existence.
     )
     
@@ -265,6 +298,17 @@ if __name__ == "__main__":
             "simple format names."
         # TODO Validate existence.
     )
+    comprArgGr.add_argument(
+        "-cbudget", dest="comprBudget", default=None, metavar="SIZE",
+        type=parseSize,
+        help="The memory budget for the peak memory footprint of all base "
+            "columns and intermediates in the query, in bytes or with one of "
+            "the units {}. Required for and only allowed for the '{}' "
+            "strategy.".format(
+                ", ".join(unit for unit in _SIZE_UNITS if unit),
+                compr.CS_BUDGET,
+            )
+    )
     
     # Query plan structure arguments
     structArgGr = parser.add_argument_group(
@@ -290,6 +334,35 @@ if __name__ == "__main__":
             "outputs. Otherwise, the normal/old intersect-operator is used, "
             "which does not support compression. Defaults to False."
     )
+    structArgGr.add_argument(
+        "--useMergeJoin", dest="structUseMergeJoin", metavar="BOOL",
+        choices=trueVals+falseVals, default=falseVals[0],
+        help="Whether to use a sort-merge-join for equi-joins whose inputs "
+            "are both known to be sorted. If set to False, all equi-joins are "
+            "hash-joins. Joins without a unique input (M:N-joins) and "
+            "sort-merge-joins require uncompressed inputs and outputs. "
+            "Defaults to False."
+    )
+    structArgGr.add_argument(
+        "--reorderSelections", dest="structReorderSelections", metavar="BOOL",
+        choices=trueVals+falseVals, default=falseVals[0],
+        help="Whether to reorder conjunctive selections on the same table by "
+            "their estimated selectivities, such that the most selective "
+            "predicate is evaluated first and the others are evaluated on "
+            "its candidates. The selectivities are estimated from the "
+            "statistics in the directory specified by --statdir or, if "
+            "available, from the file specified by --cifile. Defaults to "
+            "False."
+    )
+    structArgGr.add_argument(
+        "--useFusion", dest="structUseFusion", metavar="BOOL",
+        choices=trueVals+falseVals, default=falseVals[0],
+        help="Whether to fuse chains of operators whose intermediates are "
+            "used only once into a single generated loop, such that these "
+            "intermediates are not materialized. So far, this applies to "
+            "two projections, a binary calculation, and a whole-column "
+            "summation, whose inputs must be uncompressed. Defaults to False."
+    )
 
     args = parser.parse_args()
     
@@ -328,7 +401,7 @@ if __name__ == "__main__":
         args.comprSeqSortedFormat = args.comprSeqUnsortedFormat \
             if args.comprSeqSortedFormat is None \
             else formats.byName(args.comprSeqSortedFormat, args.processingStyle)
-    elif args.comprStrategy == compr.CS_COSTBASED:
+    elif args.comprStrategy in [compr.CS_COSTBASED, compr.CS_GLOBAL]:
         if args.comprProfileDirPath is None:
             raise RuntimeError("the directory containing the profiles for the cost-based compression strategy must be specified")
     elif args.comprStrategy in [compr.CS_REALBEST, compr.CS_REALWORST]:
@@ -337,6 +410,13 @@ if __name__ == "__main__":
     elif args.comprStrategy in [compr.CS_MANUAL]:
         if args.comprConfigFilePath is None:
             raise RuntimeError("the file containing the mapping from column names to formats must be specified")
+    if args.comprStrategy == compr.CS_BUDGET:
+        if args.comprProfileDirPath is None:
+            raise RuntimeError("the directory containing the profiles for the memory-budgeted compression strategy must be specified")
+        if args.comprBudget is None:
+            raise RuntimeError("the memory budget must be specified")
+    elif args.comprBudget is not None:
+        parser.error("Illegal combination of the compression arguments.")
 
     if args.inMalFilePath == FROM_STDIN:
         # 0 is the file descriptor of stdin, can be used with open().
@@ -357,14 +437,66 @@ if __name__ == "__main__":
         ops.GroupUnary.opName = "group_vec"
         ops.GroupBinary.opName = "group_vec"
 
-    # Query translation.
-    translationResult = mal2morphstore.translation.translate(
-        args.inMalFilePath,
-        args.versionSelect,
-        args.processingStyle,
-        parseBool(args.structUseBetween),
-        parseBool(args.structUseIntersectKAry),
-    )
+    def translate(inMalFilePath):
+        # Query translation.
+        translationResult = mal2morphstore.translation.translate(
+            inMalFilePath,
+            args.versionSelect,
+            args.processingStyle,
+            parseBool(args.structUseBetween),
+            parseBool(args.structUseIntersectKAry),
+            parseBool(args.structUseMergeJoin),
+            args.statDirPath,
+        )
+        
+        # Reordering of conjunctive selections.
+        if parseBool(args.structReorderSelections):
+            mal2morphstore.reordering.reorderSelections(
+                translationResult, args.statDirPath, args.colInfosFilePath
+            )
+        
+        # Operator fusion.
+        if parseBool(args.structUseFusion):
+            mal2morphstore.fusion.fuse(translationResult)
+        
+        return translationResult
+    
+    if args.transCacheDirPath is None:
+        translationResult = translate(args.inMalFilePath)
+        analysisResult = None
+    else:
+        # Translation only if the cache does not contain the translated
+        # program yet.
+        with open(args.inMalFilePath, "r") as inFile:
+            malText = inFile.read()
+        key = cache.getKey(
+            malText,
+            {
+                "versionSelect": args.versionSelect,
+                "processingStyle": args.processingStyle,
+                "useBetween": parseBool(args.structUseBetween),
+                "useIntersectKAry": parseBool(args.structUseIntersectKAry),
+                "useMergeJoin": parseBool(args.structUseMergeJoin),
+                "reorderSelections": parseBool(args.structReorderSelections),
+                "useFusion": parseBool(args.structUseFusion),
+            },
+            args.statDirPath,
+            args.colInfosFilePath
+                if parseBool(args.structReorderSelections)
+                else None
+        )
+        cached = cache.load(args.transCacheDirPath, key)
+        if cached is None:
+            translationResult = translate(
+                cache.storeMal(args.transCacheDirPath, key, malText)
+            )
+            analysisResult = None if args.statDirPath is None \
+                else analysis.analyze(translationResult, True, args.statDirPath)
+            cache.store(
+                args.transCacheDirPath, key, translationResult, analysisResult
+            )
+        else:
+            translationResult, analysisResult = cached
     
     # Compression configuration.
     formats.CASC_BLOCKSIZE_LOG = args.comprCascBlockSizeLog
@@ -383,6 +515,9 @@ if __name__ == "__main__":
         args.comprProfileDirPath,
         args.comprSizesFilePath,
         args.comprConfigFilePath,
+        args.statDirPath,
+        analysisResult,
+        args.comprBudget,
     )
     
     # C++-code generation.
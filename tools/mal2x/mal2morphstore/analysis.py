@@ -22,17 +22,47 @@ Such analyses can be used to find out interesting facts about the translated
 program. A translated program can be analyzed by passing it to function
 analyze(), which returns an instance of class AnalysisResult containing the
 relevant information.
+
+Which base columns are unique and sorted is read from the files
+"<table>.colstats.json" created by dbdict.py in the directory of the
+statistics on the base data. For tables without such a file, the respective
+facts about the schema of the Star Schema Benchmark (SSB) are assumed.
 """
 
 # TODO Documentation for parameters and return values.
 
 
+import mal2morphstore.estimation as estimation
+import mal2morphstore.ir as ir
 import mal2morphstore.operators as ops
 
 import json
 import os
 
 
+# TODO These are the facts about the SSB schema, which were hardcoded before
+#      the statistics contained them. Remove them once the statistics are
+#      always available.
+# The base columns of the SSB known to be unique. These are the primary key
+# columns of the dimension tables.
+_SSB_VARS_UNIQUE = {
+    "customer.c_custkey",
+    "date.d_datekey",
+    "part.p_partkey",
+    "supplier.s_suppkey",
+}
+# The base columns of the SSB known to be sorted.
+_SSB_VARS_SORTED = {
+    "customer.c_custkey",
+    "customer.c_name",
+    "date.d_datekey",
+    "lineorder.lo_shippriority",
+    "part.p_partkey",
+    "supplier.s_name",
+    "supplier.s_suppkey",
+}
+
+
 class AnalysisResult:
     """
     Encapsulates all information analyzed about a translated program. This is
@@ -54,6 +84,7 @@ class AnalysisResult:
         minDistanceToBaseByCol,
         maxDistanceToBaseByCol,
         producingOpIdxByCol,
+        estimateByCol,
     ):
         # A list of the names of column-variables in the translated program
         # which are used before they are assigned.
@@ -67,7 +98,7 @@ class AnalysisResult:
         # translation or an inefficiency in the translated program.
         self.varsNeverUsed = varsNeverUsed
         
-        # A list of the names of column-variables in the translated program
+        # A set of the names of column-variables in the translated program
         # whose contents is unique, i.e., columns that are known at query
         # translation-time to contain only unique data elements.
         self.varsUnique = varsUnique
@@ -80,13 +111,13 @@ class AnalysisResult:
         # pessimisticly estimated maximum value in that column.
         self.maxBwByCol = maxBwByCol
         
-        # A list of the names of column-variables in the translated program
+        # A set of the names of column-variables in the translated program
         # which require unsorted random access, i.e., which are the input data
         # column of some project-operator with an unsorted input positions
         # column.
         self.varsRndAccessUnsorted = varsRndAccessUnsorted
         
-        # A list of the names of column-variables in the translated program
+        # A set of the names of column-variables in the translated program
         # which require sorted random access (skip-sequential access), i.e.,
         # which are the input data column of some project-operator with a
         # sorted input positions column.
@@ -96,11 +127,11 @@ class AnalysisResult:
         # accesses to that column in the translated query program.
         self.countSeqAccessByCol = countSeqAccessByCol
         
-        # A list of the names of column-variables in the translated program
+        # A set of the names of column-variables in the translated program
         # whose contents is known to be sorted at query translation-time.
         self.varsSorted = varsSorted
         
-        # A list of the names of column-variables in the translated program
+        # A set of the names of column-variables in the translated program
         # which must be uncompressed, since they are produced or consumed by an
         # operator which does not support compressed data.
         self.varsForcedUncompr = varsForcedUncompr
@@ -119,40 +150,124 @@ class AnalysisResult:
         # produces it in the query (counting starts at 1, but for base columns,
         # it is 0).
         self.producingOpIdxByCol = producingOpIdxByCol
+        
+        # A dictionary mapping a column name to a realistic estimate of that
+        # column's data characteristics (see module
+        # mal2morphstore.estimation). Only analyzed together with the
+        # cardinalities and bit widths.
+        self.estimateByCol = estimateByCol
+
+def _getBaseVarsUniqueAndSorted(translationResult, statDirPath):
+    """
+    Returns the sets of the names of the base columns of the given translated
+    program which are unique and which are sorted, respectively.
+    """
+    
+    varsUnique = set()
+    varsSorted = set()
+    for tblName in translationResult.colNamesByTblName:
+        colStatsFilePath = None if statDirPath is None else os.path.join(
+            statDirPath, "{}.colstats.json".format(tblName)
+        )
+        if colStatsFilePath is None or not os.path.exists(colStatsFilePath):
+            tblVars = {
+                "{}.{}".format(tblName, colName)
+                for colName in translationResult.colNamesByTblName[tblName]
+            }
+            varsUnique.update(tblVars & _SSB_VARS_UNIQUE)
+            varsSorted.update(tblVars & _SSB_VARS_SORTED)
+            continue
+        with open(colStatsFilePath, "r") as inFile:
+            colStatsByColName = json.load(inFile)
+        for colName in translationResult.colNamesByTblName[tblName]:
+            if colName not in colStatsByColName:
+                raise RuntimeError(
+                    "the file '{}' does not contain statistics on the column "
+                    "'{}'".format(colStatsFilePath, colName)
+                )
+            colStats = colStatsByColName[colName]
+            var = "{}.{}".format(tblName, colName)
+            # Files created by older versions of dbdict.py do not contain the
+            # uniqueness yet.
+            if colStats.get(
+                "isUnique", colStats["distinct"] == colStats["count"]
+            ):
+                varsUnique.add(var)
+            if colStats["isSorted"]:
+                varsSorted.add(var)
+    return varsUnique, varsSorted
+
+def requiresUncompr(op, key):
+    """
+    Returns whether the given operator call requires its input or output
+    column with the given key (see method colKeys() of class Op in module
+    mal2morphstore.operators) to be uncompressed.
+    """
+    
+    if (
+            isinstance(op, ops.Intersect) or
+            isinstance(op, ops.Merge) or
+            isinstance(op, ops.CalcBinary) or
+            isinstance(op, ops.GroupBinary) or
+            isinstance(op, ops.SumGrBased) or
+            isinstance(op, ops.ProjectCalcSum) or
+            isinstance(op, ops.Partition) or
+            isinstance(op, ops.Concat) or
+            isinstance(op, ops.MtoNJoin) or
+            isinstance(op, ops.MergeJoin)
+    ):
+        # These operators do not support compressed inputs and outputs.
+        # The group-based sum-operator does not access the data of its input
+        # extents column, but only needs to know the number of data elements.
+        return not (isinstance(op, ops.SumGrBased) and key == "inExtCol")
+    elif isinstance(op, ops.SumWholeCol):
+        # This operators does not support compressed output (because it would
+        # not make sense).
+        return key == "outDataCol"
+    elif (
+        isinstance(op, ops.Project) or
+        isinstance(op, ops.Select) or
+        isinstance(op, ops.Between) or
+        isinstance(op, ops.IntersectKAry) or
+        isinstance(op, ops.Join) or
+        isinstance(op, ops.Nto1Join) or
+        isinstance(op, ops.LeftSemiNto1Join) or
+        isinstance(op, ops.GroupUnary) or
+        isinstance(op, ops.Morph)
+    ):
+        # These operators support compressed inputs and outputs.
+        return False
+    else:
+        raise RuntimeError(
+                "the operator {} is not taken into account in "
+                "tracking which columns must be uncompressed".format(
+                        op.__class__.__name__
+                )
+        )
 
 def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
     """
     Analyzes the given abstract representation of a translated program to find
     out some interesting things about it. The result is an instance of class
     AnalysisResult.
+    
+    The uniqueness and sortedness of the base columns is read from the
+    statistics in the given directory, if any (see the module documentation).
     """
     
-    # In the beginning, only the base columns are "assigned".
-    varsAssigned = [
-        "{}.{}".format(tblName, colName)
-        for tblName in translationResult.colNamesByTblName
-        for colName in translationResult.colNamesByTblName[tblName]
-    ]
+    graph = ir.DefUseGraph.fromTranslationResult(translationResult)
     
     varsUsedBeforeAssigned = []
     
     varsNeverUsed = []
     
-    # TODO This is specific to the Star Schema Benchmark (SSB) and covers only
-    #      what we currently need for translating the queries in this benchmark
-    #      correctly.
-    # All base-columns known to be unique.
-    varsUnique = [
-        # These are the primary key columns of the dimension tables of the SSB
-        # schema. We know that each of these is unique.
-        "customer.c_custkey",
-        "date.d_datekey",
-        "part.p_partkey",
-        "supplier.s_suppkey",
-    ]
+    # All base-columns known to be unique and sorted, respectively.
+    varsUnique, varsSorted = _getBaseVarsUniqueAndSorted(
+        translationResult, statDirPath
+    )
     
-    varsRndAccessUnsorted = []
-    varsRndAccessSorted = []
+    varsRndAccessUnsorted = set()
+    varsRndAccessSorted = set()
 
     def zeroForBaseCols():
         return {
@@ -170,20 +285,7 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
     maxDistanceToBaseByCol = zeroForBaseCols()
     producingOpIdxByCol = zeroForBaseCols()
     
-    # TODO This is specific to the Star Schema Benchmark (SSB). Do not hardcode
-    #      this.
-    # All base-columns known to be sorted.
-    varsSorted = [
-        "customer.c_custkey",
-        "customer.c_name",
-        "date.d_datekey",
-        "lineorder.lo_shippriority",
-        "part.p_partkey",
-        "supplier.s_name",
-        "supplier.s_suppkey",
-    ]
-    
-    varsForcedUncompr = []
+    varsForcedUncompr = set()
     
     # TODO Use the implementation in lcbase_py.whitebox.
     def effective_bitwidth(val):
@@ -219,11 +321,12 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
         maxCardByCol = None
         maxBwByCol = None
     
-    def foundUsage(var):
-        if var not in varsAssigned and var not in varsUsedBeforeAssigned:
+    def foundUsage(var, opIdx):
+        if (
+            not graph.isAssignedBy(var, opIdx) and
+            var not in varsUsedBeforeAssigned
+        ):
             varsUsedBeforeAssigned.append(var)
-        elif var in varsNeverUsed:
-            varsNeverUsed.remove(var)
             
     def raiseNonUnique(op, param):
         raise RuntimeError(
@@ -240,27 +343,24 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
         )
     
     opIdx = 0
-    for el in translationResult.baseMorphs + translationResult.prog + translationResult.resultMorphs:
+    for el in translationResult.basePartitions + translationResult.baseMorphs + translationResult.prog + translationResult.resultMorphs:
         if isinstance(el, ops.Op):
             opIdx += 1
             
             # Tracking the usage of column-variables.
-            for key in el.__dict__:
-                if key.startswith("out") and key.endswith("Col"):
-                    varName = getattr(el, key)
-                    varsAssigned.append(varName)
+            for varName in el.outCols():
+                if not graph.isUsedFrom(varName, opIdx - 1):
                     varsNeverUsed.append(varName)
-                    countSeqAccessByCol[varName] = 0
-                elif key.startswith("in") and key.endswith("Col"):
-                    varName = getattr(el, key)
-                    foundUsage(varName)
+                countSeqAccessByCol[varName] = 0
+            for varName in el.inCols():
+                foundUsage(varName, opIdx - 1)
                     
             # Tracking the uniqueness of column-variables.
             if isinstance(el, ops.Project):
                 if el.inDataCol in varsUnique and el.inPosCol in varsUnique:
-                    varsUnique.append(el.outDataCol)
+                    varsUnique.add(el.outDataCol)
             elif isinstance(el, ops.Select) or isinstance(el, ops.Between):
-                varsUnique.append(el.outPosCol)
+                varsUnique.add(el.outPosCol)
             elif (
                 isinstance(el, ops.Intersect) or
                 isinstance(el, ops.IntersectKAry) or
@@ -270,45 +370,58 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                     raiseNonUnique(el, "inPosLCol")
                 if el.inPosRCol not in varsUnique:
                     raiseNonUnique(el, "inPosRCol")
-                varsUnique.append(el.outPosCol)
-            elif isinstance(el, ops.Join):
+                varsUnique.add(el.outPosCol)
+            elif (
+                isinstance(el, ops.Join) or
+                isinstance(el, ops.MtoNJoin) or
+                isinstance(el, ops.MergeJoin)
+            ):
                 # TODO The following assumes an equi-join.
                 # Uniqueness of one side's input(data) implies uniqueness of
                 # the other side's output(positions).
                 if el.inDataLCol in varsUnique:
-                    varsUnique.append(el.outPosRCol)
+                    varsUnique.add(el.outPosRCol)
                 if el.inDataRCol in varsUnique:
-                    varsUnique.append(el.outPosLCol)
+                    varsUnique.add(el.outPosLCol)
             elif isinstance(el, ops.Nto1Join):
                 if el.inDataLCol not in varsUnique:
                     raiseNonUnique(el, "inDataLCol")
-                varsUnique.append(el.outPosRCol)
+                varsUnique.add(el.outPosRCol)
                 if el.inDataRCol in varsUnique:
-                    varsUnique.append(el.outPosLCol)
+                    varsUnique.add(el.outPosLCol)
             elif isinstance(el, ops.LeftSemiNto1Join):
                 if el.inDataLCol not in varsUnique:
                     raiseNonUnique(el, "inDataLCol")
-                varsUnique.append(el.outPosRCol)
+                varsUnique.add(el.outPosRCol)
             elif isinstance(el, ops.CalcBinary):
                 # We do not know whether the output is unique.
                 pass
-            elif isinstance(el, ops.SumWholeCol):
+            elif (
+                isinstance(el, ops.SumWholeCol) or
+                isinstance(el, ops.ProjectCalcSum)
+            ):
                 # Unique since it contains only one data element.
-                varsUnique.append(el.outDataCol)
+                varsUnique.add(el.outDataCol)
             elif isinstance(el, ops.SumGrBased):
                 # We do not know whether the output is unique.
                 pass
             elif isinstance(el, ops.GroupUnary):
                 if el.inDataCol in varsUnique:
-                    varsUnique.append(el.outGrCol)
-                varsUnique.append(el.outExtCol)
+                    varsUnique.add(el.outGrCol)
+                varsUnique.add(el.outExtCol)
             elif isinstance(el, ops.GroupBinary):
                 if el.inDataCol in varsUnique and el.inGrCol in varsUnique:
-                    varsUnique.append(el.outGrCol)
-                varsUnique.append(el.outExtCol)
+                    varsUnique.add(el.outGrCol)
+                varsUnique.add(el.outExtCol)
             elif isinstance(el, ops.Morph):
                 if el.inCol in varsUnique:
-                    varsUnique.append(el.outCol)
+                    varsUnique.add(el.outCol)
+            elif isinstance(el, ops.Partition):
+                if el.inDataCol in varsUnique:
+                    varsUnique.add(el.outDataCol)
+            elif isinstance(el, ops.Concat):
+                # We do not know whether the output is unique.
+                pass
             else:
                 raise RuntimeError(
                         "the operator {} is not taken into account in "
@@ -343,9 +456,28 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                 elif isinstance(el, ops.LeftSemiNto1Join):
                     #
                     maxCardByCol[el.outPosRCol] = maxCardByCol[el.inDataRCol]
+                elif (
+                    isinstance(el, ops.MtoNJoin) or
+                    isinstance(el, ops.MergeJoin)
+                ):
+                    # In the worst case, all data elements of both inputs are
+                    # equal. If one of the inputs is unique, each data element
+                    # of the other input has at most one join partner.
+                    if el.inDataLCol in varsUnique:
+                        maxCard = maxCardByCol[el.inDataRCol]
+                    elif el.inDataRCol in varsUnique:
+                        maxCard = maxCardByCol[el.inDataLCol]
+                    else:
+                        maxCard = \
+                            maxCardByCol[el.inDataLCol] * maxCardByCol[el.inDataRCol]
+                    maxCardByCol[el.outPosLCol] = maxCard
+                    maxCardByCol[el.outPosRCol] = maxCard
                 elif isinstance(el, ops.CalcBinary):
                     maxCardByCol[el.outDataCol] = maxCardByCol[el.inDataLCol]
-                elif isinstance(el, ops.SumWholeCol):
+                elif (
+                    isinstance(el, ops.SumWholeCol) or
+                    isinstance(el, ops.ProjectCalcSum)
+                ):
                     maxCardByCol[el.outDataCol] = 1
                 elif isinstance(el, ops.SumGrBased):
                     maxCardByCol[el.outDataCol] = maxCardByCol[el.inExtCol]
@@ -357,6 +489,13 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                     maxCardByCol[el.outExtCol] = maxCardByCol[el.inDataCol]
                 elif isinstance(el, ops.Morph):
                     maxCardByCol[el.outCol] = maxCardByCol[el.inCol]
+                elif isinstance(el, ops.Partition):
+                    # The size of the largest partition.
+                    maxCardByCol[el.outDataCol] = \
+                        -(-maxCardByCol[el.inDataCol] // el.partCount)
+                elif isinstance(el, ops.Concat):
+                    maxCardByCol[el.outDataCol] = \
+                        maxCardByCol[el.inDataLCol] + maxCardByCol[el.inDataRCol]
                 else:
                     raise RuntimeError(
                             "the operator {} is not taken into account in "
@@ -386,7 +525,11 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                 elif isinstance(el, ops.Join):
                     # We do not use this variant of the join-operator any more.
                     pass
-                elif isinstance(el, ops.Nto1Join):
+                elif (
+                    isinstance(el, ops.Nto1Join) or
+                    isinstance(el, ops.MtoNJoin) or
+                    isinstance(el, ops.MergeJoin)
+                ):
                     maxBwByCol[el.outPosLCol] = effective_bitwidth(
                         maxCardByCol[el.inDataLCol] - 1
                     )
@@ -427,7 +570,8 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                         )
                 elif (
                     isinstance(el, ops.SumWholeCol) or
-                    isinstance(el, ops.SumGrBased)
+                    isinstance(el, ops.SumGrBased) or
+                    isinstance(el, ops.ProjectCalcSum)
                 ):
                     maxBwByCol[el.outDataCol] = 64
                 elif isinstance(el, ops.GroupUnary):
@@ -446,6 +590,12 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                     )
                 elif isinstance(el, ops.Morph):
                     maxBwByCol[el.outCol] = maxBwByCol[el.inCol]
+                elif isinstance(el, ops.Partition):
+                    maxBwByCol[el.outDataCol] = maxBwByCol[el.inDataCol]
+                elif isinstance(el, ops.Concat):
+                    maxBwByCol[el.outDataCol] = max(
+                        maxBwByCol[el.inDataLCol], maxBwByCol[el.inDataRCol]
+                    )
                 else:
                     raise RuntimeError(
                             "the operator {} is not taken into account in "
@@ -457,15 +607,20 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
             # Tracking which columns require random access.
             if isinstance(el, ops.Project):
                 if el.inPosCol in varsSorted:
-                    if el.inDataCol not in varsRndAccessSorted:
-                        varsRndAccessSorted.append(el.inDataCol)
+                    varsRndAccessSorted.add(el.inDataCol)
                 else:
-                    if el.inDataCol not in varsRndAccessUnsorted:
-                        varsRndAccessUnsorted.append(el.inDataCol)
+                    varsRndAccessUnsorted.add(el.inDataCol)
+            elif isinstance(el, ops.ProjectCalcSum):
+                if el.inPosCol in varsSorted:
+                    varsRndAccessSorted.add(el.inDataLCol)
+                    varsRndAccessSorted.add(el.inDataRCol)
+                else:
+                    varsRndAccessUnsorted.add(el.inDataLCol)
+                    varsRndAccessUnsorted.add(el.inDataRCol)
             elif isinstance(el, ops.IntersectKAry):
                 # The accessed positions are always unsorted due to the k-ary
                 # search.
-                varsRndAccessUnsorted.append(el.inPosRCol)
+                varsRndAccessUnsorted.add(el.inPosRCol)
             elif (
                 isinstance(el, ops.Select) or
                 isinstance(el, ops.Between) or
@@ -474,12 +629,16 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                 isinstance(el, ops.Join) or
                 isinstance(el, ops.Nto1Join) or
                 isinstance(el, ops.LeftSemiNto1Join) or
+                isinstance(el, ops.MtoNJoin) or
+                isinstance(el, ops.MergeJoin) or
                 isinstance(el, ops.CalcBinary) or
                 isinstance(el, ops.SumWholeCol) or
                 isinstance(el, ops.SumGrBased) or
                 isinstance(el, ops.GroupUnary) or
                 isinstance(el, ops.GroupBinary) or
-                isinstance(el, ops.Morph)
+                isinstance(el, ops.Morph) or
+                isinstance(el, ops.Partition) or
+                isinstance(el, ops.Concat)
             ):
                 pass
             else:
@@ -491,7 +650,7 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                 )
                 
             # Tracking the number of sequential read accesses to each column.
-            if isinstance(el, ops.Project):
+            if isinstance(el, ops.Project) or isinstance(el, ops.ProjectCalcSum):
                 countSeqAccessByCol[el.inPosCol] += 1
             elif (
                 isinstance(el, ops.Select) or
@@ -517,10 +676,13 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
             elif (
                 isinstance(el, ops.Nto1Join) or
                 isinstance(el, ops.LeftSemiNto1Join) or
+                isinstance(el, ops.MtoNJoin) or
+                isinstance(el, ops.MergeJoin) or
                 isinstance(el, ops.CalcBinary)
             ):
                 # TODO This holds for a hash join with separate build and probe
-                # phase, but might not hold for other join implementations.
+                # phase and for a merge join, but might not hold for other join
+                # implementations.
                 countSeqAccessByCol[el.inDataLCol] += 1
                 countSeqAccessByCol[el.inDataRCol] += 1
             elif (
@@ -531,6 +693,11 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                 countSeqAccessByCol[el.inGrCol] += 1
             elif isinstance(el, ops.Morph):
                 countSeqAccessByCol[el.inCol] += 1
+            elif isinstance(el, ops.Partition):
+                countSeqAccessByCol[el.inDataCol] += 1
+            elif isinstance(el, ops.Concat):
+                countSeqAccessByCol[el.inDataLCol] += 1
+                countSeqAccessByCol[el.inDataRCol] += 1
             else:
                 raise RuntimeError(
                         "the operator {} is not taken into account in "
@@ -543,9 +710,9 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
             # Tracking the sortedness of column-variables.
             if isinstance(el, ops.Project):
                 if el.inDataCol in varsSorted and el.inPosCol in varsSorted:
-                    varsSorted.append(el.outDataCol)
+                    varsSorted.add(el.outDataCol)
             elif isinstance(el, ops.Select) or isinstance(el, ops.Between):
-                varsSorted.append(el.outPosCol)
+                varsSorted.add(el.outPosCol)
             elif (
                 isinstance(el, ops.Intersect) or
                 isinstance(el, ops.IntersectKAry) or
@@ -557,7 +724,7 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                     raiseUnsorted(el, "inPosLCol")
                 if el.inPosRCol not in varsSorted:
                     raiseUnsorted(el, "inPosRCol")
-                varsSorted.append(el.outPosCol)
+                varsSorted.add(el.outPosCol)
             elif isinstance(el, ops.Join):
                 # We do not know which of the two input data columns is the
                 # inner and which is the outer, so we do not know which output
@@ -566,13 +733,32 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
             elif isinstance(el, ops.Nto1Join) or isinstance(el, ops.LeftSemiNto1Join):
                 # The output positions corresponding to the right input, which
                 # is the probe-side and, thus, the outer, is always sorted.
-                varsSorted.append(el.outPosRCol)
+                varsSorted.add(el.outPosRCol)
+            elif isinstance(el, ops.MtoNJoin):
+                # The right input is the probe-side, but each of its data
+                # elements can have several join partners, so the output
+                # positions corresponding to it are sorted, but not unique.
+                varsSorted.add(el.outPosRCol)
+            elif isinstance(el, ops.MergeJoin):
+                if el.inDataLCol not in varsSorted:
+                    raiseUnsorted(el, "inDataLCol")
+                if el.inDataRCol not in varsSorted:
+                    raiseUnsorted(el, "inDataRCol")
+                # Both inputs are traversed in their order, but the run of a
+                # data element in the right input is traversed once for each
+                # occurrence of this data element in the left input.
+                varsSorted.add(el.outPosLCol)
+                if el.inDataLCol in varsUnique:
+                    varsSorted.add(el.outPosRCol)
             elif isinstance(el, ops.CalcBinary):
                 # We do not know whether the output is sorted.
                 pass
-            elif isinstance(el, ops.SumWholeCol):
+            elif (
+                isinstance(el, ops.SumWholeCol) or
+                isinstance(el, ops.ProjectCalcSum)
+            ):
                 # Sorted since it contains only one data element.
-                varsSorted.append(el.outDataCol)
+                varsSorted.add(el.outDataCol)
             elif isinstance(el, ops.SumGrBased):
                 # We do not know whether the output is sorted.
                 pass
@@ -582,18 +768,24 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                 # There are more cases when this is fulfilled, however, this is
                 # the case we can detect with the information we have.
                 if el.inDataCol in varsUnique or el.inDataCol in varsSorted:
-                    varsSorted.append(el.outGrCol)
-                varsSorted.append(el.outExtCol)
+                    varsSorted.add(el.outGrCol)
+                varsSorted.add(el.outExtCol)
             elif isinstance(el, ops.GroupBinary):
                 # Analogous to the unary case, but for combinations.
                 # There are more cases when this is fulfilled, however, these
                 # are the cases we can detect with the information we have.
                 if (el.inDataCol in varsUnique or el.inDataCol in varsSorted) and (el.inGrCol in varsUnique or el.inGrCol in varsSorted):
-                    varsSorted.append(el.outGrCol)
-                varsSorted.append(el.outExtCol)
+                    varsSorted.add(el.outGrCol)
+                varsSorted.add(el.outExtCol)
             elif isinstance(el, ops.Morph):
                 if el.inCol in varsSorted:
-                    varsSorted.append(el.outCol)
+                    varsSorted.add(el.outCol)
+            elif isinstance(el, ops.Partition):
+                if el.inDataCol in varsSorted:
+                    varsSorted.add(el.outDataCol)
+            elif isinstance(el, ops.Concat):
+                # We do not know whether the output is sorted.
+                pass
             else:
                 raise RuntimeError(
                         "the operator {} is not taken into account in "
@@ -603,68 +795,32 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
                 )
                 
             # Tracking which columns must be uncompressed.
-            if (
-                    isinstance(el, ops.Intersect) or
-                    isinstance(el, ops.Merge) or
-                    isinstance(el, ops.CalcBinary) or
-                    isinstance(el, ops.GroupBinary) or
-                    isinstance(el, ops.SumGrBased)
-            ):
-                # These operators do not support compressed inputs and outputs.
-                for key in el.__dict__:
-                    if key.endswith("Col"):
-                        # The group-based sum-operator does not access the data
-                        # of its input extents column, but only needs to know
-                        # the number of data elements.
-                        if isinstance(el, ops.SumGrBased) and key == "inExtCol":
-                            continue
-                        varName = getattr(el, key)
-                        if varName not in varsForcedUncompr:
-                            varsForcedUncompr.append(varName)
-            elif isinstance(el, ops.SumWholeCol):
-                # This operators does not support compressed output (because it
-                # would not make sense).
-                varsForcedUncompr.append(el.outDataCol)
-            elif (
-                isinstance(el, ops.Project) or
-                isinstance(el, ops.Select) or
-                isinstance(el, ops.Between) or
-                isinstance(el, ops.IntersectKAry) or
-                isinstance(el, ops.Join) or
-                isinstance(el, ops.Nto1Join) or
-                isinstance(el, ops.LeftSemiNto1Join) or
-                isinstance(el, ops.GroupUnary) or
-                isinstance(el, ops.Morph)
-            ):
-                # These operators support compressed inputs and outputs.
-                pass
-            else:
-                raise RuntimeError(
-                        "the operator {} is not taken into account in "
-                        "tracking which columns must be uncompressed".format(
-                                el.__class__.__name__
-                        )
-                )
+            for key in el.colKeys():
+                if requiresUncompr(el, key):
+                    varsForcedUncompr.add(getattr(el, key))
                 
             # Tracking distance measures.
             inputMinDistancesToBase = []
             inputMaxDistancesToBase = []
-            for key in el.__dict__:
-                if key.startswith("in") and key.endswith("Col"):
-                    colName = getattr(el, key)
-                    inputMinDistancesToBase.append(minDistanceToBaseByCol[colName])
-                    inputMaxDistancesToBase.append(maxDistanceToBaseByCol[colName])
+            for colName in el.inCols():
+                inputMinDistancesToBase.append(minDistanceToBaseByCol[colName])
+                inputMaxDistancesToBase.append(maxDistanceToBaseByCol[colName])
             outputMinDistanceToBase = min(inputMinDistancesToBase) + 1
             outputMaxDistanceToBase = min(inputMaxDistancesToBase) + 1
-            for key in el.__dict__:
-                if key.startswith("out") and key.endswith("Col"):
-                    colName = getattr(el, key)
-                    minDistanceToBaseByCol[colName] = outputMinDistanceToBase
-                    maxDistanceToBaseByCol[colName] = outputMaxDistanceToBase
-                    producingOpIdxByCol[colName] = opIdx
+            for colName in el.outCols():
+                minDistanceToBaseByCol[colName] = outputMinDistanceToBase
+                maxDistanceToBaseByCol[colName] = outputMaxDistanceToBase
+                producingOpIdxByCol[colName] = opIdx
+    
+    for varName in graph.resultCols:
+        foundUsage(varName, len(graph.ops))
     
-    for varName in translationResult.resultCols:
-        foundUsage(varName)
+    if analyzeCardsAndBws:
+        estimateByCol = estimation.estimate(
+            translationResult, statDirPath, varsSorted
+        )
+    else:
+        estimateByCol = None
     
     return AnalysisResult(
         varsUsedBeforeAssigned,
@@ -680,4 +836,5 @@ def analyze(translationResult, analyzeCardsAndBws=False, statDirPath=None):
         minDistanceToBaseByCol,
         maxDistanceToBaseByCol,
         producingOpIdxByCol,
+        estimateByCol,
     )
\ No newline at end of file
@@ -0,0 +1,112 @@
+#*********************************************************************************************
+# Copyright (C) 2019 by MorphStore-Team                                                      *
+#                                                                                            *
+# This file is part of MorphStore - a compression aware vectorized column store.             *
+#                                                                                            *
+# This program is free software: you can redistribute it and/or modify it under the          *
+# terms of the GNU General Public License as published by the Free Software Foundation,      *
+# either version 3 of the License, or (at your option) any later version.                    *
+#                                                                                            *
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;  *
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  *
+# See the GNU General Public License for more details.                                       *
+#                                                                                            *
+# You should have received a copy of the GNU General Public License along with this program. *
+# If not, see <http://www.gnu.org/licenses/>.                                                *
+#*********************************************************************************************
+
+"""
+A persistent cache of translated programs.
+
+Experiments such as the search for good formats (see ssb/greedy.py) translate
+the same MAL programs with the same structural options over and over again,
+while only the compression configuration changes. This module stores the
+translated program after all structural passes, i.e., before the formats are
+configured (see module mal2morphstore.compr), together with its analysis (see
+module mal2morphstore.analysis) as a pickle file in a cache directory.
+
+An entry is identified by a hash of everything the translation depends on:
+the MAL program, the structural options, the statistics on the base columns,
+the data characteristics used for reordering selections, and the source code
+of this package itself, such that changes to the translation never lead to
+stale entries.
+"""
+
+
+import hashlib
+import os
+import pickle
+
+
+def _hashFile(h, filePath):
+    with open(filePath, "rb") as inFile:
+        h.update(inFile.read())
+
+def getKey(malText, options, statDirPath=None, colInfosFilePath=None):
+    """
+    Returns the key of the cache entry for the given MAL program, translated
+    with the given options (a dictionary) and the given statistics and data
+    characteristics, if specified.
+    """
+
+    h = hashlib.sha256()
+    h.update(malText.encode())
+    h.update(repr(sorted(options.items())).encode())
+    if statDirPath is not None:
+        for fileName in sorted(os.listdir(statDirPath)):
+            if fileName.endswith(".json"):
+                h.update(fileName.encode())
+                _hashFile(h, os.path.join(statDirPath, fileName))
+    if colInfosFilePath is not None:
+        _hashFile(h, colInfosFilePath)
+    pkgDirPath = os.path.dirname(os.path.abspath(__file__))
+    for fileName in sorted(os.listdir(pkgDirPath)):
+        if fileName.endswith(".py"):
+            h.update(fileName.encode())
+            _hashFile(h, os.path.join(pkgDirPath, fileName))
+    return h.hexdigest()
+
+def _write(filePath, data, mode):
+    # Write to a temporary file first, such that concurrent translations never
+    # read an incomplete file.
+    tmpFilePath = "{}.{}.tmp".format(filePath, os.getpid())
+    with open(tmpFilePath, mode) as outFile:
+        outFile.write(data)
+    os.replace(tmpFilePath, filePath)
+
+def storeMal(cacheDirPath, key, malText):
+    """
+    Stores the given MAL program in the cache directory and returns the path
+    of the file, which can be passed to translation.translate().
+    """
+
+    os.makedirs(cacheDirPath, exist_ok=True)
+    malFilePath = os.path.join(cacheDirPath, "{}.mal".format(key))
+    _write(malFilePath, malText, "w")
+    return malFilePath
+
+def load(cacheDirPath, key):
+    """
+    Returns the translated program (an instance of class TranslationResult in
+    module mal2morphstore.translation) and its analysis (an instance of class
+    AnalysisResult in module mal2morphstore.analysis, or None) stored under
+    the given key as a pair, or None if there is no such entry.
+    """
+
+    filePath = os.path.join(cacheDirPath, "{}.pkl".format(key))
+    if not os.path.exists(filePath):
+        return None
+    with open(filePath, "rb") as inFile:
+        return pickle.load(inFile)
+
+def store(cacheDirPath, key, translationResult, analysisResult):
+    """
+    Stores the given translated program and its analysis under the given key.
+    """
+
+    os.makedirs(cacheDirPath, exist_ok=True)
+    _write(
+        os.path.join(cacheDirPath, "{}.pkl".format(key)),
+        pickle.dumps((translationResult, analysisResult)),
+        "wb"
+    )
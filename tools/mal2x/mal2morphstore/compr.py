@@ -31,7 +31,9 @@ with "F". See module mal2morphstore.operators.
 
 import mal2morphstore.analysis as analysis
 import mal2morphstore.formats as formats
+import mal2morphstore.ir as ir
 import mal2morphstore.operators as ops
+import mal2morphstore.parallel as parallel
 import mal2morphstore.processingstyles as pss
 
 import sys
@@ -50,10 +52,13 @@ cm.UNCOMPR_BW = 64
 sys.path.append(".")
 import csvutils
 
+import numpy as np
 import pandas as pd
 
+import itertools
 import math
 import os
+import pickle
 from functools import partial
 
 
@@ -71,11 +76,15 @@ CS_COSTBASED = "costbased"
 CS_REALBEST = "realbest"
 CS_REALWORST = "realworst"
 CS_MANUAL = "manual"
+CS_GLOBAL = "global"
+CS_BUDGET = "budget"
 
 COMPR_STRATEGIES = [
     CS_UNCOMPR,
     CS_RULEBASED,
     CS_COSTBASED,
+    CS_GLOBAL,
+    CS_BUDGET,
     CS_REALBEST,
     CS_REALWORST,
     CS_MANUAL,
@@ -95,27 +104,28 @@ OBJECTIVES = [OBJ_MEM, OBJ_PERF]
 # Compression strategies
 # *****************************************************************************
 
+def _setBw(fmt, bw):
+    """
+    Explicitly sets the bit width of the given format, if necessary.
+    
+    If the given format is not Static Bit-Packing, it is returned as it is.
+    If the given format is Static Bit-Packing, then the bit width is set
+    only if the bit width has not been explicitly set to a number before.
+    Otherwise, the bit width is set depending on the placeholder.
+    """
+    if isinstance(fmt, formats.StaticVBPFormat):
+        if fmt._bw is None or fmt._bw == formats.StaticVBPFormat.SUFFIX_BIT:
+            return fmt.changeBw(bw)
+        if fmt._bw == formats.StaticVBPFormat.SUFFIX_EVEN:
+            return fmt.changeBw(bw + bw % 2)
+        if fmt._bw == formats.StaticVBPFormat.SUFFIX_BYTE:
+            return fmt.changeBw(bw + 8 - bw % 8)
+        if fmt._bw == formats.StaticVBPFormat.SUFFIX_POWEROFTWO:
+            return fmt.changeBw(2 ** int(bw - 1).bit_length())
+    return fmt
+
 def _setStaticBitwidth(sFormat, dfColInfos):
-    def setBw(fmt, bw):
-        """
-        Explicitly sets the bit width of the given format, if necessary.
-        
-        If the given format is not Static Bit-Packing, it is returned as it is.
-        If the given format is Static Bit-Packing, then the bit width is set
-        only if the bit width has not been explicitly set to a number before.
-        Otherwise, the bit width is set depending on the placeholder.
-        """
-        if isinstance(fmt, formats.StaticVBPFormat):
-            if fmt._bw is None or fmt._bw == formats.StaticVBPFormat.SUFFIX_BIT:
-                return fmt.changeBw(bw)
-            if fmt._bw == formats.StaticVBPFormat.SUFFIX_EVEN:
-                return fmt.changeBw(bw + bw % 2)
-            if fmt._bw == formats.StaticVBPFormat.SUFFIX_BYTE:
-                return fmt.changeBw(bw + 8 - bw % 8)
-            if fmt._bw == formats.StaticVBPFormat.SUFFIX_POWEROFTWO:
-                return fmt.changeBw(2 ** int(bw - 1).bit_length())
-        return fmt
-    return sFormat.combine(dfColInfos[csvutils.ColInfoCols.maxBw], setBw)
+    return sFormat.combine(dfColInfos[csvutils.ColInfoCols.maxBw], _setBw)
 
 # All base and intermediate columns are uncompressed.
 def chooseUncompr(varNames):
@@ -141,61 +151,83 @@ def chooseRuleBased(dfColInfos, fRndAccUnsorted, fRndAccSorted, fSeqAccUnsorted,
             dfColInfos
     )
 
-def _configureCostModel(ps, profileDirPath):
-    #TODO This does not belong here.
-    BITS_PER_BYTE = 8
+# -----------------------------------------------------------------------------
+# Column names in the CSV files containing the profiles
+# -----------------------------------------------------------------------------
+
+class _GeneralCols:
+    ve = "vector_extension"
+    fmt = "format"
+    rtc = "runtime compr [µs]"
+    rtd = "runtime decompr [µs]"
+    rta = "runtime agg [µs]"
+    check = "check"
+    rep = "repetition"
+class _BwProfCols:
+    bw = "bitwidth"
+class _BwProfAloneCols:
+    sizeUsed = "size used [byte]"
+    sizeCompr = "size compr [byte]"
+    count = "countValues"
+
+# The names of the CSV files containing the profiles.
+_PROFILE_FILE_NAMES = [
+    "bw_prof_alone.csv",
+    "bw_prof_casc.csv",
+    "const_prof_casc.csv",
+    "uncompr.csv",
+]
+
+def compileProfiles(ps, profileDirPath):
+    """
+    Reads the CSV files containing the profiles in the given directory, checks
+    them, and averages the repeated calibration measurements of the given
+    processing style. Returns the resulting `pandas.DataFrame`s in the order
+    of _PROFILE_FILE_NAMES.
     
-    # -------------------------------------------------------------------------
-    # Column names in the CSV files containing the profiles
-    # -------------------------------------------------------------------------
+    The result is stored as a pickle file in the subdirectory "compiled" of
+    the given directory and loaded from there as long as it is newer than the
+    CSV files, since parsing and averaging the CSV files takes much longer
+    than the rest of the configuration of the cost model.
+    """
     
-    class GeneralCols:
-        ve = "vector_extension"
-        fmt = "format"
-        rtc = "runtime compr [µs]"
-        rtd = "runtime decompr [µs]"
-        rta = "runtime agg [µs]"
-        check = "check"
-        rep = "repetition"
-    class BwProfCols:
-        bw = "bitwidth"
-    class BwProfAloneCols:
-        sizeUsed = "size used [byte]"
-        sizeCompr = "size compr [byte]"
-        count = "countValues"
+    # The file name is the vector extension of the processing style, e.g.,
+    # "sse" for "sse<v128<uint64_t>>".
+    compiledFilePath = os.path.join(
+            profileDirPath, "compiled", "{}.pkl".format(ps.split("<", 1)[0])
+    )
+    csvFilePaths = [
+        os.path.join(profileDirPath, fileName)
+        for fileName in _PROFILE_FILE_NAMES
+    ]
+    if os.path.exists(compiledFilePath) and all(
+        os.path.getmtime(csvFilePath) <= os.path.getmtime(compiledFilePath)
+        for csvFilePath in csvFilePaths
+    ):
+        with open(compiledFilePath, "rb") as inFile:
+            return pickle.load(inFile)
     
     # -------------------------------------------------------------------------
     # Loading the CSV files containing the profiles
     # -------------------------------------------------------------------------
 
-    # Has GeneralCols + BwProfCols + BwProfColsAlone
+    # In this order, they have
+    # - _GeneralCols + _BwProfCols + _BwProfAloneCols
+    # - _GeneralCols + _BwProfCols
+    # - _GeneralCols
+    # - _GeneralCols
     readCsvParams = dict(sep="\t", skiprows=2)
-    dfBwProfsAlone = pd.read_csv(
-            os.path.join(profileDirPath, "bw_prof_alone.csv"),
-            **readCsvParams
-    )
-    # Has GeneralCols + BwProfCols
-    dfBwProfsCasc = pd.read_csv(
-            os.path.join(profileDirPath, "bw_prof_casc.csv"),
-            **readCsvParams
-    )
-    # Has GeneralCols
-    dfConstProfsCasc = pd.read_csv(
-            os.path.join(profileDirPath, "const_prof_casc.csv"),
-            **readCsvParams
-    )
-    # Has GeneralCols
-    dfUncomprProfs = pd.read_csv(
-            os.path.join(profileDirPath, "uncompr.csv"),
-            **readCsvParams
-    )
+    dfBwProfsAlone, dfBwProfsCasc, dfConstProfsCasc, dfUncomprProfs = [
+        pd.read_csv(csvFilePath, **readCsvParams)
+        for csvFilePath in csvFilePaths
+    ]
     
-    if any(dfBwProfsAlone[GeneralCols.check] == 0):
+    if any(dfBwProfsAlone[_GeneralCols.check] == 0):
         raise RuntimeError(
                 "some check in the calibration of stand-alone bit width "
                 "profiles failed"
         )
-    if any(dfBwProfsCasc[GeneralCols.check] == 0):
+    if any(dfBwProfsCasc[_GeneralCols.check] == 0):
         raise RuntimeError(
                 "some check in the calibration of cascade bit width "
                 "profiles failed"
@@ -207,24 +239,58 @@ def _configureCostModel(ps, profileDirPath):
     # Averaging of repeated calibration measurements
     # -------------------------------------------------------------------------
     
-    # Drop unnecessary columns.
-    for df in [dfBwProfsAlone, dfBwProfsCasc, dfConstProfsCasc, dfUncomprProfs]:
-        df.drop(columns=[GeneralCols.rep, GeneralCols.check], inplace=True)
+    # Drop unnecessary columns and the measurements of other processing
+    # styles.
+    dfs = [
+        df[df[_GeneralCols.ve] == ps].drop(
+                columns=[_GeneralCols.rep, _GeneralCols.check]
+        )
+        for df in [dfBwProfsAlone, dfBwProfsCasc, dfConstProfsCasc, dfUncomprProfs]
+    ]
+    dfBwProfsAlone, dfBwProfsCasc, dfConstProfsCasc, dfUncomprProfs = dfs
     
     # Calculate the mean of repeated measurements.
     dfBwProfsAlone = dfBwProfsAlone.groupby(
-            [GeneralCols.ve, GeneralCols.fmt, BwProfCols.bw], as_index=False
+            [_GeneralCols.ve, _GeneralCols.fmt, _BwProfCols.bw], as_index=False
     ).mean()
     dfBwProfsCasc = dfBwProfsCasc.groupby(
-            [GeneralCols.ve, GeneralCols.fmt, BwProfCols.bw], as_index=False
+            [_GeneralCols.ve, _GeneralCols.fmt, _BwProfCols.bw], as_index=False
     ).mean()
     dfConstProfsCasc = dfConstProfsCasc.groupby(
-            [GeneralCols.ve, GeneralCols.fmt], as_index=False
+            [_GeneralCols.ve, _GeneralCols.fmt], as_index=False
     ).mean()
     dfUncomprProfs = dfUncomprProfs.groupby(
-            GeneralCols.ve, as_index=False
+            _GeneralCols.ve, as_index=False
     ).mean()
     
+    profiles = (dfBwProfsAlone, dfBwProfsCasc, dfConstProfsCasc, dfUncomprProfs)
+    
+    # Write to a temporary file first, such that concurrent translations never
+    # read an incomplete file.
+    os.makedirs(os.path.dirname(compiledFilePath), exist_ok=True)
+    tmpFilePath = "{}.{}.tmp".format(compiledFilePath, os.getpid())
+    with open(tmpFilePath, "wb") as outFile:
+        pickle.dump(profiles, outFile)
+    os.replace(tmpFilePath, compiledFilePath)
+    
+    return profiles
+
+# The cost models configured so far, by processing style and profile directory.
+_costModelCache = {}
+
+def _configureCostModel(ps, profileDirPath):
+    key = (ps, os.path.abspath(profileDirPath))
+    if key not in _costModelCache:
+        _costModelCache[key] = _createCostModel(ps, profileDirPath)
+    return _costModelCache[key]
+
+def _createCostModel(ps, profileDirPath):
+    #TODO This does not belong here.
+    BITS_PER_BYTE = 8
+    
+    dfBwProfsAlone, dfBwProfsCasc, dfConstProfsCasc, dfUncomprProfs = \
+            compileProfiles(ps, profileDirPath)
+    
     # -------------------------------------------------------------------------
     # Creation of a new cost model
     # -------------------------------------------------------------------------
@@ -254,7 +320,7 @@ def _configureCostModel(ps, profileDirPath):
     costModel.diProfs[cm.CONTEXT_STAND_ALONE][fmt.changeMode(algo.MODE_FORMAT)] = cm.UNCOMPR_BW
     
     # Runtimes.
-    dfUncomprProfs_Ps = dfUncomprProfs[dfUncomprProfs[GeneralCols.ve] == ps]
+    dfUncomprProfs_Ps = dfUncomprProfs[dfUncomprProfs[_GeneralCols.ve] == ps]
     if not len(dfUncomprProfs_Ps):
         raise RuntimeError(
                 "there seem to be no calibration measurements for "
@@ -325,38 +391,38 @@ def _configureCostModel(ps, profileDirPath):
         else:
             internalName = fmt.getInternalName()
         dfBwProfsAlone_PsFmt = dfBwProfsAlone[
-            (dfBwProfsAlone[GeneralCols.ve] == ps) &
-            (dfBwProfsAlone[GeneralCols.fmt] == internalName)
+            (dfBwProfsAlone[_GeneralCols.ve] == ps) &
+            (dfBwProfsAlone[_GeneralCols.fmt] == internalName)
         ]
-        dfBwProfsAlone_PsFmt.index = dfBwProfsAlone_PsFmt[BwProfCols.bw]
+        dfBwProfsAlone_PsFmt.index = dfBwProfsAlone_PsFmt[_BwProfCols.bw]
         dfBwProfsCasc_PsFmt = dfBwProfsCasc[
-            (dfBwProfsCasc[GeneralCols.ve] == ps) &
-            (dfBwProfsCasc[GeneralCols.fmt] == internalName)
+            (dfBwProfsCasc[_GeneralCols.ve] == ps) &
+            (dfBwProfsCasc[_GeneralCols.fmt] == internalName)
         ]
-        dfBwProfsCasc_PsFmt.index = dfBwProfsCasc_PsFmt[BwProfCols.bw]
+        dfBwProfsCasc_PsFmt.index = dfBwProfsCasc_PsFmt[_BwProfCols.bw]
         
         # Compression rate.
         
         costModel.bwProfs[cm.CONTEXT_STAND_ALONE][fmt.changeMode(algo.MODE_FORMAT)] = \
-                dfBwProfsAlone_PsFmt[BwProfAloneCols.sizeUsed] / \
-                dfBwProfsAlone_PsFmt[BwProfAloneCols.count] * BITS_PER_BYTE
+                dfBwProfsAlone_PsFmt[_BwProfAloneCols.sizeUsed] / \
+                dfBwProfsAlone_PsFmt[_BwProfAloneCols.count] * BITS_PER_BYTE
         
         # Runtimes and penalty factors.
         # The penalty factors are 0 for all Null Suppression algorithms we
         # have so far in MorphStore.
 
         fmtCompr = fmt.changeMode(algo.MODE_COMPR)
-        costModel.bwProfs[cm.CONTEXT_STAND_ALONE][fmtCompr] = dfBwProfsCasc_PsFmt[GeneralCols.rtc] # cache -> RAM
+        costModel.bwProfs[cm.CONTEXT_STAND_ALONE][fmtCompr] = dfBwProfsCasc_PsFmt[_GeneralCols.rtc] # cache -> RAM
         costModel.penaltyFactors[cm.CONTEXT_STAND_ALONE][fmtCompr] = 0
         if supportCasc:
-            costModel.bwProfs[cm.CONTEXT_IN_CASC][fmtCompr] = dfBwProfsCasc_PsFmt[GeneralCols.rtc] # cache -> RAM
+            costModel.bwProfs[cm.CONTEXT_IN_CASC][fmtCompr] = dfBwProfsCasc_PsFmt[_GeneralCols.rtc] # cache -> RAM
             costModel.penaltyFactors[cm.CONTEXT_IN_CASC][fmtCompr] = 0
 
         fmtDecompr = fmt.changeMode(algo.MODE_DECOMPR)
-        costModel.bwProfs[cm.CONTEXT_STAND_ALONE][fmtDecompr] = dfBwProfsAlone_PsFmt[GeneralCols.rta] # RAM -> reg
+        costModel.bwProfs[cm.CONTEXT_STAND_ALONE][fmtDecompr] = dfBwProfsAlone_PsFmt[_GeneralCols.rta] # RAM -> reg
         costModel.penaltyFactors[cm.CONTEXT_STAND_ALONE][fmtDecompr] = 0
         if supportCasc:
-            costModel.bwProfs[cm.CONTEXT_IN_CASC][fmtDecompr] = dfBwProfsCasc_PsFmt[GeneralCols.rtd] # RAM -> cache
+            costModel.bwProfs[cm.CONTEXT_IN_CASC][fmtDecompr] = dfBwProfsCasc_PsFmt[_GeneralCols.rtd] # RAM -> cache
             costModel.penaltyFactors[cm.CONTEXT_IN_CASC][fmtDecompr] = 0
 
     # -------------------------------------------------------------------------
@@ -389,8 +455,8 @@ def _configureCostModel(ps, profileDirPath):
         # --------------
         
         dfConstProfsCasc_PsFmt = dfConstProfsCasc[
-            (dfConstProfsCasc[GeneralCols.ve] == ps) &
-            (dfConstProfsCasc[GeneralCols.fmt] == fmt.getInternalName())
+            (dfConstProfsCasc[_GeneralCols.ve] == ps) &
+            (dfConstProfsCasc[_GeneralCols.fmt] == fmt.getInternalName())
         ]
         
         # Compression rate.
@@ -403,38 +469,470 @@ def _configureCostModel(ps, profileDirPath):
         costModel.diProfs[cm.CONTEXT_IN_CASC][fmt.changeMode(algo.MODE_COMPR)] = \
                 dfConstProfsCasc_PsFmt["runtime compr cache2cache [µs]"].values[0] # cache -> cache
         costModel.diProfs[cm.CONTEXT_IN_CASC][fmt.changeMode(algo.MODE_DECOMPR)] \
-                = dfConstProfsCasc_PsFmt[GeneralCols.rta].values[0] # cache -> reg
+                = dfConstProfsCasc_PsFmt[_GeneralCols.rta].values[0] # cache -> reg
                     
     return costModel
 
+def getCandidateFormats(ps, allowHigherStaticBitWidth=False):
+    """
+    Returns the list of the formats among which the cost-based and real
+    best/worst strategies choose for columns without random access.
+    """
+    
+    choice = [
+        formats.UncomprFormat(),
+    ]
+    if allowHigherStaticBitWidth:
+        choice.extend([
+            formats.StaticVBPFormat(ps, "bit"),
+            formats.StaticVBPFormat(ps, "even"),
+            formats.StaticVBPFormat(ps, "byte"),
+            formats.StaticVBPFormat(ps, "pot"),
+        ])
+    else:
+        choice.append(formats.StaticVBPFormat(ps))
+    choice.extend([
+        formats.DynamicVBPFormat(ps),
+        formats.DeltaCascFormat(
+                formats.CASC_BLOCKSIZE_LOG,
+                ps,
+                formats.DynamicVBPFormat(ps)
+        ),
+        formats.ForCascFormat(
+                formats.CASC_BLOCKSIZE_LOG,
+                ps,
+                formats.DynamicVBPFormat(ps)
+        ),
+    ])
+    if ps == pss.PS_VEC128:
+        choice.extend([
+            formats.KWiseNSFormat(ps),
+            formats.DeltaCascFormat(
+                    formats.CASC_BLOCKSIZE_LOG,
+                    ps,
+                    formats.KWiseNSFormat(ps)
+            ),
+            formats.ForCascFormat(
+                    formats.CASC_BLOCKSIZE_LOG,
+                    ps,
+                    formats.KWiseNSFormat(ps)
+            ),
+        ])
+    return [al.changeMode(algo.MODE_FORMAT) for al in choice]
+
+def costMatrix(costFunc, dfColInfos, choice):
+    """
+    Returns the costs of all formats in the given choice for all columns
+    represented by the rows of the given `pandas.DataFrame` as a NumPy array
+    with one row per column and one column per format.
+    
+    The given cost function is called once per format and must return the
+    costs of that format for all columns as a `pandas.Series`. Missing costs
+    are NaN.
+    """
+    
+    mCost = np.empty((len(dfColInfos), len(choice)))
+    for fmtIdx, fmt in enumerate(choice):
+        mCost[:, fmtIdx] = pd.Series(costFunc(fmt)).reindex(
+                dfColInfos.index
+        ).to_numpy(dtype=float)
+    return mCost
+
+def _chooseMatrixBased(mCost, minimize, dfColInfos, choice):
+    """
+    Chooses the format with the minimum (or maximum) cost for each column
+    from the given cost matrix (see costMatrix()).
+    """
+    
+    # Formats whose costs are unknown are never chosen.
+    mCost = np.where(np.isnan(mCost), math.inf if minimize else -math.inf, mCost)
+    fmtIdxs = mCost.argmin(axis=1) if minimize else mCost.argmax(axis=1)
+    sFound = np.isfinite(mCost[np.arange(len(fmtIdxs)), fmtIdxs])
+    if not sFound.all():
+        raise RuntimeError(
+                "the costs of all formats are unknown for column '{}'".format(
+                        dfColInfos.index[~sFound][0]
+                )
+        )
+    res = pd.Series(
+            [choice[fmtIdx] for fmtIdx in fmtIdxs],
+            index=dfColInfos.index,
+            dtype=object
+    )
+    return _setStaticBitwidth(res, dfColInfos)
+
 def _chooseFuncBased(costFunc, minimize, dfColInfos, choice):
-    res = cm.select(
-            choice,
-            costFunc,
-            minimize,
-            math.inf,
-            None
-    )["algo"]
-    res = _setStaticBitwidth(res, dfColInfos)
-    return res
+    return _chooseMatrixBased(
+            costMatrix(costFunc, dfColInfos, choice),
+            minimize, dfColInfos, choice
+    )
+
+def getCostMatrix(objective, dfColInfos, choice, processingStyle, profileDirPath):
+    """
+    Returns the costs of all formats in the given choice for all columns
+    represented by the rows of the given `pandas.DataFrame` w.r.t. the given
+    objective as estimated by our cost model (see costMatrix()).
+    """
+    
+    algoCostModel = _configureCostModel(processingStyle, profileDirPath)
+    if objective == OBJ_MEM:
+        return costMatrix(
+                partial(algoCostModel.cost, dfDC=dfColInfos),
+                dfColInfos, choice
+        )
+    elif objective == OBJ_PERF:
+        return CostModel(algoCostModel).costMatrix(dfColInfos, choice)
+    else:
+        raise RuntimeError(
+                "unsupported objective for cost-based format selection: "
+                "'{}'".format(objective)
+        )
 
 # Our cost-based strategy.
 def chooseCostBased(
     objective, dfColInfos, choice, processingStyle, profileDirPath
 ):
-    # TODO Don't reconfigure every time.
+    return _chooseMatrixBased(
+            getCostMatrix(
+                    objective, dfColInfos, choice,
+                    processingStyle, profileDirPath
+            ),
+            True, dfColInfos, choice
+    )
+
+# The maximum number of formats besides its own format into which the
+# query-wide strategy morphs a column.
+MAX_MORPHS_PER_COL = 2
+
+def chooseGlobal(
+    translationResult, dfColInfos, processingStyle, objective,
+    uncomprBase, uncomprInterm, fnRndAccUnsorted, fnRndAccSorted,
+    profileDirPath
+):
+    """
+    Our query-wide cost-based strategy.
+    
+    In contrast to the other strategies, the format in which an operator call
+    consumes a column may differ from the format in which the column was
+    produced. In this case, a full-column morph-operator is inserted (see
+    _insertMorphs()). This allows, e.g., to produce a column in a compressed
+    format for most of its consumers, while an operator call requiring
+    uncompressed data gets an uncompressed copy.
+    
+    Since the cost model estimates the costs of each column on its own, the
+    query-wide optimum is the combination of the optima for each column. For
+    each column, the format of its producer and the formats of all its
+    consumers are chosen jointly by enumerating all producer formats and all
+    sets of at most MAX_MORPHS_PER_COL further formats. Each consumer gets the
+    cheapest of these formats it supports. The costs are, depending on the
+    objective:
+    - OBJ_PERF: compressing the column by its producer, decompressing it by
+      each consumer, and decompressing and compressing it by each morph.
+    - OBJ_MEM: the sizes of the column in all of these formats.
+    Base columns are never written and morphed during the query execution.
+    
+    Like for the cost-based strategy, columns with random access get the
+    formats of the rule-based strategy. These columns, result columns, and
+    columns which must be uncompressed by the other parameters are
+    uncompressed for all of their consumers, if necessary.
+    
+    Returns a `pandas.Series` of the format of each column and a dictionary
+    mapping a pair of the index of an operator call (in the sense of
+    ir.DefUseGraph.ops) and the key of one of its input columns to the format
+    in which this operator call consumes the column, if it differs.
+    """
+    
+    tr = translationResult
+    graph = ir.DefUseGraph(tr.prog, resultCols=tr.resultCols)
+    dfColInfos = dfColInfos.loc[list(graph.cols)]
+    
+    sHasRndAcc = \
+        dfColInfos[csvutils.ColInfoCols.hasRndAccUnsorted] | \
+        dfColInfos[csvutils.ColInfoCols.hasRndAccSorted]
+    sMustBeUncompr = \
+        dfColInfos[csvutils.ColInfoCols.isResult] | \
+        (sHasRndAcc & dfColInfos[csvutils.ColInfoCols.isForcedUncompr]) | \
+        (dfColInfos[csvutils.ColInfoCols.isBaseCol] & uncomprBase) | \
+        (~dfColInfos[csvutils.ColInfoCols.isBaseCol] & uncomprInterm)
+    dfColInfosRndAcc = dfColInfos[sHasRndAcc & ~sMustBeUncompr]
+    dfColInfosOpt = dfColInfos[~sHasRndAcc & ~sMustBeUncompr]
+    
+    formatsByCol = chooseUncompr(sMustBeUncompr[sMustBeUncompr].index).to_dict()
+    if len(dfColInfosRndAcc):
+        formatsByCol.update(chooseRuleBased(
+                dfColInfosRndAcc, fnRndAccUnsorted, fnRndAccSorted, None, None
+        ).to_dict())
+    inFormatsByEdge = {}
+    if not len(dfColInfosOpt):
+        return pd.Series(formatsByCol, dtype=object), inFormatsByEdge
+    
+    # The costs of all candidate formats for all columns to optimize.
+    choice = getCandidateFormats(processingStyle)
+    uncomprIdx = next(
+            fmtIdx
+            for fmtIdx, fmt in enumerate(choice)
+            if isinstance(fmt, formats.UncomprFormat)
+    )
     algoCostModel = _configureCostModel(processingStyle, profileDirPath)
-    if objective == OBJ_MEM:
-        func = partial(algoCostModel.cost, dfDC=dfColInfos)
-    elif objective == OBJ_PERF:
-        costModel = CostModel(algoCostModel)
-        func = partial(costModel.cost, dfColInfos=dfColInfos)
+    def getMatrix(mode):
+        mCost = costMatrix(
+                lambda fmt: algoCostModel.cost(fmt.changeMode(mode), dfColInfosOpt),
+                dfColInfosOpt, choice
+        )
+        # Formats whose costs are unknown are never chosen.
+        return np.where(np.isnan(mCost), math.inf, mCost)
+    if objective == OBJ_PERF:
+        mCompr = getMatrix(algo.MODE_COMPR)
+        mDecompr = getMatrix(algo.MODE_DECOMPR)
+    elif objective == OBJ_MEM:
+        mSize = getMatrix(algo.MODE_FORMAT)
     else:
         raise RuntimeError(
-                "unsupported objective for cost-based format selection: "
+                "unsupported objective for query-wide format selection: "
                 "'{}'".format(objective)
         )
-    return _chooseFuncBased(func, True, dfColInfos, choice)
+    
+    fmtIdxsAll = range(len(choice))
+    for rowIdx, col in enumerate(dfColInfosOpt.index):
+        isBaseCol = dfColInfosOpt[csvutils.ColInfoCols.isBaseCol].iloc[rowIdx]
+        
+        # The formats supported by the producer and by each consumer.
+        producerIdx = graph.producerIdxByCol.get(col)
+        if producerIdx is not None and any(
+            analysis.requiresUncompr(graph.ops[producerIdx], key)
+            for key in graph.ops[producerIdx].colKeys()
+            if getattr(graph.ops[producerIdx], key) == col
+        ):
+            producerFmtIdxs = [uncomprIdx]
+        else:
+            producerFmtIdxs = fmtIdxsAll
+        edges = []
+        for opIdx in graph.consumerIdxsByCol.get(col, []):
+            op = graph.ops[opIdx]
+            for key in op.colKeys():
+                if not key.startswith("in") or getattr(op, key) != col:
+                    continue
+                # See _insertMorphs().
+                if isinstance(op, ops.SumGrBased) and key == "inExtCol":
+                    continue
+                edges.append((
+                    (opIdx, key),
+                    {uncomprIdx} if analysis.requiresUncompr(op, key)
+                    else set(fmtIdxsAll)
+                ))
+        
+        bestCost = math.inf
+        for pIdx in producerFmtIdxs:
+            morphFmtIdxSets = [
+                fmtIdxs
+                for countMorphs in range(MAX_MORPHS_PER_COL + 1)
+                for fmtIdxs in itertools.combinations(
+                        [fmtIdx for fmtIdx in fmtIdxsAll if fmtIdx != pIdx],
+                        countMorphs
+                )
+            ]
+            for qIdxs in morphFmtIdxSets:
+                available = {pIdx, *qIdxs}
+                # The format in which each consumer consumes the column.
+                edgeFmtIdxs = []
+                for edge, allowed in edges:
+                    candidates = available & allowed
+                    if not candidates:
+                        break
+                    # The cheapest format, preferring the producer's format.
+                    edgeFmtIdxs.append(min(
+                            candidates,
+                            key=lambda fmtIdx: (
+                                mDecompr[rowIdx, fmtIdx]
+                                if objective == OBJ_PERF
+                                else 0,
+                                fmtIdx != pIdx,
+                                fmtIdx,
+                            )
+                    ))
+                else:
+                    # Morphs which are not consumed are useless.
+                    if not set(qIdxs) <= set(edgeFmtIdxs):
+                        continue
+                    if objective == OBJ_PERF:
+                        cost = sum(
+                                mDecompr[rowIdx, fmtIdx]
+                                for fmtIdx in edgeFmtIdxs
+                        )
+                        if not isBaseCol:
+                            cost += mCompr[rowIdx, pIdx] + sum(
+                                    mDecompr[rowIdx, pIdx] +
+                                    mCompr[rowIdx, qIdx]
+                                    for qIdx in qIdxs
+                            )
+                    else:
+                        cost = sum(mSize[rowIdx, fmtIdx] for fmtIdx in available)
+                    if cost < bestCost:
+                        bestCost = cost
+                        bestPIdx = pIdx
+                        bestEdgeFmtIdxs = edgeFmtIdxs
+        if bestCost == math.inf:
+            raise RuntimeError(
+                    "the costs of all formats are unknown for column '{}'".format(
+                            col
+                    )
+            )
+        
+        maxBw = dfColInfosOpt[csvutils.ColInfoCols.maxBw].iloc[rowIdx]
+        formatsByCol[col] = _setBw(choice[bestPIdx], maxBw)
+        for (edge, _), fmtIdx in zip(edges, bestEdgeFmtIdxs):
+            if fmtIdx != bestPIdx:
+                inFormatsByEdge[edge] = _setBw(choice[fmtIdx], maxBw)
+    
+    return pd.Series(formatsByCol, dtype=object), inFormatsByEdge
+
+def chooseBudgeted(
+    translationResult, dfColInfos, processingStyle, budget,
+    uncomprBase, uncomprInterm, fnRndAccUnsorted, fnRndAccSorted,
+    profileDirPath, sizesFilePath=None
+):
+    """
+    Our cost-based strategy minimizing the runtime subject to a memory budget.
+    
+    The peak memory footprint of the query program is the maximum total size
+    of the columns alive at the same time. A base column is alive during the
+    whole program, an intermediate from its producer to its last consumer
+    (see ir.DefUseGraph.lastUseIdx()), and a result column until the end of
+    the program. The sizes of the columns in the candidate formats are taken
+    from the given CSV file containing size measurements (see 'ssb.sh -p s'),
+    if specified, or are estimated by the cost model relative to the
+    uncompressed size.
+    
+    Like for the cost-based strategy, columns with random access get the
+    formats of the rule-based strategy. These columns, result columns, and
+    columns which must be uncompressed stay as they are. Starting from the
+    formats with the minimum runtime, the strategy repeatedly switches one of
+    the remaining columns alive at the time of the peak memory footprint to a
+    smaller format, choosing the switch with the least additional runtime per
+    byte saved, until the peak memory footprint fits into the given budget
+    (in bytes).
+    """
+    
+    tr = translationResult
+    graph = ir.DefUseGraph.fromTranslationResult(tr)
+    cols = list(graph.cols)
+    dfColInfos = dfColInfos.loc[cols]
+    
+    sHasRndAcc = \
+        dfColInfos[csvutils.ColInfoCols.hasRndAccUnsorted] | \
+        dfColInfos[csvutils.ColInfoCols.hasRndAccSorted]
+    sMustBeUncompr = \
+        dfColInfos[csvutils.ColInfoCols.isForcedUncompr] | \
+        dfColInfos[csvutils.ColInfoCols.isResult] | \
+        (dfColInfos[csvutils.ColInfoCols.isBaseCol] & uncomprBase) | \
+        (~dfColInfos[csvutils.ColInfoCols.isBaseCol] & uncomprInterm)
+    sOpt = ~sHasRndAcc & ~sMustBeUncompr
+    
+    formatsByCol = chooseUncompr(sMustBeUncompr[sMustBeUncompr].index).to_dict()
+    dfColInfosRndAcc = dfColInfos[sHasRndAcc & ~sMustBeUncompr]
+    if len(dfColInfosRndAcc):
+        formatsByCol.update(chooseRuleBased(
+                dfColInfosRndAcc, fnRndAccUnsorted, fnRndAccSorted, None, None
+        ).to_dict())
+    
+    # The runtimes and sizes of all candidate formats for all columns.
+    choice = getCandidateFormats(processingStyle)
+    uncomprIdx = next(
+            fmtIdx
+            for fmtIdx, fmt in enumerate(choice)
+            if isinstance(fmt, formats.UncomprFormat)
+    )
+    algoCostModel = _configureCostModel(processingStyle, profileDirPath)
+    mRuntime = CostModel(algoCostModel).costMatrix(dfColInfos, choice)
+    aSizeUncompr = dfColInfos[csvutils.ColInfoCols.countValues].to_numpy(
+            dtype=float
+    ) * cm.UNCOMPR_BW / 8
+    if sizesFilePath is None:
+        mSize = costMatrix(
+                lambda fmt: algoCostModel.cost(fmt, dfColInfos),
+                dfColInfos, choice
+        )
+        mSize = mSize / mSize[:, [uncomprIdx]] * aSizeUncompr[:, np.newaxis]
+    else:
+        mSize = costMatrix(
+                partial(_measure, csvutils.getSizes(sizesFilePath, cols)),
+                dfColInfos, choice
+        )
+    # Formats whose costs are unknown are never chosen.
+    sUnknown = np.isnan(mRuntime) | np.isnan(mSize)
+    mRuntime = np.where(sUnknown, math.inf, mRuntime)
+    mSize = np.where(sUnknown, math.inf, mSize)
+    
+    # The sizes of the columns whose formats are fixed. Formats which are not
+    # among the candidates are pessimistically assumed to be uncompressed.
+    aSize = aSizeUncompr.copy()
+    for colIdx, col in enumerate(cols):
+        if col in formatsByCol:
+            maxBw = dfColInfos[csvutils.ColInfoCols.maxBw].iloc[colIdx]
+            for fmtIdx, fmt in enumerate(choice):
+                if _setBw(fmt, maxBw).getInternalName() == \
+                        formatsByCol[col].getInternalName() and \
+                        np.isfinite(mSize[colIdx, fmtIdx]):
+                    aSize[colIdx] = mSize[colIdx, fmtIdx]
+                    break
+    
+    # The formats with the minimum runtime for the remaining columns.
+    optColIdxs = np.flatnonzero(sOpt.to_numpy())
+    aFmtIdx = np.full(len(cols), uncomprIdx)
+    aFmtIdx[optColIdxs] = mRuntime[optColIdxs].argmin(axis=1)
+    for colIdx in optColIdxs:
+        if not np.isfinite(mRuntime[colIdx, aFmtIdx[colIdx]]):
+            raise RuntimeError(
+                    "the costs of all formats are unknown for column "
+                    "'{}'".format(cols[colIdx])
+            )
+    aSize[optColIdxs] = mSize[optColIdxs, aFmtIdx[optColIdxs]]
+    
+    # Which columns are alive during which operator call.
+    countOps = len(graph.ops)
+    mAlive = np.zeros((max(countOps, 1), len(cols)), dtype=bool)
+    for colIdx, col in enumerate(cols):
+        firstIdx = graph.producerIdxByCol.get(col, 0)
+        lastIdx = graph.lastUseIdx(col)
+        if lastIdx is None:
+            lastIdx = countOps - 1
+        mAlive[firstIdx:lastIdx + 1, colIdx] = True
+    
+    while True:
+        aFootprint = mAlive @ aSize
+        peakIdx = aFootprint.argmax()
+        if aFootprint[peakIdx] <= budget:
+            break
+        # The switch with the least additional runtime per byte saved.
+        bestRatio = math.inf
+        for colIdx in optColIdxs[mAlive[peakIdx, optColIdxs]]:
+            curFmtIdx = aFmtIdx[colIdx]
+            for fmtIdx in range(len(choice)):
+                saved = aSize[colIdx] - mSize[colIdx, fmtIdx]
+                if not saved > 0 or not np.isfinite(mRuntime[colIdx, fmtIdx]):
+                    continue
+                ratio = (
+                    mRuntime[colIdx, fmtIdx] - mRuntime[colIdx, curFmtIdx]
+                ) / saved
+                if ratio < bestRatio:
+                    bestRatio = ratio
+                    bestColIdx = colIdx
+                    bestFmtIdx = fmtIdx
+        if bestRatio == math.inf:
+            raise RuntimeError(
+                    "the peak memory footprint of the query cannot be reduced "
+                    "below {:.0f} bytes, which exceeds the memory budget of {} "
+                    "bytes".format(aFootprint[peakIdx], budget)
+            )
+        aFmtIdx[bestColIdx] = bestFmtIdx
+        aSize[bestColIdx] = mSize[bestColIdx, bestFmtIdx]
+    
+    for colIdx in optColIdxs:
+        formatsByCol[cols[colIdx]] = _setBw(
+                choice[aFmtIdx[colIdx]],
+                dfColInfos[csvutils.ColInfoCols.maxBw].iloc[colIdx]
+        )
+    return pd.Series(formatsByCol, dtype=object)
 
 def _measure(dfMea, al):
     if al._mode == algo.MODE_FORMAT:
@@ -503,21 +1001,29 @@ def _addHeaders(tr, fmt):
     else:
         raise RuntimeError("unsupported format: '{}'".format(fmt))
 
-def _insertFormats(tr, sFormats):
+def _insertFormats(tr, sFormats, inFormatsByEdge={}):
+    # inFormatsByEdge can override the format of input columns, see
+    # chooseGlobal().
+    opIdx = 0
     for el in tr.prog:
         if isinstance(el, ops.Op):
             for key in el.__dict__:
                 if key.endswith("F"):
-                    varName = getattr(el, key[:-1] + "Col")
-                    if varName not in sFormats:
+                    colKey = key[:-1] + "Col"
+                    varName = getattr(el, colKey)
+                    if (opIdx, colKey) in inFormatsByEdge:
+                        fmt = inFormatsByEdge[(opIdx, colKey)]
+                    elif varName not in sFormats:
                         raise RuntimeError(
                                 "no format provided for column '{}'".format(
                                         varName
                                 )
                         )
-                    fmt = sFormats[varName]
+                    else:
+                        fmt = sFormats[varName]
                     el.__dict__[key] = fmt.getInternalName()
                     _addHeaders(tr, fmt)
+            opIdx += 1
 
 # Checks if all input and output formats of all operators in the given
 # translated query have been set and raises an error otherwise.
@@ -565,25 +1071,24 @@ def _insertMorphs(translationResult):
     # Add full-column morphs for the operators' input columns, if necessary.
     for el in translationResult.prog:
         if isinstance(el, ops.Op):
-            for key in el.__dict__:
-                if key.endswith("Col"):
-                    if isinstance(el, ops.SumGrBased) and key == "inExtCol":
-                        # This special case must be skipped, since the
-                        # group-based agg_sum-operator does not access the data
-                        # of its parameter inExtCol, but only needs its number
-                        # of data elements. Thus, no special format is required
-                        # for this input column.
-                        continue
-                    varName = getattr(el, key)
-                    configuredFormat = getattr(
-                        el, "{}F".format(key[:-len("Col")])
-                    )
-                    if key.startswith("in"): # Input columns
-                        _ensureAvailable(varName, configuredFormat)
-                        setattr(el, key, actualNames[varName][configuredFormat])
-                    else: # Output columns
-                        # Remember in which format this column was created.
-                        actualNames[varName] = {configuredFormat: varName}
+            for key in el.colKeys():
+                if isinstance(el, ops.SumGrBased) and key == "inExtCol":
+                    # This special case must be skipped, since the
+                    # group-based agg_sum-operator does not access the data of
+                    # its parameter inExtCol, but only needs its number of
+                    # data elements. Thus, no special format is required for
+                    # this input column.
+                    continue
+                varName = getattr(el, key)
+                configuredFormat = getattr(
+                    el, "{}F".format(key[:-len("Col")])
+                )
+                if key.startswith("in"): # Input columns
+                    _ensureAvailable(varName, configuredFormat)
+                    setattr(el, key, actualNames[varName][configuredFormat])
+                else: # Output columns
+                    # Remember in which format this column was created.
+                    actualNames[varName] = {configuredFormat: varName}
         newProg.append(el)
     
     
@@ -706,46 +1211,9 @@ def choose(
                             None, None
                     )
                 if len(dfColInfosComprHasNoRndAcc):
-                    choice = [
-                        formats.UncomprFormat(),
-                    ]
-                    if allowHigherStaticBitWidth:
-                        choice.extend([
-                            formats.StaticVBPFormat(processingStyle, "bit"),
-                            formats.StaticVBPFormat(processingStyle, "even"),
-                            formats.StaticVBPFormat(processingStyle, "byte"),
-                            formats.StaticVBPFormat(processingStyle, "pot"),
-                        ])
-                    else:
-                        choice.append(formats.StaticVBPFormat(processingStyle))
-                    choice.extend([
-                        formats.DynamicVBPFormat(processingStyle),
-                        formats.DeltaCascFormat(
-                                formats.CASC_BLOCKSIZE_LOG,
-                                processingStyle,
-                                formats.DynamicVBPFormat(processingStyle)
-                        ),
-                        formats.ForCascFormat(
-                                formats.CASC_BLOCKSIZE_LOG,
-                                processingStyle,
-                                formats.DynamicVBPFormat(processingStyle)
-                        ),
-                    ])
-                    if processingStyle == pss.PS_VEC128:
-                        choice.extend([
-                            formats.KWiseNSFormat(processingStyle),
-                            formats.DeltaCascFormat(
-                                    formats.CASC_BLOCKSIZE_LOG,
-                                    processingStyle,
-                                    formats.KWiseNSFormat(processingStyle)
-                            ),
-                            formats.ForCascFormat(
-                                    formats.CASC_BLOCKSIZE_LOG,
-                                    processingStyle,
-                                    formats.KWiseNSFormat(processingStyle)
-                            ),
-                        ])
-                    choice = [al.changeMode(algo.MODE_FORMAT) for al in choice]
+                    choice = getCandidateFormats(
+                            processingStyle, allowHigherStaticBitWidth
+                    )
                     sFormats = sFormats.append(chooseFunc(
                             objective, dfColInfosComprHasNoRndAcc, choice
                     ))
@@ -762,6 +1230,69 @@ def choose(
     
     return sFormats
             
+def estimateColInfos(translationResult, statDirPath, analysisResult=None):
+    """
+    Returns a `pandas.DataFrame` like `csvutils.getColInfos()`, but with the
+    data characteristics estimated from the statistics on the base data in
+    the given directory (see module mal2morphstore.estimation) instead of
+    measured in a previous run of the translated program.
+    
+    If the analysis of the translated program with cardinalities and bit
+    widths is already known, it can be passed to avoid analyzing it again.
+    """
+    
+    tr = translationResult
+    if analysisResult is None:
+        ar = analysis.analyze(tr, True, statDirPath)
+    else:
+        ar = analysisResult
+    resultCols = set(tr.resultCols)
+    
+    rows = []
+    varNames = list(ir.DefUseGraph(tr.prog).cols)
+    for varName in varNames:
+        est = ar.estimateByCol[varName]
+        bwHist = est.bwHist()
+        rows.append(bwHist + [
+            int(round(est.count)),
+            int(round(est.countDistinct)),
+            est.min,
+            est.max,
+            est.isSorted,
+            max(bw for bw, count in enumerate(bwHist, 1) if count > 0),
+            "." in varName,
+            varName in resultCols,
+            varName in ar.varsRndAccessUnsorted,
+            varName in ar.varsRndAccessSorted,
+            ar.countSeqAccessByCol.get(varName, 0),
+            varName in ar.varsForcedUncompr,
+            ar.minDistanceToBaseByCol[varName],
+            ar.maxDistanceToBaseByCol[varName],
+            ar.producingOpIdxByCol[varName],
+        ])
+    
+    return pd.DataFrame(
+        rows,
+        index=varNames,
+        columns=csvutils.ColInfoCols.bwHist + [
+            csvutils.ColInfoCols.countValues,
+            csvutils.ColInfoCols.countDistinct,
+            csvutils.ColInfoCols.min,
+            csvutils.ColInfoCols.max,
+            csvutils.ColInfoCols.isSorted,
+            csvutils.ColInfoCols.maxBw,
+            csvutils.ColInfoCols.isBaseCol,
+            csvutils.ColInfoCols.isResult,
+            csvutils.ColInfoCols.hasRndAccUnsorted,
+            csvutils.ColInfoCols.hasRndAccSorted,
+            csvutils.ColInfoCols.countSeqAcc,
+            csvutils.ColInfoCols.isForcedUncompr,
+            csvutils.ColInfoCols.minDistanceToBase,
+            csvutils.ColInfoCols.maxDistanceToBase,
+            csvutils.ColInfoCols.producingOpIdx,
+        ]
+    )
+    
 def configureProgram(
     translationResult, colInfosFilePath, processingStyle,
     # general compression parameters
@@ -774,10 +1305,19 @@ def configureProgram(
     sizesFilePath,
     # parameters for the manual strategy
     configFilePath,
+    # other
+    statDirPath=None, analysisResult=None,
+    # parameter for the memory-budgeted strategy
+    budget=None,
 ):
     """
     Modifies the given translated query program to use compression in the way
     specified by the other parameters.
+    
+    If no CSV file containing information on the columns is given, this
+    information is estimated from the statistics on the base data in the
+    directory statDirPath, or taken from analysisResult, the analysis of the
+    given program before its formats are configured, if specified.
     """
     
     # Choose the (un)compressed format for each base column and intermediate.
@@ -785,32 +1325,47 @@ def configureProgram(
         # Uncompressed processing is possible without the CSV file containing
         # information on the columns. This is important since that CSV file is
         # created by an uncompressed execution.
-        varNames = []
-        for el in translationResult.prog:
-            if isinstance(el, ops.Op):
-                for key in el.__dict__:
-                    if key.endswith("Col"):
-                        varName = getattr(el, key)
-                        if varName not in varNames:
-                            varNames.append(varName)
+        varNames = list(ir.DefUseGraph(translationResult.prog).cols)
         sFormats = chooseUncompr(varNames)
+        inFormatsByEdge = {}
     else:
-        sFormats = choose(
-            csvutils.getColInfos(colInfosFilePath), processingStyle,
-            # general compression parameters
-            strategy, objective, uncomprBase, uncomprInterm,
-            # parameter for rule-based strategy
-            fnRndAccUnsorted, fnRndAccSorted, fnSeqAccUnsorted, fnSeqAccSorted,
-            # parameters for cost-based strategy
-            profileDirPath,
-            # parameters for real best/worst w.r.t. memory footprint
-            sizesFilePath,
-            # parameters for the manual strategy
-            configFilePath,
-        )
+        if colInfosFilePath is None:
+            dfColInfos = estimateColInfos(
+                    translationResult, statDirPath, analysisResult
+            )
+        else:
+            dfColInfos = csvutils.getColInfos(colInfosFilePath)
+        if strategy == CS_GLOBAL:
+            sFormats, inFormatsByEdge = chooseGlobal(
+                translationResult, dfColInfos, processingStyle, objective,
+                uncomprBase, uncomprInterm, fnRndAccUnsorted, fnRndAccSorted,
+                profileDirPath,
+            )
+        elif strategy == CS_BUDGET:
+            sFormats = chooseBudgeted(
+                translationResult, dfColInfos, processingStyle, budget,
+                uncomprBase, uncomprInterm, fnRndAccUnsorted, fnRndAccSorted,
+                profileDirPath, sizesFilePath,
+            )
+            inFormatsByEdge = {}
+        else:
+            sFormats = choose(
+                dfColInfos, processingStyle,
+                # general compression parameters
+                strategy, objective, uncomprBase, uncomprInterm,
+                # parameter for rule-based strategy
+                fnRndAccUnsorted, fnRndAccSorted, fnSeqAccUnsorted, fnSeqAccSorted,
+                # parameters for cost-based strategy
+                profileDirPath,
+                # parameters for real best/worst w.r.t. memory footprint
+                sizesFilePath,
+                # parameters for the manual strategy
+                configFilePath,
+            )
+            inFormatsByEdge = {}
         
     # Insert the formats into the query program.
-    _insertFormats(translationResult, sFormats)
+    _insertFormats(translationResult, sFormats, inFormatsByEdge)
     _checkAllFormatsSet(translationResult)
     
     # Insert full-column morph-operators if and where necessary.
@@ -821,6 +1376,9 @@ def configureProgram(
     # query program.
     _reorderMorphs(translationResult)
     
+    # Move partition-operators of base columns out of the query program.
+    parallel.separateBasePartitions(translationResult)
+    
 class CostModel:
     def __init__(self, algoCostModel):
         self.algoCostModel = algoCostModel
@@ -833,4 +1391,32 @@ class CostModel:
         # Base columns are never written (during the query execution).
         sCountCompr = (~dfColInfos[csvutils.ColInfoCols.isBaseCol]).astype(int)
         sCountDecompr = dfColInfos[csvutils.ColInfoCols.countSeqAcc]
-        return sCountCompr * sCostCompr + sCountDecompr * sCostDecompr
\ No newline at end of file
+        return sCountCompr * sCostCompr + sCountDecompr * sCostDecompr
+    
+    def costMatrix(self, dfColInfos, choice):
+        """
+        Like cost(), but for all formats in the given choice at once (see
+        function costMatrix()).
+        """
+        
+        mCostCompr = costMatrix(
+                lambda fmt: self.algoCostModel.cost(
+                        fmt.changeMode(algo.MODE_COMPR), dfColInfos
+                ),
+                dfColInfos, choice
+        )
+        mCostDecompr = costMatrix(
+                lambda fmt: self.algoCostModel.cost(
+                        fmt.changeMode(algo.MODE_DECOMPR), dfColInfos
+                ),
+                dfColInfos, choice
+        )
+        # Base columns are never written (during the query execution).
+        aCountCompr = (~dfColInfos[csvutils.ColInfoCols.isBaseCol]).to_numpy(
+                dtype=float
+        )
+        aCountDecompr = dfColInfos[csvutils.ColInfoCols.countSeqAcc].to_numpy(
+                dtype=float
+        )
+        return aCountCompr[:, np.newaxis] * mCostCompr + \
+                aCountDecompr[:, np.newaxis] * mCostDecompr
\ No newline at end of file
@@ -0,0 +1,499 @@
+#*********************************************************************************************
+# Copyright (C) 2019 by MorphStore-Team                                                      *
+#                                                                                            *
+# This file is part of MorphStore - a compression aware vectorized column store.             *
+#                                                                                            *
+# This program is free software: you can redistribute it and/or modify it under the          *
+# terms of the GNU General Public License as published by the Free Software Foundation,      *
+# either version 3 of the License, or (at your option) any later version.                    *
+#                                                                                            *
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;  *
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  *
+# See the GNU General Public License for more details.                                       *
+#                                                                                            *
+# You should have received a copy of the GNU General Public License along with this program. *
+# If not, see <http://www.gnu.org/licenses/>.                                                *
+#*********************************************************************************************
+
+"""
+Estimation of the data characteristics of the columns in translated programs.
+
+In contrast to the pessimistic upper bounds determined by module
+mal2morphstore.analysis, the estimates in this module are meant to be close to
+the actual data characteristics, such that they can replace the data
+characteristics of a previous run (see 'ssb.sh -p d') in the selection of the
+formats (see module mal2morphstore.compr).
+
+The estimates of the base columns are obtained from the statistics created by
+dbdict.py: the number of data elements, the minimum, the maximum, the number of
+distinct values, and an equi-depth histogram from the file
+"<table>.colstats.json", or, for tables without such a file, only the
+maximum and the number of data elements from the file "<table>.json",
+assuming a minimum of zero and a uniform distribution.
+
+The estimates are propagated through the program in the textbook way:
+- The selectivity of a predicate is estimated from the histogram of its input
+  column, assuming a uniform distribution within each bucket.
+- Position columns are assumed to be uniformly distributed over the positions
+  of the column they refer to.
+- The predicates of an intersection are assumed to be independent.
+- The number of data elements in the output of an equi-join is the product of
+  the numbers of data elements in its inputs divided by the larger number of
+  distinct values of its inputs (containment of value sets).
+- A projection retains the distribution of its input data column.
+"""
+
+
+import mal2morphstore.ir as ir
+import mal2morphstore.operators as ops
+
+import json
+import os
+
+
+# The selectivity assumed for predicates whose qualifying range is not known.
+DEFAULT_SELECTIVITY = 1 / 3
+
+# The comparison operators of select-operators, for both versions of the
+# operators (see module mal2morphstore.translation).
+_OPS_EQ = ["equal", "std::equal_to", "std::equal"]
+_OPS_LT = ["less", "std::less"]
+_OPS_LE = ["lessequal", "std::less_equal"]
+_OPS_GT = ["greater", "std::greater"]
+_OPS_GE = ["greaterequal", "std::greater_equal"]
+
+_MAX_UINT64 = (1 << 64) - 1
+
+
+# *****************************************************************************
+# Estimates of single columns
+# *****************************************************************************
+
+class ColEstimate:
+    """
+    The estimated data characteristics of a column. The values of the column
+    are described by an equi-depth histogram, i.e., each bucket contains the
+    same fraction of the data elements, which are assumed to be uniformly
+    distributed within the bucket.
+    """
+
+    def __init__(self, count, countDistinct, histBounds, isSorted=False):
+        # The number of data elements. Might be fractional.
+        self.count = count
+        # The number of distinct values. Might be fractional.
+        self.countDistinct = min(countDistinct, count)
+        # The bounds of the buckets of the histogram, see the documentation of
+        # _histBounds() in dbdict.py. The first and the last bound are the
+        # minimum and the maximum of the column.
+        self.histBounds = histBounds
+        self.isSorted = isSorted
+
+    @classmethod
+    def uniform(cls, count, countDistinct, minVal, maxVal, isSorted=False):
+        """
+        Returns the estimate of a column whose values are uniformly
+        distributed between the given minimum and maximum.
+        """
+
+        return cls(count, countDistinct, [minVal, maxVal], isSorted)
+
+    @classmethod
+    def positions(cls, count, countPositions, isSorted=True):
+        """
+        Returns the estimate of a column containing the given number of
+        distinct positions of a column with the given number of data elements.
+        """
+
+        return cls.uniform(
+            count, count, 0, max(int(countPositions) - 1, 0), isSorted
+        )
+
+    @property
+    def min(self):
+        return self.histBounds[0]
+
+    @property
+    def max(self):
+        return self.histBounds[-1]
+
+    def _buckets(self):
+        """
+        Yields the lower and upper bound (both inclusive) and the number of
+        distinct values of each bucket.
+        """
+
+        countBuckets = len(self.histBounds) - 1
+        for bucketIdx in range(countBuckets):
+            lo = self.histBounds[bucketIdx]
+            hi = self.histBounds[bucketIdx + 1]
+            # The distinct values of the column are assumed to be distributed
+            # equally among the buckets.
+            countDistinct = max(
+                1, min(hi - lo + 1, self.countDistinct / countBuckets)
+            )
+            yield lo, hi, countDistinct
+
+    def fraction(self, lo, hi):
+        """
+        Returns the estimated fraction of the data elements whose values lie
+        in the range [lo, hi]. A bound of None means that the range is not
+        restricted on this side.
+        """
+
+        lo = self.min if lo is None else max(lo, self.min)
+        hi = self.max if hi is None else min(hi, self.max)
+        if lo > hi:
+            return 0
+        countBuckets = len(self.histBounds) - 1
+        fraction = 0
+        for bucketLo, bucketHi, bucketCountDistinct in self._buckets():
+            overlapLo = max(lo, bucketLo)
+            overlapHi = min(hi, bucketHi)
+            if overlapLo > overlapHi:
+                continue
+            # A range overlapping the bucket contains at least one of its
+            # distinct values.
+            bucketFraction = max(
+                (overlapHi - overlapLo + 1) / (bucketHi - bucketLo + 1),
+                1 / bucketCountDistinct
+            )
+            fraction += min(bucketFraction, 1) / countBuckets
+        return min(fraction, 1)
+
+    def bwHist(self):
+        """
+        Returns the estimated number of data elements of each effective bit
+        width as a list, whose i-th entry refers to bit width i+1.
+        """
+
+        countBuckets = len(self.histBounds) - 1
+        hist = [0] * 64
+        for bucketLo, bucketHi, _ in self._buckets():
+            for bw in range(1, 65):
+                # The range of the values with this effective bit width. The
+                # effective bit width of zero is one.
+                bwLo = 0 if bw == 1 else 1 << (bw - 1)
+                bwHi = (1 << bw) - 1
+                overlapLo = max(bwLo, bucketLo)
+                overlapHi = min(bwHi, bucketHi)
+                if overlapLo <= overlapHi:
+                    hist[bw - 1] += self.count / countBuckets * \
+                        (overlapHi - overlapLo + 1) / (bucketHi - bucketLo + 1)
+        return hist
+
+    def scaled(self, count, isSorted=False):
+        """
+        Returns the estimate of a column containing the given number of data
+        elements drawn from this column, e.g., by a projection.
+        """
+
+        return ColEstimate(
+            count,
+            _countDistinctDrawn(self.countDistinct, count),
+            self.histBounds,
+            isSorted
+        )
+
+def _countDistinctDrawn(countDistinct, count):
+    """
+    Returns the expected number of distinct values among the given number of
+    data elements drawn uniformly from the given number of distinct values.
+    """
+
+    if countDistinct <= 1:
+        return min(countDistinct, count)
+    return countDistinct * (1 - (1 - 1 / countDistinct) ** count)
+
+
+# *****************************************************************************
+# Estimates of base columns
+# *****************************************************************************
+
+def loadBaseEstimates(statDirPath, colNamesByTblName):
+    """
+    Returns a dictionary mapping the name of each given base column to its
+    estimate according to the statistics in the given directory (see the
+    module documentation). Columns without statistics are not contained.
+    """
+
+    estByCol = {}
+    for tblName, colNames in colNamesByTblName.items():
+        colStatsFilePath = os.path.join(
+            statDirPath, "{}.colstats.json".format(tblName)
+        )
+        statsFilePath = os.path.join(statDirPath, "{}.json".format(tblName))
+        if os.path.exists(colStatsFilePath):
+            with open(colStatsFilePath, "r") as inFile:
+                colStatsByColName = json.load(inFile)
+            for colName in colNames:
+                if colName not in colStatsByColName:
+                    continue
+                colStats = colStatsByColName[colName]
+                histBounds = list(colStats.get("histBounds", []))
+                if len(histBounds) < 2:
+                    histBounds = [colStats["min"], colStats["max"]]
+                # The histogram might be built from a sample.
+                histBounds[0] = colStats["min"]
+                histBounds[-1] = colStats["max"]
+                estByCol["{}.{}".format(tblName, colName)] = ColEstimate(
+                    colStats["count"],
+                    colStats["distinct"],
+                    histBounds,
+                    colStats["isSorted"]
+                )
+        elif os.path.exists(statsFilePath):
+            with open(statsFilePath, "r") as inFile:
+                stats = json.load(inFile)
+            for colName in colNames:
+                if colName not in stats:
+                    continue
+                estByCol["{}.{}".format(tblName, colName)] = \
+                    ColEstimate.uniform(
+                        stats["_cardinality"],
+                        stats[colName] + 1,
+                        0,
+                        stats[colName]
+                    )
+    return estByCol
+
+
+# *****************************************************************************
+# Selectivities
+# *****************************************************************************
+
+def predicateRange(op):
+    """
+    Returns the range [lo, hi] of the values qualifying for the given select-
+    or between-operator as a pair, or None if it is not known. A bound of None
+    means that the range is not restricted on this side.
+    """
+
+    if isinstance(op, ops.Select):
+        val = int(op.val)
+        if op.op in _OPS_EQ:
+            return val, val
+        elif op.op in _OPS_LT:
+            return None, val - 1
+        elif op.op in _OPS_LE:
+            return None, val
+        elif op.op in _OPS_GT:
+            return val + 1, None
+        elif op.op in _OPS_GE:
+            return val, None
+    elif isinstance(op, ops.Between):
+        if op.opLo in _OPS_GE and op.opHi in _OPS_LE:
+            return int(op.valLo), int(op.valHi)
+    return None
+
+def selectivity(est, preds):
+    """
+    Returns the estimated selectivity of the conjunction of the given select-
+    and between-operators on the column with the given estimate, or None if
+    the qualifying range of any of them is not known.
+    """
+
+    lo, hi = None, None
+    for pred in preds:
+        predRange = predicateRange(pred)
+        if predRange is None:
+            return None
+        predLo, predHi = predRange
+        if predLo is not None:
+            lo = predLo if lo is None else max(lo, predLo)
+        if predHi is not None:
+            hi = predHi if hi is None else min(hi, predHi)
+    if lo is not None and hi is not None and lo > hi:
+        return 0
+    return est.fraction(lo, hi)
+
+
+# *****************************************************************************
+# Propagation through the program
+# *****************************************************************************
+
+def _joinCount(estL, estR):
+    """
+    Returns the estimated number of data elements in the output of an equi-join
+    of columns with the given estimates.
+    """
+
+    return estL.count * estR.count / max(
+        estL.countDistinct, estR.countDistinct, 1
+    )
+
+def _calcBinary(op, estL, estR):
+    """
+    Returns the estimate of the output of the given binary
+    calculation-operator.
+    """
+
+    if op.op in ["add", "std::plus"]:
+        lo, hi = estL.min + estR.min, estL.max + estR.max
+    elif op.op in ["sub", "std::minus"]:
+        # The calculation wraps around for negative results, but this does not
+        # happen in sensible queries.
+        lo, hi = max(estL.min - estR.max, 0), max(estL.max - estR.min, 0)
+    elif op.op in ["mul", "std::multiplies"]:
+        lo, hi = estL.min * estR.min, estL.max * estR.max
+    else:
+        raise RuntimeError(
+            "binary calc with the operation '{}' is not taken into "
+            "account".format(op.op)
+        )
+    hi = min(hi, _MAX_UINT64)
+    lo = min(lo, hi)
+    return ColEstimate.uniform(
+        estL.count,
+        min(estL.countDistinct * estR.countDistinct, hi - lo + 1),
+        lo,
+        hi
+    )
+
+def _sum(estData, countGroups):
+    """
+    Returns the estimate of the sums of the data elements of the column with
+    the given estimate in the given number of groups.
+    """
+
+    countPerGroup = estData.count / max(countGroups, 1)
+    return ColEstimate.uniform(
+        countGroups,
+        countGroups,
+        0,
+        min(int(estData.max * countPerGroup), _MAX_UINT64)
+    )
+
+def estimate(translationResult, statDirPath, varsSorted=set()):
+    """
+    Returns a dictionary mapping the name of each column in the given
+    translated program (including the morph-operators of its base and result
+    columns) to its estimate (an instance of class ColEstimate). The
+    statistics on the base columns are read from the given directory. The
+    columns in varsSorted (see module mal2morphstore.analysis) are known to be
+    sorted.
+    """
+
+    tr = translationResult
+    estByCol = loadBaseEstimates(statDirPath, tr.colNamesByTblName)
+    graph = ir.DefUseGraph.fromTranslationResult(tr)
+    for col in graph.baseCols:
+        if col not in estByCol:
+            raise RuntimeError(
+                "there are no statistics on the base column '{}'".format(col)
+            )
+
+    for el in graph.ops:
+        if isinstance(el, ops.Project):
+            estByCol[el.outDataCol] = estByCol[el.inDataCol].scaled(
+                estByCol[el.inPosCol].count
+            )
+        elif isinstance(el, ops.Select) or isinstance(el, ops.Between):
+            estData = estByCol[el.inDataCol]
+            sel = selectivity(estData, [el])
+            if sel is None:
+                sel = DEFAULT_SELECTIVITY
+            estByCol[el.outPosCol] = ColEstimate.positions(
+                estData.count * sel, estData.count
+            )
+        elif (
+            isinstance(el, ops.Intersect) or
+            isinstance(el, ops.IntersectKAry) or
+            isinstance(el, ops.Merge)
+        ):
+            estL = estByCol[el.inPosLCol]
+            estR = estByCol[el.inPosRCol]
+            countPositions = max(estL.max, estR.max) + 1
+            # The predicates are assumed to be independent.
+            countBoth = estL.count * estR.count / countPositions
+            if isinstance(el, ops.Merge):
+                count = estL.count + estR.count - countBoth
+            else:
+                count = countBoth
+            estByCol[el.outPosCol] = \
+                ColEstimate.positions(count, countPositions)
+        elif (
+            isinstance(el, ops.Join) or
+            isinstance(el, ops.Nto1Join) or
+            isinstance(el, ops.MtoNJoin) or
+            isinstance(el, ops.MergeJoin)
+        ):
+            estL = estByCol[el.inDataLCol]
+            estR = estByCol[el.inDataRCol]
+            count = _joinCount(estL, estR)
+            # Each position of the left input occurs once per join partner.
+            estPosL = ColEstimate.positions(
+                min(count, estL.count), estL.count
+            )
+            estByCol[el.outPosLCol] = estPosL.scaled(count)
+            estPosR = ColEstimate.positions(
+                min(count, estR.count), estR.count
+            )
+            estByCol[el.outPosRCol] = estPosR.scaled(count)
+        elif isinstance(el, ops.LeftSemiNto1Join):
+            estR = estByCol[el.inDataRCol]
+            estByCol[el.outPosRCol] = ColEstimate.positions(
+                min(_joinCount(estByCol[el.inDataLCol], estR), estR.count),
+                estR.count
+            )
+        elif isinstance(el, ops.CalcBinary):
+            estByCol[el.outDataCol] = _calcBinary(
+                el, estByCol[el.inDataLCol], estByCol[el.inDataRCol]
+            )
+        elif isinstance(el, ops.SumWholeCol):
+            estByCol[el.outDataCol] = _sum(estByCol[el.inDataCol], 1)
+        elif isinstance(el, ops.ProjectCalcSum):
+            estCalc = _calcBinary(
+                el, estByCol[el.inDataLCol], estByCol[el.inDataRCol]
+            )
+            estByCol[el.outDataCol] = _sum(
+                estCalc.scaled(estByCol[el.inPosCol].count), 1
+            )
+        elif isinstance(el, ops.SumGrBased):
+            estByCol[el.outDataCol] = _sum(
+                estByCol[el.inDataCol], estByCol[el.inExtCol].count
+            )
+        elif isinstance(el, ops.GroupUnary) or isinstance(el, ops.GroupBinary):
+            estData = estByCol[el.inDataCol]
+            if isinstance(el, ops.GroupUnary):
+                countGroups = estData.countDistinct
+            else:
+                countGroups = min(
+                    estByCol[el.inGrCol].countDistinct * estData.countDistinct,
+                    estData.count
+                )
+            estByCol[el.outGrCol] = ColEstimate.uniform(
+                estData.count, countGroups, 0, max(int(countGroups) - 1, 0)
+            )
+            estByCol[el.outExtCol] = \
+                ColEstimate.positions(countGroups, estData.count)
+        elif isinstance(el, ops.Morph):
+            estByCol[el.outCol] = estByCol[el.inCol]
+        elif isinstance(el, ops.Partition):
+            estData = estByCol[el.inDataCol]
+            estByCol[el.outDataCol] = \
+                estData.scaled(estData.count / el.partCount)
+        elif isinstance(el, ops.Concat):
+            estL = estByCol[el.inDataLCol]
+            estR = estByCol[el.inDataRCol]
+            estByCol[el.outDataCol] = ColEstimate.uniform(
+                estL.count + estR.count,
+                max(estL.countDistinct, estR.countDistinct),
+                min(estL.min, estR.min),
+                max(estL.max, estR.max)
+            )
+        else:
+            raise RuntimeError(
+                    "the operator {} is not taken into account in "
+                    "estimating the data characteristics of columns".format(
+                            el.__class__.__name__
+                    )
+            )
+
+    for col, est in estByCol.items():
+        # An estimate of zero data elements is not helpful, since the format
+        # selection must consider some data elements.
+        est.count = max(est.count, 1)
+        est.countDistinct = max(min(est.countDistinct, est.count), 1)
+        est.isSorted = est.isSorted or col in varsSorted
+
+    return estByCol
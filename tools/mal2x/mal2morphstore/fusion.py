@@ -0,0 +1,114 @@
+#*********************************************************************************************
+# Copyright (C) 2019 by MorphStore-Team                                                      *
+#                                                                                            *
+# This file is part of MorphStore - a compression aware vectorized column store.             *
+#                                                                                            *
+# This program is free software: you can redistribute it and/or modify it under the          *
+# terms of the GNU General Public License as published by the Free Software Foundation,      *
+# either version 3 of the License, or (at your option) any later version.                    *
+#                                                                                            *
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;  *
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  *
+# See the GNU General Public License for more details.                                       *
+#                                                                                            *
+# You should have received a copy of the GNU General Public License along with this program. *
+# If not, see <http://www.gnu.org/licenses/>.                                                *
+#*********************************************************************************************
+
+"""
+Fusion of chains of operator calls in translated programs.
+
+Each of MorphStore's query operators materializes its outputs as columns. If an
+intermediate column is consumed by only one operator call, then writing it to
+and reading it from main memory can be avoided by fusing its producer and its
+consumer. This module replaces such chains in translated programs (see module
+mal2morphstore.translation) by a single fused operator call (see module
+mal2morphstore.operators).
+
+So far, the following chain is fused:
+- Two project-operators with the same input positions column, a binary
+  calculation-operator on their outputs, and a whole-column summation-operator
+  on its output (class ProjectCalcSum). This is the final aggregation in the
+  queries of flight 1 of the Star Schema Benchmark.
+
+The selections and joins preceding this chain are not fused, since their output
+positions are used by several operator calls.
+
+Fusion must take place before the formats are configured (see module
+mal2morphstore.compr), since the fused operator calls require uncompressed
+inputs (see module mal2morphstore.analysis).
+"""
+
+
+import mal2morphstore.ir as ir
+import mal2morphstore.operators as ops
+
+
+def _fuseProjectCalcSum(graph, sumIdx):
+    """
+    Returns the fused operator call replacing the whole-column
+    summation-operator with the given index and the indexes of the operator
+    calls to remove, or None if the chain ending in this operator call cannot
+    be fused.
+    """
+
+    sumOp = graph.ops[sumIdx]
+    calcIdx = graph.producerIdxByCol.get(sumOp.inDataCol)
+    if calcIdx is None or graph.singleConsumerIdx(sumOp.inDataCol) != sumIdx:
+        return None
+    calcOp = graph.ops[calcIdx]
+    if (
+        not isinstance(calcOp, ops.CalcBinary)
+        or calcOp.op not in ops.ProjectCalcSum.cppOpByOp
+        or calcOp.inDataLCol == calcOp.inDataRCol
+    ):
+        return None
+
+    projIdxs = []
+    for col in [calcOp.inDataLCol, calcOp.inDataRCol]:
+        projIdx = graph.producerIdxByCol.get(col)
+        if (
+            projIdx is None
+            or not isinstance(graph.ops[projIdx], ops.Project)
+            or graph.singleConsumerIdx(col) != calcIdx
+        ):
+            return None
+        projIdxs.append(projIdx)
+    projLOp, projROp = [graph.ops[projIdx] for projIdx in projIdxs]
+    if projLOp.inPosCol != projROp.inPosCol:
+        return None
+
+    fusedOp = ops.ProjectCalcSum(
+        outDataCol = sumOp.outDataCol,
+        op         = calcOp.op,
+        inDataLCol = projLOp.inDataCol,
+        inDataRCol = projROp.inDataCol,
+        inPosCol   = projLOp.inPosCol
+    )
+    return fusedOp, projIdxs + [calcIdx]
+
+def fuse(translationResult):
+    """
+    Replaces all fusable chains of operator calls in the given translated
+    program by fused operator calls. Returns the number of fused chains.
+    """
+
+    tr = translationResult
+    graph = ir.DefUseGraph(tr.prog, resultCols=tr.resultCols)
+
+    newOpsByIdx = {}
+    countFused = 0
+    for opIdx, op in enumerate(graph.ops):
+        if isinstance(op, ops.SumWholeCol):
+            fusion = _fuseProjectCalcSum(graph, opIdx)
+            if fusion is not None:
+                fusedOp, idxs = fusion
+                # The fused operator call takes the place of the last operator
+                # call of its chain, where all of its inputs are available.
+                newOpsByIdx[opIdx] = [fusedOp]
+                for idx in idxs:
+                    newOpsByIdx[idx] = []
+                countFused += 1
+    tr.prog = ir.rewriteProg(tr.prog, newOpsByIdx)
+
+    return countFused
@@ -0,0 +1,193 @@
+#*********************************************************************************************
+# Copyright (C) 2019 by MorphStore-Team                                                      *
+#                                                                                            *
+# This file is part of MorphStore - a compression aware vectorized column store.             *
+#                                                                                            *
+# This program is free software: you can redistribute it and/or modify it under the          *
+# terms of the GNU General Public License as published by the Free Software Foundation,      *
+# either version 3 of the License, or (at your option) any later version.                    *
+#                                                                                            *
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;  *
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  *
+# See the GNU General Public License for more details.                                       *
+#                                                                                            *
+# You should have received a copy of the GNU General Public License along with this program. *
+# If not, see <http://www.gnu.org/licenses/>.                                                *
+#*********************************************************************************************
+
+"""
+An explicit dataflow representation of translated programs.
+
+The abstract representation of a translated program (see class
+TranslationResult in module mal2morphstore.translation) is a list of operator
+calls (instances of the classes in module mal2morphstore.operators) and
+ordinary strings. The class DefUseGraph in this module makes the data flow
+between these operator calls explicit. Like MAL programs, translated programs
+are in static single assignment form, i.e., each column is assigned by exactly
+one operator call, or it is a base column. Thus, each column has at most one
+producer and an arbitrary number of consumers, which the graph provides in
+constant time after it has been built once.
+
+A DefUseGraph reflects the program at the time of its construction. Passes
+changing the program, e.g., by inserting morph-operators or renaming columns,
+must build a new graph afterwards.
+"""
+
+
+import mal2morphstore.operators as ops
+
+
+class DefUseGraph:
+    """
+    The def-use graph of a translated program.
+
+    The operator calls are referred to by their index in the field ops.
+    """
+
+    def __init__(self, prog, baseCols=[], resultCols=[]):
+        # The operator calls of the program in their order. The strings in the
+        # program are omitted.
+        self.ops = [el for el in prog if isinstance(el, ops.Op)]
+
+        # The names of the base columns, i.e., of the columns which are not
+        # produced by any operator call in the program.
+        self.baseCols = set(baseCols)
+
+        # The names of the result columns of the program in their order.
+        self.resultCols = list(resultCols)
+        self._resultColsSet = set(resultCols)
+
+        # The names of all columns used as inputs or outputs by the operator
+        # calls, in the order of their first occurrence. The values of this
+        # dictionary are meaningless, it is used as an ordered set.
+        self.cols = {}
+
+        # A mapping from the name of a column to the index of the operator call
+        # producing it. Base columns are not contained.
+        self.producerIdxByCol = {}
+
+        # A mapping from the name of a column to the ascending list of the
+        # indexes of the operator calls consuming it. Columns which are never
+        # consumed are not contained.
+        self.consumerIdxsByCol = {}
+
+        for opIdx, op in enumerate(self.ops):
+            for key in op.colKeys():
+                col = getattr(op, key)
+                self.cols[col] = None
+                if key.startswith("out"):
+                    if col in self.producerIdxByCol or col in self.baseCols:
+                        raise RuntimeError(
+                            "column '{}' is assigned more than once".format(col)
+                        )
+                    self.producerIdxByCol[col] = opIdx
+                else:
+                    consumerIdxs = self.consumerIdxsByCol.setdefault(col, [])
+                    if not consumerIdxs or consumerIdxs[-1] != opIdx:
+                        consumerIdxs.append(opIdx)
+
+    @classmethod
+    def fromTranslationResult(cls, translationResult):
+        """
+        Builds the def-use graph of the given translated program including its
+        partition-operators for the base columns and its morph-operators for
+        the base and result columns.
+        """
+
+        tr = translationResult
+        return cls(
+            tr.basePartitions + tr.baseMorphs + tr.prog + tr.resultMorphs,
+            [
+                "{}.{}".format(tblName, colName)
+                for tblName in tr.colNamesByTblName
+                for colName in tr.colNamesByTblName[tblName]
+            ],
+            tr.resultCols
+        )
+
+    def producer(self, col):
+        """
+        Returns the operator call producing the given column, or None if it is
+        a base column.
+        """
+
+        opIdx = self.producerIdxByCol.get(col)
+        return None if opIdx is None else self.ops[opIdx]
+
+    def consumers(self, col):
+        """Returns the list of the operator calls consuming the given column."""
+
+        return [self.ops[opIdx] for opIdx in self.consumerIdxsByCol.get(col, [])]
+
+    def singleConsumerIdx(self, col):
+        """
+        Returns the index of the only operator call consuming the given column,
+        or None if the column is a result column or is consumed by no or more
+        than one operator call.
+        """
+
+        if col in self._resultColsSet:
+            return None
+        consumerIdxs = self.consumerIdxsByCol.get(col)
+        if consumerIdxs is None or len(consumerIdxs) != 1:
+            return None
+        return consumerIdxs[0]
+
+    def isAssignedBy(self, col, opIdx):
+        """
+        Returns whether the given column is a base column or is produced by the
+        operator call with the given index or an earlier one.
+        """
+
+        if col in self.baseCols:
+            return True
+        producerIdx = self.producerIdxByCol.get(col)
+        return producerIdx is not None and producerIdx <= opIdx
+
+    def isUsedFrom(self, col, opIdx):
+        """
+        Returns whether the given column is a result column or is consumed by
+        the operator call with the given index or a later one.
+        """
+
+        if col in self._resultColsSet:
+            return True
+        consumerIdxs = self.consumerIdxsByCol.get(col)
+        return consumerIdxs is not None and consumerIdxs[-1] >= opIdx
+
+    def lastUseIdx(self, col):
+        """
+        Returns the index of the last operator call using the given column,
+        i.e., of its last consumer or, if it is never consumed, of its
+        producer. Returns None for base and result columns, since these are
+        still required after the program.
+        """
+
+        if col in self.baseCols or col in self._resultColsSet:
+            return None
+        consumerIdxs = self.consumerIdxsByCol.get(col)
+        if consumerIdxs is not None:
+            return consumerIdxs[-1]
+        return self.producerIdxByCol.get(col)
+
+
+def rewriteProg(prog, newOpsByIdx):
+    """
+    Returns a copy of the given translated program in which the operator
+    calls are replaced as specified.
+
+    The keys of the given dictionary are the indexes of operator calls (in the
+    sense of DefUseGraph.ops), its values are lists of the operator calls to
+    insert instead. An empty list removes the operator call. Empty lines
+    separating removed operator calls are omitted.
+    """
+
+    newProg = []
+    opIdx = 0
+    for el in prog:
+        if isinstance(el, ops.Op):
+            newProg.extend(newOpsByIdx.get(opIdx, [el]))
+            opIdx += 1
+        elif el != "" or (newProg and newProg[-1] != ""):
+            newProg.append(el)
+    return newProg
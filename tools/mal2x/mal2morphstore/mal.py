@@ -0,0 +1,496 @@
+#*********************************************************************************************
+# Copyright (C) 2019 by MorphStore-Team                                                      *
+#                                                                                            *
+# This file is part of MorphStore - a compression aware vectorized column store.             *
+#                                                                                            *
+# This program is free software: you can redistribute it and/or modify it under the          *
+# terms of the GNU General Public License as published by the Free Software Foundation,      *
+# either version 3 of the License, or (at your option) any later version.                    *
+#                                                                                            *
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;  *
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  *
+# See the GNU General Public License for more details.                                       *
+#                                                                                            *
+# You should have received a copy of the GNU General Public License along with this program. *
+# If not, see <http://www.gnu.org/licenses/>.                                                *
+#*********************************************************************************************
+
+"""
+Parsing of MAL programs.
+
+This module provides a parser for MAL programs produced by MonetDB and
+available as plain text. The function parse() is the entry-point for callers.
+It returns an instance of class Program, a typed abstract syntax
+tree consisting of instances of the classes defined in this module. Each
+instruction knows the number of the line it was found in, such that errors can
+be reported with line numbers.
+
+A MAL program as output by MonetDB's EXPLAIN has the following structure (from
+top to bottom):
+- Some comments beginning with "%" (the header of the EXPLAIN result).
+- The signature of the query function, e.g., "function user.s4_1():void;".
+- The instructions of the query function, one per line, e.g.,
+  "X_26:bat[:int] := algebra.projection(C_7:bat[:oid], X_20:bat[:int]);".
+- The end of the query function, e.g., "end user.s4_1;".
+- Some comments beginning with "#" (statistics of MonetDB's optimizers).
+
+Each instruction assigns the results of a call to zero or more typed variables.
+The parameters of the call are typed variables or typed literals. Instructions
+can be prefixed by a control flow keyword (e.g. "barrier"), and an "exit"
+statement closes a block opened by such a keyword.
+"""
+
+# TODO Support MAL's properties of variables (e.g. "{rows=42}") if required.
+
+
+import re
+
+
+# *****************************************************************************
+# Classes for the abstract syntax tree
+# *****************************************************************************
+
+class Type:
+    """
+    A MAL type, either a scalar type (e.g. "int") or a BAT type (e.g.
+    "bat[:int]"), whose element type is a scalar type.
+    """
+
+    __slots__ = ("name", "isBat")
+
+    def __init__(self, name, isBat=False):
+        self.name = name
+        self.isBat = isBat
+
+    def __eq__(self, other):
+        return isinstance(other, Type) and \
+            (self.name, self.isBat) == (other.name, other.isBat)
+
+    def __hash__(self):
+        return hash((self.name, self.isBat))
+
+    def __str__(self):
+        return "bat[:{}]".format(self.name) if self.isBat else self.name
+
+class Var:
+    """A typed MAL variable, e.g., "X_26:bat[:int]"."""
+
+    __slots__ = ("name", "type")
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+    def __str__(self):
+        return "{}:{}".format(self.name, self.type)
+
+class Literal:
+    """
+    A typed MAL literal, e.g., "1:int" or "\\"lineorder\\":str".
+
+    The value is the literal's text without its type, whereby the quotation
+    marks and escape sequences of string literals are resolved.
+    """
+
+    __slots__ = ("value", "type", "isStr")
+
+    def __init__(self, value, type, isStr=False):
+        self.value = value
+        self.type = type
+        self.isStr = isStr
+
+    def isNil(self):
+        return not self.isStr and self.value == "nil"
+
+    def __str__(self):
+        if self.isStr:
+            return "\"{}\":{}".format(
+                self.value.replace("\\", "\\\\").replace("\"", "\\\""),
+                self.type
+            )
+        return "{}:{}".format(self.value, self.type)
+
+class Instruction:
+    """
+    A MAL instruction, i.e., an assignment of the results of a call of a MAL
+    function to variables, e.g.,
+    "(X_63:bat[:oid], X_64:bat[:oid]) := algebra.join(...);".
+
+    The list of results is empty for calls without an assignment. For
+    assignments of a single parameter without a function call (e.g.
+    "X_1:int := 0:int;"), module and function are None. The field flow is
+    the control flow keyword preceding the instruction (e.g. "barrier"), or
+    None.
+    """
+
+    __slots__ = (
+        "results", "module", "function", "params", "lineNo", "text", "flow"
+    )
+
+    def __init__(self, results, module, function, params, lineNo, text, flow):
+        self.results = results
+        self.module = module
+        self.function = function
+        self.params = params
+        self.lineNo = lineNo
+        self.text = text
+        self.flow = flow
+
+    def __str__(self):
+        return self.text
+
+class Exit:
+    """
+    A MAL exit-statement closing the block of the given variables, e.g.,
+    "exit (X_1:bat[:int], X_2:bat[:int]);".
+    """
+
+    __slots__ = ("vars", "lineNo", "text")
+
+    def __init__(self, vars, lineNo, text):
+        self.vars = vars
+        self.lineNo = lineNo
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+class Program:
+    """
+    A parsed MAL program, i.e., the name of its query function and the list of
+    its statements (instances of Instruction and Exit) in their order in the
+    program.
+    """
+
+    def __init__(self, name, statements):
+        self.name = name
+        self.statements = statements
+
+
+# *****************************************************************************
+# Lexical elements
+# *****************************************************************************
+
+# Regular expressions for the lexical elements of MAL. Numbers include oid
+# literals like "0@0". Operators are the names of some MAL functions, e.g.,
+# "batcalc.*".
+_strName = r"[A-Za-z_][A-Za-z0-9_]*"
+_strOperator = r"[-+*/%<>=!]+"
+_strStr = r'"(?:[^"\\]|\\.)*"'
+_strNum = r"-?[0-9]+(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?(?:@[0-9]+)?"
+_strTypeName = r"[A-Za-z0-9_]+"
+
+# A term is a variable or a literal together with its type, e.g.,
+# "X_26:bat[:int]", "1:int", or "\"lineorder\":str". The groups of the
+# capturing variant hold the string, number, or name, and the element type (of
+# a BAT) or the scalar type.
+_strTerm = r"(?:{}|{}|{}):(?:bat\[:{}\]|{})".format(
+    _strStr, _strNum, _strName, _strTypeName, _strTypeName
+)
+_pTerm = re.compile(r"(?:({})|({})|({})):(?:bat\[:({})\]|({}))".format(
+    _strStr, _strNum, _strName, _strTypeName, _strTypeName
+))
+_pTermText = re.compile(_strTerm)
+_pSeparator = re.compile(r"\s*(,)?\s*")
+
+# The escape sequences in MAL string literals.
+_pEscape = re.compile(r"\\(.)")
+_escapes = {"n": "\n", "t": "\t", "r": "\r"}
+
+def _unescape(text):
+    """Resolves the escape sequences in the given string literal's text."""
+    if "\\" not in text:
+        return text
+    return _pEscape.sub(lambda m: _escapes.get(m.group(1), m.group(1)), text)
+
+
+# *****************************************************************************
+# Parser
+# *****************************************************************************
+
+# The keywords which can precede an instruction in MAL.
+_FLOW_KEYWORDS = ["barrier", "catch", "leave", "redo", "return", "raise"]
+
+# The names which are literals rather than variables.
+_LITERAL_NAMES = ["nil", "true", "false"]
+
+# The grammar of MAL statements:
+#   statement := "exit" varList ";"
+#              | [flowKeyword] [varList ":="] call ";"
+#   call      := NAME "." (NAME | OPERATOR) "(" termList ")" | term
+#   varList   := var | "(" var {"," var} ")"
+#   termList  := [term {"," term}]
+# A statement is matched as a whole, whereby its lists are split into their
+# terms afterwards. If a statement does not match, its loose variant, which
+# does not check the contents of the lists, is used to find the error.
+_strTermList = r"\s*(?:{}(?:\s*,\s*{})*)?\s*".format(_strTerm, _strTerm)
+_strVarList = r"\(\s*{}(?:\s*,\s*{})*\s*\)|{}".format(
+    _strTerm, _strTerm, _strTerm
+)
+_strInstruction = \
+    r"(?:(?P<flow>{})\s+)?" \
+    r"(?:(?P<results>{{}})\s*:=\s*)?" \
+    r"(?:(?P<module>{})\.(?P<function>{}|{})\s*\((?P<params>{{}})\)|" \
+    r"(?P<term>{}))\s*;".format(
+        "|".join(_FLOW_KEYWORDS), _strName, _strName, _strOperator, _strTerm
+    )
+_pInstruction = re.compile(_strInstruction.format(_strVarList, _strTermList))
+_pInstructionLoose = re.compile(
+    _strInstruction.format(r"\(.*?\)|\S+", r".*")
+)
+_pExit = re.compile(r"exit\s+(?P<vars>{})\s*;".format(_strVarList))
+_pExitLoose = re.compile(r"exit\s+(?P<vars>.*?)\s*;")
+
+# An instruction in the form printed by MonetDB, i.e., with ", " between the
+# terms of a list and " := " after the results. The lists are not checked by
+# this regular expression, but by splitting them at each ", " and looking up
+# the parts in the cache of terms (see below), which maps texts which are not
+# terms to None. A list containing a string literal with a ", " is split
+# wrongly, but then the part starting the string literal is not a term (since
+# the closing quotation mark of a string literal is not followed by ", "), and
+# the terms are found by a regular expression instead. Statements of any other
+# form are matched by the grammar above.
+_pInstructionUsual = re.compile(
+    r"(?:({}) )?(?:(\([^)]*\)|[^ ]+) := )?"
+    r"(?:({})\.({}|{})\((.*)\)|(.+));".format(
+        "|".join(_FLOW_KEYWORDS), _strName, _strName, _strOperator
+    )
+)
+
+# The instances of class Type seen so far. Since types are immutable, they can
+# be shared by all terms.
+_typeCache = {}
+
+def _makeTerm(strText, num, name, elemType, scalarType):
+    """
+    Creates a Var or a Literal from the groups of a match of the regular
+    expression for terms.
+    """
+
+    key = (elemType, True) if elemType else (scalarType, False)
+    type = _typeCache.get(key)
+    if type is None:
+        type = _typeCache[key] = Type(*key)
+    if name:
+        if name in _LITERAL_NAMES:
+            return Literal(name, type)
+        return Var(name, type)
+    if strText:
+        return Literal(_unescape(strText[1:-1]), type, True)
+    return Literal(num, type)
+
+class _Terms(dict):
+    """
+    Terms by their text, which are created on first access. Texts which are
+    not terms are mapped to None.
+    """
+
+    def __missing__(self, text):
+        m = _pTerm.fullmatch(text)
+        term = self[text] = None if m is None else _makeTerm(*m.groups())
+        return term
+
+# The terms seen so far. Since terms are immutable, they can be shared by all
+# programs, such that most terms of a program need not be created anew. The
+# cache is cleared before parsing a program once it has grown too large, e.g.,
+# due to string literals.
+_terms = _Terms()
+_MAX_COUNT_TERMS = 1 << 16
+
+class _Parser:
+    """
+    A parser for the statements of a single MAL program. Equal terms are
+    represented by the same instance of Var or Literal.
+    """
+
+    def __init__(self):
+        if len(_terms) > _MAX_COUNT_TERMS:
+            _terms.clear()
+        self.terms = _terms
+
+    def error(self, lineNo, line, msg):
+        raise RuntimeError("line {}: {} in MAL program:\n{}".format(
+            lineNo, msg, line
+        ))
+
+    def parseTermList(self, text):
+        """
+        Parses the given comma-separated list of terms, which is known to be
+        valid. Returns a list of instances of Var and Literal.
+        """
+
+        return list(map(self.terms.__getitem__, _pTermText.findall(text)))
+
+    def parseVarList(self, text, lineNo, line):
+        """
+        Parses the given list of variables, which is known to be a valid list
+        of terms. Returns a list of instances of Var.
+        """
+
+        vars = self.parseTermList(text)
+        for var in vars:
+            if not isinstance(var, Var):
+                self.error(
+                    lineNo, line,
+                    "expected a variable, but found '{}'".format(var)
+                )
+        return vars
+
+    def checkTermList(self, text, lineNo, line):
+        """
+        Raises an error reporting the first part of the given list of terms
+        which is not a term, if any.
+        """
+
+        if text[:1] == "(" and text[-1:] == ")":
+            text = text[1:-1]
+        pos = _pSeparator.match(text).end()
+        while pos < len(text):
+            m = _pTerm.match(text, pos)
+            if m is None:
+                self.error(
+                    lineNo, line,
+                    "expected a variable or a literal, but found '{}'".format(
+                        text[pos:]
+                    )
+                )
+            mSep = _pSeparator.match(text, m.end())
+            if mSep.group(1) is None and mSep.end() < len(text):
+                self.error(
+                    lineNo, line,
+                    "expected ',', but found '{}'".format(text[mSep.end():])
+                )
+            pos = mSep.end()
+
+    def parseStatement(self, line, lineNo):
+        """
+        Parses the given line containing a single MAL statement. Returns an
+        instance of Instruction or Exit. This handles all statements, but is
+        slower than the parsing of instructions in the usual form in parse().
+        """
+
+        m = _pInstruction.fullmatch(line)
+        if m is not None:
+            resultsText, paramsText, termText = m.group(
+                "results", "params", "term"
+            )
+            return Instruction(
+                [] if resultsText is None
+                else self.parseVarList(resultsText, lineNo, line),
+                m.group("module"),
+                m.group("function"),
+                self.parseTermList(
+                    paramsText if termText is None else termText
+                ),
+                lineNo,
+                line,
+                m.group("flow")
+            )
+        m = _pExit.fullmatch(line)
+        if m is not None:
+            return Exit(
+                self.parseVarList(m.group("vars"), lineNo, line), lineNo, line
+            )
+
+        # The statement is invalid, find out why.
+        if not line.endswith(";"):
+            self.error(lineNo, line, "expected ';' at the end of the statement")
+        m = _pExitLoose.fullmatch(line)
+        if m is not None:
+            self.checkTermList(m.group("vars"), lineNo, line)
+        m = _pInstructionLoose.fullmatch(line)
+        if m is not None:
+            for text in m.group("results", "params", "term"):
+                if text is not None:
+                    self.checkTermList(text, lineNo, line)
+        self.error(lineNo, line, "could not parse the statement")
+
+def parse(lines):
+    """
+    Parses the given lines of a MAL program and returns an instance of
+    Program. The parts of the program (see the module's documentation) are
+    handled one after the other.
+    """
+
+    parser = _Parser()
+    numberedLines = enumerate(lines, start=1)
+
+    # The prologue and the start of the query function.
+    for lineNo, line in numberedLines:
+        stripped = line.strip()
+        if not stripped or stripped[0] == "%":
+            continue
+        m = re.fullmatch(r"function (\S+?)\(.*\)(?::\S+)?;", stripped)
+        if m is None:
+            raise RuntimeError(
+                "line {}: expected the start of the query function in "
+                "MAL program:\n{}".format(lineNo, stripped)
+            )
+        name = m.group(1)
+        break
+    else:
+        raise RuntimeError(
+            "the MAL program ended before the start of the query function"
+        )
+
+    # The body and the end of the query function. Instructions in the usual
+    # form are parsed right here, since this is the bulk of the work.
+    statements = []
+    getTerm = parser.terms.__getitem__
+    for lineNo, line in numberedLines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        m = _pInstructionUsual.fullmatch(stripped)
+        if m is not None:
+            flow, resultsText, module, function, paramsText, termText = \
+                m.groups()
+            if termText is not None:
+                params = [getTerm(termText)]
+            elif paramsText:
+                params = list(map(getTerm, paramsText.split(", ")))
+                if None in params and "\"" in paramsText:
+                    # A string literal containing ", " was split.
+                    paramTexts = _pTermText.findall(paramsText)
+                    if ", ".join(paramTexts) == paramsText:
+                        params = list(map(getTerm, paramTexts))
+            else:
+                params = []
+            if resultsText is None:
+                results = []
+            elif resultsText[0] == "(":
+                results = list(map(getTerm, resultsText[1:-1].split(", ")))
+            else:
+                results = [getTerm(resultsText)]
+            if None not in params:
+                for var in results:
+                    if not isinstance(var, Var):
+                        break
+                else:
+                    statements.append(Instruction(
+                        results, module, function, params, lineNo, stripped,
+                        flow
+                    ))
+                    continue
+        if stripped.startswith("end "):
+            if stripped != "end {};".format(name):
+                raise RuntimeError(
+                    "line {}: expected the end of the query function "
+                    "'{}' in MAL program:\n{}".format(lineNo, name, stripped)
+                )
+            break
+        statements.append(parser.parseStatement(stripped, lineNo))
+    else:
+        raise RuntimeError(
+            "the MAL program ended before the end of the query function"
+        )
+
+    # The epilogue.
+    for lineNo, line in numberedLines:
+        stripped = line.strip()
+        if stripped and stripped[0] != "#":
+            raise RuntimeError(
+                "line {}: unexpected line after the end of the query function "
+                "in MAL program:\n{}".format(lineNo, stripped)
+            )
+    return Program(name, statements)
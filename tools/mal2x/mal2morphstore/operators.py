@@ -32,6 +32,10 @@ criteria:
   "out" and end with "Col" (e.g. "outPosCol") to allow automatic analysis of
   the translated program (see module mal2morphstore.analysis and
   mal2morphstore.compr).
+- It must assign all of these fields in its constructor. The names of the
+  fields of the input and output columns are determined only once per class
+  (see Op.colKeys()), such that they do not need to be rediscovered for every
+  operator call.
 - It must store the C++ identifiers of the formats of each parameter and each
   result as its fields. The names of these fields must have the same names as 
   those for the corresponding input/output columns, but end with "F" instead of
@@ -59,7 +63,7 @@ module.
 """
 
 # TODO Support the optional cardinality estimate parameters of some operators.
-# TODO Currently, joins are assumed to be 1:N (see class Join).
+# TODO Currently, the nested-loop-joins are assumed to be 1:N (see class Join).
 # TODO Automatically wrap too long lines in the generated C++ code in a nice
 #      way.
 
@@ -78,12 +82,67 @@ _commonIdentifiers = {
     "get_count_values": "get_count_values",
 }
 
+def _checkUncompr(op):
+    """
+    Raises an error if the format of any input or output column of the given
+    operator call is not uncompr_f. This is required by the operators which
+    are generated as loops directly accessing the data of their columns.
+    """
+    
+    for key in op.colKeys():
+        formatKey = "{}F".format(key[:-len("Col")])
+        if getattr(op, formatKey) != "uncompr_f":
+            raise RuntimeError(
+                    "the format '{}' of operator '{}' must be uncompr_f, "
+                    "but is '{}'".format(
+                            formatKey, op.opName, getattr(op, formatKey)
+                    )
+            )
+
 class Op:
     """
     The base class of all classes representing a call to a query operator in
     MorphStore.
     """
-    pass
+    
+    # A mapping from a subclass of Op to a triple of the names of the fields of
+    # all columns, of the input columns, and of the output columns of that
+    # class, each in the order in which they are assigned in the constructor.
+    _colKeysByClass = {}
+    
+    def _getColKeys(self):
+        colKeys = Op._colKeysByClass.get(self.__class__)
+        if colKeys is None:
+            allKeys = [key for key in self.__dict__ if key.endswith("Col")]
+            colKeys = Op._colKeysByClass[self.__class__] = (
+                allKeys,
+                [key for key in allKeys if key.startswith("in")],
+                [key for key in allKeys if key.startswith("out")],
+            )
+        return colKeys
+    
+    def colKeys(self):
+        """
+        Returns the names of the fields of all input and output columns of this
+        operator call.
+        """
+        return self._getColKeys()[0]
+    
+    def inColKeys(self):
+        """Returns the names of the fields of the input columns."""
+        return self._getColKeys()[1]
+    
+    def outColKeys(self):
+        """Returns the names of the fields of the output columns."""
+        return self._getColKeys()[2]
+    
+    def inCols(self):
+        """Returns the names of the variables of the input columns."""
+        return [getattr(self, key) for key in self.inColKeys()]
+    
+    def outCols(self):
+        """Returns the names of the variables of the output columns."""
+        return [getattr(self, key) for key in self.outColKeys()]
 
 class Project(Op):
     """A call to MorphStore's project operator."""
@@ -356,6 +415,147 @@ class LeftSemiNto1Join(Op):
                     opName=self.opName, **self.__dict__, **_commonIdentifiers
             )
     
+# The C++ code materializing the output positions columns of the generated
+# joins (see classes MtoNJoin and MergeJoin) from the std::vectors posL and
+# posR.
+_joinOutputCode = \
+    "    const size_t outCount = posL.size();\n" \
+    "    const size_t outSize = outCount * sizeof(uint64_t);\n" \
+    "    auto outPosLCol = new {column}<uncompr_f>(outSize);\n" \
+    "    auto outPosRCol = new {column}<uncompr_f>(outSize);\n" \
+    "    memcpy(outPosLCol->get_data(), posL.data(), outSize);\n" \
+    "    memcpy(outPosRCol->get_data(), posR.data(), outSize);\n" \
+    "    outPosLCol->set_meta_data(outCount, outSize);\n" \
+    "    outPosRCol->set_meta_data(outCount, outSize);\n" \
+    "    return std::make_tuple(outPosLCol, outPosRCol);\n"
+
+class MtoNJoin(Op):
+    """
+    A call to a hash-based M:N-join, i.e., an equi-join whose inputs may both
+    contain duplicates.
+    
+    The left input is the build-side and the right input is the probe-side.
+    MorphStore does not offer such an operator, so this call is generated as a
+    scalar loop using a hash multimap. The loop directly accesses the data of
+    its columns, so all of them must be uncompressed.
+    """
+    
+    opName = "hash_join"
+    headers = [
+        "core/morphing/uncompr.h",
+        "core/storage/column.h",
+        "cstdint",
+        "cstring",
+        "tuple",
+        "unordered_map",
+        "vector",
+    ]
+    
+    def __init__(self, outPosLCol, outPosRCol, inDataLCol, inDataRCol):
+        self.outPosLCol = outPosLCol
+        self.outPosRCol = outPosRCol
+        self.inDataLCol = inDataLCol
+        self.inDataRCol = inDataRCol
+        self.outPosLF = "uncompr_f"
+        self.outPosRF = "uncompr_f"
+        self.inDataLF = None
+        self.inDataRF = None
+        
+    def __str__(self):
+        _checkUncompr(self)
+        return (
+            "// Hash M:N-join of {inDataLCol} (build-side) and {inDataRCol} (probe-side).\n" \
+            "const {column}<uncompr_f> * {outPosLCol};\n" \
+            "const {column}<uncompr_f> * {outPosRCol};\n" \
+            "std::tie({outPosLCol}, {outPosRCol}) = [&]() {{\n" \
+            "    const uint64_t * const inDataL = static_cast<const uint64_t *>({inDataLCol}->get_data());\n" \
+            "    const uint64_t * const inDataR = static_cast<const uint64_t *>({inDataRCol}->get_data());\n" \
+            "    const size_t inCountL = {inDataLCol}->{get_count_values}();\n" \
+            "    const size_t inCountR = {inDataRCol}->{get_count_values}();\n" \
+            "    std::unordered_multimap<uint64_t, uint64_t> posLByVal(inCountL);\n" \
+            "    for(size_t i = 0; i < inCountL; i++)\n" \
+            "        posLByVal.emplace(inDataL[i], i);\n" \
+            "    std::vector<uint64_t> posL;\n" \
+            "    std::vector<uint64_t> posR;\n" \
+            "    for(size_t j = 0; j < inCountR; j++) {{\n" \
+            "        const auto matches = posLByVal.equal_range(inDataR[j]);\n" \
+            "        for(auto it = matches.first; it != matches.second; it++) {{\n" \
+            "            posL.push_back(it->second);\n" \
+            "            posR.push_back(j);\n" \
+            "        }}\n" \
+            "    }}\n" + \
+            _joinOutputCode + \
+            "}}();"
+        ).format(**self.__dict__, **_commonIdentifiers)
+    
+class MergeJoin(Op):
+    """
+    A call to a sort-merge-join, i.e., an equi-join whose inputs are both
+    sorted, but may both contain duplicates.
+    
+    MorphStore does not offer such an operator, so this call is generated as a
+    scalar loop merging both inputs. The loop directly accesses the data of its
+    columns, so all of them must be uncompressed.
+    """
+    
+    opName = "merge_join"
+    headers = [
+        "core/morphing/uncompr.h",
+        "core/storage/column.h",
+        "cstdint",
+        "cstring",
+        "tuple",
+        "vector",
+    ]
+    
+    def __init__(self, outPosLCol, outPosRCol, inDataLCol, inDataRCol):
+        self.outPosLCol = outPosLCol
+        self.outPosRCol = outPosRCol
+        self.inDataLCol = inDataLCol
+        self.inDataRCol = inDataRCol
+        self.outPosLF = "uncompr_f"
+        self.outPosRF = "uncompr_f"
+        self.inDataLF = None
+        self.inDataRF = None
+        
+    def __str__(self):
+        _checkUncompr(self)
+        return (
+            "// Sort-merge-join of {inDataLCol} and {inDataRCol}.\n" \
+            "const {column}<uncompr_f> * {outPosLCol};\n" \
+            "const {column}<uncompr_f> * {outPosRCol};\n" \
+            "std::tie({outPosLCol}, {outPosRCol}) = [&]() {{\n" \
+            "    const uint64_t * const inDataL = static_cast<const uint64_t *>({inDataLCol}->get_data());\n" \
+            "    const uint64_t * const inDataR = static_cast<const uint64_t *>({inDataRCol}->get_data());\n" \
+            "    const size_t inCountL = {inDataLCol}->{get_count_values}();\n" \
+            "    const size_t inCountR = {inDataRCol}->{get_count_values}();\n" \
+            "    std::vector<uint64_t> posL;\n" \
+            "    std::vector<uint64_t> posR;\n" \
+            "    size_t i = 0;\n" \
+            "    size_t j = 0;\n" \
+            "    while(i < inCountL && j < inCountR) {{\n" \
+            "        if(inDataL[i] < inDataR[j])\n" \
+            "            i++;\n" \
+            "        else if(inDataR[j] < inDataL[i])\n" \
+            "            j++;\n" \
+            "        else {{\n" \
+            "            // Output the cross product of the runs of the current value.\n" \
+            "            const uint64_t val = inDataL[i];\n" \
+            "            size_t jEnd = j;\n" \
+            "            while(jEnd < inCountR && inDataR[jEnd] == val)\n" \
+            "                jEnd++;\n" \
+            "            for(; i < inCountL && inDataL[i] == val; i++)\n" \
+            "                for(size_t k = j; k < jEnd; k++) {{\n" \
+            "                    posL.push_back(i);\n" \
+            "                    posR.push_back(k);\n" \
+            "                }}\n" \
+            "            j = jEnd;\n" \
+            "        }}\n" \
+            "    }}\n" + \
+            _joinOutputCode + \
+            "}}();"
+        ).format(**self.__dict__, **_commonIdentifiers)
+    
 class CalcBinary(Op):
     """A call to MorphStore's binary calculation operator."""
     
@@ -503,3 +703,151 @@ class Morph(Op):
             opName=self.opName, **self.__dict__, **_commonIdentifiers
         )
             
+class ProjectCalcSum(Op):
+    """
+    A fused call of two project-operators with the same input positions
+    column, a binary calculation-operator on their outputs, and a whole-column
+    summation-operator on its output (see module mal2morphstore.fusion).
+    
+    MorphStore does not offer such an operator, so this call is generated as a
+    scalar loop, which does not materialize any intermediate column. The loop
+    directly accesses the data of its input columns, so all of them must be
+    uncompressed.
+    """
+    
+    opName = "project_calc_sum"
+    headers = [
+        "core/morphing/uncompr.h",
+        "core/storage/column.h",
+        "cstdint",
+    ]
+    
+    # A mapping from the operations of the binary calculation-operator to the
+    # respective C++ operators.
+    cppOpByOp = {
+        "std::plus": "+",
+        "std::minus": "-",
+        "std::multiplies": "*",
+        "add": "+",
+        "sub": "-",
+        "mul": "*",
+    }
+    
+    def __init__(self, outDataCol, op, inDataLCol, inDataRCol, inPosCol):
+        self.outDataCol = outDataCol
+        self.op = op
+        self.inDataLCol = inDataLCol
+        self.inDataRCol = inDataRCol
+        self.inPosCol = inPosCol
+        # Like for the whole-column summation-operator, the output format is
+        # uncompr_f.
+        self.outDataF = "uncompr_f"
+        self.inDataLF = None
+        self.inDataRF = None
+        self.inPosF = None
+        
+    def __str__(self):
+        _checkUncompr(self)
+        return \
+            "// Fused {opName}: sum of {op}({inDataLCol}, {inDataRCol}) at the positions in {inPosCol}.\n" \
+            "auto {outDataCol} = new {column}<uncompr_f>(sizeof(uint64_t));\n" \
+            "{{\n" \
+            "    const uint64_t * const inDataL = static_cast<const uint64_t *>({inDataLCol}->get_data());\n" \
+            "    const uint64_t * const inDataR = static_cast<const uint64_t *>({inDataRCol}->get_data());\n" \
+            "    const uint64_t * const inPos = static_cast<const uint64_t *>({inPosCol}->get_data());\n" \
+            "    const size_t inPosCount = {inPosCol}->{get_count_values}();\n" \
+            "    uint64_t sum = 0;\n" \
+            "    for(size_t i = 0; i < inPosCount; i++)\n" \
+            "        sum += inDataL[inPos[i]] {cppOp} inDataR[inPos[i]];\n" \
+            "    *static_cast<uint64_t *>({outDataCol}->get_data()) = sum;\n" \
+            "    {outDataCol}->set_meta_data(1, sizeof(uint64_t));\n" \
+            "}}".format(
+            opName=self.opName, cppOp=self.cppOpByOp[self.op],
+            **self.__dict__, **_commonIdentifiers
+        )
+
+class Partition(Op):
+    """
+    A call to obtain one of the partitions of a column, as MonetDB's mitosis
+    does for the largest table of a query (see module mal2morphstore.parallel).
+    
+    The column is split into partCount contiguous partitions of (almost) equal
+    size. MorphStore does not offer such an operator, so this call is generated
+    as a copy of the respective part of the input column, which must be
+    uncompressed. The positions in the output are relative to the partition.
+    """
+    
+    opName = "partition"
+    headers = [
+        "core/morphing/uncompr.h",
+        "core/storage/column.h",
+        "cstdint",
+        "cstring",
+    ]
+    
+    def __init__(self, outDataCol, inDataCol, partIdx, partCount):
+        self.outDataCol = outDataCol
+        self.inDataCol = inDataCol
+        self.partIdx = partIdx
+        self.partCount = partCount
+        self.outDataF = "uncompr_f"
+        self.inDataF = None
+        
+    def __str__(self):
+        _checkUncompr(self)
+        return \
+            "// Partition {partIdx} of {partCount} of {inDataCol}.\n" \
+            "auto {outDataCol} = [&]() {{\n" \
+            "    const size_t countValues = {inDataCol}->{get_count_values}();\n" \
+            "    const size_t partBegin = countValues * {partIdx} / {partCount};\n" \
+            "    const size_t partEnd = countValues * {partIdxNext} / {partCount};\n" \
+            "    const size_t partSize = (partEnd - partBegin) * sizeof(uint64_t);\n" \
+            "    auto outDataCol = new {column}<uncompr_f>(partSize);\n" \
+            "    memcpy(outDataCol->get_data(), static_cast<const uint64_t *>({inDataCol}->get_data()) + partBegin, partSize);\n" \
+            "    outDataCol->set_meta_data(partEnd - partBegin, partSize);\n" \
+            "    return outDataCol;\n" \
+            "}}();".format(
+            partIdxNext=self.partIdx + 1, **self.__dict__, **_commonIdentifiers
+        )
+            
+class Concat(Op):
+    """
+    A call to concatenate two columns, as MonetDB's mat.pack does with the
+    results of the partitions of a query (see module mal2morphstore.parallel).
+    
+    MorphStore does not offer such an operator, so this call is generated as a
+    copy of both input columns, which must be uncompressed.
+    """
+    
+    opName = "concat"
+    headers = [
+        "core/morphing/uncompr.h",
+        "core/storage/column.h",
+        "cstdint",
+        "cstring",
+    ]
+    
+    def __init__(self, outDataCol, inDataLCol, inDataRCol):
+        self.outDataCol = outDataCol
+        self.inDataLCol = inDataLCol
+        self.inDataRCol = inDataRCol
+        self.outDataF = "uncompr_f"
+        self.inDataLF = None
+        self.inDataRF = None
+        
+    def __str__(self):
+        _checkUncompr(self)
+        return \
+            "auto {outDataCol} = [&]() {{\n" \
+            "    const size_t countValuesL = {inDataLCol}->{get_count_values}();\n" \
+            "    const size_t countValuesR = {inDataRCol}->{get_count_values}();\n" \
+            "    const size_t sizeL = countValuesL * sizeof(uint64_t);\n" \
+            "    const size_t sizeR = countValuesR * sizeof(uint64_t);\n" \
+            "    auto outDataCol = new {column}<uncompr_f>(sizeL + sizeR);\n" \
+            "    memcpy(outDataCol->get_data(), {inDataLCol}->get_data(), sizeL);\n" \
+            "    memcpy(static_cast<uint8_t *>(outDataCol->get_data()) + sizeL, {inDataRCol}->get_data(), sizeR);\n" \
+            "    outDataCol->set_meta_data(countValuesL + countValuesR, sizeL + sizeR);\n" \
+            "    return outDataCol;\n" \
+            "}}();".format(
+            **self.__dict__, **_commonIdentifiers
+        )
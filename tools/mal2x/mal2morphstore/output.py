@@ -47,7 +47,9 @@ of an abstract representation of the translated program.
 import mal2morphstore.analysis
 import mal2morphstore.compr as compr
 import mal2morphstore.formats as formats
+import mal2morphstore.ir as ir
 from mal2morphstore.operators import Op, Morph
+import mal2morphstore.parallel as parallel
 import mal2morphstore.processingstyles as ps
 import mal2morphstore.purposes as pp
 
@@ -94,7 +96,7 @@ def _printHeaders(indent, tr, purpose, processingStyle, versionSelect):
     # selected processing style.
     # TODO switch include directories depending on vector version
     if (versionSelect == 1):
-      for el in tr.baseMorphs + tr.prog + tr.resultMorphs:
+      for el in tr.basePartitions + tr.baseMorphs + tr.prog + tr.resultMorphs:
           if isinstance(el, Op):
               for header in el.headers:
                   tr.headers.add(header.format(
@@ -104,7 +106,7 @@ def _printHeaders(indent, tr, purpose, processingStyle, versionSelect):
                           }
                   ))
     else:             
-      for el in tr.baseMorphs + tr.prog + tr.resultMorphs:
+      for el in tr.basePartitions + tr.baseMorphs + tr.prog + tr.resultMorphs:
           if isinstance(el, Op):
               for header in el.headers:
                   tr.headers.add(header.format(
@@ -150,13 +152,11 @@ def _printSchema(indent, tr):
         print()
 
 def _prepareOutColsForRandomAccess(indent, op, ar):
-    for key in op.__dict__:
-        if key.startswith("out") and key.endswith("Col"):
-            varName = getattr(op, key)
-            if varName in ar.varsRndAccessUnsorted or varName in ar.varsRndAccessSorted:
-                print("{}{}->template prepare_for_random_access<{}>();".format(
-                        indent, varName, ps.PS_VAR
-                ))
+    for varName in op.outCols():
+        if varName in ar.varsRndAccessUnsorted or varName in ar.varsRndAccessSorted:
+            print("{}{}->template prepare_for_random_access<{}>();".format(
+                    indent, varName, ps.PS_VAR
+            ))
 
 def _printDataLoad(indent, tr, ar):
     """
@@ -195,33 +195,188 @@ def _printDataLoad(indent, tr, ar):
         print("{}// No morphing of the base columns required.".format(indent))
     print()
     
-def _printFreeIntermediates(
-    indent, tr, freeMorphedBaseCols, freeQueryResultCols
-):
+    # Partition the base columns, if the query is executed partition-parallel.
+    if len(tr.basePartitions):
+        print("{}// Partition the base columns.".format(indent))
+        for op in tr.basePartitions:
+            print("{}{}".format(indent, op).replace("\n", "\n" + indent))
+            _prepareOutColsForRandomAccess(indent, op, ar)
+        print()
+    
+def _getResultColsWithInputs(tr):
+    """
+    Returns the names of the query results and of the inputs of their morphs,
+    i.e., of all columns still required after the query program.
+    """
+    
+    return tr.resultCols + [morphOp.inCol for morphOp in tr.resultMorphs]
+
+def _getPreparedBaseCols(tr):
+    """
+    Returns the names of the columns prepared from the base columns while
+    loading the base data, i.e., of the morphed and partitioned base columns.
+    """
+    
+    return [morphOp.outCol for morphOp in tr.baseMorphs] + \
+        [partOp.outDataCol for partOp in tr.basePartitions]
+
+def _getEarlyFreedCols(tr, items, freeMorphedBaseCols):
+    """
+    Returns a mapping from the items of the given schedule of the query
+    program (see function mal2morphstore.parallel.schedule()) to the lists of
+    the intermediates which can be freed directly after them, since no later
+    operator call uses them. Intermediates used only within one partition of
+    a parallel region are freed within the task of that partition, i.e., the
+    key is the index of the last operator call using them. All other
+    intermediates used last in a parallel region are freed after all of its
+    tasks have finished. Base columns, query results, and the inputs of the
+    morphs of the query results are never contained; morphed and partitioned
+    base columns only if requested.
+    """
+
+    graph = ir.DefUseGraph(tr.prog, resultCols=_getResultColsWithInputs(tr))
+    preparedBaseCols = _getPreparedBaseCols(tr)
+    
+    # The position of each operator call in the schedule and the parallel
+    # region containing it, if any.
+    stepByOpIdx = {}
+    regionByOpIdx = {}
+    step = 0
+    for item in items:
+        if isinstance(item, parallel.ParallelRegion):
+            for opIdx in item.opIdxs():
+                stepByOpIdx[opIdx] = step
+                regionByOpIdx[opIdx] = item
+            step += 1
+        elif not isinstance(item, str):
+            stepByOpIdx[item] = step
+            step += 1
+    
+    freedColsByItem = {}
+    for varName in graph.cols:
+        if (
+            "." in varName
+            or graph.lastUseIdx(varName) is None
+            or (not freeMorphedBaseCols and varName in preparedBaseCols)
+        ):
+            continue
+        producerIdx = graph.producerIdxByCol.get(varName)
+        useIdxs = graph.consumerIdxsByCol.get(varName, []) + (
+            [] if producerIdx is None else [producerIdx]
+        )
+        lastUseIdx = max(
+            useIdxs, key=lambda opIdx: (stepByOpIdx[opIdx], opIdx)
+        )
+        region = regionByOpIdx.get(lastUseIdx)
+        if region is None or (
+            regionByOpIdx.get(producerIdx) is region
+            and not any(
+                varName in outCols
+                for outCols in region.outColsByPartIdx.values()
+            )
+        ):
+            item = lastUseIdx
+        else:
+            item = region
+        freedColsByItem.setdefault(item, []).append(varName)
+    return freedColsByItem
+
+def _getFreedCols(freedColsByItem):
+    return {
+        varName
+        for varNames in freedColsByItem.values()
+        for varName in varNames
+    }
+
+def _printFreeCols(indent, varNames):
+    if not varNames:
+        return
     # TODO This should also work with MorphStore's own memory manager.
     print("#ifdef MSV_NO_SELFMANAGED_MEMORY")
-    freedVars = set()
-    morphedBaseCols = [morphOp.outCol for morphOp in tr.baseMorphs]
-    for el in tr.prog:
-        if isinstance(el, Op):
-            for key in el.__dict__:
-                if key.endswith("Col"):
-                    varName = getattr(el, key)
-                    if (
-                        "." not in varName
-                        and varName not in freedVars
-                        and (freeMorphedBaseCols or varName not in morphedBaseCols)
-                        and (freeQueryResultCols or varName not in tr.resultCols)
-                    ):
-                        print("{}delete {};".format(indent, varName))
-                        freedVars.add(varName)
+    for varName in varNames:
+        print("{}delete {};".format(indent, varName))
     print("#endif")
 
+def _printFreeIntermediates(
+    indent, tr, comment, freeMorphedBaseCols, freeQueryResultCols,
+    freedCols=set()
+):
+    preparedBaseCols = _getPreparedBaseCols(tr)
+    # Each column is deleted once, in the order of its first occurrence.
+    # Columns which have already been freed early during query processing are
+    # skipped.
+    varNames = [
+        varName
+        for varName in ir.DefUseGraph(tr.prog).cols
+        if "." not in varName
+        and varName not in freedCols
+        and (freeMorphedBaseCols or varName not in preparedBaseCols)
+        and (freeQueryResultCols or varName not in tr.resultCols)
+    ]
+    # The comment is omitted if nothing remains to be freed.
+    if varNames:
+        print("{}// {}".format(indent, comment))
+    _printFreeCols(indent, varNames)
+    return len(varNames) > 0
+
 def _printFreeQueryResults(indent, tr, suffix=""):
     print("#ifdef MSV_NO_SELFMANAGED_MEMORY")
     for colName in tr.resultCols:
         print("{}delete {}{};".format(indent, colName, suffix))
     print("#endif")
+
+def _printParallelRegion(indent, progOps, region, ar, freedColsByItem):
+    """
+    Prints C++ statements executing the operator chain of each partition of
+    the given parallel region as a task on its own thread, waiting for all of
+    these tasks, and obtaining the columns they produced for later use.
+    """
+    
+    indentMore = "{}    ".format(indent)
+    taskVarFs = "partTask{}_{{}}".format(min(region.opIdxs()))
+    
+    def getFormat(varName):
+        for op in progOps:
+            for key in op.outColKeys():
+                if getattr(op, key) == varName:
+                    return getattr(op, "{}F".format(key[:-len("Col")]))
+    
+    print("{}// Execute {} partitions in parallel.".format(
+            indent, len(region.opIdxsByPartIdx)
+    ))
+    for partIdx, opIdxs in region.opIdxsByPartIdx.items():
+        print(
+                "{}auto {} = std::async(std::launch::async, [&]() {{"
+                .format(indent, taskVarFs.format(partIdx))
+        )
+        for opIdx in opIdxs:
+            op = progOps[opIdx]
+            print("{}{}".format(indentMore, op).replace("\n", "\n" + indentMore))
+            _prepareOutColsForRandomAccess(indentMore, op, ar)
+            if opIdx in freedColsByItem:
+                _printFreeCols(indentMore, freedColsByItem[opIdx])
+        if region.outColsByPartIdx[partIdx]:
+            print("{}return std::make_tuple({});".format(
+                    indentMore, ", ".join(region.outColsByPartIdx[partIdx])
+            ))
+        print("{}}});".format(indent))
+    print("{}// Wait for the partitions and obtain their outputs.".format(
+            indent
+    ))
+    for partIdx, outCols in region.outColsByPartIdx.items():
+        if outCols:
+            for varName in outCols:
+                print("{}const column<{} > * {};".format(
+                        indent, getFormat(varName), varName
+                ))
+            print("{}std::tie({}) = {}.get();".format(
+                    indent, ", ".join(outCols), taskVarFs.format(partIdx)
+            ))
+        else:
+            print("{}{}.get();".format(indent, taskVarFs.format(partIdx)))
+    if region in freedColsByItem:
+        _printFreeCols(indent, freedColsByItem[region])
+    print(indent)
     
 def _printProg(indent, tr, purpose, ar, ps, colInfosFilePath, repetitionCount):
     """
@@ -273,11 +428,24 @@ def _printProg(indent, tr, purpose, ar, ps, colInfosFilePath, repetitionCount):
         print()
         
         # Creation of the monitors.
+        # The operators executed in the tasks of the partitions are not
+        # monitored individually.
+        items = parallel.schedule(
+                tr.prog, _getResultColsWithInputs(tr), tr.basePartitions
+        )
+        parallelOpIdxs = {
+            opIdx
+            for item in items
+            if isinstance(item, parallel.ParallelRegion)
+            for opIdx in item.opIdxs()
+        }
         print("{}// Creation of the monitors.".format(indent))
         for opIdx, opName in enumerate(
                 [opNameQuery] + \
                 [op.opName for op in filter(isOp, tr.prog)]
         ):
+            if opIdx - 1 in parallelOpIdxs:
+                continue
             print(
                     '{{}}MONITORING_CREATE_MONITOR(MONITORING_MAKE_MONITOR({{: <{}}}, {{: >{}}}), MONITORING_KEY_IDENTS({{}}, {{}}));'
                     .format(maxVarOpNameLen, 2)
@@ -317,9 +485,19 @@ def _printProg(indent, tr, purpose, ar, ps, colInfosFilePath, repetitionCount):
                 .format(indentMore, varColRuntime, varOpNameQuery, 0)
         )
         print()
-        opIdx = 1
-        for el in tr.prog:
-            if isinstance(el, Op):
+        # Intermediates are freed directly after their last use, except for
+        # the morphed and partitioned base columns, which are reused in all
+        # repetitions.
+        freedColsByItem = _getEarlyFreedCols(tr, items, False)
+        progOps = list(filter(isOp, tr.prog))
+        for item in items:
+            if isinstance(item, parallel.ParallelRegion):
+                _printParallelRegion(
+                        indentMore, progOps, item, ar, freedColsByItem
+                )
+            elif not isinstance(item, str):
+                el = progOps[item]
+                opIdx = item + 1
                 monVarOpNameOp = varOpNameFs.format(el.opName)
                 print('{}MONITORING_START_INTERVAL_FOR({}, {}, {});'.format(
                         indentMore, varColRuntime, monVarOpNameOp, opIdx)
@@ -329,9 +507,10 @@ def _printProg(indent, tr, purpose, ar, ps, colInfosFilePath, repetitionCount):
                         indentMore, varColRuntime, monVarOpNameOp, opIdx)
                 )
                 _prepareOutColsForRandomAccess(indentMore, el, ar)
-                opIdx += 1
+                if item in freedColsByItem:
+                    _printFreeCols(indentMore, freedColsByItem[item])
             else:
-                print("{}{}".format(indentMore, el).replace("\n", "\n" + indentMore))
+                print("{}{}".format(indentMore, item).replace("\n", "\n" + indentMore))
         print()
         print(
                 '{}MONITORING_END_INTERVAL_FOR  ({}, {}, {});'
@@ -339,15 +518,15 @@ def _printProg(indent, tr, purpose, ar, ps, colInfosFilePath, repetitionCount):
         )
         print()
         
-        # Free all intermediate results which are not morphed base columns or
-        # query results.
-        # TODO This should happen as early as possible during query processing.
-        print(
-                "{}// Free all intermediate results which are not morphed "
-                "base columns or query results.".format(indentMore)
-        )
-        _printFreeIntermediates(indentMore, tr, False, False)
-        print()
+        # Free all remaining intermediate results which are not morphed base
+        # columns or query results.
+        if _printFreeIntermediates(
+                indentMore, tr,
+                "Free all remaining intermediate results which are not "
+                "morphed base columns or query results.",
+                False, False, _getFreedCols(freedColsByItem)
+        ):
+            print()
         print("{}// Handle query results.".format(indentMore))
         print("{}if(repIdx < {}) {{".format(indentMore, repetitionCount))
         print("{}    // This is not the last query repetition.".format(indentMore))
@@ -565,13 +744,7 @@ def _printProg(indent, tr, purpose, ar, ps, colInfosFilePath, repetitionCount):
 
         # Creation of the monitors.
         print("{}// Creation of the monitors.".format(indent))
-        varNames = set()
-        for el in tr.prog:
-            if isinstance(el, Op):
-                for key in el.__dict__:
-                    if key.endswith("Col"):
-                        varNames.add(getattr(el, key))
-        for varName in varNames:
+        for varName in ir.DefUseGraph(tr.prog).cols:
             for fmt in (
                 [formats.UncomprFormat()]
                 if varName in tr.resultCols
@@ -640,6 +813,9 @@ def _printProg(indent, tr, purpose, ar, ps, colInfosFilePath, repetitionCount):
         for tblName in tr.colNamesByTblName:
             for colName in tr.colNamesByTblName[tblName]:
                 _morphToAllFormats("{}.{}".format(tblName, colName))
+        for op in tr.basePartitions:
+            for varName in op.outCols():
+                _morphToAllFormats(varName)
         print()
         
         # Query program.
@@ -650,18 +826,31 @@ def _printProg(indent, tr, purpose, ar, ps, colInfosFilePath, repetitionCount):
                 print("{}{}".format(indent, el).replace("\n", "\n" + indent))
                 _prepareOutColsForRandomAccess(indent, el, ar)
                 
-                for key in el.__dict__:
-                    if key.startswith("out") and key.endswith("Col"):
-                        varName = getattr(el, key)
-                        _morphToAllFormats(varName)
+                for varName in el.outCols():
+                    _morphToAllFormats(varName)
             else:
                 print("{}{}".format(indent, el).replace("\n", "\n" + indent))
         print()
     elif purpose in [pp.PP_CHECK, pp.PP_RESULTS]:
-        for el in tr.prog:
-            print("{}{}".format(indent, el).replace("\n", "\n" + indent))
-            if isinstance(el, Op):
+        # Intermediates are freed directly after their last use.
+        items = parallel.schedule(
+                tr.prog, _getResultColsWithInputs(tr), tr.basePartitions
+        )
+        freedColsByItem = _getEarlyFreedCols(tr, items, True)
+        progOps = [el for el in tr.prog if isinstance(el, Op)]
+        for item in items:
+            if isinstance(item, parallel.ParallelRegion):
+                _printParallelRegion(
+                        indent, progOps, item, ar, freedColsByItem
+                )
+            elif not isinstance(item, str):
+                el = progOps[item]
+                print("{}{}".format(indent, el).replace("\n", "\n" + indent))
                 _prepareOutColsForRandomAccess(indent, el, ar)
+                if item in freedColsByItem:
+                    _printFreeCols(indent, freedColsByItem[item])
+            else:
+                print("{}{}".format(indent, item).replace("\n", "\n" + indent))
     else:
         raise RuntimeError("unsupported purpose: '{}'".format(purpose))
 
@@ -717,10 +906,21 @@ def _printResultOutput(indent, tr, purpose):
     if purpose == pp.PP_TIME:
         print("{}// Free all query results.".format(indent))
         _printFreeQueryResults(indent, tr, RES_SUFFIX)
+    elif purpose in [pp.PP_CHECK, pp.PP_RESULTS]:
+        # The other intermediates have already been freed during query
+        # processing (see function _printProg).
+        items = parallel.schedule(
+                tr.prog, _getResultColsWithInputs(tr), tr.basePartitions
+        )
+        _printFreeIntermediates(
+                indent, tr, "Free all remaining intermediate results.",
+                True, True,
+                _getFreedCols(_getEarlyFreedCols(tr, items, True))
+        )
     else:
-        # TODO This should happen as early as possible during query processing.
-        print("{}// Free all intermediate results.".format(indent))
-        _printFreeIntermediates(indent, tr, True, True)
+        _printFreeIntermediates(
+                indent, tr, "Free all intermediate results.", True, True
+        )
 
 def _printAnalysis(indent, ar):
     """
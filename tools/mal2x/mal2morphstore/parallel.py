@@ -0,0 +1,203 @@
+#*********************************************************************************************
+# Copyright (C) 2019 by MorphStore-Team                                                      *
+#                                                                                            *
+# This file is part of MorphStore - a compression aware vectorized column store.             *
+#                                                                                            *
+# This program is free software: you can redistribute it and/or modify it under the          *
+# terms of the GNU General Public License as published by the Free Software Foundation,      *
+# either version 3 of the License, or (at your option) any later version.                    *
+#                                                                                            *
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;  *
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  *
+# See the GNU General Public License for more details.                                       *
+#                                                                                            *
+# You should have received a copy of the GNU General Public License along with this program. *
+# If not, see <http://www.gnu.org/licenses/>.                                                *
+#*********************************************************************************************
+
+"""
+Partition-parallel execution of translated programs.
+
+If MonetDB runs with multiple threads, its mitosis optimizer splits the largest
+table of a query into partitions and replicates the operator chain consuming
+this table once per partition. The results of the partitions are merged by
+MAL's mat.pack. In the translated program (see module
+mal2morphstore.translation), the partitions of a column are obtained by
+partition-operators, and mat.pack is translated to concat-operators (see
+module mal2morphstore.operators). Apart from that, the translated program is
+an ordinary sequential program.
+
+This module derives the partition each operator call belongs to from the data
+flow: The output of a partition-operator belongs to its partition, and any
+other operator call belongs to the partition of its inputs, unless it is a
+concat-operator, which merges the partitions. Operator calls belonging to no
+partition are executed sequentially. The function schedule() groups the
+operator calls of the partitions into parallel regions, such that the
+generated C++ program (see module mal2morphstore.output) can execute the
+operator chain of each partition of a region as one task on its own thread.
+
+The partitions of the base columns do not depend on the query. Thus, the
+partition-operators consuming base columns are moved out of the query program
+by the function separateBasePartitions(), such that the generated C++ program
+obtains these partitions once while loading the base data. Only the partitions
+of intermediates are obtained within the tasks.
+
+Since the positions within a partition are relative to that partition,
+positions lists must not be merged by concat-operators. This is checked during
+the translation.
+"""
+
+
+import mal2morphstore.ir as ir
+import mal2morphstore.operators as ops
+
+
+class ParallelRegion:
+    """
+    A set of operator chains, one per partition, which can be executed in
+    parallel.
+    """
+
+    def __init__(self):
+        # A mapping from the index of a partition to the ascending list of the
+        # indexes (in the sense of ir.DefUseGraph.ops) of the operator calls
+        # of that partition in this region.
+        self.opIdxsByPartIdx = {}
+
+        # A mapping from the index of a partition to the list of the columns
+        # produced in that partition in this region which are used after this
+        # region.
+        self.outColsByPartIdx = {}
+
+    def opIdxs(self):
+        """
+        Returns the set of the indexes of all operator calls in this region.
+        """
+
+        return {
+            opIdx
+            for opIdxs in self.opIdxsByPartIdx.values()
+            for opIdx in opIdxs
+        }
+
+def getPartIdxs(graph, partIdxByCol={}):
+    """
+    Returns a list containing the index of the partition of each operator call
+    in the given def-use graph, or None for operator calls belonging to no
+    partition. The columns not produced in the graph belong to the partitions
+    given by the mapping partIdxByCol, if they are contained in it.
+    """
+
+    partIdxs = []
+    for op in graph.ops:
+        if isinstance(op, ops.Partition):
+            partIdx = op.partIdx
+        elif isinstance(op, ops.Concat):
+            partIdx = None
+        else:
+            inPartIdxs = {
+                partIdxs[graph.producerIdxByCol[col]]
+                if col in graph.producerIdxByCol
+                else partIdxByCol.get(col)
+                for col in op.inCols()
+            }
+            inPartIdxs.discard(None)
+            if len(inPartIdxs) > 1:
+                raise RuntimeError(
+                        "the operator {} consumes columns of different "
+                        "partitions".format(op.__class__.__name__)
+                )
+            partIdx = inPartIdxs.pop() if inPartIdxs else None
+        partIdxs.append(partIdx)
+    return partIdxs
+
+def separateBasePartitions(translationResult):
+    """
+    Separates the partition-operators consuming base columns from the rest of
+    the query program, together with the blank line following each of them.
+    """
+
+    newProg = []
+    basePartitions = []
+    afterBasePartition = False
+    for el in translationResult.prog:
+        if isinstance(el, ops.Partition) and "." in el.inDataCol:
+            basePartitions.append(el)
+            afterBasePartition = True
+            continue
+        if not (afterBasePartition and el == ""):
+            newProg.append(el)
+        afterBasePartition = False
+
+    translationResult.prog = newProg
+    translationResult.basePartitions = basePartitions
+
+def schedule(prog, resultCols, basePartitions=[]):
+    """
+    Returns the order in which the given translated program shall be executed
+    as a list of the strings of the program, the indexes of the operator calls
+    to execute sequentially, and instances of ParallelRegion. The result
+    columns must include the inputs of the morphs of the result columns. The
+    outputs of the given partition-operators consuming base columns, which
+    have been separated from the program, belong to their partitions.
+
+    For a program without partitions, this is just the original program with
+    its operator calls replaced by their indexes. Otherwise, the operator calls
+    of the partitions are collected in a parallel region until a sequential
+    operator call uses one of their outputs. Sequential operator calls
+    independent of the current region are executed before it, since the
+    remaining operator calls of the region might depend on them.
+    """
+
+    graph = ir.DefUseGraph(prog, resultCols=resultCols)
+    partIdxs = getPartIdxs(graph, {
+        op.outDataCol: op.partIdx for op in basePartitions
+    })
+
+    items = []
+    regions = []
+    region = None
+    regionOpIdxs = set()
+    opIdx = 0
+    for el in prog:
+        if not isinstance(el, ops.Op):
+            # Strings are kept only outside the parallel regions.
+            if region is None:
+                items.append(el)
+            continue
+        partIdx = partIdxs[opIdx]
+        if partIdx is not None:
+            if region is None:
+                region = ParallelRegion()
+                regions.append(region)
+                regionOpIdxs = set()
+                items.append(region)
+            region.opIdxsByPartIdx.setdefault(partIdx, []).append(opIdx)
+            regionOpIdxs.add(opIdx)
+        elif region is not None and all(
+            graph.producerIdxByCol.get(col) not in regionOpIdxs
+            for col in el.inCols()
+        ):
+            items.insert(items.index(region), opIdx)
+            items.insert(items.index(region), "")
+        else:
+            region = None
+            items.append(opIdx)
+        opIdx += 1
+
+    # Determine the outputs of the partitions.
+    for region in regions:
+        regionOpIdxs = region.opIdxs()
+        for partIdx, opIdxs in region.opIdxsByPartIdx.items():
+            region.outColsByPartIdx[partIdx] = [
+                col
+                for opIdx in opIdxs
+                for col in graph.ops[opIdx].outCols()
+                if col in graph.resultCols
+                or any(
+                    consumerIdx not in regionOpIdxs
+                    for consumerIdx in graph.consumerIdxsByCol.get(col, [])
+                )
+            ]
+
+    return items
@@ -0,0 +1,297 @@
+#*********************************************************************************************
+# Copyright (C) 2019 by MorphStore-Team                                                      *
+#                                                                                            *
+# This file is part of MorphStore - a compression aware vectorized column store.             *
+#                                                                                            *
+# This program is free software: you can redistribute it and/or modify it under the          *
+# terms of the GNU General Public License as published by the Free Software Foundation,      *
+# either version 3 of the License, or (at your option) any later version.                    *
+#                                                                                            *
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;  *
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  *
+# See the GNU General Public License for more details.                                       *
+#                                                                                            *
+# You should have received a copy of the GNU General Public License along with this program. *
+# If not, see <http://www.gnu.org/licenses/>.                                                *
+#*********************************************************************************************
+
+"""
+Reordering of conjunctive selections in translated programs by their estimated
+selectivities.
+
+MAL programs evaluate a conjunction of predicates on the same table as a
+sequence of selections, each of which gets the output of the previous one as
+its candidate list. In the translated program, each of these selections runs
+on the full base column and is intersected with the candidates afterwards (see
+module mal2morphstore.translation), in the order chosen by MonetDB.
+
+This module finds such conjunctions, i.e., trees of intersect-operators whose
+leaves are select- or between-operators on base columns of the same table, and
+replaces each of them by an equivalent sequence of operator calls:
+- The most selective predicate is evaluated on the full base column.
+- Each further predicate is evaluated in ascending order of selectivity on the
+  data elements at the positions of the candidates so far, i.e., as a
+  project-operator, a select- or between-operator on its output, and a
+  project-operator mapping the qualifying positions back to the positions in
+  the table. This is only done as long as the estimated fraction of
+  candidates does not exceed MAX_CAND_FRACTION, since projecting is more
+  expensive than scanning per data element. Otherwise, the predicate is
+  evaluated on the full base column and intersected with the candidates as
+  before.
+The outputs are still sorted and unique position lists, so the rest of the
+program remains valid.
+
+The selectivity of a predicate is, in descending order of preference:
+- the ratio of the numbers of data elements in its output and input column
+  according to the data characteristics of a previous run (see 'ssb.sh -p d'),
+- estimated from the statistics on its input column created by dbdict.py, i.e.,
+  from the equi-depth histogram and the number of distinct values in the
+  "<table>.colstats.json" file, or from the maximum in the "<table>.json"
+  file, assuming a minimum of zero and a uniform distribution (see module
+  mal2morphstore.estimation).
+A conjunction whose predicates' selectivities cannot all be determined is left
+unchanged. The predicates are assumed to be independent.
+"""
+
+
+import mal2morphstore.estimation as estimation
+import mal2morphstore.ir as ir
+import mal2morphstore.operators as ops
+
+import copy
+import sys
+
+# TODO This is relative to ssb.sh.
+sys.path.append(".")
+import csvutils
+
+
+# The maximum estimated fraction of candidates (relative to the cardinality of
+# the table) for which a further predicate is evaluated on the data elements at
+# the candidates' positions rather than on the full base column.
+MAX_CAND_FRACTION = 0.5
+
+
+# *****************************************************************************
+# Selectivity estimation
+# *****************************************************************************
+
+class _SelectivityEstimator:
+    """Determines the selectivities of select- and between-operators."""
+
+    def __init__(self, statDirPath, colInfosFilePath):
+        self._statDirPath = statDirPath
+        self._countByCol = None
+        if colInfosFilePath is not None:
+            dfColInfos = csvutils.getColInfos(colInfosFilePath)
+            self._countByCol = \
+                dfColInfos[csvutils.ColInfoCols.countValues].to_dict()
+        # The estimates of the base columns, loaded lazily.
+        self._estByCol = {}
+
+    def _getEstimate(self, col):
+        """
+        Returns the estimate of the given base column (see module
+        mal2morphstore.estimation), or None if it is not known.
+        """
+
+        if self._statDirPath is None:
+            return None
+        if col not in self._estByCol:
+            tblName, colName = col.split(".", 1)
+            self._estByCol[col] = estimation.loadBaseEstimates(
+                self._statDirPath, {tblName: [colName]}
+            ).get(col)
+        return self._estByCol[col]
+
+    def estimate(self, preds):
+        """
+        Returns the selectivity of the conjunction of the given select- and
+        between-operators on the same base column, or None if it cannot be
+        determined.
+        """
+
+        if self._countByCol is not None and all(
+            pred.outPosCol in self._countByCol
+            and self._countByCol.get(pred.inDataCol)
+            for pred in preds
+        ):
+            # The conjunction is at most as selective as its least selective
+            # predicate.
+            return min(
+                self._countByCol[pred.outPosCol] /
+                self._countByCol[pred.inDataCol]
+                for pred in preds
+            )
+
+        est = self._getEstimate(preds[0].inDataCol)
+        if est is None:
+            return None
+        return estimation.selectivity(est, preds)
+
+
+# *****************************************************************************
+# Reordering
+# *****************************************************************************
+
+def _isIntersect(op):
+    return isinstance(op, ops.Intersect) or isinstance(op, ops.IntersectKAry)
+
+def _isPredicate(op):
+    return isinstance(op, ops.Select) or isinstance(op, ops.Between)
+
+def _collectConjunction(graph, rootIdx):
+    """
+    Returns the indexes of the intersect-operators and of the select- and
+    between-operators (the predicates) of the conjunction whose last
+    intersect-operator has the given index, or None if that operator is not
+    the root of a conjunction on base columns.
+    """
+
+    intersectIdxs = [rootIdx]
+    predIdxs = []
+    pending = [rootIdx]
+    while pending:
+        opIdx = pending.pop()
+        op = graph.ops[opIdx]
+        for col in [op.inPosLCol, op.inPosRCol]:
+            producerIdx = graph.producerIdxByCol.get(col)
+            if (
+                producerIdx is None
+                or graph.singleConsumerIdx(col) != opIdx
+            ):
+                return None
+            producer = graph.ops[producerIdx]
+            if _isIntersect(producer):
+                intersectIdxs.append(producerIdx)
+                pending.append(producerIdx)
+            elif _isPredicate(producer) and "." in producer.inDataCol:
+                predIdxs.append(producerIdx)
+            else:
+                return None
+
+    # The predicates must refer to the same table.
+    if len(set(
+        graph.ops[predIdx].inDataCol.split(".", 1)[0] for predIdx in predIdxs
+    )) != 1:
+        return None
+    return intersectIdxs, sorted(predIdxs)
+
+def _reorderConjunction(root, preds, estimator):
+    """
+    Returns the sequence of operator calls replacing the conjunction with the
+    given last intersect-operator and predicates, or None if the selectivities
+    of the predicates cannot be determined.
+    
+    The predicates on the same base column are kept together, since they are
+    usually the lower and upper bound of a range.
+    """
+
+    predsByCol = {}
+    for pred in preds:
+        predsByCol.setdefault(pred.inDataCol, []).append(pred)
+    groups = []
+    for colPreds in predsByCol.values():
+        sels = [estimator.estimate([pred]) for pred in colPreds]
+        groupSel = estimator.estimate(colPreds)
+        if None in sels or groupSel is None:
+            return None
+        # The most selective predicate on the column first.
+        colPreds = [
+            pred for _, _, pred in sorted(
+                zip(sels, range(len(colPreds)), colPreds),
+                key=lambda triple: triple[:2]
+            )
+        ]
+        groups.append((groupSel, len(groups), colPreds))
+    # The most selective column first.
+    groups.sort(key=lambda triple: triple[:2])
+    predsSorted = [pred for _, _, colPreds in groups for pred in colPreds]
+
+    newOps = []
+    candCol = None
+    # The estimated fraction of candidates after the previous predicates.
+    candFraction = 1
+    prevGroupsFraction = 1
+    for groupSel, _, colPreds in groups:
+        for idx, pred in enumerate(colPreds):
+            outPosCol = root.outPosCol \
+                if pred is predsSorted[-1] \
+                else "{}_c".format(pred.outPosCol)
+            if candCol is None:
+                # The most selective predicate on the full base column.
+                newOps.append(pred)
+                outPosCol = pred.outPosCol
+            elif candFraction <= MAX_CAND_FRACTION:
+                # The predicate on the data elements at the candidates'
+                # positions.
+                dataCol = "{}_d".format(pred.outPosCol)
+                newOps.append(ops.Project(
+                    outDataCol = dataCol,
+                    inDataCol  = pred.inDataCol,
+                    inPosCol   = candCol
+                ))
+                predOnCands = copy.copy(pred)
+                predOnCands.inDataCol = dataCol
+                predOnCands.outPosCol = "{}_p".format(pred.outPosCol)
+                newOps.append(predOnCands)
+                newOps.append(ops.Project(
+                    outDataCol = outPosCol,
+                    inDataCol  = candCol,
+                    inPosCol   = predOnCands.outPosCol
+                ))
+            else:
+                # The predicate on the full base column.
+                newOps.append(pred)
+                newOps.append(root.__class__(
+                    outPosCol = outPosCol,
+                    inPosLCol = pred.outPosCol,
+                    inPosRCol = candCol
+                ))
+            candCol = outPosCol
+            candFraction = prevGroupsFraction * \
+                estimator.estimate(colPreds[:idx + 1])
+        prevGroupsFraction *= groupSel
+
+    return newOps
+
+def reorderSelections(
+        translationResult, statDirPath=None, colInfosFilePath=None
+):
+    """
+    Reorders all conjunctive selections in the given translated program by
+    their selectivities as described in the documentation of this module.
+    Returns the number of reordered conjunctions.
+    """
+
+    tr = translationResult
+    graph = ir.DefUseGraph(tr.prog, resultCols=tr.resultCols)
+    estimator = _SelectivityEstimator(statDirPath, colInfosFilePath)
+
+    newOpsByIdx = {}
+    countReordered = 0
+    # The operator calls are visited backwards, such that the last
+    # intersect-operator of a conjunction is visited first.
+    for opIdx in reversed(range(len(graph.ops))):
+        op = graph.ops[opIdx]
+        if not _isIntersect(op) or opIdx in newOpsByIdx:
+            continue
+        conjunction = _collectConjunction(graph, opIdx)
+        if conjunction is None:
+            continue
+        intersectIdxs, predIdxs = conjunction
+        newOps = _reorderConjunction(
+            op, [graph.ops[predIdx] for predIdx in predIdxs], estimator
+        )
+        if newOps is None:
+            continue
+
+        # The new operator calls take the place of the root, where all base
+        # columns are available and which precedes all consumers.
+        for idx in intersectIdxs + predIdxs:
+            newOpsByIdx[idx] = []
+        newOpsByIdx[opIdx] = newOps
+        countReordered += 1
+    tr.prog = ir.rewriteProg(tr.prog, newOpsByIdx)
+
+    return countReordered
@@ -25,15 +25,24 @@ MorphStore C++ program. This abstract representation is defined by class
 TranslationResult in this module and can be further processed using the modules
 mal2x.output and mal2x.analysis.
 
-The function translate() is the entry-point for callers. The translation is
-based on parsing the MAL program using regular expressions. During the
-translation, several things must be tracked. These are representated by class
-_TranslationState. The core of the translation are the individual translation
-functions, one for each (family of) MAL operator(s). Each of these functions
+The function translate() is the entry-point for callers. The MAL program is
+parsed into a typed abstract syntax tree by module mal2morphstore.mal once,
+before the translation. During the translation, several things must be
+tracked. These are representated by class _TranslationState. The core of the
+translation are the individual translation functions, one for each (family of)
+MAL operator(s). They are looked up for each MAL instruction in a dispatch
+table by the instruction's MAL module and function. Each of these functions
 changes the translation state according to its input, most importantly it
 appends calls to MorphStore query operators in the form of instances of the
 classes defined in module operators to the translated program.
 
+MAL programs employing MonetDB's mitosis and dataflow optimizers (i.e., plans
+produced with multiple threads) are supported. The partitions of the base
+columns and the merging of the partitions' results by mat.pack are
+translated to dedicated operators, whose partition-parallel execution is
+handled by module mal2morphstore.parallel. The partitions of the base columns
+are obtained before the query program, like the morphs of the base columns.
+
 Known limitations:
 - Since MorphStore does not support sorting the result columns yet, we cannot
   translate MAL's sort operators. Instead, the translated program will output
@@ -47,29 +56,25 @@ have to be done:
 - Add a new translation function for the new MAL operator. This may involve
   adding a new MorphStore operator in module mal2x.operators if the
   new MAL operator cannot be expressed with existing MorphStore operators.
-- Add a regular expression for parsing the MAL operator's parameters.
-- In function translate() add a case calling the new translation function when
-  encountering the new MAL operator in the MAL program.
+- In this translation function, check the kinds of the MAL operator's results
+  and parameters using _TranslationState.checkSignature().
+- Register the new translation function in the dispatch table
+  _translateFunctions.
 """
 
 # TODO Support optionally outputting the original MAL assignments as comments.
 # TODO Support optional status outputs so that during the execution of the
 #      final C++ program the progress can be tracked.
-# TODO The regular expressions in this module often treat the types of the
-#      results or parameters of the MAL operators in a sloppy way. Maybe we
-#      should at least check whether they are oids or actual data.
 # TODO Translate MAL's sort operators as soon as MorphStore supports sorting.
 # TODO Documentation for parameters and return values.
 # TODO Systematically support all variants of the relevant MAL operators.
-# TODO Error messages should mention the line number in the MAL program.
 
 
 import mal2morphstore.analysis as analysis
+import mal2morphstore.mal as mal
 import mal2morphstore.operators as ops
 import mal2morphstore.processingstyles as ps
 
-import re
-
 
 _MAL_INT_TYPES = ["bit", "byte", "sht", "int", "lng", "hge"]
 
@@ -84,24 +89,14 @@ class _TranslationState():
     program and provides some utility functions on that state.
     """
     
-    # The translation works as a state machine, whose states are called steps
-    # here to avoid confusion with the overall translation state. These are the
-    # possible steps. They also represent the common structure (from top to
-    # bottom) of the MAL program as generated by MonetDB (see function
-    # translate() for explanations of these steps):
-    STEP_SKIP_PROLOGUE_COMMENTS    = 1
-    STEP_SKIP_QUERY_FUNCTION_START = 2
-    STEP_PROCESS_ASSIGNMENTS       = 3
-    STEP_PROCESS_OUTPUT            = 4
-    STEP_SKIP_QUERY_FUNCTION_END   = 5
-    STEP_SKIP_EPILOGUE_COMMENTS    = 6
-    
-    def __init__(self):
-        # The current step of the translation.
-        self.step = _TranslationState.STEP_SKIP_PROLOGUE_COMMENTS
+    def __init__(self, versionSelect, style, useBetween):
+        # The options of the translation.
+        self.versionSelect = versionSelect
+        self.style = style
+        self.useBetween = useBetween
         
-        # The current line in the MAL program.
-        self.line = None
+        # The MAL instruction currently being translated.
+        self.instr = None
         
         # The C++ headers required in the translated program.
         self.headers = set()
@@ -135,6 +130,13 @@ class _TranslationState():
         # The MAL variable names of the result columns.
         self.resultCols = []
         
+        # The base columns used only in partitions as pairs of a table name and
+        # a column name. All other base columns are contained in nameMap.
+        self.partitionedBaseCols = set()
+        
+        # The names of the variables of the dataflow blocks in the MAL program.
+        self.dataflowVars = []
+        
     def mapNameIf(self, malVarName):
         """
         Returns the name the given variable from the MAL program has in the
@@ -155,34 +157,39 @@ class _TranslationState():
         else:
             return malVarName
         
-    def _fullmatch(self, text, pattern, role):
+    def error(self, msg):
         """
-        Matches the given regular expression pattern against the given text.
-        Returns the match object or raises an error if the pattern does not
-        match.
+        Raises an error with the given message, mentioning the MAL instruction
+        currently being translated and its line number.
         """
-
-        match = pattern.fullmatch(text)
-        if match is None:
-            raise RuntimeError(
-                "Could not parse the {} string '{}' in line\n{}".format(
-                    role, text, self.line
-                )
-            )
-        return match
-
-    def fullmatchRes(self, text, pattern):
-        return self._fullmatch(text, pattern, "result")
-
-    def fullmatchPar(self, text, pattern):
-        return self._fullmatch(text, pattern, "parameter")
-
-    def error(self):
-        """Raises an error based on the current translation state."""
         
-        raise RuntimeError(
-            "Error in step {} at line \n{}".format(self.step, self.line)
-        )
+        raise RuntimeError("line {}: {} in MAL instruction\n{}".format(
+            self.instr.lineNo, msg, self.instr
+        ))
+        
+    def _checkKinds(self, items, kinds, role):
+        if len(items) != len(kinds):
+            self.error("expected {} {}s, but found {}".format(
+                len(kinds), role, len(items)
+            ))
+        for pos, (item, kind) in enumerate(zip(items, kinds)):
+            if not _hasKind(item, kind):
+                self.error("expected {} as {} {}, but found '{}'".format(
+                    _KIND_DESCRS.get(kind, "'{}'".format(kind)),
+                    role, pos + 1, item
+                ))
+        
+    def checkSignature(self, resKinds, parKinds=None):
+        """
+        Checks whether the results and parameters of the MAL instruction
+        currently being translated have the given kinds (see _hasKind()).
+        Raises an error otherwise. The parameters are not checked if parKinds
+        is None.
+        """
+        
+        self._checkKinds(self.instr.results, resKinds, "result")
+        if parKinds is not None:
+            self._checkKinds(self.instr.params, parKinds, "parameter")
 
 class TranslationResult():
     """
@@ -212,12 +219,17 @@ class TranslationResult():
         # TODO Verify that all table and column names are valid C++ identifiers
         #      such that they can be used as variable names in the C++ code.
         #      Or should such checks be done in module output?
-        baseCols = [x for x in ts.nameMap.values() if isinstance(x, tuple)]
+        baseCols = [x for x in ts.nameMap.values() if isinstance(x, tuple)] + \
+            list(ts.partitionedBaseCols)
         for tblName, colName in baseCols:
             if tblName not in self.colNamesByTblName:
                 self.colNamesByTblName[tblName] = set()
             self.colNamesByTblName[tblName].add(colName)
         
+        # A list of partition-operators consuming base columns. These need to
+        # be executed before the actual query program in self.prog.
+        self.basePartitions = []
+        
         # A list of morph-operators consuming base columns. These need to be
         # executed before the actual query program in self.prog.
         self.baseMorphs = []
@@ -232,67 +244,96 @@ class TranslationResult():
 # *****************************************************************************
 # - The naming convention for these functions is "_translate" followed by the
 #   MAL module name followed by the MAL function name (camel case).
-# - Most of these translation functions are preceeded by a regular expression
-#   pattern for parsing their parameters and some additional data structures,
-#   if applicable.
+# - All of these translation functions take the translation state and the MAL
+#   instruction (an instance of mal.Instruction) as their parameters.
+# - Some of these translation functions are preceeded by some additional data
+#   structures, if applicable.
 
 # TODO Maybe all these translation function should rather be methods of class
 #      _TranslationState, because they also access and modify the state.
 
-# Regular expression patterns for parsing the left-hand sides of MAL
-# assignments, i.e., the result variables of the MAL operators.
-_pResScalar = re.compile(r"(X_\d+):(?:.+?)")
-_str1Res = r"([XC]_\d+):bat\[:(?:.+?)\]"
-_pRes1 = re.compile(_str1Res)
-_pRes2 = re.compile(r"\({}, {}\)".format(_str1Res, _str1Res))
-_pRes3 = re.compile(r"\({}, {}, {}\)".format(_str1Res, _str1Res, _str1Res))
-    
-_pParAggrSubsum = re.compile(
-    r"(X_\d+):bat\[:(?:.+?)\], (X_\d+):bat\[:oid\], (C_\d+):bat\[:oid\], true:bit, true:bit"
-)
-def _translateAggrSubsum(ts, resStr, parStr):
+# The kinds of results and parameters of MAL instructions expected by the
+# translation functions. Any other kind is the textual representation of an
+# expected literal, e.g., "true:bit".
+_KIND_VAR  = "var"  # a variable of any type
+_KIND_BAT  = "bat"  # a BAT variable of any type
+_KIND_OIDS = "oids" # a BAT variable of type bat[:oid]
+_KIND_UINT = "uint" # an unsigned integer literal
+_KIND_STR  = "str"  # a string literal
+_KIND_DESCRS = {
+    _KIND_VAR : "a variable",
+    _KIND_BAT : "a BAT variable",
+    _KIND_OIDS: "a BAT variable of oids",
+    _KIND_UINT: "an unsigned integer literal",
+    _KIND_STR : "a string literal",
+}
+
+def _hasKind(item, kind):
+    """
+    Returns whether the given result or parameter of a MAL instruction has the
+    given kind.
+    """
+    
+    if kind == _KIND_VAR:
+        return isinstance(item, mal.Var)
+    elif kind == _KIND_BAT:
+        return isinstance(item, mal.Var) and item.type.isBat
+    elif kind == _KIND_OIDS:
+        return isinstance(item, mal.Var) and \
+            item.type == mal.Type("oid", True)
+    elif kind == _KIND_UINT:
+        return isinstance(item, mal.Literal) and not item.isStr and \
+            item.value.isdigit()
+    elif kind == _KIND_STR:
+        return isinstance(item, mal.Literal) and item.isStr
+    else:
+        return isinstance(item, mal.Literal) and str(item) == kind
+
+def _translateAggrSubsum(ts, instr):
     """Translation function for MAL's "aggr.subsum"."""
     
-    mRes = ts.fullmatchRes(resStr, _pRes1)
-    mPar = ts.fullmatchPar(parStr, _pParAggrSubsum)
+    ts.checkSignature(
+        [_KIND_BAT],
+        [_KIND_BAT, _KIND_OIDS, _KIND_OIDS, "true:bit", "true:bit"]
+    )
+    res = instr.results
+    par = instr.params
     ts.prog.append(ops.SumGrBased(
-        outDataCol = mRes.group(1),
-        inGrCol    = ts.mapNameIf(mPar.group(2)),
-        inDataCol  = ts.mapNameIf(mPar.group(1)),
-        inExtCol   = ts.mapNameIf(mPar.group(3))
+        outDataCol = res[0].name,
+        inGrCol    = ts.mapNameIf(par[1].name),
+        inDataCol  = ts.mapNameIf(par[0].name),
+        inExtCol   = ts.mapNameIf(par[2].name)
     ))
     
-_pParAggrSum = re.compile(r"(X_\d+):bat\[:(?:.+?)\]")
-def _translateAggrSum(ts, resStr, parStr):
+def _translateAggrSum(ts, instr):
     """Translation function for MAL's "aggr.sum"."""
     
-    mRes = ts.fullmatchRes(resStr, _pResScalar)
-    mPar = ts.fullmatchPar(parStr, _pParAggrSum)
+    ts.checkSignature([_KIND_VAR], [_KIND_BAT])
     ts.prog.append(ops.SumWholeCol(
-        outDataCol = mRes.group(1),
-        inDataCol  = ts.mapNameIf(mPar.group(1))
+        outDataCol = instr.results[0].name,
+        inDataCol  = ts.mapNameIf(instr.params[0].name)
     ))
     
-_pParAlgebraJoin = re.compile(
-    r"(X_\d+):bat\[:(?:.+?)\], (X_\d+):bat\[:(?:.+?)\], nil:BAT, nil:BAT, false:bit, nil:lng"
-)
-def _translateAlgebraJoin(ts, resStr, parStr):
+def _translateAlgebraJoin(ts, instr):
     """Translation function for MAL's "algebra.join"."""
     
-    mRes = ts.fullmatchRes(resStr, _pRes2)
-    mPar = ts.fullmatchPar(parStr, _pParAlgebraJoin)
+    ts.checkSignature(
+        [_KIND_BAT, _KIND_BAT],
+        [
+            _KIND_BAT, _KIND_BAT,
+            "nil:BAT", "nil:BAT", "false:bit", "nil:lng"
+        ]
+    )
+    res = instr.results
+    par = instr.params
     ts.prog.append(ops.Join(
-        outPosLCol = mRes.group(1),
-        outPosRCol = mRes.group(2),
-        inDataLCol = ts.mapNameIf(mPar.group(1)),
-        inDataRCol = ts.mapNameIf(mPar.group(2))
+        outPosLCol = res[0].name,
+        outPosRCol = res[1].name,
+        inDataLCol = ts.mapNameIf(par[0].name),
+        inDataRCol = ts.mapNameIf(par[1].name)
     ))
             
-_pParAlgebraProjectionpath = re.compile(
-    r"((?:[XC]_\d+:bat\[:oid\], )+)(X_\d+):bat\[:(?:.+?)\]"
-)
-_pParAlgebraProjectionpathInner = re.compile(r"([XC]_\d+):bat\[:oid\], ")
-def _translateAlgebraProjectionpath(ts, resStr, parStr):
+def _translateAlgebraProjectionpath(ts, instr):
     """
     Translation function for MAL's "algebra.projection" and
     "algebra.projectionpath".
@@ -306,27 +347,25 @@ def _translateAlgebraProjectionpath(ts, resStr, parStr):
     multiple positions lists shall be applied.
     """
     
-    mRes = ts.fullmatchRes(resStr, _pRes1)
-    mPar = ts.fullmatchPar(parStr, _pParAlgebraProjectionpath)
-    outDataCol   = mRes.group(1)
-    inDataCol    = ts.mapNameIf(mPar.group(2))
+    ts.checkSignature(
+        [_KIND_BAT],
+        [_KIND_OIDS] * max(len(instr.params) - 1, 1) + [_KIND_BAT]
+    )
+    outDataCol   = instr.results[0].name
+    inDataCol    = ts.mapNameIf(instr.params[-1].name)
     inPosCols    = []
-    inPosColsStr = mPar.group(1)
     
     # Find out the individual positions columns.
-    mInner = _pParAlgebraProjectionpathInner.match(inPosColsStr)
-    while mInner is not None:
-        inPosCol = mInner.group(1)
+    for par in instr.params[:-1]:
+        inPosCol = par.name
         if inPosCol not in ts.fullOidBats and inPosCol not in ts.sortResults:
             inPosCols.append(ts.mapNameIf(inPosCol))
-        inPosColsStr = inPosColsStr[mInner.end():]
-        mInner = _pParAlgebraProjectionpathInner.match(inPosColsStr)
         
     pathLen = len(inPosCols)
     if pathLen == 0:
         # This projection is a no-op. No action is required in MorphStore C++,
         # we simply need to keep track of the names.
-        ts.nameMap[mRes.group(1)] = inDataCol
+        ts.nameMap[outDataCol] = inDataCol
     elif pathLen == 1:
         # Exactly one projection must be done in MorphStore.
         ts.prog.append(ops.Project(
@@ -351,10 +390,7 @@ def _translateAlgebraProjectionpath(ts, resStr, parStr):
                 inPosCol = inPosCol
             ))
     
-_pParAlgebraSelect = re.compile(
-    r"([XC]_\d+):bat\[:(?:.+?)\], (?:(C_\d+):bat\[:oid\], )?(\d+):(?:.+?), (\d+):(?:.+?), true:bit, true:bit, false:bit"
-)
-def _translateAlgebraSelect(ts, resStr, parStr, vectorSelect, style, useBetween):
+def _translateAlgebraSelect(ts, instr):
     """
     Translation function for MAL's "algebra.select".
     
@@ -371,19 +407,24 @@ def _translateAlgebraSelect(ts, resStr, parStr, vectorSelect, style, useBetween)
     # TODO Currently we support only >= and <=, we should also support > and <
     #      (see the second to last and third to last parameters).
     
-    mRes = ts.fullmatchRes(resStr, _pRes1)
-    mPar = ts.fullmatchPar(parStr, _pParAlgebraSelect)
-    outPosCol = mRes.group(1)
-    inDataCol = ts.mapNameIf(mPar.group(1))
-    inCandCol = mPar.group(2)
-    valLo = mPar.group(3)
-    valHi = mPar.group(4)
+    hasCands = len(instr.params) == 7
+    ts.checkSignature(
+        [_KIND_BAT],
+        [_KIND_BAT] + ([_KIND_OIDS] if hasCands else []) + [
+            _KIND_UINT, _KIND_UINT, "true:bit", "true:bit", "false:bit"
+        ]
+    )
+    outPosCol = instr.results[0].name
+    inDataCol = ts.mapNameIf(instr.params[0].name)
+    inCandCol = instr.params[1].name if hasCands else None
+    valLo = instr.params[-5].value
+    valHi = instr.params[-4].value
     
     hasUsefulCands = \
         (inCandCol is not None) and (inCandCol not in ts.fullOidBats)
     
     ts.headers.add("functional")
-    if useBetween:
+    if ts.useBetween:
         # Select with between lower and upper bound.
         outPosColInterm = "{}_0".format(outPosCol)
         ts.prog.append(ops.Between(
@@ -397,7 +438,7 @@ def _translateAlgebraSelect(ts, resStr, parStr, vectorSelect, style, useBetween)
     else:
         # Select for the lower bound.
         outPosColLo = "{}_lo".format(outPosCol)
-        if (vectorSelect == 1):
+        if (ts.versionSelect == 1):
             ts.prog.append(ops.Select(
                 outPosCol = outPosColLo,
                 inDataCol = inDataCol,
@@ -413,7 +454,7 @@ def _translateAlgebraSelect(ts, resStr, parStr, vectorSelect, style, useBetween)
             ))
         # Select for the upper bound.
         outPosColHi = "{}_hi".format(outPosCol)
-        if (vectorSelect == 1):
+        if (ts.versionSelect == 1):
             ts.prog.append(ops.Select(
                 outPosCol = outPosColHi,
                 inDataCol = inDataCol,
@@ -442,7 +483,7 @@ def _translateAlgebraSelect(ts, resStr, parStr, vectorSelect, style, useBetween)
             inPosRCol = inCandCol
         ))
     
-def _translateAlgebraSort(ts, resStr):
+def _translateAlgebraSort(ts, instr):
     """
     Translation function for MAL's "algebra.sort".
     
@@ -455,10 +496,9 @@ def _translateAlgebraSort(ts, resStr):
     # TODO Can it happen that one of the results is directly output, without
     #      going into a projection?
 
-    m3Res = ts.fullmatchRes(resStr, _pRes3)
-    ts.sortResults.append(m3Res.group(1))
-    ts.sortResults.append(m3Res.group(2))
-    ts.sortResults.append(m3Res.group(3))
+    ts.checkSignature([_KIND_BAT, _KIND_BAT, _KIND_BAT])
+    for res in instr.results:
+        ts.sortResults.append(res.name)
     
 _cmpOpMap = {
     "<" : "std::less",
@@ -474,17 +514,7 @@ _cmpOpMapVec = {
     ">=": "greaterequal",
     ">" : "equal",
 }  
-_pParThetaselect = re.compile(
-    r'(X_\d+):bat\[:(?:.+?)\], (?:(C_\d+):bat\[:oid\], )?(\d+):(?:.+?), "({})":str'.format(
-        "|".join(_cmpOpMap)
-    )
-)
-_pParThetaselectVec = re.compile(
-    r'(X_\d+):bat\[:(?:.+?)\], (?:(C_\d+):bat\[:oid\], )?(\d+):(?:.+?), "({})":str'.format(
-        "|".join(_cmpOpMapVec)
-    )
-)
-def _translateAlgebraThetaselect(ts, resStr, parStr, vectorSelect, style):
+def _translateAlgebraThetaselect(ts, instr):
     """
     Translation function for MAL's "algebra.thetaselect".
     
@@ -492,35 +522,32 @@ def _translateAlgebraThetaselect(ts, resStr, parStr, vectorSelect, style):
     we have to insert an additional intersect operator call in MorphStore.
     """
     
-    mRes = ts.fullmatchRes(resStr, _pRes1)
-    if (vectorSelect==1):
-        mPar = ts.fullmatchPar(parStr, _pParThetaselect)
-    else:
-        mPar = ts.fullmatchPar(parStr, _pParThetaselectVec)
-    outPosCol = mRes.group(1)
-    inCandCol = ts.mapNameIf(mPar.group(2))
+    hasCands = len(instr.params) == 4
+    ts.checkSignature(
+        [_KIND_BAT],
+        [_KIND_BAT] + ([_KIND_OIDS] if hasCands else []) + [
+            _KIND_UINT, _KIND_STR
+        ]
+    )
+    cmpOpMap = _cmpOpMap if ts.versionSelect == 1 else _cmpOpMapVec
+    opStr = instr.params[-1].value
+    if opStr not in cmpOpMap:
+        ts.error("unsupported comparison operator '{}'".format(opStr))
+    outPosCol = instr.results[0].name
+    inCandCol = ts.mapNameIf(instr.params[1].name) if hasCands else None
     
     hasUsefulCands = \
         (inCandCol is not None) and (inCandCol not in ts.fullOidBats)
         
     ts.headers.add("functional")
     # The actual selection.
-    if (vectorSelect==1):
-        outPosColInterm = "{}_0".format(outPosCol)
-        ts.prog.append(ops.Select(
-            outPosCol = outPosColInterm if hasUsefulCands else outPosCol,
-            inDataCol = ts.mapNameIf(mPar.group(1)),
-            op        = _cmpOpMap[mPar.group(4)],
-            val       = mPar.group(3)
-        ))
-    else:
-        outPosColInterm = "{}_0".format(outPosCol)
-        ts.prog.append(ops.Select(
-            outPosCol = outPosColInterm if hasUsefulCands else outPosCol,
-            inDataCol = ts.mapNameIf(mPar.group(1)),
-            op        = _cmpOpMapVec[mPar.group(4)],
-            val       = mPar.group(3)
-        ))
+    outPosColInterm = "{}_0".format(outPosCol)
+    ts.prog.append(ops.Select(
+        outPosCol = outPosColInterm if hasUsefulCands else outPosCol,
+        inDataCol = ts.mapNameIf(instr.params[0].name),
+        op        = cmpOpMap[opStr],
+        val       = instr.params[-2].value
+    ))
     # Intersection with candidate list, if required.
     if hasUsefulCands:
         ts.prog.append(ops.Intersect(
@@ -529,22 +556,31 @@ def _translateAlgebraThetaselect(ts, resStr, parStr, vectorSelect, style):
             inPosRCol = inCandCol
         ))
     
-_pParMerge = re.compile(r"(C_\d+):bat\[:oid\], (C_\d+):bat\[:oid\]")
-def _translateBatMergecand(ts, resStr, parStr):
+def _appendPartition(ts, outDataCol, inDataCol, partIdx, partCount):
+    """
+    Appends a partition-operator to the translated program, if the given
+    partition is valid.
+    """
+    
+    if partIdx >= partCount:
+        ts.error("invalid partition {} of {}".format(partIdx, partCount))
+    ts.prog.append(ops.Partition(
+        outDataCol = outDataCol,
+        inDataCol  = inDataCol,
+        partIdx    = partIdx,
+        partCount  = partCount
+    ))
+    
+def _translateBatMergecand(ts, instr):
     """Translation function for MAL's "bat.mergecand"."""
     
-    mRes = ts.fullmatchRes(resStr, _pRes1)
-    mPar = ts.fullmatchPar(parStr, _pParMerge)
+    ts.checkSignature([_KIND_BAT], [_KIND_OIDS, _KIND_OIDS])
     ts.prog.append(ops.Merge(
-        outPosCol = mRes.group(1),
-        inPosLCol = ts.mapNameIf(mPar.group(1)),
-        inPosRCol = ts.mapNameIf(mPar.group(2))
+        outPosCol = instr.results[0].name,
+        inPosLCol = ts.mapNameIf(instr.params[0].name),
+        inPosRCol = ts.mapNameIf(instr.params[1].name)
     ))
     
-_pParBatCalcUnary = re.compile(r"(X_\d+):bat\[:(?:.+?)\]")
-_pParBatCalcBinary = re.compile(
-    r"(X_\d+):bat\[:(?:.+?)\], (X_\d+):bat\[:(?:.+?)\]"
-)
 _arithmOpMap = {
     # TODO Support more arithmetic operators.
     # TODO Support comparison operators here as well. (Required if two columns
@@ -561,275 +597,354 @@ _arithmOpMapVec = {
     "-": "sub",
     "*": "mul",
 }
-def _translateBatcalc(ts, resStr, funStr, parStr,vectorSelect, style):
+def _translateBatPartition(ts, instr):
+    """
+    Translation function for MAL's "bat.partition".
+    
+    This MAL operator returns one of the partitions of an intermediate result
+    (see module mal2morphstore.parallel).
+    """
+    
+    ts.checkSignature([_KIND_BAT], [_KIND_BAT, _KIND_UINT, _KIND_UINT])
+    _appendPartition(
+        ts,
+        outDataCol = instr.results[0].name,
+        inDataCol  = ts.mapNameIf(instr.params[0].name),
+        partIdx    = int(instr.params[2].value),
+        partCount  = int(instr.params[1].value)
+    )
+    
+def _translateBatcalc(ts, instr):
     """Translation function for all MAL functions in MAL's "batcalc" module."""
     
-    mRes = ts.fullmatchRes(resStr, _pRes1)
-    if funStr in _MAL_INT_TYPES:
+    if instr.function in _MAL_INT_TYPES:
         # Conversion/cast MAL statement.
-        mPar = ts.fullmatchPar(parStr, _pParBatCalcUnary)
-        ts.nameMap[mRes.group(1)] = ts.mapNameIf(mPar.group(1))
+        ts.checkSignature([_KIND_BAT], [_KIND_BAT])
+        ts.nameMap[instr.results[0].name] = ts.mapNameIf(instr.params[0].name)
     else:
-        mPar = ts.fullmatchPar(parStr, _pParBatCalcBinary)
-        ts.headers.add("functional")
-        if (vectorSelect == 1):
-            ts.prog.append(ops.CalcBinary(
-            outDataCol = mRes.group(1),
-            op         = _arithmOpMap[funStr],
-            inDataLCol = ts.mapNameIf(mPar.group(1)),
-            inDataRCol = ts.mapNameIf(mPar.group(2))
-            ))
-        else:
-            ts.prog.append(ops.CalcBinary(
-            outDataCol = mRes.group(1),
-            op         = _arithmOpMapVec[funStr],
-            inDataLCol = ts.mapNameIf(mPar.group(1)),
-            inDataRCol = ts.mapNameIf(mPar.group(2))
+        ts.checkSignature([_KIND_BAT], [_KIND_BAT, _KIND_BAT])
+        arithmOpMap = \
+            _arithmOpMap if ts.versionSelect == 1 else _arithmOpMapVec
+        if instr.function not in arithmOpMap:
+            ts.error("unsupported arithmetic operator '{}'".format(
+                instr.function
             ))
-        
+        ts.headers.add("functional")
+        ts.prog.append(ops.CalcBinary(
+            outDataCol = instr.results[0].name,
+            op         = arithmOpMap[instr.function],
+            inDataLCol = ts.mapNameIf(instr.params[0].name),
+            inDataRCol = ts.mapNameIf(instr.params[1].name)
+        ))
     
-_pParGroupGroup = re.compile(r"(X_\d+):bat\[:(?:.+?)\]")
-def _translateGroupGroup(ts, resStr, parStr):
+def _translateGroupGroup(ts, instr):
     """Translation function for MAL's unary grouping "group.group"."""
     
-    mRes = ts.fullmatchRes(resStr, _pRes3)
-    mPar = ts.fullmatchPar(parStr, _pParGroupGroup)
+    ts.checkSignature([_KIND_BAT, _KIND_BAT, _KIND_BAT], [_KIND_BAT])
     ts.prog.append(ops.GroupUnary(
-        outGrCol  = mRes.group(1),
-        outExtCol = mRes.group(2),
-        inDataCol = ts.mapNameIf(mPar.group(1))
+        outGrCol  = instr.results[0].name,
+        outExtCol = instr.results[1].name,
+        inDataCol = ts.mapNameIf(instr.params[0].name)
     ))
     
-_pParGroupSubgroup = re.compile(
-    r"(X_\d+):bat\[:(?:.+?), (X_\d+):bat\[:(?:.+?)\]"
-)
-def _translateGroupSubgroup(ts, resStr, parStr):
+def _translateGroupSubgroup(ts, instr):
     """Translation function for MAL's binary grouping "group.subgroupdone"."""
     
-    mRes = ts.fullmatchRes(resStr, _pRes3)
-    mPar = ts.fullmatchPar(parStr, _pParGroupSubgroup)
+    ts.checkSignature([_KIND_BAT, _KIND_BAT, _KIND_BAT], [_KIND_BAT, _KIND_BAT])
     ts.prog.append(ops.GroupBinary(
-        outGrCol  = mRes.group(1),
-        outExtCol = mRes.group(2),
-        inGrCol   = ts.mapNameIf(mPar.group(2)),
-        inDataCol = ts.mapNameIf(mPar.group(1))
+        outGrCol  = instr.results[0].name,
+        outExtCol = instr.results[1].name,
+        inGrCol   = ts.mapNameIf(instr.params[1].name),
+        inDataCol = ts.mapNameIf(instr.params[0].name)
     ))
 
-_pParSqlBind = re.compile(
-    r'X_\d+:int, ".+?":str, "(.+?)":str, "(.+?)":str, 0:int'
-)
-def _translateSqlBind(ts, resStr, parStr):
+def _translateLanguageDataflow(ts, instr):
+    """
+    Translation function for MAL's "language.dataflow".
+    
+    This MAL operator opens a block of instructions MonetDB may execute in
+    parallel. No action is required in MorphStore, since the parallelism is
+    derived from the partitions (see module mal2morphstore.parallel). We only
+    need to remember the block's variable to accept its exit-statement.
+    """
+    
+    ts.checkSignature([_KIND_VAR], [])
+    if instr.flow != "barrier":
+        ts.error("expected a barrier")
+    ts.dataflowVars.append(instr.results[0].name)
+    
+def _translateMatPack(ts, instr):
+    """
+    Translation function for MAL's "mat.pack".
+    
+    This MAL operator merges the results of the partitions. We translate it
+    to a balanced tree of binary concat-operators. Positions lists cannot be
+    merged, since the positions within a partition are relative to that
+    partition.
+    """
+    
+    ts.checkSignature([_KIND_BAT])
+    if not instr.params:
+        ts.error("expected at least one parameter")
+    for par in instr.params:
+        if not isinstance(par, mal.Var):
+            ts.error("expected a variable, but found '{}'".format(par))
+        if _hasKind(par, _KIND_OIDS):
+            ts.error("merging positions lists of partitions is not supported")
+    outDataCol = instr.results[0].name
+    inDataCols = [ts.mapNameIf(par.name) for par in instr.params]
+    if len(inDataCols) == 1:
+        ts.nameMap[outDataCol] = inDataCols[0]
+        return
+    # Concatenate adjacent pairs of columns until only one is left. This
+    # preserves the order of the partitions.
+    countInterm = 0
+    while len(inDataCols) > 1:
+        newInDataCols = []
+        for idx in range(0, len(inDataCols) - 1, 2):
+            if len(inDataCols) == 2:
+                newOutDataCol = outDataCol
+            else:
+                newOutDataCol = "{}_{}".format(outDataCol, countInterm)
+                countInterm += 1
+            ts.prog.append(ops.Concat(
+                outDataCol = newOutDataCol,
+                inDataLCol = inDataCols[idx],
+                inDataRCol = inDataCols[idx + 1]
+            ))
+            newInDataCols.append(newOutDataCol)
+        if len(inDataCols) % 2:
+            newInDataCols.append(inDataCols[-1])
+        inDataCols = newInDataCols
+    
+def _translateMatPackIncrement(ts, instr):
+    """
+    Translation function for MAL's "mat.packIncrement".
+    
+    This MAL operator merges the results of the partitions incrementally. The
+    first call gets the first partition's result and the number of
+    partitions, each further call gets the result of the previous call and
+    the next partition's result.
+    """
+    
+    ts.checkSignature([_KIND_BAT], [_KIND_BAT, _KIND_VAR])
+    if _hasKind(instr.params[0], _KIND_OIDS):
+        ts.error("merging positions lists of partitions is not supported")
+    if instr.params[1].type.isBat:
+        ts.prog.append(ops.Concat(
+            outDataCol = instr.results[0].name,
+            inDataLCol = ts.mapNameIf(instr.params[0].name),
+            inDataRCol = ts.mapNameIf(instr.params[1].name)
+        ))
+    else:
+        ts.nameMap[instr.results[0].name] = ts.mapNameIf(instr.params[0].name)
+    
+def _translateSqlBind(ts, instr):
     """
     Translation function for MAL's "sql.bind".
     
-    No action is required in MorphStore. We only need to remember that the
-    output variable of this MAL operator denotes a base column.
+    Usually, no action is required in MorphStore. We only need to remember that
+    the output variable of this MAL operator denotes a base column. If this
+    MAL operator binds only a partition of the base column (mitosis), then we
+    need to obtain that partition.
     """
     
-    mRes = ts.fullmatchRes(resStr, _pRes1)
-    mPar = ts.fullmatchPar(parStr, _pParSqlBind)
-    tabName = mPar.group(1)
-    colName = mPar.group(2)
-    ts.nameMap[mRes.group(1)] = (tabName, colName)
+    isPartitioned = len(instr.params) == 7
+    ts.checkSignature(
+        [_KIND_BAT],
+        [_KIND_VAR, _KIND_STR, _KIND_STR, _KIND_STR, "0:int"] + (
+            [_KIND_UINT, _KIND_UINT] if isPartitioned else []
+        )
+    )
+    tabName = instr.params[2].value
+    colName = instr.params[3].value
+    if isPartitioned:
+        ts.partitionedBaseCols.add((tabName, colName))
+        _appendPartition(
+            ts,
+            outDataCol = instr.results[0].name,
+            inDataCol  = "{}.{}".format(tabName, colName),
+            partIdx    = int(instr.params[5].value),
+            partCount  = int(instr.params[6].value)
+        )
+    else:
+        ts.nameMap[instr.results[0].name] = (tabName, colName)
+    
+def _translateSqlResultSet(ts, instr):
+    """
+    Translation function for MAL's "sql.resultSet".
     
-def _translateSqlTid(ts, resStr):
+    This MAL operator outputs the result columns. We need to know which these
+    are. Its first five parameters describe the result columns and are
+    irrelevant for us. They might be followed by an integer literal.
+    """
+    
+    ts.checkSignature([])
+    inDataCols = instr.params[5:]
+    if inDataCols and isinstance(inDataCols[0], mal.Literal) and \
+            inDataCols[0].type == mal.Type("int"):
+        inDataCols = inDataCols[1:]
+    if not inDataCols:
+        ts.error("expected at least one result column")
+    for inDataCol in inDataCols:
+        if not isinstance(inDataCol, mal.Var) or not (
+            inDataCol.type.isBat or inDataCol.type.name in _MAL_INT_TYPES
+        ):
+            ts.error("unsupported result column '{}'".format(inDataCol))
+        ts.resultCols.append(ts.mapNameIf(inDataCol.name))
+    
+def _translateSqlTid(ts, instr):
     """
     Translation function for MAL's "sql.tid".
     
     No action is required in MorphStore. We only need to remember that the
     output variable of this MAL operator is a full list of OIds for the
     respective table. We ignore such full lists if they are used in projections
-    or as candidate lists.
+    or as candidate lists. This also holds for the full lists of the partitions
+    of a table, since the positions within a partition are relative to that
+    partition.
     """
     
-    mRes = ts.fullmatchRes(resStr, _pRes1)
-    ts.fullOidBats.append(mRes.group(1))
+    ts.checkSignature([_KIND_BAT])
+    ts.fullOidBats.append(instr.results[0].name)
+
+def _translateNoOp(ts, instr):
+    """
+    Translation function for all MAL operators which do not require any action
+    in MorphStore.
+    """
+    
+    pass
+
+# The dispatch table of the translation functions. Maps a pair of a MAL module
+# and a MAL function to the translation function for it. A MAL function of
+# None means that the translation function is responsible for all functions
+# in the respective MAL module.
+# Sorted in alphabetical order w.r.t. the key.
+_translateFunctions = {
+    ("aggr"    , "subsum"        ): _translateAggrSubsum,
+    ("aggr"    , "sum"           ): _translateAggrSum,
+    ("algebra" , "join"          ): _translateAlgebraJoin,
+    ("algebra" , "projection"    ): _translateAlgebraProjectionpath,
+    ("algebra" , "projectionpath"): _translateAlgebraProjectionpath,
+    ("algebra" , "select"        ): _translateAlgebraSelect,
+    ("algebra" , "sort"          ): _translateAlgebraSort,
+    ("algebra" , "thetaselect"   ): _translateAlgebraThetaselect,
+    ("bat"     , "append"        ): _translateNoOp,
+    ("bat"     , "mergecand"     ): _translateBatMergecand,
+    ("bat"     , "new"           ): _translateNoOp,
+    ("bat"     , "partition"     ): _translateBatPartition,
+    ("batcalc" , None            ): _translateBatcalc,
+    ("group"   , "group"         ): _translateGroupGroup,
+    ("group"   , "subgroup"      ): _translateGroupSubgroup,
+    ("group"   , "subgroupdone"  ): _translateGroupSubgroup,
+    ("language", "dataflow"      ): _translateLanguageDataflow,
+    ("language", "pass"          ): _translateNoOp,
+    ("mat"     , "pack"          ): _translateMatPack,
+    ("mat"     , "packIncrement" ): _translateMatPackIncrement,
+    ("querylog", "define"        ): _translateNoOp,
+    ("sql"     , "bind"          ): _translateSqlBind,
+    ("sql"     , "mvc"           ): _translateNoOp,
+    ("sql"     , "resultSet"     ): _translateSqlResultSet,
+    ("sql"     , "tid"           ): _translateSqlTid,
+}
 
 
 # *****************************************************************************
 # Program translation
 # *****************************************************************************
 
-_pAssignment = re.compile(r"(.+?) := (.+?)\.(.+?)\((.*?)\);")
-_pResultSet = re.compile(
-    r"sql.resultSet\(.+?:.+?, .+?:.+?, .+?:.+?, .+?:.+?, .+?:.+?(?:, \d+:int)?((?:, X_\d+:.+?)+)\);"
-)
-_pResultSetInner = re.compile(r", (X_\d+):(?:{}|bat\[.+?\])".format(
-    "|".join(_MAL_INT_TYPES))
-)
-
 def translate(
-        inMalFilePath, versionSelect, style, useBetween, useIntersectKAry
+        inMalFilePath, versionSelect, style, useBetween, useIntersectKAry,
+        useMergeJoin=False, statDirPath=None
 ):
     """
     Translates the MAL program in the specified file and returns an abstract
     representation of the translated C++ program as an instance of
     TranslationResult.
+    
+    MAL's equi-joins are translated to the join-operator best suited for the
+    uniqueness of their inputs. If useMergeJoin is True, then joins whose
+    inputs are both known to be sorted are translated to sort-merge-joins
+    instead.
+    
+    The uniqueness and sortedness of the base columns, on which the choice of
+    the join-operators depends, is read from the statistics in the directory
+    statDirPath, if specified (see module mal2morphstore.analysis).
     """
     
     with open(inMalFilePath, "r") as inFile:
-        # Initialize a new translation state.
-        ts = _TranslationState()
+        prog = mal.parse(inFile)
+    
+    # Initialize a new translation state.
+    ts = _TranslationState(versionSelect, style, useBetween)
+    
+    # The MAL query function consists of assignments constituting the core MAL
+    # program of the query, which we translate into MorphStore query
+    # operators, and ends with the output of the result columns.
+    for instr in prog.statements:
+        ts.instr = instr
         
-        # Read the input MAL file line by line. The translation works like a
-        # state machine, whose states are called steps here. See the STEP_...
-        # fields in class _TranslationState.
-        for line in inFile:
-            # Get rid of leading and trailing whitespace.
-            line = line.strip();
-            ts.line = line
-            
-            # In some of the steps, exactly one line (matching a certain
-            # format) is expected.
-            # - If this line is found, the step changes and processing
-            #   continues with the next line.
-            # - If this line is not found, an error is raised.
-            # In some of the steps, an a-priori unknown number of lines (each
-            # matching a certain common format) can be processed.
-            # - If the current line matches this format, it is consumed and the
-            #   processing continues with the next line.
-            # - Otherwise, the step is changed and the current line is tried
-            #   according to the rules of the new step.
-
-            # A MAL program starts with some comments beginning with "%". These
-            # are irrelevant for us and must be skipped.
-            # This step consumes an a-priori unknown number of lines.
-            if ts.step == _TranslationState.STEP_SKIP_PROLOGUE_COMMENTS:
-                if line[0] != "%":
-                    ts.step = _TranslationState.STEP_SKIP_QUERY_FUNCTION_START
-
-            # After that, the MAL query function is formally defined. This has
-            # no relevant information for us, therefore we skip it.
-            # This step expects exactly one line.
-            if ts.step == _TranslationState.STEP_SKIP_QUERY_FUNCTION_START:
-                if line.startswith("function user."):
-                    ts.step = _TranslationState.STEP_PROCESS_ASSIGNMENTS
-                    continue
-                else:
-                    _error(ts, line)
-
-            # Within the MAL query function, there are assignments constituting
-            # the core MAL program of the query. We translate these into
-            # MorphStore query operators.
-            # This step consumes an a-priori unknown number of lines.
-            if ts.step == _TranslationState.STEP_PROCESS_ASSIGNMENTS:
-                mAssignment = _pAssignment.fullmatch(line)
-                if mAssignment is None:
-                    ts.step = _TranslationState.STEP_PROCESS_OUTPUT
-                else:
-                    resStr = mAssignment.group(1) # the result list
-                    modStr = mAssignment.group(2) # the MAL module
-                    funStr = mAssignment.group(3) # the MAL function
-                    parStr = mAssignment.group(4) # the parameter list
-                    
-                    progLenBefore = len(ts.prog)
-
-                    # Sorted in alphabetical order w.r.t. (modStr, funStr)
-                    if (modStr, funStr) == ("aggr", "subsum"):
-                        _translateAggrSubsum(ts, resStr, parStr)
-                    elif (modStr, funStr) == ("aggr", "sum"):
-                        _translateAggrSum(ts, resStr, parStr)
-                    elif (modStr, funStr) == ("algebra", "join"):
-                        _translateAlgebraJoin(ts, resStr, parStr)
-                    elif modStr == "algebra" and funStr in [
-                        "projection",
-                        "projectionpath"
-                    ]:
-                        _translateAlgebraProjectionpath(ts, resStr, parStr)
-                    elif (modStr, funStr) == ("algebra", "select"):
-                        _translateAlgebraSelect(ts, resStr, parStr, versionSelect, style, useBetween)
-                    elif (modStr, funStr) == ("algebra", "sort"):
-                        _translateAlgebraSort(ts, resStr)
-                    elif (modStr, funStr) == ("algebra", "thetaselect"):
-                        _translateAlgebraThetaselect(ts, resStr, parStr, versionSelect, style)
-                    elif (modStr, funStr) == ("bat", "append"):
-                        pass
-                    elif (modStr, funStr) == ("bat", "mergecand"):
-                        _translateBatMergecand(ts, resStr, parStr)
-                    elif (modStr, funStr) == ("bat", "new"):
-                        pass
-                    elif modStr == "batcalc":
-                        _translateBatcalc(ts, resStr, funStr, parStr, versionSelect, style)
-                    elif (modStr, funStr) == ("group", "group"):
-                        _translateGroupGroup(ts, resStr, parStr)
-                    elif modStr == "group" and funStr in [
-                        "subgroup",
-                        "subgroupdone"
-                    ]:
-                        _translateGroupSubgroup(ts, resStr, parStr)
-                    elif (modStr, funStr) == ("querylog", "define"):
-                        pass
-                    elif (modStr, funStr) == ("sql", "bind"):
-                        _translateSqlBind(ts, resStr, parStr)
-                    elif (modStr, funStr) == ("sql", "mvc"):
-                        pass
-                    elif (modStr, funStr) == ("sql", "tid"):
-                        _translateSqlTid(ts, resStr)
-                    else:
-                        raise RuntimeError(
-                            "unknown MAL function: '{}.{}' in line\n{}".format(
-                                modStr,
-                                funStr,
-                                line
-                            )
-                        )
-
-                    if len(ts.prog) > progLenBefore:
-                        # Produce a blank line after the translation of each
-                        # MAL assignment to make it easier recognizable, which
-                        # C++ statements were produced by the same MAL
-                        # assignment (sometimes a single MAL assignment yields
-                        # multiple C++ statements).
-                        ts.prog.append("")
-
-            # The MAL query function ends with the output of the result
-            # columns. We need to know which these are.
-            # This step expects exactly one line.
-            if ts.step == _TranslationState.STEP_PROCESS_OUTPUT:
-                mResultSet = _pResultSet.fullmatch(line)
-                if mResultSet is not None:
-                    inDataColsStr = mResultSet.group(1)
-                    mInner = _pResultSetInner.match(inDataColsStr)
-                    while mInner is not None:
-                        inDataCol = mInner.group(1)
-                        ts.resultCols.append(ts.mapNameIf(inDataCol))
-                        inDataColsStr = inDataColsStr[mInner.end():]
-                        mInner = _pResultSetInner.match(inDataColsStr)
-                    ts.step = _TranslationState.STEP_SKIP_QUERY_FUNCTION_END
-                    continue
-                else:
-                    _error(ts)
-
-            # After that, the MAL query function formally ends. No relevant
-            # information for us.
-            # This step expects exactly one line.
-            if ts.step == _TranslationState.STEP_SKIP_QUERY_FUNCTION_END:
-                if line.startswith("end user."):
-                    ts.step = _TranslationState.STEP_SKIP_EPILOGUE_COMMENTS
-                    continue
-                else:
-                    _error(ts)
-
-            # Finally, a MAL program ends with some comments beginning with
-            # "#". These are irrelevant for us and must be skipped.
-            # This step consumes an a-priori unknown number of lines.
-            if ts.step == _TranslationState.STEP_SKIP_EPILOGUE_COMMENTS:
-                if line[0] != "#":
-                    _error(ts)
+        if isinstance(instr, mal.Exit):
+            # Only the dataflow blocks are supported.
+            if not all(var.name in ts.dataflowVars for var in instr.vars):
+                ts.error("unsupported control flow")
+            continue
+        if instr.flow is not None and \
+                (instr.module, instr.function) != ("language", "dataflow"):
+            ts.error("unsupported control flow")
+        if ts.resultCols:
+            ts.error("unexpected MAL instruction after the result set")
+        
+        translateFunction = _translateFunctions.get(
+            (instr.module, instr.function),
+            _translateFunctions.get((instr.module, None))
+        )
+        if translateFunction is None:
+            ts.error("unknown MAL function: '{}.{}'".format(
+                instr.module, instr.function
+            ))
+        
+        progLenBefore = len(ts.prog)
+        translateFunction(ts, instr)
+        if len(ts.prog) > progLenBefore:
+            # Produce a blank line after the translation of each MAL
+            # assignment to make it easier recognizable, which C++ statements
+            # were produced by the same MAL assignment (sometimes a single MAL
+            # assignment yields multiple C++ statements).
+            ts.prog.append("")
+    
+    if not ts.resultCols:
+        raise RuntimeError(
+            "the MAL program does not output any result columns"
+        )
+    
+    if any(isinstance(el, ops.Partition) for el in ts.prog):
+        # For the tasks executing the partitions in parallel.
+        ts.headers.add("future")
+        ts.headers.add("tuple")
     
     # Replace certain operators by other variants.
-    ar = analysis.analyze(TranslationResult(ts))
+    ar = analysis.analyze(TranslationResult(ts), statDirPath=statDirPath)
     for idx, el in enumerate(ts.prog):
-        # Replace inner joins by semi-joins where it is possible.
+        # Replace inner joins by the join-operator suited for the uniqueness
+        # and sortedness of their inputs, by semi-joins where it is possible.
         if isinstance(el, ops.Join):
             # TODO From the structure of the program, we know that we can use
             #      a semi-join in the following two cases. However, using an
             #      N:1-join is not correct in all possible cases. While it is
             #      correct for SSB, we should find a generally sound solution.
             
-            # TODO We do not consider 1:1-joins here (when both inputs are
-            #      unique), but this case is not relevant for us at the moment.
-            if el.inDataLCol in ar.varsUnique:
+            # 1:1-joins (when both inputs are unique) are handled by the first
+            # of the following cases, i.e., the left input is the build-side.
+            if (
+                useMergeJoin and
+                el.inDataLCol in ar.varsSorted and
+                el.inDataRCol in ar.varsSorted
+            ):
+                # Both inputs are sorted, so no hash table is required.
+                ts.prog[idx] = ops.MergeJoin(el.outPosLCol, el.outPosRCol, el.inDataLCol, el.inDataRCol)
+            elif el.inDataLCol in ar.varsUnique:
                 # It is an 1:N-join (1 data element in the left input matches
                 # N data elements in the right input).
                 # The left input can be used as the build-side of a hash-join.
@@ -847,9 +962,8 @@ def translate(
                     ts.prog[idx] = ops.Nto1Join(el.outPosRCol, el.outPosLCol, el.inDataRCol, el.inDataLCol)
             else:
                 # It is an M:N-join.
-                # We do not want this at the moment.
-                # TODO Support it in a nice way.
-                raise RuntimeError("the query contains an M:N-join")
+                # The left input is used as the build-side of a hash-join.
+                ts.prog[idx] = ops.MtoNJoin(el.outPosLCol, el.outPosRCol, el.inDataLCol, el.inDataRCol)
         # Replace normal/old intersect by k-ary-search-based intersect, if
         # desired.
         elif useIntersectKAry and isinstance(el, ops.Intersect):
@@ -50,12 +50,25 @@ The CSV files to load the data from must fulfil the following criteria:
 - Lines are separated by the newline character "\\n".
 These requirements are fulfilled for the files output by MorphStore's
 dbdict.py tool.
+
+Alternatively, the data can be loaded from the binary column files output by
+dbdict.py (sub-directory "cols_dict") using MonetDB's COPY BINARY INTO, which
+saves MonetDB from parsing any text and makes the projected CSV files
+unnecessary. Since MonetDB expects a file containing nothing but the column's
+values in the column's integer type, each column file is converted to such a
+file in the specified directory before the statement for loading the
+respective table is printed. These files are no longer required once the
+generated statements have been executed.
 """
 
 
 import argparse
 import json
 import os
+import shutil
+import struct
+
+import numpy as np
 
 
 INTTYPE_TINY = "TINYINT"
@@ -65,6 +78,26 @@ INTTYPE_BIG = "BIGINT"
 INTTYPE_TIGHT = "tight"
 INTTYPES= [INTTYPE_TINY, INTTYPE_SMALL, INTTYPE_INT, INTTYPE_BIG, INTTYPE_TIGHT]
 
+# The NumPy types of the values in MonetDB's binary files for each integer
+# type. MonetDB expects the native byte order.
+NPTYPE_BY_INTTYPE = {
+    INTTYPE_TINY: np.int8,
+    INTTYPE_SMALL: np.int16,
+    INTTYPE_INT: np.int32,
+    INTTYPE_BIG: np.int64,
+}
+
+LOADMODE_CSV = "csv"
+LOADMODE_BINARY = "binary"
+LOADMODES = [LOADMODE_CSV, LOADMODE_BINARY]
+
+# The size of the meta data at the beginning of each column file output by
+# dbdict.py in bytes.
+COLFILE_HEADERSIZE = 16
+
+# The number of data elements to convert at once.
+CHUNKSIZE = 1 << 20
+
 def bitwidth(n):
     return 1 if n == 0 else int(n).bit_length()
 
@@ -78,6 +111,64 @@ def getIntType(bw):
         return INTTYPE_INT
     return INTTYPE_BIG
 
+def copyRange(inFile, outFile, offset, count):
+    """
+    Copies count bytes starting at the given offset of the input file to the
+    output file, within the kernel if possible.
+    """
+    
+    try:
+        while count:
+            copied = os.copy_file_range(
+                inFile.fileno(), outFile.fileno(), count, offset
+            )
+            if not copied:
+                break
+            offset += copied
+            count -= copied
+    except (AttributeError, OSError):
+        # copy_file_range() is not available or not supported for these
+        # files.
+        pass
+    if count:
+        inFile.seek(offset)
+        outFile.seek(0, os.SEEK_END)
+        shutil.copyfileobj(inFile, outFile)
+
+def convertColFile(colFilePath, binFilePath, intType):
+    """
+    Converts a column file output by dbdict.py to a file containing only the
+    column's values in the given integer type, as expected by MonetDB's COPY
+    BINARY INTO.
+    """
+    
+    with open(colFilePath, "rb") as colFile:
+        countVals = struct.unpack("<Q", colFile.read(8))[0]
+    npType = NPTYPE_BY_INTTYPE[intType]
+    maxVal = np.iinfo(npType).max
+    
+    with open(binFilePath, "wb") as binFile:
+        if not countVals:
+            return
+        if np.dtype(npType) == np.dtype("<i8"):
+            # The values have the right width and byte order already, so they
+            # only need to be copied without the meta data.
+            with open(colFilePath, "rb") as colFile:
+                copyRange(colFile, binFile, COLFILE_HEADERSIZE, countVals * 8)
+            return
+        vals = np.memmap(
+            colFilePath, dtype="<u8", mode="r",
+            offset=COLFILE_HEADERSIZE, shape=(countVals,)
+        )
+        for pos in range(0, countVals, CHUNKSIZE):
+            chunk = vals[pos:pos + CHUNKSIZE]
+            if chunk.max() > maxVal:
+                raise RuntimeError(
+                    "the values of column file '{}' do not fit into the "
+                    "integer type {}".format(colFilePath, intType)
+                )
+            binFile.write(chunk.astype(npType).tobytes())
+
 
 if __name__ == "__main__":
     # -------------------------------------------------------------------------
@@ -104,7 +195,10 @@ if __name__ == "__main__":
         help="The path to the directory containing the CSV files with the "
             "data to be loaded into the newly created database. This "
             "directory is not required to exist when executing this program, "
-            "since it will only be inserted into the generated SQL statements."
+            "since it will only be inserted into the generated SQL "
+            "statements. If the load mode is '{}', this must be the existing "
+            "directory containing the column files output by "
+            "dbdict.py instead.".format(LOADMODE_BINARY)
     )
     parser.add_argument(
         "intType", metavar="intType", choices=INTTYPES,
@@ -121,7 +215,27 @@ if __name__ == "__main__":
                 INTTYPE_TIGHT
             )
     )
+    # Optional arguments.
+    parser.add_argument(
+        "--loadMode", choices=LOADMODES, default=LOADMODE_CSV,
+        help="How to load the data into MonetDB. Choose one of {}. Defaults "
+            "to '{}'.".format(LOADMODES, LOADMODE_CSV)
+    )
+    parser.add_argument(
+        "--binDir", dest="binDirPath", metavar="DIR",
+        help="The directory where the binary files for MonetDB shall be "
+            "stored. Required if the load mode is '{}'.".format(
+                LOADMODE_BINARY
+            )
+    )
     args = parser.parse_args()
+    
+    if args.loadMode == LOADMODE_BINARY:
+        if args.binDirPath is None:
+            raise RuntimeError(
+                "the load mode '{}' requires --binDir".format(LOADMODE_BINARY)
+            )
+        os.makedirs(args.binDirPath, exist_ok=True)
 
     # -------------------------------------------------------------------------
     # Actual work
@@ -144,20 +258,44 @@ if __name__ == "__main__":
                     stats = json.load(statsFile)
             
             countCols = len(colNames)
+            colIntTypes = []
             print("CREATE TABLE {} (".format(tblName))
             for colIdx, colName in enumerate(colNames):
                 colIntType = getIntType(bitwidth(stats[colName])) \
                     if args.intType == INTTYPE_TIGHT \
                     else args.intType
+                colIntTypes.append(colIntType)
                 print("\t{} {}{}".format(
                     colName, colIntType, "," if colIdx < countCols - 1 else ""
                 ))
             print(");")
-            # MonetDB expects an absolute path here.
-            dataFilePath = os.path.abspath(os.path.join(
-                args.dataDirPath, "{}.tbl".format(tblName)
-            ))
-            print("COPY INTO {} FROM '{}' USING DELIMITERS '|','\\n';".format(
-                tblName, dataFilePath
-            ));
+            if args.loadMode == LOADMODE_CSV:
+                # MonetDB expects an absolute path here.
+                dataFilePath = os.path.abspath(os.path.join(
+                    args.dataDirPath, "{}.tbl".format(tblName)
+                ))
+                print(
+                    "COPY INTO {} FROM '{}' USING DELIMITERS "
+                    "'|','\\n';".format(tblName, dataFilePath)
+                );
+            else:
+                # MonetDB expects absolute paths here.
+                binFilePaths = []
+                for colName, colIntType in zip(colNames, colIntTypes):
+                    binFilePath = os.path.abspath(os.path.join(
+                        args.binDirPath, "{}.{}.bin".format(tblName, colName)
+                    ))
+                    convertColFile(
+                        os.path.join(
+                            args.dataDirPath,
+                            "{}.{}.uncompr_f.bin".format(tblName, colName)
+                        ),
+                        binFilePath,
+                        colIntType
+                    )
+                    binFilePaths.append(binFilePath)
+                print("COPY BINARY INTO {} FROM ({});".format(
+                    tblName,
+                    ", ".join(["'{}'".format(path) for path in binFilePaths])
+                ))
             print()
\ No newline at end of file